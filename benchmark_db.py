@@ -0,0 +1,608 @@
+"""
+Script đo hiệu năng (micro-benchmark) cho DatabaseService
+
+Chạy: python benchmark_db.py [số_quân_nhân] [phần ...]
+Ví dụ: python benchmark_db.py 100000 summary   (chỉ chạy phần thống kê ở 100k dòng)
+"""
+
+import io
+import sys
+import json
+import time
+import sqlite3
+import tempfile
+import random
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.database import DatabaseService
+from models.personnel import Personnel
+from models.unit import Unit
+from models.nguoi_than import NguoiThan
+from utils.cap_bac import cap_bac_category
+from utils.text_utils import fold_vietnamese
+
+HO = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Huỳnh", "Phan", "Vũ", "Võ", "Đặng"]
+DEM = ["Văn", "Thị", "Hữu", "Đức", "Minh", "Quang", "Thành", "Ngọc"]
+TEN = ["An", "Bình", "Cường", "Dũng", "Hùng", "Long", "Nam", "Sơn", "Tuấn", "Việt"]
+CAP_BAC = ["B2", "B1", "H3", "H2", "H1", "4//", "3//", "2//", "1//", "4/", "3/", "2/"]
+CHUC_VU = ["CS", "A trưởng", "B trưởng", "B phó", "C trưởng", "CTV"]
+DON_VI = ["C1", "C2", "C3", "C4", "C5"]
+DAN_TOC = ["Kinh", "Kinh", "Kinh", "Tày", "Nùng", "Ê Đê", "Mường"]
+TON_GIAO = ["Không", "Không", "Không", "Phật giáo", "Công giáo"]
+
+
+def make_personnel(i: int) -> Personnel:
+    """Tạo một quân nhân giả lập"""
+    rnd = random.Random(i)
+    p = Personnel(
+        hoTen=f"{rnd.choice(HO)} {rnd.choice(DEM)} {rnd.choice(TEN)} {i}",
+        ngaySinh=f"{rnd.randint(1, 28):02d}/{rnd.randint(1, 12):02d}/{rnd.randint(1980, 2005)}",
+        capBac=rnd.choice(CAP_BAC),
+        chucVu=rnd.choice(CHUC_VU),
+        donVi=rnd.choice(DON_VI),
+        queQuan="Xã A, huyện B, tỉnh C",
+        truQuan="Xã D, huyện E, tỉnh F",
+        danToc=rnd.choice(DAN_TOC),
+        tonGiao=rnd.choice(TON_GIAO),
+        nhapNgu=str(rnd.randint(2015, 2024)),
+        trinhDoVanHoa="12/12",
+    )
+    if rnd.random() < 0.3:
+        p.thongTinKhac.dang.ngayVao = "01/01/2020"
+    if rnd.random() < 0.6:
+        p.thongTinKhac.doan.ngayVao = "01/01/2018"
+    p.thongTinKhac.cdCu = rnd.random() < 0.05
+    p.thongTinKhac.yeuToNN = rnd.random() < 0.05
+    return p
+
+
+def build_database(db_path: str, count: int) -> DatabaseService:
+    """Tạo database mẫu với `count` quân nhân (một transaction duy nhất)"""
+    db = DatabaseService(db_path)
+    with db.connection():
+        for i in range(count):
+            db.create(make_personnel(i))
+    return db
+
+
+def measure(label: str, func, calls: int):
+    """Chạy func `calls` lần và in số lời gọi mỗi giây"""
+    start = time.perf_counter()
+    for i in range(calls):
+        func(i)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<45} {calls / elapsed:>12,.0f} calls/s  ({elapsed * 1000:.1f} ms)")
+    return elapsed
+
+
+def bench_connection_pool(db: DatabaseService, ids):
+    """So sánh mở kết nối mới mỗi lần gọi với pool kết nối dùng lâu dài"""
+    print("\n[Connection pool] get_by_id")
+
+    def legacy_get_by_id(i):
+        # Cách cũ: mỗi lời gọi mở rồi đóng một kết nối mới
+        conn = sqlite3.connect(db.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM personnel WHERE id = ?", (ids[i % len(ids)],))
+        row = cursor.fetchone()
+        conn.close()
+        data = dict(row)
+        data['thongTinKhac'] = json.loads(data['thongTinKhac'])
+        return Personnel.from_dict(data)
+
+    calls = 5000
+    before = measure("trước (connect/close mỗi lần gọi)", legacy_get_by_id, calls)
+    after = measure("sau (pool theo luồng)", lambda i: db.get_by_id(ids[i % len(ids)]), calls)
+    print(f"  => nhanh hơn {before / after:.1f}x")
+
+
+def bench_personnel_cache(db: DatabaseService, ids):
+    """So sánh get_all/get_by_id đọc lại database với đọc từ cache quân nhân"""
+    print("\n[Personnel cache] get_all / get_by_id")
+
+    def uncached_get_all(i):
+        db.invalidate_cache()
+        return db.get_all()
+
+    calls = 10
+    before = measure("trước (parse lại mọi dòng)", uncached_get_all, calls)
+    db.get_all()
+    after = measure("sau (cache, trả về bản sao)", lambda i: db.get_all(), calls)
+    print(f"  => nhanh hơn {before / after:.1f}x")
+    measure("get_by_id (cache)", lambda i: db.get_by_id(ids[i % len(ids)]), 5000)
+    print(f"  {db.cache_stats()}")
+
+
+def measure_memory(func) -> int:
+    """Chạy func và trả về số byte còn bị giữ bởi kết quả của nó"""
+    tracemalloc.start()
+    result = func()
+    retained, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained
+
+
+def bench_projection(db: DatabaseService):
+    """
+    So sánh Personnel.from_dict (giải mã toàn bộ thongTinKhac) với get_all(columns=[...])
+    cho view danh sách. Yêu cầu đo ở 50k dòng: python benchmark_db.py 50000
+    """
+    columns = ['hoTen', 'capBac', 'chucVu', 'donVi', 'unitId', 'danToc']
+
+    def full_rows():
+        db.invalidate_cache()
+        return db.get_all()
+
+    def list_view_rows():
+        rows = db.get_all(columns=columns)
+        # Mô phỏng refresh_tree: đọc các cột hiển thị
+        for row in rows:
+            (row.hoTen, row.capBac, row.chucVu, row.donVi, row.danToc)
+        return rows
+
+    def with_lazy_info():
+        rows = db.get_all(columns=columns + ['thongTinKhac'])
+        # Chỉ các dòng qua bộ lọc cấp bậc mới phải giải mã JSON
+        [row for row in rows if row.capBac == "1//" and row.thongTinKhac.dang.ngayVao]
+        return rows
+
+    print(f"\n[Projection] {db.count_search(''):,} dòng - thời gian và bộ nhớ giữ lại")
+    for label, func in (("trước (Personnel.from_dict)", full_rows),
+                        ("sau (get_all(columns=...))", list_view_rows),
+                        ("sau (+ thongTinKhac lười, lọc 1 cấp bậc)", with_lazy_info)):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        retained = measure_memory(func)
+        print(f"  {label:<45} {elapsed * 1000:>9.1f} ms  {retained / 1024 / 1024:>8.1f} MB")
+    db.invalidate_cache()
+
+
+def bench_flags(db: DatabaseService):
+    """So sánh đếm đảng viên/đoàn viên/cdCu bằng giải mã JSON với cột sinh tự động có index"""
+    print("\n[Flags] đếm diện quản lý (đảng, đoàn, cdCu, yeuToNN, dangPhaiPhanDong)")
+
+    def legacy_counts(i):
+        # Cách cũ: parse thongTinKhac của mọi quân nhân rồi đếm trong Python
+        db.invalidate_cache()
+        all_personnel = db.get_all()
+        return (
+            sum(1 for p in all_personnel if p.thongTinKhac.dang.ngayVao or p.thongTinKhac.dang.ngayChinhThuc),
+            sum(1 for p in all_personnel if p.thongTinKhac.doan.ngayVao),
+            sum(1 for p in all_personnel if p.thongTinKhac.cdCu),
+            sum(1 for p in all_personnel if p.thongTinKhac.yeuToNN),
+            sum(1 for p in all_personnel if p.thongTinKhac.dangPhaiPhanDong),
+        )
+
+    calls = 3
+    before = measure("trước (get_all + giải mã JSON)", legacy_counts, calls)
+    after = measure("sau (count_flags)", lambda i: db.count_flags(), calls)
+    print(f"  => nhanh hơn {before / after:.1f}x")
+    measure("filter_personnel('cdCu')", lambda i: db.filter_personnel('cdCu'), calls)
+
+
+def bench_summary(db: DatabaseService):
+    """So sánh thống kê ReportFrame (đếm bằng dict trong Python) với summary() (GROUP BY)"""
+    print(f"\n[Summary] thống kê 5 tiêu chí + đảng/đoàn cho {db.count_search(''):,} quân nhân")
+    fields = ('danToc', 'tonGiao', 'capBac', 'chucVu', 'donVi')
+
+    def legacy_stats(i):
+        # Cách cũ: tải toàn bộ quân nhân rồi đếm từng tiêu chí
+        db.invalidate_cache()
+        all_personnel = db.get_all()
+        stats = {}
+        for field in fields:
+            counts = stats.setdefault(field, {})
+            for person in all_personnel:
+                key = getattr(person, field) or ''
+                counts[key] = counts.get(key, 0) + 1
+        stats['dangVien'] = sum(1 for p in all_personnel
+                                if p.thongTinKhac.dang.ngayVao or p.thongTinKhac.dang.ngayChinhThuc)
+        stats['doanVien'] = sum(1 for p in all_personnel if p.thongTinKhac.doan.ngayVao)
+        return stats
+
+    calls = 3
+    before = measure("trước (get_all + đếm Python)", legacy_stats, calls)
+    after = measure("sau (summary)", lambda i: db.summary(), calls)
+    print(f"  => nhanh hơn {before / after:.1f}x")
+    measure("group_counts('donVi', {'capBac': '2/'})",
+            lambda i: db.group_counts('donVi', {'capBac': '2/'}), calls)
+
+
+def bench_tong_hop(db: DatabaseService, ids):
+    """So sánh tab Tổng hợp tính từ get_all() với đọc bảng tổng hợp tong_hop_counts"""
+    print("\n[Tổng hợp] DTTS/tôn giáo/cdCu/yeuToNN x SQ/QNCN/HSQ-CS x đơn vị")
+
+    def legacy_tong_hop(i):
+        # Cách cũ: tải toàn bộ quân nhân rồi phân loại từng người trong Python
+        db.invalidate_cache()
+        counts = {}
+        for p in db.get_all():
+            lines = []
+            if (p.danToc or '').strip() and p.danToc.strip().lower() not in ('kinh', 'việt'):
+                lines.append('dtts')
+            if (p.tonGiao or '').strip():
+                lines.append('tonGiao')
+            if p.thongTinKhac.cdCu:
+                lines.append('cdCu')
+            if p.thongTinKhac.yeuToNN:
+                lines.append('yeuToNN')
+            for line in lines:
+                key = (line, cap_bac_category(p.capBac), p.donVi or '')
+                counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    calls = 3
+    before = measure("trước (get_all + phân loại Python)", legacy_tong_hop, calls)
+    after = measure("sau (get_tong_hop_counts)", lambda i: db.get_tong_hop_counts(), calls)
+    print(f"  => nhanh hơn {before / after:.1f}x")
+
+    # Chi phí trigger khi ghi: cập nhật cấp bậc/đơn vị của một quân nhân
+    people = db.get_by_ids(ids[:200])
+
+    def update_one(i):
+        person = people[i % len(people)]
+        person.donVi = DON_VI[i % len(DON_VI)]
+        db.update(person)
+
+    measure("update() (có trigger tổng hợp)", update_one, 200)
+    legacy = legacy_tong_hop(0)
+    current = db.get_tong_hop_counts()
+    matches = all(
+        sum(v for (line, _, _), v in legacy.items() if line == name) == entry['total']
+        for name, entry in current.items()
+    )
+    print(f"  khớp với cách cũ: {matches}")
+
+
+def bench_search(db: DatabaseService):
+    """So sánh lọc trong Python (get_all rồi duyệt) với tìm tên qua personnel_fts + lọc bằng SQL"""
+    print("\n[Search] tìm theo tên + lọc đơn vị")
+    queries = ["nguyễn", "văn h", "tuấn 1", "lê", "bình"]
+
+    def legacy_search(i):
+        # Cách cũ: tải toàn bộ bảng rồi lọc trong Python (cùng quy tắc: mỗi từ là tiền tố một từ trong họ tên)
+        tokens = fold_vietnamese(queries[i % len(queries)]).split()
+        return [p for p in db.get_all()
+                if p.donVi == "C3" and all(
+                    any(word.startswith(token) for word in fold_vietnamese(p.hoTen).split())
+                    for token in tokens
+                )]
+
+    calls = 5
+    before = measure("trước (get_all + lọc Python)", legacy_search, calls)
+    after = measure("sau (MATCH trên cột hoTen của personnel_fts)",
+                    lambda i: db.search(queries[i % len(queries)], {'donVi': 'C3'}), calls)
+    print(f"  => nhanh hơn {before / after:.1f}x")
+    measure("trang đầu (limit=50)",
+            lambda i: db.search(queries[i % len(queries)], {'donVi': 'C3'}, limit=50), calls)
+    measure("chỉ đếm (count_search)",
+            lambda i: db.count_search(queries[i % len(queries)], {'donVi': 'C3'}), calls)
+    matches = all(
+        {p.id for p in legacy_search(i)} == {p.id for p in db.search(query, {'donVi': 'C3'})}
+        for i, query in enumerate(queries)
+    )
+    print(f"  khớp với cách cũ: {matches}")
+
+
+def bench_full_text(db: DatabaseService):
+    """Đo tìm kiếm full-text không dấu (mục tiêu < 10ms mỗi lần tra cứu)"""
+    print("\n[Full-text] full_text_search(query, limit=50)")
+    queries = ["nguyen van", "tuan", "hoang minh", "dung 12", "ha"]
+    measure("full_text_search", lambda i: db.full_text_search(queries[i % len(queries)], limit=50), 200)
+    measure("full_text_search_ids", lambda i: db.full_text_search_ids(queries[i % len(queries)], limit=50), 200)
+
+
+def build_unit_tree(db: DatabaseService, ids, companies: int = 5, platoons: int = 9, squads: int = 10):
+    """Tạo cây đơn vị đại đội -> trung đội -> tổ (mặc định 500 đơn vị) và gán quân nhân vào tổ"""
+    squad_ids = []
+    with db.connection():
+        for c in range(companies):
+            company = Unit(ten=f"C{c + 1}", loai='dai_doi')
+            db.create_unit(company)
+            for b in range(platoons):
+                platoon = Unit(ten=f"B{b + 1}", loai='trung_doi', parentId=company.id)
+                db.create_unit(platoon)
+                for t in range(squads):
+                    squad = Unit(ten=f"Tổ {t + 1}", loai='to', parentId=platoon.id)
+                    db.create_unit(squad)
+                    squad_ids.append(squad.id)
+        for i, person_id in enumerate(ids):
+            db.add_personnel_to_unit(squad_ids[i % len(squad_ids)], [person_id])
+
+
+def bench_unit_tree(db: DatabaseService):
+    """So sánh đếm quân số đệ quy từng đơn vị với một truy vấn WITH RECURSIVE"""
+    units = db.get_all_units()
+    print(f"\n[Unit tree] quân số cộng dồn cho {len(units)} đơn vị")
+    child_map = {}
+    for unit in units:
+        child_map.setdefault(unit.parentId or None, []).append(unit)
+
+    def legacy_count(unit_id):
+        # Cách cũ: mỗi nút một lần get_unit_by_id
+        unit = db.get_unit_by_id(unit_id)
+        count = len(unit.personnelIds)
+        for child in child_map.get(unit_id, []):
+            count += legacy_count(child.id)
+        return count
+
+    def legacy_tree(i):
+        return {u.id: legacy_count(u.id) for u in child_map.get(None, [])}
+
+    calls = 3
+    before = measure("trước (đệ quy get_unit_by_id)", legacy_tree, calls)
+    after = measure("sau (get_unit_headcounts)", lambda i: db.get_unit_headcounts(), calls)
+    print(f"  => nhanh hơn {before / after:.1f}x")
+    root_id = child_map[None][0].id
+    measure("get_personnel_in_subtree (1 đại đội)", lambda i: db.get_personnel_in_subtree(root_id), calls)
+
+
+def build_relatives(db: DatabaseService, ids):
+    """Tạo bố, mẹ (và vợ cho khoảng 1/3 quân nhân) cho mỗi quân nhân"""
+    with db.connection():
+        for i, person_id in enumerate(ids):
+            relations = ["Bố đẻ", "Mẹ đẻ"] + (["Vợ"] if i % 3 == 0 else [])
+            for quan_he in relations:
+                db.create_nguoi_than(NguoiThan(personnelId=person_id, hoTen=f"{quan_he} {i}", moiQuanHe=quan_he))
+
+
+def count_queries(db: DatabaseService, func):
+    """Chạy func và đếm số câu lệnh SQL đã thực thi trên kết nối của luồng hiện tại"""
+    statements = []
+    with db.connection() as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+        finally:
+            conn.set_trace_callback(None)
+    return len(statements), elapsed
+
+
+def bench_relatives(db: DatabaseService):
+    """Đếm số truy vấn khi dựng một tab báo cáo có cột người thân (N+1 so với tải theo lô)"""
+    print("\n[Relatives] số truy vấn mỗi lần dựng tab")
+    all_personnel = db.get_all()
+
+    def legacy_render():
+        # Cách cũ: mỗi quân nhân một lần get_nguoi_than_by_personnel
+        return [db.get_nguoi_than_by_personnel(p.id) for p in all_personnel]
+
+    def batched_render():
+        nguoi_than_map = db.get_nguoi_than_for_many([p.id for p in all_personnel])
+        return [nguoi_than_map.get(p.id, []) for p in all_personnel]
+
+    for label, func in (("trước (get_nguoi_than_by_personnel)", legacy_render),
+                        ("sau (get_nguoi_than_for_many)", batched_render),
+                        ("chỉ kiểm tra (count_nguoi_than_for_many)", db.count_nguoi_than_for_many)):
+        queries, elapsed = count_queries(db, func)
+        print(f"  {label:<45} {queries:>8,} truy vấn  ({elapsed * 1000:.1f} ms)")
+
+
+def legacy_word_table(doc, headers, widths, rows, font_size):
+    """Cách cũ của các hàm services/export_*: tạo bảng bằng python-docx, viền/nền và font từng ô"""
+    from docx.shared import Pt, RGBColor
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+
+    def format_cell(cell, bold=False):
+        tcPr = cell._element.get_or_add_tcPr()
+        shading_elm = OxmlElement('w:shd')
+        shading_elm.set(qn('w:fill'), 'FFFFFF')
+        shading_elm.set(qn('w:val'), 'clear')
+        tcPr.append(shading_elm)
+        for border_name in ['top', 'left', 'bottom', 'right']:
+            border = OxmlElement(f'w:{border_name}')
+            border.set(qn('w:val'), 'single')
+            border.set(qn('w:sz'), '4')
+            border.set(qn('w:space'), '0')
+            border.set(qn('w:color'), '000000')
+            tcPr.append(border)
+        for paragraph in cell.paragraphs:
+            for run in paragraph.runs:
+                run.bold = bold
+                run.font.size = Pt(font_size)
+                run.font.color.rgb = RGBColor(0, 0, 0)
+                run.font.name = 'Times New Roman'
+                run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+
+    table = doc.add_table(rows=1, cols=len(headers))
+    for column, width in zip(table.columns, widths):
+        column.width = width
+    for cell, header in zip(table.rows[0].cells, headers):
+        cell.text = header
+        format_cell(cell, bold=True)
+    for values in rows:
+        cells = table.add_row().cells
+        for cell, value in zip(cells, values):
+            cell.text = value
+            format_cell(cell)
+    return table
+
+
+def bench_word_tables(db: DatabaseService, ids):
+    """Thời gian dựng bảng Word mỗi 1.000 hàng: từng ô qua python-docx so với services.word_table"""
+    from docx import Document
+    from docx.shared import Inches
+    from services.word_table import add_table, Column
+
+    print("\n[Word] giây cho mỗi 1.000 hàng")
+    headers = ['TT', 'Họ và tên', 'Ngày sinh', 'Cấp bậc', 'Chức vụ', 'Đơn vị',
+               'Dân tộc\nTôn giáo', 'Văn hóa', 'Quê quán\nTrú quán']
+    widths = [Inches(0.4), Inches(1.5), Inches(0.8), Inches(0.6), Inches(0.8), Inches(0.6),
+              Inches(0.9), Inches(0.6), Inches(2.0)]
+    people = [make_personnel(i) for i in range(1000)]
+    rows = [(str(i), p.hoTen, p.ngaySinh, p.capBac, p.chucVu, p.donVi,
+             f"{p.danToc}\n{p.tonGiao}", p.trinhDoVanHoa, f"{p.queQuan}\n{p.truQuan}")
+            for i, p in enumerate(people, 1)]
+
+    def legacy():
+        legacy_word_table(Document(), headers, widths, rows, 9)
+
+    def bulk():
+        add_table(Document(), [Column(h, w) for h, w in zip(headers, widths)], rows, font_size=9)
+
+    timings = []
+    for label, func in (("trước (từng ô qua python-docx)", legacy),
+                        ("sau (add_table, XML một lần)", bulk)):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+        print(f"  {label:<45} {timings[-1]:>12.2f} s/1.000 hàng")
+    print(f"  => nhanh hơn {timings[0] / timings[1]:.1f}x")
+
+    # Các hàm xuất đầy đủ (kèm truy vấn người thân/ghi chú) trên 1.000 quân nhân đầu
+    from services.export_to_dan_van import to_word_docx_to_dan_van
+    from services.export_trich_ngang import to_word_docx_trich_ngang
+    from services.export_ton_giao import to_word_docx_ton_giao
+    from services.export_vi_tri_can_bo import to_word_docx_vi_tri_can_bo
+    from services.export_ban_chap_hanh_chi_doan import to_word_docx_ban_chap_hanh_chi_doan
+    from services.export_dang_vien_dien_tap import to_word_docx_dang_vien_dien_tap
+    from services.export_dang_phai_phan_dong import to_word_docx_dang_phai_phan_dong
+    from services.export_nguoi_than_che_do_cu import to_word_docx_nguoi_than_che_do_cu
+    from services.export_bao_ve_an_ninh import to_word_docx_bao_ve_an_ninh
+
+    personnel = db.get_by_ids(ids[:1000])
+    exporters = [
+        ("to_dan_van", lambda: to_word_docx_to_dan_van(personnel, db_service=db)),
+        ("trich_ngang", lambda: to_word_docx_trich_ngang(personnel, db_service=db)),
+        ("ton_giao", lambda: to_word_docx_ton_giao(personnel)),
+        ("vi_tri_can_bo", lambda: to_word_docx_vi_tri_can_bo(personnel, db_service=db)),
+        ("ban_chap_hanh_chi_doan", lambda: to_word_docx_ban_chap_hanh_chi_doan(personnel, db_service=db)),
+        ("dang_vien_dien_tap", lambda: to_word_docx_dang_vien_dien_tap(personnel, db_service=db)),
+        ("dang_phai_phan_dong", lambda: to_word_docx_dang_phai_phan_dong(personnel, db_service=db)),
+        ("nguoi_than_che_do_cu", lambda: to_word_docx_nguoi_than_che_do_cu(personnel, db_service=db)),
+        ("bao_ve_an_ninh", lambda: to_word_docx_bao_ve_an_ninh(personnel, db_service=db)),
+    ]
+    for name, export in exporters:
+        start = time.perf_counter()
+        export()
+        elapsed = time.perf_counter() - start
+        print(f"  {'export_' + name:<45} {elapsed * 1000 / len(personnel):>12.2f} s/1.000 hàng")
+
+
+def bench_word_templates(db: DatabaseService, ids):
+    """Thời gian mỗi văn bản nhỏ (20 hàng): dựng trang/tiêu đề/chữ ký mỗi lần so với sao chép mẫu đã cache"""
+    import importlib
+    from docx.shared import Inches
+    from services.word_table import add_table, Column
+    from services.word_template import get_template, clear_template_cache
+
+    print("\n[Mẫu Word] ms cho mỗi văn bản 20 hàng")
+    columns = [Column('TT', Inches(0.4)), Column('Họ và tên', Inches(1.5)),
+               Column('Cấp bậc', Inches(0.8)), Column('Chức vụ', Inches(0.8))]
+    rows = [(str(i), p.hoTen, p.capBac, p.chucVu) for i, p in enumerate(db.get_by_ids(ids[:20]), 1)]
+    names = ['to_dan_van', 'trich_ngang', 'ton_giao', 'vi_tri_can_bo', 'ban_chap_hanh_chi_doan',
+             'dang_vien_dien_tap', 'dang_phai_phan_dong', 'nguoi_than_che_do_cu', 'bao_ve_an_ninh']
+    clear_template_cache()
+    calls = 20
+    totals = [0.0, 0.0]
+    for name in names:
+        builder = importlib.import_module(f'services.export_{name}')._template
+
+        def scratch():
+            doc = builder()
+            add_table(doc, columns, rows)
+            doc.save(io.BytesIO())
+
+        def cached():
+            doc = get_template(name, builder).render(
+                tables={'bang': lambda doc: add_table(doc, columns, rows)})
+            doc.save(io.BytesIO())
+
+        cached()  # Lần đầu dựng mẫu
+        timings = []
+        for func in (scratch, cached):
+            start = time.perf_counter()
+            for _ in range(calls):
+                func()
+            timings.append((time.perf_counter() - start) * 1000 / calls)
+        totals[0] += timings[0]
+        totals[1] += timings[1]
+        print(f"  {'export_' + name:<45} {timings[0]:>8.1f} -> {timings[1]:.1f} ms")
+    print(f"  {'tổng 9 báo cáo':<45} {totals[0]:>8.1f} -> {totals[1]:.1f} ms "
+          f"(nhanh hơn {totals[0] / totals[1]:.1f}x)")
+
+
+def bench_batch_export(db: DatabaseService, ids):
+    """Gói xuất Word (mọi báo cáo vào một .zip): thời gian theo số tiến trình"""
+    import os
+    from services.batch_export import export_reports_zip
+
+    for pid in ids[:200]:
+        db.add_to_dan_van(pid)
+        db.add_dang_vien_dien_tap(pid)
+        db.add_ban_chap_hanh_chi_doan(pid)
+        db.add_bao_ve_an_ninh(pid)
+        db.add_nguoi_than_dang_phai_phan_dong(pid)
+
+    print(f"\n[Gói xuất Word] 9 báo cáo vào một .zip ({os.cpu_count()} nhân CPU)")
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = str(Path(tmp) / "bao_cao.zip")
+        baseline = None
+        for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+            start = time.perf_counter()
+            manifest = export_reports_zip(db, file_path, max_workers=workers)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            rows = sum(entry['count'] for entry in manifest['reports'])
+            label = f"{workers} tiến trình ({rows:,} hàng)"
+            print(f"  {label:<45} {elapsed:>8.2f}s (nhanh hơn {baseline / elapsed:.1f}x)")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    sections = set(sys.argv[2:])
+
+    def wanted(name):
+        return not sections or name in sections
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.db")
+        start = time.perf_counter()
+        db = build_database(db_path, count)
+        print(f"Đã tạo {count:,} quân nhân trong {time.perf_counter() - start:.2f}s")
+
+        with db.connection() as conn:
+            ids = [row[0] for row in conn.execute("SELECT id FROM personnel")]
+
+        if wanted('pool'):
+            bench_connection_pool(db, ids)
+        if wanted('cache'):
+            bench_personnel_cache(db, ids)
+        if wanted('projection'):
+            bench_projection(db)
+        if wanted('flags'):
+            bench_flags(db)
+        if wanted('summary'):
+            bench_summary(db)
+        if wanted('tonghop'):
+            bench_tong_hop(db, ids)
+        if wanted('search'):
+            bench_search(db)
+        if wanted('fts'):
+            bench_full_text(db)
+        if wanted('relatives'):
+            build_relatives(db, ids)
+            bench_relatives(db)
+        if wanted('units'):
+            build_unit_tree(db, ids)
+            bench_unit_tree(db)
+        if wanted('word'):
+            bench_word_tables(db, ids)
+        if wanted('template'):
+            bench_word_templates(db, ids)
+        if wanted('batch'):
+            bench_batch_export(db, ids)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Quản lý các trang (frame) của cửa sổ chính: giữ frame đã tạo để chuyển trang tức thì
+"""
+
+import time
+import logging
+import tkinter as tk
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class FrameManager:
+    """
+    Giữ các frame đã tạo thay vì hủy và tạo lại mỗi lần chuyển trang:
+    
+    - Chuyển trang chỉ pack_forget() frame cũ và pack() frame đã có.
+    - Frame được làm mới (refresh) khi hiện lại nếu version() đã đổi từ lúc frame bị ẩn
+      (ví dụ DatabaseService.data_version), không đổi thì hiện ngay không truy vấn.
+    - Tổng chi phí ước lượng (cost, MB) của các frame đang giữ không vượt MEMORY_BUDGET:
+      vượt thì hủy frame ẩn ít dùng nhất (ưu tiên frame nặng), lần sau mở sẽ tạo lại.
+    
+    Frame đăng ký với cache=False (ví dụ form thêm/sửa) luôn được tạo mới và hủy khi rời trang.
+    """
+    
+    # Ngân sách bộ nhớ ước lượng (MB) cho các frame đang giữ
+    MEMORY_BUDGET = 120
+    
+    def __init__(self, parent, version: Optional[Callable[[], Hashable]] = None,
+                 memory_budget: Optional[int] = None):
+        """
+        Args:
+            parent: Widget chứa các frame
+            version: Hàm trả về mã phiên bản dữ liệu; đổi thì frame được refresh khi hiện lại
+            memory_budget: Ngân sách bộ nhớ (MB), mặc định MEMORY_BUDGET
+        """
+        self.parent = parent
+        self.version = version
+        self.memory_budget = self.MEMORY_BUDGET if memory_budget is None else memory_budget
+        self._pages: Dict[str, dict] = {}
+        self._frames: Dict[str, dict] = {}  # {tên: {'frame', 'version', 'uses', 'last_used'}}
+        self.current = None
+        self.current_name: Optional[str] = None
+    
+    def register(self, name: str, factory: Callable[..., tk.Widget],
+                 refresh: Optional[Callable[[Any], None]] = None, cost: int = 10,
+                 cache: bool = True, pack_options: Optional[dict] = None):
+        """
+        Đăng ký một trang
+        Args:
+            name: Tên trang (dùng trong show())
+            factory: Hàm (parent, *args) -> frame
+            refresh: Hàm (frame) làm mới dữ liệu khi hiện lại sau khi dữ liệu đổi
+            cost: Bộ nhớ ước lượng của frame (MB)
+            cache: Giữ frame khi rời trang
+            pack_options: Tham số pack() của frame
+        """
+        self._pages[name] = {
+            'factory': factory,
+            'refresh': refresh,
+            'cost': cost,
+            'cache': cache,
+            'pack': pack_options if pack_options is not None else {'fill': tk.BOTH, 'expand': True},
+        }
+    
+    def show(self, name: str, *args):
+        """
+        Hiện trang name (tạo nếu chưa có). Tham số args chỉ dùng khi tạo frame mới.
+        Returns:
+            Frame đang hiện
+        """
+        page = self._pages.get(name)
+        if page is None:
+            raise ValueError(f"Trang không tồn tại: {name}")
+        
+        self.hide_current()
+        
+        entry = self._frames.get(name) if page['cache'] else None
+        if entry is not None and not entry['frame'].winfo_exists():
+            del self._frames[name]
+            entry = None
+        
+        if entry is None:
+            started = time.perf_counter()
+            frame = page['factory'](self.parent, *args)
+            entry = {'frame': frame, 'version': None, 'uses': 0, 'last_used': 0.0}
+            if page['cache']:
+                self._frames[name] = entry
+            logger.debug(f"Tạo trang '{name}' trong {time.perf_counter() - started:.3f}s")
+        elif page['refresh'] and entry['version'] != self._version():
+            started = time.perf_counter()
+            page['refresh'](entry['frame'])
+            logger.debug(f"Làm mới trang '{name}' trong {time.perf_counter() - started:.3f}s")
+        
+        entry['uses'] += 1
+        entry['last_used'] = time.monotonic()
+        entry['frame'].pack(**page['pack'])
+        self.current = entry['frame']
+        self.current_name = name
+        
+        self._evict()
+        return self.current
+    
+    def hide_current(self):
+        """Ẩn trang đang hiện (trang không cache thì hủy)"""
+        frame, name = self.current, self.current_name
+        self.current = None
+        self.current_name = None
+        if frame is None:
+            return
+        
+        entry = self._frames.get(name)
+        if entry is not None and entry['frame'] is frame:
+            # Dữ liệu của frame cập nhật tới thời điểm bị ẩn
+            entry['version'] = self._version()
+            try:
+                frame.pack_forget()
+            except tk.TclError:
+                del self._frames[name]
+        else:
+            try:
+                frame.destroy()
+            except tk.TclError:
+                pass
+    
+    def hidden_frames(self) -> list:
+        """Các frame đang giữ nhưng không hiện"""
+        return [entry['frame'] for name, entry in self._frames.items() if name != self.current_name]
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self._pages
+    
+    def invalidate(self, name: Optional[str] = None):
+        """Hủy frame đang giữ của trang name (None = mọi trang), trừ trang đang hiện"""
+        names = [name] if name is not None else list(self._frames)
+        for frame_name in names:
+            if frame_name != self.current_name:
+                self._destroy(frame_name)
+    
+    def clear(self):
+        """Hủy mọi frame (kể cả trang đang hiện)"""
+        self.hide_current()
+        for name in list(self._frames):
+            self._destroy(name)
+    
+    # ========== Nội bộ ==========
+    
+    def _version(self):
+        if self.version is None:
+            return None
+        try:
+            return self.version()
+        except Exception as e:
+            logger.error(f"Lỗi khi lấy phiên bản dữ liệu: {e}", exc_info=True)
+            return None
+    
+    def _destroy(self, name: str):
+        entry = self._frames.pop(name, None)
+        if entry is None:
+            return
+        try:
+            entry['frame'].destroy()
+        except tk.TclError:
+            pass
+        logger.debug(f"Đã giải phóng trang '{name}'")
+    
+    def _evict(self):
+        """Hủy các frame ẩn ít dùng (và nặng) cho tới khi tổng chi phí nằm trong ngân sách"""
+        total = sum(self._pages[name]['cost'] for name in self._frames)
+        if total <= self.memory_budget:
+            return
+        
+        # Ít lượt dùng trên mỗi MB trước, cùng mức thì frame dùng lâu nhất trước
+        hidden = sorted(
+            (name for name in self._frames if name != self.current_name),
+            key=lambda name: (self._frames[name]['uses'] / max(1, self._pages[name]['cost']),
+                              self._frames[name]['last_used'])
+        )
+        for name in hidden:
+            if total <= self.memory_budget:
+                break
+            total -= self._pages[name]['cost']
+            self._destroy(name)
+
+
+def get_main_window(widget):
+    """MainWindow chứa widget (None nếu frame được dùng riêng lẻ, không có MainWindow)"""
+    return getattr(widget.nametowidget('.'), 'main_window', None)
@@ -10,8 +10,9 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from services.database import DatabaseService
-from utils.file_reader import read_office_files
+from utils.file_reader import iter_office_files, list_office_files
 from gui.theme import MILITARY_COLORS, get_button_style, get_label_style
+from gui.task_executor import get_task_executor
 
 
 class ImportFrame(tk.Frame):
@@ -97,6 +98,10 @@ class ImportFrame(tk.Frame):
         )
         read_btn.pack(side=tk.LEFT, padx=5)
         
+        # Tiến độ đọc file
+        self.status_var = tk.StringVar(value="")
+        tk.Label(self, textvariable=self.status_var, font=('Arial', 10), anchor=tk.W).pack(fill=tk.X, padx=15)
+        
         # Preview
         preview_frame = tk.LabelFrame(self, text="Preview Dữ Liệu", font=('Arial', 12, 'bold'), padx=10, pady=10)
         preview_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
@@ -152,35 +157,75 @@ class ImportFrame(tk.Frame):
             messagebox.showerror("Lỗi", f"Thư mục không tồn tại: {folder_path}")
             return
         
-        try:
-            # Đọc file
-            self.personnel_list = read_office_files(str(folder))
-            
-            if not self.personnel_list:
-                messagebox.showwarning("Cảnh báo", "Không tìm thấy dữ liệu trong các file")
-                return
-            
-            # Hiển thị preview
-            self.preview_tree.delete(*self.preview_tree.get_children())
-            
-            for idx, person in enumerate(self.personnel_list[:50], 1):  # Chỉ hiển thị 50 đầu
-                self.preview_tree.insert('', tk.END, values=(
-                    idx,
-                    person.hoTen or 'Chưa có tên',
-                    person.capBac or '',
-                    person.donVi or '',
-                    person.danToc or ''
-                ))
-            
-            if len(self.personnel_list) > 50:
-                messagebox.showinfo("Thông báo", f"Đã đọc {len(self.personnel_list)} hồ sơ. Hiển thị 50 đầu tiên.")
-            else:
-                messagebox.showinfo("Thành công", f"Đã đọc được {len(self.personnel_list)} hồ sơ")
-                
-        except Exception as e:
+        # Đọc song song trên luồng nền (process pool), giao diện chỉ nhận tiến độ và kết quả
+        def work(task):
+            files = list_office_files(str(folder))
+            results = []
+            for result in iter_office_files(str(folder)):
+                task.check_cancelled()
+                results.append(result)
+                task.report_progress(
+                    len(results) / len(files),
+                    f"Đã đọc {len(results)}/{len(files)} file ({result.path.name})"
+                )
+            # Giữ thứ tự file như khi đọc tuần tự
+            order = {file_path: index for index, file_path in enumerate(files)}
+            results.sort(key=lambda result: order.get(result.path, len(order)))
+            return results
+        
+        def on_progress(value, message):
+            self.status_var.set(message)
+        
+        def on_error(e):
+            self.status_var.set("")
             messagebox.showerror("Lỗi", f"Lỗi khi đọc file: {str(e)}")
-            import traceback
-            traceback.print_exc()
+        
+        self.status_var.set("Đang đọc file...")
+        get_task_executor(self).submit(
+            work,
+            on_done=self.show_read_results,
+            on_error=on_error,
+            on_progress=on_progress,
+            key=('import-read', str(folder)),
+            description="Đang đọc file..."
+        )
+    
+    def show_read_results(self, results):
+        """Hiển thị kết quả đọc file (danh sách FileReadResult)"""
+        self.personnel_list = [person for result in results for person in result.personnel]
+        errors = [result for result in results if result.error]
+        total_seconds = sum(result.seconds for result in results)
+        self.status_var.set(
+            f"Đã đọc {len(results)} file, {len(self.personnel_list)} hồ sơ "
+            f"({total_seconds:.1f}s xử lý), {len(errors)} file lỗi"
+        )
+        
+        # Hiển thị preview
+        self.preview_tree.delete(*self.preview_tree.get_children())
+        
+        for idx, person in enumerate(self.personnel_list[:50], 1):  # Chỉ hiển thị 50 đầu
+            self.preview_tree.insert('', tk.END, values=(
+                idx,
+                person.hoTen or 'Chưa có tên',
+                person.capBac or '',
+                person.donVi or '',
+                person.danToc or ''
+            ))
+        
+        error_text = ""
+        if errors:
+            error_text = "\n\nKhông đọc được:\n" + "\n".join(
+                f"- {result.path.name}: {result.error}" for result in errors[:10]
+            )
+            if len(errors) > 10:
+                error_text += f"\n... và {len(errors) - 10} file khác"
+        
+        if not self.personnel_list:
+            messagebox.showwarning("Cảnh báo", "Không tìm thấy dữ liệu trong các file" + error_text)
+        elif len(self.personnel_list) > 50:
+            messagebox.showinfo("Thông báo", f"Đã đọc {len(self.personnel_list)} hồ sơ. Hiển thị 50 đầu tiên." + error_text)
+        else:
+            messagebox.showinfo("Thành công", f"Đã đọc được {len(self.personnel_list)} hồ sơ" + error_text)
     
     def import_data(self):
         """Import dữ liệu vào database"""
@@ -198,22 +243,12 @@ class ImportFrame(tk.Frame):
             return
         
         try:
-            imported = 0
-            skipped = 0
-            
-            for person in self.personnel_list:
-                # Kiểm tra xem đã tồn tại chưa (theo tên)
-                existing = self.db.search(person.hoTen or "")
-                if existing and any(p.hoTen == person.hoTen and person.hoTen for p in existing):
-                    skipped += 1
-                    continue
-                
-                self.db.create(person)
-                imported += 1
+            # Một transaction cho cả lô; trùng = cùng họ tên (không phân biệt dấu) và ngày sinh
+            counts = self.db.bulk_upsert(self.personnel_list, dedupe_key='hoTen_ngaySinh')
             
             messagebox.showinfo(
                 "Thành công",
-                f"Đã import {imported} hồ sơ.\nBỏ qua {skipped} hồ sơ trùng lặp."
+                f"Đã import {counts['inserted']} hồ sơ.\nBỏ qua {counts['skipped']} hồ sơ trùng lặp."
             )
             
             # Xóa preview
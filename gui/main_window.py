@@ -22,6 +22,8 @@ from gui.import_frame import ImportFrame
 from gui.reports_list_frame import ReportsListFrame
 from gui.theme import MILITARY_COLORS, get_button_style
 from gui.tooltip import create_tooltip
+from gui.task_executor import TaskExecutor
+from gui.frame_manager import FrameManager
 
 # Setup logging
 logging.basicConfig(
@@ -47,8 +49,14 @@ class MainWindow:
         self.db = DatabaseService()
         self.edit_personnel_id = None  # Lưu ID khi edit
         self.current_username = ""  # Username từ đăng nhập
+        # Công việc nền (truy vấn, xuất file) dùng chung cho mọi frame qua get_task_executor()
+        self.tasks = self._start_tasks()
+        self.root.main_window = self
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.status_bar = None
         self.setup_menu()
         self.current_frame = None
+        self.frames = self._create_frame_manager()
         
         # Khởi động Discord bot
         try:
@@ -67,6 +75,38 @@ class MainWindow:
             logger.error(f"Lỗi khi khởi động Discord bot: {str(e)}")
             self.discord_bot = None
     
+    def _create_frame_manager(self) -> FrameManager:
+        """Đăng ký các trang; cost là bộ nhớ ước lượng (MB) để FrameManager giải phóng trang ít dùng"""
+        frames = FrameManager(self.root, version=self.db.data_version)
+        padded = {'fill': tk.BOTH, 'expand': True, 'padx': 10, 'pady': 10}
+        full = {'fill': tk.BOTH, 'expand': True}  # Form frame không có padding để tràn viền
+        
+        frames.register('list', lambda parent: PersonnelListFrame(parent, self.db),
+                        refresh=lambda frame: frame.load_data(), cost=30, pack_options=padded)
+        frames.register('report', lambda parent: ReportFrame(parent, self.db),
+                        refresh=lambda frame: frame.update_stats(), cost=40, pack_options=padded)
+        frames.register('reports_list', lambda parent: ReportsListFrame(parent, self.db),
+                        refresh=lambda frame: frame.reload_tabs(), cost=60, pack_options=padded)
+        frames.register('import', lambda parent: ImportFrame(parent, self.db),
+                        cost=10, pack_options=padded)
+        frames.register('add', lambda parent: PersonnelFormFrame(parent, self.db, is_new=True),
+                        cache=False, pack_options=full)
+        frames.register('edit', lambda parent, personnel_id: PersonnelFormFrame(
+                            parent, self.db, personnel_id=personnel_id),
+                        cache=False, pack_options=full)
+        return frames
+    
+    def _start_tasks(self) -> TaskExecutor:
+        """Tạo TaskExecutor mới cho phiên làm việc và gắn vào root (xem get_task_executor)"""
+        tasks = TaskExecutor(self.root, on_status=self._on_task_status)
+        self.root.task_executor = tasks
+        return tasks
+    
+    def _on_close(self):
+        """Đóng cửa sổ: hủy công việc nền, dừng thread pool rồi thoát"""
+        self.tasks.shutdown()
+        self.root.destroy()
+    
     def _shutdown_app(self):
         """Tắt ứng dụng (được gọi từ Discord bot)"""
         logger.warning("⚠️ Nhận lệnh tắt ứng dụng từ Discord")
@@ -78,10 +118,15 @@ class MainWindow:
                     color=0xF44336
                 )
             # Đợi một chút để gửi thông báo
-            self.root.after(1000, self.root.quit)
+            self.root.after(1000, self._quit_app)
         except Exception as e:
             logger.error(f"Lỗi khi tắt ứng dụng: {str(e)}")
-            self.root.quit()
+            self._quit_app()
+    
+    def _quit_app(self):
+        """Dừng công việc nền (trên luồng giao diện) rồi thoát main loop"""
+        self.tasks.shutdown()
+        self.root.quit()
     
     def _restart_app(self):
         """Khởi động lại ứng dụng (được gọi từ Discord bot)"""
@@ -94,7 +139,7 @@ class MainWindow:
                     color=0xFF9800
                 )
             # Đợi một chút để gửi thông báo, sau đó restart
-            self.root.after(2000, lambda: self.root.quit())
+            self.root.after(2000, self._quit_app)
             # Note: Để restart thực sự, cần có script wrapper hoặc system call
         except Exception as e:
             logger.error(f"Lỗi khi khởi động lại ứng dụng: {str(e)}")
@@ -112,6 +157,56 @@ class MainWindow:
         except Exception as e:
             logger.error(f"Lỗi khi gửi thông báo khởi động: {str(e)}")
         
+    def _on_task_status(self, busy: bool, message: str, progress=None):
+        """Cập nhật chỉ báo bận ở thanh trạng thái (gọi trên luồng giao diện)"""
+        if not self.status_bar or not self.status_bar.winfo_exists():
+            return
+        if busy:
+            self.status_label.config(text=f"⏳ {message}")
+            if progress is None:
+                if str(self.status_progress.cget('mode')) != 'indeterminate':
+                    self.status_progress.config(mode='indeterminate')
+                self.status_progress.start(15)
+            else:
+                self.status_progress.stop()
+                self.status_progress.config(mode='determinate', value=progress * 100)
+            self.status_cancel_btn.config(state=tk.NORMAL)
+            self.root.config(cursor='watch')
+        else:
+            self.status_label.config(text="")
+            self.status_progress.stop()
+            self.status_progress.config(mode='determinate', value=0)
+            self.status_cancel_btn.config(state=tk.DISABLED)
+            self.root.config(cursor='')
+    
+    def _create_status_bar(self):
+        """Thanh trạng thái: mô tả công việc nền, tiến độ và nút hủy"""
+        self.status_bar = tk.Frame(self.root, bg=MILITARY_COLORS['bg_light'], height=28)
+        self.status_bar.pack(fill=tk.X, side=tk.BOTTOM)
+        
+        self.status_label = tk.Label(
+            self.status_bar,
+            text="",
+            font=('Arial', 9),
+            bg=MILITARY_COLORS['bg_light'],
+            fg=MILITARY_COLORS['primary_dark'],
+            anchor=tk.W
+        )
+        self.status_label.pack(side=tk.LEFT, padx=10, fill=tk.X, expand=True)
+        
+        self.status_cancel_btn = tk.Button(
+            self.status_bar,
+            text="✖ Hủy",
+            command=self.tasks.cancel_all,
+            font=('Arial', 9),
+            relief=tk.FLAT,
+            state=tk.DISABLED
+        )
+        self.status_cancel_btn.pack(side=tk.RIGHT, padx=5)
+        
+        self.status_progress = ttk.Progressbar(self.status_bar, length=160, mode='determinate')
+        self.status_progress.pack(side=tk.RIGHT, padx=5, pady=3)
+    
     def setup_menu(self):
         """Thiết lập menu bar"""
         menubar = tk.Menu(self.root)
@@ -163,14 +258,17 @@ class MainWindow:
         
         # Bước 2: Đóng tất cả dialog và DatePicker popup đang mở trước
         try:
-            # Tìm tất cả Toplevel windows (bao gồm cả dialog con và DatePicker popup)
+            # Tìm tất cả Toplevel windows (bao gồm cả dialog con và DatePicker popup).
+            # Bỏ qua các trang đang ẩn: dialog của chúng đã được đóng khi rời trang.
+            hidden_frames = self.frames.hidden_frames()
             all_toplevels = []
             def find_toplevels(widget):
                 if isinstance(widget, tk.Toplevel):
                     all_toplevels.append(widget)
                 try:
                     for child in widget.winfo_children():
-                        find_toplevels(child)
+                        if child not in hidden_frames:
+                            find_toplevels(child)
                 except:
                     pass
             
@@ -183,11 +281,6 @@ class MainWindow:
                     toplevel.grab_release()
                 except:
                     pass
-                try:
-                    # Update để đảm bảo release được xử lý
-                    toplevel.update_idletasks()
-                except:
-                    pass
             
             # Destroy tất cả sau khi release grab
             for toplevel in all_toplevels:
@@ -195,141 +288,42 @@ class MainWindow:
                     toplevel.destroy()
                 except:
                     pass
-            
-            # Update nhiều lần để đảm bảo UI được render lại đúng
-            try:
-                self.root.update_idletasks()
-                self.root.update()
-                self.root.update_idletasks()
-            except:
-                pass
         except:
             pass
         
-        # Bước 3: Xóa frame hiện tại một cách an toàn
-        if self.current_frame:
-            # Lưu reference frame cũ để destroy sau
-            old_frame = self.current_frame
-            self.current_frame = None  # Set None trước để tránh conflict
-            
-            try:
-                # Đóng tất cả dialog con trong frame trước
-                def close_all_dialogs_in_frame(widget):
-                    """Đệ quy đóng tất cả dialog trong frame"""
-                    if isinstance(widget, tk.Toplevel):
-                        try:
-                            widget.grab_release()
-                            widget.destroy()
-                        except:
-                            pass
-                    try:
-                        for child in widget.winfo_children():
-                            close_all_dialogs_in_frame(child)
-                    except:
-                        pass
-                
-                close_all_dialogs_in_frame(old_frame)
-            except:
-                pass
-            
-            try:
-                # Unpack trước
-                old_frame.pack_forget()
-            except:
-                pass
-            
-            # Update để đảm bảo unpack được xử lý
-            try:
-                self.root.update_idletasks()
-                self.root.update()
-            except:
-                pass
-            
-            # Destroy frame sau khi đã unpack
-            try:
-                old_frame.destroy()
-            except:
-                pass
-            
-            # Update lại để đảm bảo cleanup hoàn toàn
-            try:
-                self.root.update_idletasks()
-                self.root.update()
-                self.root.update_idletasks()
-            except:
-                pass
-        
-        # Bước 4: Đảm bảo focus về root window
+        # Bước 3: Đảm bảo focus về root window
         try:
             self.root.focus_set()
-            self.root.update_idletasks()
-            logger.debug("Đã set focus về root window")
         except Exception as e:
             logger.error(f"Lỗi khi set focus về root window: {e}", exc_info=True)
         
-        # Bước 5: Đảm bảo root window có background đúng
+        # Bước 4: Ẩn trang hiện tại và hiện trang mới (trang đã mở trước đó được giữ lại,
+        # chỉ làm mới khi dữ liệu đã đổi - xem FrameManager)
         try:
-            self.root.configure(bg=MILITARY_COLORS['bg_light'])
-        except:
-            pass
-        
-        # Bước 6: Tạo frame mới với xử lý lỗi tốt hơn
-        try:
-            # Đảm bảo root window sẵn sàng
-            self.root.update_idletasks()
-            
-            if frame_name == 'list':
-                self.current_frame = PersonnelListFrame(self.root, self.db)
-            elif frame_name == 'add':
-                self.current_frame = PersonnelFormFrame(self.root, self.db, is_new=True)
-            elif frame_name == 'edit':
+            if frame_name == 'edit':
                 # Edit với personnel_id đã lưu
-                if self.edit_personnel_id:
-                    self.current_frame = PersonnelFormFrame(self.root, self.db, personnel_id=self.edit_personnel_id)
-                    self.edit_personnel_id = None  # Reset
-                else:
+                if not self.edit_personnel_id:
                     messagebox.showwarning("Cảnh báo", "Không có quân nhân được chọn để sửa")
                     return
-            elif frame_name == 'report':
-                self.current_frame = ReportFrame(self.root, self.db)
-            elif frame_name == 'reports_list':
-                self.current_frame = ReportsListFrame(self.root, self.db)
-            elif frame_name == 'import':
-                self.current_frame = ImportFrame(self.root, self.db)
+                personnel_id, self.edit_personnel_id = self.edit_personnel_id, None
+                self.current_frame = self.frames.show('edit', personnel_id)
+            elif frame_name in self.frames:
+                self.current_frame = self.frames.show(frame_name)
             else:
                 messagebox.showwarning("Cảnh báo", f"Chức năng '{frame_name}' không tồn tại")
                 return  # Frame name không hợp lệ
             
-            if self.current_frame:
-                # Đảm bảo frame có background đúng
-                try:
-                    self.current_frame.configure(bg=MILITARY_COLORS['bg_light'])
-                except:
-                    pass
-                
-                # Form frame không có padding để tràn viền
-                if frame_name in ['add', 'edit']:
-                    self.current_frame.pack(fill=tk.BOTH, expand=True)
-                else:
-                    self.current_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-                
-                # Update nhiều lần để đảm bảo UI được render đúng
-                try:
-                    self.root.update_idletasks()
-                    self.root.update()
-                    self.current_frame.update_idletasks()
-                    self.root.update_idletasks()
-                    self.root.update()
-                except:
-                    pass
-                
-                # Đảm bảo root window có focus và được hiển thị đúng
-                try:
-                    self.root.focus_set()
-                    self.root.lift()
-                    logger.debug(f"Đã set focus và lift root window sau khi tạo frame {frame_name}")
-                except Exception as e:
-                    logger.error(f"Lỗi khi set focus/lift root window: {e}", exc_info=True)
+            try:
+                self.current_frame.configure(bg=MILITARY_COLORS['bg_light'])
+            except:
+                pass
+            
+            try:
+                self.root.update_idletasks()
+                self.root.lift()
+                logger.debug(f"Đã hiển thị frame {frame_name}")
+            except Exception as e:
+                logger.error(f"Lỗi khi set focus/lift root window: {e}", exc_info=True)
         except Exception as e:
             error_msg = f"Không thể hiển thị trang '{frame_name}': {str(e)}"
             logger.error(f"Lỗi khi hiển thị frame '{frame_name}': {e}", exc_info=True)
@@ -417,52 +411,62 @@ class MainWindow:
         )
         btn_import.pack(side=tk.LEFT, padx=3)
         
+        # Thanh trạng thái công việc nền (pack trước frame nội dung để luôn nằm dưới cùng)
+        self._create_status_bar()
+        
         # Hiển thị frame mặc định
         self.show_frame('list')
     
     def export_csv(self):
-        """Xuất CSV"""
-        from tkinter import filedialog
-        all_personnel = self.db.get_all()
-        if not all_personnel:
-            messagebox.showinfo("Thông báo", "Chưa có dữ liệu để xuất")
-            return
+        """Xuất CSV (ghi thẳng ra file theo từng lô; tên file .csv.gz thì nén gzip)"""
+        def write(task, file_path):
+            def progress(count):
+                task.check_cancelled()
+                task.report_progress(None, f"Đã ghi {count} dòng...")
+            
+            ExportService.write_csv(self.db, file_path, on_progress=progress)
         
-        file_path = filedialog.asksaveasfilename(
-            defaultextension=".csv",
-            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+        self._export_all(
+            ".csv", [("CSV files", "*.csv"), ("CSV nén (gzip)", "*.csv.gz"), ("All files", "*.*")],
+            write,
         )
-        
-        if file_path:
-            try:
-                csv_data = ExportService.to_csv(all_personnel)
-                with open(file_path, 'w', encoding='utf-8-sig') as f:
-                    f.write(csv_data)
-                messagebox.showinfo("Thành công", f"Đã xuất file: {file_path}")
-            except Exception as e:
-                messagebox.showerror("Lỗi", f"Không thể xuất file: {str(e)}")
     
     def export_pdf(self):
         """Xuất PDF"""
+        def write(task, file_path):
+            content = ExportService.to_pdf(self.db.get_all())
+            task.check_cancelled()
+            with open(file_path, 'wb') as f:
+                f.write(content)
+        
+        self._export_all(".pdf", [("PDF files", "*.pdf"), ("All files", "*.*")], write)
+    
+    def _export_all(self, extension: str, filetypes, write):
+        """
+        Xuất toàn bộ quân nhân: chọn file rồi chạy write(task, file_path) trên luồng nền
+        """
         from tkinter import filedialog
-        all_personnel = self.db.get_all()
-        if not all_personnel:
+        if self.db.count_search('') == 0:
             messagebox.showinfo("Thông báo", "Chưa có dữ liệu để xuất")
             return
         
         file_path = filedialog.asksaveasfilename(
-            defaultextension=".pdf",
-            filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")]
+            defaultextension=extension,
+            filetypes=filetypes
         )
         
         if file_path:
-            try:
-                pdf_data = ExportService.to_pdf(all_personnel)
-                with open(file_path, 'wb') as f:
-                    f.write(pdf_data)
-                messagebox.showinfo("Thành công", f"Đã xuất file: {file_path}")
-            except Exception as e:
-                messagebox.showerror("Lỗi", f"Không thể xuất file: {str(e)}")
+            def work(task):
+                write(task, file_path)
+                return file_path
+            
+            self.tasks.submit(
+                work,
+                on_done=lambda path: messagebox.showinfo("Thành công", f"Đã xuất file: {path}"),
+                on_error=lambda e: messagebox.showerror("Lỗi", f"Không thể xuất file: {str(e)}"),
+                key=('export', file_path),
+                description=f"Đang xuất {Path(file_path).name}...",
+            )
     
     def test_discord_bot(self):
         """Test kết nối Discord bot"""
@@ -495,6 +499,14 @@ class MainWindow:
         auth = AuthService()
         auth.logout()
         
+        # Dừng công việc nền của phiên làm việc cũ (executor đã dừng không báo trạng thái nữa
+        # nên tắt chỉ báo bận ở đây); phiên mới dùng TaskExecutor mới
+        self.tasks.shutdown()
+        self._on_task_status(False, '')
+        self.tasks = self._start_tasks()
+        self.frames.clear()
+        self.current_frame = None
+        
         # Quay lại màn hình login
         from gui.login_window import LoginWindow
         for widget in self.root.winfo_children():
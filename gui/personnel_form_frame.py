@@ -15,6 +15,7 @@ from models.personnel import Personnel, ThongTinDang, ThongTinDoan, ThongTinKhac
 from models.nguoi_than import NguoiThan
 from gui.date_picker import DatePicker
 from gui.theme import MILITARY_COLORS, get_button_style, get_label_style
+from gui.frame_manager import get_main_window
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -1116,9 +1117,10 @@ class PersonnelFormFrame(tk.Frame):
         # Với form gắn trực tiếp vào root: chỉ cần nhờ MainWindow.show_frame('list')
         # để xử lý toàn bộ cleanup giao diện.
         try:
-            if hasattr(self.master, 'master') and hasattr(self.master.master, 'show_frame'):
+            main_window = get_main_window(self)
+            if main_window is not None:
                 try:
-                    self.master.master.show_frame('list')
+                    main_window.show_frame('list')
                     logger.debug("Đã gọi show_frame('list') thành công")
                 except Exception as e:
                     logger.error(f"Lỗi khi gọi show_frame('list'): {e}", exc_info=True)
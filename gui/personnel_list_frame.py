@@ -13,12 +13,19 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from services.database import DatabaseService
 from services.export import ExportService
 from gui.theme import MILITARY_COLORS, get_button_style, get_label_style
+from gui.frame_manager import get_main_window
 from gui.tooltip import create_tooltip
+from gui.virtual_tree import VirtualTreeview
+from gui.task_executor import get_task_executor
+from gui.search_controller import SearchController
 
 
 class PersonnelListFrame(tk.Frame):
     """Frame hiển thị danh sách quân nhân"""
     
+    # Các cột cần cho danh sách (đọc gọn bằng get_all(columns=...))
+    LIST_COLUMNS = ['hoTen', 'capBac', 'chucVu', 'donVi', 'unitId', 'danToc']
+    
     def __init__(self, parent, db: DatabaseService):
         """
         Args:
@@ -29,6 +36,7 @@ class PersonnelListFrame(tk.Frame):
         self.db = db
         self.personnel_list = []
         self.selected_id = None
+        self.units_cache = {}  # {unitId: tên đơn vị}, nạp lại trong load_data()
         self.setup_ui()
         self.load_data()
     
@@ -68,7 +76,15 @@ class PersonnelListFrame(tk.Frame):
         ).pack(side=tk.LEFT, padx=5)
         
         self.search_var = tk.StringVar()
-        self.search_var.trace('w', lambda *args: self.filter_data())
+        # Lọc theo họ tên (không phân biệt dấu) trên dữ liệu đã tải; chỉ truy vấn lại khi bộ lọc
+        # hoặc database thay đổi
+        self.search = SearchController(
+            self, self.search_var,
+            fetch=lambda: self.db.search('', self._filters() or None, columns=self.LIST_COLUMNS),
+            on_result=self._show_results,
+            row_text=lambda person: person.hoTen or '',
+            version=lambda: (self.db.data_version(), tuple(sorted(self._filters().items())))
+        )
         search_entry = tk.Entry(
             search_frame,
             textvariable=self.search_var,
@@ -216,12 +232,10 @@ class PersonnelListFrame(tk.Frame):
             tree_frame,
             columns=columns,
             show='headings',
-            yscrollcommand=vsb.set,
             xscrollcommand=hsb.set,
             height=18
         )
         
-        vsb.config(command=self.tree.yview)
         hsb.config(command=self.tree.xview)
         
         # Lưu trạng thái sắp xếp để toggle A-Z / Z-A
@@ -271,6 +285,13 @@ class PersonnelListFrame(tk.Frame):
         self.tree.tag_configure('evenrow', background='#FFFFFF')
         self.tree.tag_configure('oddrow', background='#F5F5F5')
         
+        # Danh sách ảo: chỉ tạo item cho các hàng đang nhìn thấy, thanh cuộn dọc theo self.personnel_list
+        self.virtual_tree = VirtualTreeview(
+            self.tree, vsb,
+            row_values=self._row_values,
+            row_tags=lambda person, index: ('evenrow' if index % 2 else 'oddrow',),
+        )
+        
         # Grid layout
         self.tree.grid(row=0, column=0, sticky='nsew')
         vsb.grid(row=0, column=1, sticky='ns')
@@ -344,7 +365,7 @@ class PersonnelListFrame(tk.Frame):
         if item:
             self.selected_id = item
             # Highlight row
-            self.tree.selection_set(item)
+            self.virtual_tree.select(item)
     
     def sort_by_column(self, column_key: str):
         """Sắp xếp theo cột được chọn, toggle A-Z / Z-A"""
@@ -375,7 +396,7 @@ class PersonnelListFrame(tk.Frame):
         
         try:
             self.personnel_list.sort(key=sort_key, reverse=reverse)
-            self.refresh_tree()
+            self.refresh_tree(keep_position=True)
         except Exception:
             # Nếu có lỗi khi sort, bỏ qua để không làm bể giao diện
             pass
@@ -383,8 +404,9 @@ class PersonnelListFrame(tk.Frame):
     def load_data(self):
         """Load dữ liệu - Xử lý lỗi an toàn"""
         try:
-            self.personnel_list = self.db.get_all()
-            self.refresh_tree()
+            self.load_units_cache()
+            self.search.invalidate()
+            self.search.apply()
         except Exception as e:
             # Xử lý lỗi khi load data - không để giao diện bị nát
             import traceback
@@ -403,97 +425,52 @@ class PersonnelListFrame(tk.Frame):
                 pass
     
     def filter_data(self):
-        """Lọc dữ liệu"""
-        search_query = self.search_var.get()
+        """Lọc dữ liệu (bộ lọc thay đổi -> SearchController tự tải lại dữ liệu gốc)"""
+        self.search.apply()
+    
+    def _filters(self) -> dict:
+        """Bộ lọc đang chọn trên toolbar"""
         filters = {}
-        
         if self.unit_var.get():
             filters['donVi'] = self.unit_var.get()
         if self.rank_var.get():
             filters['capBac'] = self.rank_var.get()
         if hasattr(self, 'ethnic_var') and self.ethnic_var.get():
             filters['danToc'] = self.ethnic_var.get()
-        
-        self.personnel_list = self.db.search(search_query, filters if filters else None)
+        return filters
+    
+    def _show_results(self, personnel_list):
+        """Hiển thị kết quả lọc của SearchController"""
+        self.personnel_list = personnel_list
         self.refresh_tree()
     
-    def refresh_tree(self):
-        """Refresh treeview - Sửa lỗi Item already exists"""
+    def load_units_cache(self):
+        """Nạp bảng tên đơn vị theo unitId (dùng cho cột Đơn Vị)"""
         try:
-            # Xóa tất cả items một cách an toàn
-            for item in self.tree.get_children():
-                try:
-                    self.tree.delete(item)
-                except:
-                    pass
-            
-            # Đảm bảo treeview đã được clear hoàn toàn
-            self.tree.delete(*self.tree.get_children())
-            
-            # Cache đơn vị để tránh query nhiều lần
-            units_cache = {}
-            try:
-                all_units = self.db.get_all_units()
-                for unit in all_units:
-                    units_cache[unit.id] = unit.ten
-            except:
-                pass
-            
-            # Set để track các ID đã insert (tránh duplicate)
-            inserted_ids = set()
-            
-            # Thêm items mới với STT
-            for idx, person in enumerate(self.personnel_list, 1):
-                # Kiểm tra ID hợp lệ và chưa được insert
-                if not person.id:
-                    # Nếu không có ID, tạo ID tạm thời
-                    temp_id = f"temp_{idx}"
-                    while temp_id in inserted_ids:
-                        temp_id = f"temp_{idx}_{len(inserted_ids)}"
-                    person_id = temp_id
-                else:
-                    person_id = person.id
-                
-                # Bỏ qua nếu ID đã được insert
-                if person_id in inserted_ids:
-                    continue
-                
-                try:
-                    # Lấy tên đơn vị từ unitId nếu có
-                    don_vi_display = person.donVi or ''
-                    if person.unitId and person.unitId in units_cache:
-                        don_vi_display = units_cache[person.unitId]
-                    
-                    # Kiểm tra xem item đã tồn tại chưa
-                    if person_id in self.tree.get_children():
-                        # Nếu đã tồn tại, xóa và insert lại
-                        self.tree.delete(person_id)
-                    
-                    row_tag = 'oddrow' if idx % 2 else 'evenrow'
-                    self.tree.insert(
-                        '',
-                        'end',
-                        iid=person_id,
-                        values=(
-                            idx,
-                            person.hoTen or 'Chưa có tên',
-                            person.capBac or '',
-                            person.chucVu or '',
-                            don_vi_display,
-                            person.danToc or '',
-                        ),
-                        tags=(row_tag,),
-                    )
-                    inserted_ids.add(person_id)
-                except tk.TclError as e:
-                    # Nếu lỗi "Item already exists", bỏ qua và tiếp tục
-                    if "already exists" in str(e):
-                        continue
-                    else:
-                        # Log lỗi khác nhưng không dừng
-                        import traceback
-                        traceback.print_exc()
-                        continue
+            self.units_cache = {unit.id: unit.ten for unit in self.db.get_all_units()}
+        except Exception:
+            self.units_cache = {}
+    
+    def _row_values(self, person, index: int) -> tuple:
+        """Giá trị các cột của một hàng (index tính từ 0)"""
+        # Lấy tên đơn vị từ unitId nếu có
+        don_vi_display = self.units_cache.get(person.unitId) or person.donVi or ''
+        return (
+            index + 1,
+            person.hoTen or 'Chưa có tên',
+            person.capBac or '',
+            person.chucVu or '',
+            don_vi_display,
+            person.danToc or '',
+        )
+    
+    def refresh_tree(self, keep_position: bool = False):
+        """
+        Hiển thị lại self.personnel_list. Chỉ các hàng trong vùng nhìn thấy được tạo item
+        (xem VirtualTreeview) nên chi phí không phụ thuộc số quân nhân.
+        """
+        try:
+            self.virtual_tree.set_rows(self.personnel_list, keep_position=keep_position)
         except Exception as e:
             # Xử lý lỗi tổng quát - không để giao diện bị nát
             import traceback
@@ -526,7 +503,7 @@ class PersonnelListFrame(tk.Frame):
         """Xử lý right click - context menu"""
         item = self.tree.identify_row(event.y)
         if item:
-            self.tree.selection_set(item)
+            self.virtual_tree.select(item)
             self.selected_id = item
             menu = tk.Menu(self, tearoff=0)
             menu.add_command(label="✏️ Sửa", command=lambda: self.edit_personnel(item))
@@ -601,8 +578,9 @@ class PersonnelListFrame(tk.Frame):
         except Exception as e:
             # Nếu có lỗi với modal, fallback về cơ chế cũ để không chặn người dùng
             try:
-                if hasattr(self.master, 'master') and hasattr(self.master.master, 'show_frame'):
-                    self.master.master.show_frame('add')
+                main_window = get_main_window(self)
+                if main_window is not None:
+                    main_window.show_frame('add')
                 else:
                     from gui.personnel_form_frame import PersonnelFormFrame
                     self.destroy()
@@ -696,18 +674,17 @@ class PersonnelListFrame(tk.Frame):
             try:
                 self.load_data()
                 # Cố gắng giữ lại selection quân nhân vừa sửa
-                if personnel_id in self.tree.get_children():
-                    self.tree.selection_set(personnel_id)
-                    self.tree.see(personnel_id)
+                if self.virtual_tree.select(personnel_id):
                     self.selected_id = personnel_id
             except:
                 pass
         except Exception as e:
             # Nếu có lỗi với modal, fallback về cơ chế cũ
             try:
-                if hasattr(self.master, 'master') and hasattr(self.master.master, 'edit_personnel_id'):
-                    self.master.master.edit_personnel_id = personnel_id
-                    self.master.master.show_frame('edit')
+                main_window = get_main_window(self)
+                if main_window is not None:
+                    main_window.edit_personnel_id = personnel_id
+                    main_window.show_frame('edit')
                 else:
                     from gui.personnel_form_frame import PersonnelFormFrame
                     self.destroy()
@@ -1198,6 +1175,10 @@ class PersonnelListFrame(tk.Frame):
             else:
                 messagebox.showerror("Lỗi", "Không thể xóa quân nhân")
     
+    def _full_personnel_list(self):
+        """Personnel đầy đủ của danh sách đang hiển thị (danh sách chỉ giữ các cột LIST_COLUMNS)"""
+        return self.db.get_by_ids([p.id for p in self.personnel_list])
+    
     def export_csv(self):
         """Xuất CSV"""
         if not self.personnel_list:
@@ -1206,23 +1187,33 @@ class PersonnelListFrame(tk.Frame):
         
         file_path = filedialog.asksaveasfilename(
             defaultextension=".csv",
-            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+            filetypes=[("CSV files", "*.csv"), ("CSV nén (gzip)", "*.csv.gz"), ("All files", "*.*")],
             title="Xuất file CSV"
         )
         
         if file_path:
-            try:
-                csv_data = ExportService.to_csv(self.personnel_list)
-                with open(file_path, 'w', encoding='utf-8-sig') as f:
-                    f.write(csv_data)
-                messagebox.showinfo("Thành công", f"Đã xuất file:\n{file_path}")
-            except Exception as e:
-                messagebox.showerror("Lỗi", f"Không thể xuất file:\n{str(e)}")
+            personnel_ids = [p.id for p in self.personnel_list]
+            
+            # Đọc theo lô và ghi thẳng ra file trên luồng nền (chỉ các quân nhân đang hiển thị)
+            def work(task):
+                ExportService.write_csv(
+                    self.db, file_path, personnel_ids=personnel_ids,
+                    on_progress=lambda count: task.check_cancelled()
+                )
+                return file_path
+            
+            get_task_executor(self).submit(
+                work,
+                on_done=lambda path: messagebox.showinfo("Thành công", f"Đã xuất file:\n{path}"),
+                on_error=lambda e: messagebox.showerror("Lỗi", f"Không thể xuất file:\n{str(e)}"),
+                key=('export', file_path),
+                description="Đang xuất file CSV...",
+            )
     
     def export_word(self):
         """Xuất Word với bản xem trước"""
         # Lọc theo dân tộc thiểu số
-        filtered_list = ExportService.filter_ethnic_minority(self.personnel_list)
+        filtered_list = ExportService.filter_ethnic_minority(self._full_personnel_list())
         
         if not filtered_list:
             messagebox.showinfo("Thông báo", "Không có quân nhân nào là người đồng bào dân tộc thiểu số")
@@ -1252,30 +1243,40 @@ class PersonnelListFrame(tk.Frame):
                 )
                 
                 if file_path:
-                    word_data = ExportService.to_word_docx(
-                        filtered_list,
-                        tieu_doan_var.get(),
-                        dai_doi_var.get(),
-                        dia_diem_var.get(),
-                        chinh_tri_vien_var.get()
-                    )
+                    # Đọc giá trị form trên luồng giao diện, tạo file trên luồng nền
+                    header = (tieu_doan_var.get(), dai_doi_var.get(),
+                              dia_diem_var.get(), chinh_tri_vien_var.get())
                     
-                    with open(file_path, 'wb') as f:
-                        f.write(word_data)
+                    def work(task):
+                        word_data = ExportService.to_word_docx(filtered_list, *header)
+                        task.check_cancelled()
+                        with open(file_path, 'wb') as f:
+                            f.write(word_data)
+                        
+                        # Gửi thông báo Discord
+                        try:
+                            from services.discord_bot import get_discord_bot
+                            discord_bot = get_discord_bot()
+                            import os
+                            file_name = os.path.basename(file_path)
+                            discord_bot.notify_export("Word", file_name, len(filtered_list))
+                        except Exception as e:
+                            import logging
+                            logging.getLogger(__name__).error(f"Lỗi khi gửi thông báo Discord: {str(e)}")
+                        return file_path
                     
-                    # Gửi thông báo Discord
-                    try:
-                        from services.discord_bot import get_discord_bot
-                        discord_bot = get_discord_bot()
-                        import os
-                        file_name = os.path.basename(file_path)
-                        discord_bot.notify_export("Word", file_name, len(filtered_list))
-                    except Exception as e:
-                        import logging
-                        logging.getLogger(__name__).error(f"Lỗi khi gửi thông báo Discord: {str(e)}")
+                    def done(path):
+                        messagebox.showinfo("Thành công", f"Đã xuất file:\n{path}\n\nSố lượng: {len(filtered_list)} quân nhân")
+                        if dialog.winfo_exists():
+                            dialog.destroy()
                     
-                    messagebox.showinfo("Thành công", f"Đã xuất file:\n{file_path}\n\nSố lượng: {len(filtered_list)} quân nhân")
-                    dialog.destroy()
+                    get_task_executor(self).submit(
+                        work,
+                        on_done=done,
+                        on_error=lambda e: messagebox.showerror("Lỗi", f"Không thể xuất file:\n{str(e)}"),
+                        key=('export', file_path),
+                        description="Đang xuất file Word...",
+                    )
             except Exception as e:
                 messagebox.showerror("Lỗi", f"Không thể xuất file:\n{str(e)}")
         
@@ -12,6 +12,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from services.database import DatabaseService
 from services.export import ExportService
 from gui.theme import MILITARY_COLORS, get_button_style, get_label_style
+from gui.task_executor import get_task_executor
 
 # Import matplotlib cho biểu đồ
 try:
@@ -144,7 +145,7 @@ class ReportFrame(tk.Frame):
             width=20
         )
         criteria_combo.pack(side=tk.LEFT, padx=5)
-        criteria_combo.bind('<<ComboboxSelected>>', lambda e: self.update_stats())
+        criteria_combo.bind('<<ComboboxSelected>>', lambda e: self.show_criteria())
         
         # Nút xuất CSV
         export_btn = tk.Button(
@@ -234,11 +235,20 @@ class ReportFrame(tk.Frame):
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
     
+    # Tiêu chí thống kê -> (trường GROUP BY, nhãn cho giá trị rỗng)
+    CRITERIA_FIELDS = {
+        "Dân Tộc": ('danToc', "Chưa xác định"),
+        "Tôn Giáo": ('tonGiao', "Không"),
+        "Cấp Bậc": ('capBac', "Chưa xác định"),
+        "Chức Vụ": ('chucVu', "Chưa xác định"),
+        "Đơn Vị": ('donVi', "Chưa xác định"),
+    }
+    
     def update_stats(self):
-        """Cập nhật thống kê"""
-        all_personnel = self.db.get_all()
+        """Cập nhật thống kê: tải số liệu tổng hợp (một lần gọi summary()) rồi hiển thị"""
+        self.summary = self.db.summary()
         
-        if not all_personnel:
+        if not self.summary['total']:
             # Xóa tree
             for item in self.tree.get_children():
                 self.tree.delete(item)
@@ -261,57 +271,38 @@ class ReportFrame(tk.Frame):
             return
         
         # Tổng quan
-        self.total_label.config(text=f"Tổng Số: {len(all_personnel)}")
-        
-        dang_vien = sum(1 for p in all_personnel 
-                       if p.thongTinKhac.dang.ngayVao or p.thongTinKhac.dang.ngayChinhThuc)
-        self.dang_vien_label.config(text=f"Đảng Viên: {dang_vien}")
-        
-        doan_vien = sum(1 for p in all_personnel if p.thongTinKhac.doan.ngayVao)
-        self.doan_vien_label.config(text=f"Đoàn Viên: {doan_vien}")
-        
-        co_cd_cu = sum(1 for p in all_personnel if p.thongTinKhac.cdCu)
-        self.cd_cu_label.config(text=f"Có Chế Độ Cũ: {co_cd_cu}")
+        total = self.summary['total']
+        flag_counts = self.summary['flags']
+        self.total_label.config(text=f"Tổng Số: {total}")
+        self.dang_vien_label.config(text=f"Đảng Viên: {flag_counts['dangVien']}")
+        self.doan_vien_label.config(text=f"Đoàn Viên: {flag_counts['doanVien']}")
+        self.cd_cu_label.config(text=f"Có Chế Độ Cũ: {flag_counts['cdCu']}")
+        
+        self.show_criteria()
+    
+    def show_criteria(self):
+        """Hiển thị thống kê theo tiêu chí đang chọn từ số liệu đã tải (không truy vấn lại database)"""
+        if not self.summary['total']:
+            return
         
-        # Tính toán thống kê theo tiêu chí
+        total = self.summary['total']
+        flag_counts = self.summary['flags']
         criteria = self.criteria_var.get()
         stats = {}
         
-        if criteria == "Dân Tộc":
-            for person in all_personnel:
-                key = person.danToc or "Chưa xác định"
-                stats[key] = stats.get(key, 0) + 1
-        
-        elif criteria == "Tôn Giáo":
-            for person in all_personnel:
-                key = person.tonGiao or "Không"
-                stats[key] = stats.get(key, 0) + 1
-        
-        elif criteria == "Cấp Bậc":
-            for person in all_personnel:
-                key = person.capBac or "Chưa xác định"
-                stats[key] = stats.get(key, 0) + 1
-        
-        elif criteria == "Chức Vụ":
-            for person in all_personnel:
-                key = person.chucVu or "Chưa xác định"
-                stats[key] = stats.get(key, 0) + 1
-        
-        elif criteria == "Đơn Vị":
-            for person in all_personnel:
-                key = person.donVi or "Chưa xác định"
-                stats[key] = stats.get(key, 0) + 1
+        if criteria in self.CRITERIA_FIELDS:
+            field, empty_label = self.CRITERIA_FIELDS[criteria]
+            for value, count in self.summary['groups'][field].items():
+                key = value or empty_label
+                stats[key] = stats.get(key, 0) + count
         
         elif criteria == "Đảng Viên":
-            dang_vien_count = sum(1 for p in all_personnel 
-                                 if p.thongTinKhac.dang.ngayVao or p.thongTinKhac.dang.ngayChinhThuc)
-            stats["Đảng viên"] = dang_vien_count
-            stats["Không phải đảng viên"] = len(all_personnel) - dang_vien_count
+            stats["Đảng viên"] = flag_counts['dangVien']
+            stats["Không phải đảng viên"] = total - flag_counts['dangVien']
         
         elif criteria == "Đoàn Viên":
-            doan_vien_count = sum(1 for p in all_personnel if p.thongTinKhac.doan.ngayVao)
-            stats["Đoàn viên"] = doan_vien_count
-            stats["Không phải đoàn viên"] = len(all_personnel) - doan_vien_count
+            stats["Đoàn viên"] = flag_counts['doanVien']
+            stats["Không phải đoàn viên"] = total - flag_counts['doanVien']
         
         # Hiển thị kết quả trong bảng
         self.tree.delete(*self.tree.get_children())
@@ -371,22 +362,25 @@ class ReportFrame(tk.Frame):
             traceback.print_exc()
     
     def export_csv(self):
-        """Xuất CSV"""
-        all_personnel = self.db.get_all()
-        if not all_personnel:
+        """Xuất CSV (ghi thẳng ra file theo từng lô trên luồng nền)"""
+        if self.db.count_search('') == 0:
             messagebox.showinfo("Thông báo", "Chưa có dữ liệu để xuất")
             return
         
         file_path = filedialog.asksaveasfilename(
             defaultextension=".csv",
-            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+            filetypes=[("CSV files", "*.csv"), ("CSV nén (gzip)", "*.csv.gz"), ("All files", "*.*")]
         )
         
         if file_path:
-            try:
-                csv_data = ExportService.to_csv(all_personnel)
-                with open(file_path, 'w', encoding='utf-8-sig') as f:
-                    f.write(csv_data)
-                messagebox.showinfo("Thành công", f"Đã xuất file: {file_path}")
-            except Exception as e:
-                messagebox.showerror("Lỗi", f"Không thể xuất file: {str(e)}")
\ No newline at end of file
+            def work(task):
+                ExportService.write_csv(self.db, file_path, on_progress=lambda count: task.check_cancelled())
+                return file_path
+            
+            get_task_executor(self).submit(
+                work,
+                on_done=lambda path: messagebox.showinfo("Thành công", f"Đã xuất file: {path}"),
+                on_error=lambda e: messagebox.showerror("Lỗi", f"Không thể xuất file: {str(e)}"),
+                key=('export', file_path),
+                description="Đang xuất file CSV...",
+            )
\ No newline at end of file
@@ -5,6 +5,8 @@ Frame quản lý các danh sách báo cáo đại đội
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import sys
+import time
+from functools import partial
 from pathlib import Path
 from datetime import datetime
 
@@ -12,12 +14,21 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from services.database import DatabaseService
 from services.export import ExportService
+from gui.task_executor import get_task_executor
+from gui.search_controller import SearchController
 from gui.theme import MILITARY_COLORS, get_button_style, get_label_style
+from gui.frame_manager import get_main_window
 
 
 class ReportsListFrame(tk.Frame):
     """Frame quản lý các danh sách báo cáo"""
     
+    # Chờ bao lâu sau khi chọn tab thì tạo sẵn tab kế tiếp (lúc rảnh)
+    PREWARM_DELAY_MS = 1500
+    # Tab ẩn không được xem quá thời gian này thì giải phóng (tạo lại khi chọn)
+    RELEASE_AFTER_SECONDS = 300
+    RELEASE_CHECK_MS = 60000
+    
     def __init__(self, parent, db: DatabaseService):
         """
         Args:
@@ -104,95 +115,32 @@ class ReportsListFrame(tk.Frame):
         )
         search_entry.pack(side=tk.LEFT, padx=5)
         
-        # Hàm lọc dữ liệu
-        original_get_data = get_data_func
+        # Lọc theo từng phím gõ trên dữ liệu đã tải (get_data_func chỉ chạy lại khi database thay đổi)
+        def row_values(item):
+            return item.get('values', []) if isinstance(item, dict) else item
         
-        def get_filtered_data():
-            data = original_get_data()
-            search_text = search_var.get().strip().lower()
-            if not search_text:
-                return data
-            filtered = []
-            for item in data:
-                # Tìm kiếm trong tất cả các cột
-                if isinstance(item, dict):
-                    searchable_text = ' '.join(str(v) for v in item.get('values', [])).lower()
-                else:
-                    searchable_text = ' '.join(str(v) for v in item).lower()
-                if search_text in searchable_text:
-                    filtered.append(item)
-            return filtered
+        def row_id(item):
+            if isinstance(item, dict):
+                return item.get('id')
+            return get_id_func(item) if get_id_func else None
         
-        def on_search_change(*args):
+        def show_results(rows):
             tree = tree_ref[0] if tree_ref and len(tree_ref) > 0 else None
             if tree:
-                self.refresh_list(get_filtered_data, tree, get_id_func)
-        
-        search_var.trace('w', on_search_change)
-        
-        return get_filtered_data
-    
-    def _parse_cap_bac_rank(self, cap_bac: str) -> int:
-        """
-        Parse cấp bậc thành số để so sánh
-        Thứ tự từ cao xuống thấp:
-        Đại tá (100) > Trung tá (90) > Thiếu tá (80) > Đại úy (70) > Thượng úy (60) > 
-        Trung úy (50) > Thiếu úy (40) > Thượng sĩ (30) > Trung sĩ (20) > Hạ sĩ (10) > 
-        H3 (3) > H2 (2) > H1 (1) > 4 (4) > 3 (3) > 2 (2) > 1 (1)
-        """
-        if not cap_bac:
-            return 0
-        
-        cap_bac = cap_bac.strip().upper()
-        
-        # Sĩ quan
-        if 'ĐẠI TÁ' in cap_bac or 'ĐẠI TÁ' == cap_bac:
-            return 100
-        elif 'TRUNG TÁ' in cap_bac or 'TRUNG TÁ' == cap_bac:
-            return 90
-        elif 'THIẾU TÁ' in cap_bac or 'THIẾU TÁ' == cap_bac:
-            return 80
-        elif 'ĐẠI ÚY' in cap_bac or 'ĐẠI ÚY' == cap_bac:
-            return 70
-        elif 'THƯỢNG ÚY' in cap_bac or 'THƯỢNG ÚY' == cap_bac:
-            return 60
-        elif 'TRUNG ÚY' in cap_bac or 'TRUNG ÚY' == cap_bac:
-            return 50
-        elif 'THIẾU ÚY' in cap_bac or 'THIẾU ÚY' == cap_bac:
-            return 40
-        # Hạ sĩ quan
-        elif 'THƯỢNG SĨ' in cap_bac or 'THƯỢNG SĨ' == cap_bac:
-            return 30
-        elif 'TRUNG SĨ' in cap_bac or 'TRUNG SĨ' == cap_bac:
-            return 20
-        elif 'HẠ SĨ' in cap_bac or 'HẠ SĨ' == cap_bac:
-            return 10
-        # Binh sĩ - H1, H2, H3
-        elif cap_bac.startswith('H'):
-            try:
-                num = int(cap_bac[1:])
-                return num  # H1=1, H2=2, H3=3
-            except:
-                return 0
-        # Binh sĩ - số thuần
-        else:
-            try:
-                num = int(cap_bac)
-                return num + 10  # 1=11, 2=12, 3=13, 4=14 (cao hơn H1, H2, H3)
-            except:
-                return 0
-    
-    def _sort_personnel_by_cap_bac(self, personnel_list):
-        """
-        Sắp xếp danh sách quân nhân theo cấp bậc (từ cao xuống thấp)
-        Nếu cùng cấp bậc, sắp xếp theo tên
-        """
-        def sort_key(personnel):
-            cap_bac_rank = self._parse_cap_bac_rank(personnel.capBac or '')
-            ho_ten = (personnel.hoTen or '').lower()
-            return (-cap_bac_rank, ho_ten)  # Dấu - để sắp xếp từ cao xuống thấp
-        
-        return sorted(personnel_list, key=sort_key)
+                self.refresh_list(lambda: rows, tree, get_id_func)
+        
+        # Tìm trong tất cả các cột (không phân biệt dấu); quân nhân còn khớp qua chỉ mục
+        # full-text (gồm cả quê quán, trú quán, người thân)
+        search = SearchController(
+            parent, search_var,
+            fetch=get_data_func,
+            on_result=show_results,
+            row_text=lambda item: ' '.join(str(v) for v in row_values(item)),
+            row_id=row_id,
+            match_ids=self.db.full_text_search_ids,
+            version=self.db.data_version
+        )
+        return search.results
     
     def setup_ui(self):
         """Thiết lập giao diện"""
@@ -236,6 +184,34 @@ class ReportsListFrame(tk.Frame):
         )
         back_btn.pack(side=tk.RIGHT, padx=15, pady=5)
         
+        # Nút xuất tất cả báo cáo ra một file Excel (mỗi báo cáo một sheet)
+        tk.Button(
+            title_frame,
+            text="📥 Xuất Excel Tất Cả",
+            command=self.export_all_excel,
+            font=('Segoe UI', 10, 'bold'),
+            bg='#2196F3',
+            fg='white',
+            relief=tk.FLAT,
+            padx=20,
+            pady=5,
+            cursor='hand2'
+        ).pack(side=tk.RIGHT, padx=5, pady=5)
+        
+        # Nút xuất nhiều báo cáo Word một lần vào một file .zip
+        tk.Button(
+            title_frame,
+            text="📦 Xuất Word Tất Cả",
+            command=self.export_all_word,
+            font=('Segoe UI', 10, 'bold'),
+            bg='#2196F3',
+            fg='white',
+            relief=tk.FLAT,
+            padx=20,
+            pady=5,
+            cursor='hand2'
+        ).pack(side=tk.RIGHT, padx=5, pady=5)
+        
         # Notebook với các tab
         notebook = ttk.Notebook(self)
         notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -245,60 +221,108 @@ class ReportsListFrame(tk.Frame):
         style.theme_use('clam')
         style.configure('TNotebook.Tab', padding=[20, 10], font=('Segoe UI', 10, 'bold'))
         
-        # Tab 1: Trích ngang Đại đội
-        tab1 = tk.Frame(notebook, bg=self.bg_color)
-        notebook.add(tab1, text="Trích Ngang Đại Đội")
-        self.create_trich_ngang_tab(tab1)
-        
-        # Tab 2: Vị trí Cán bộ
-        tab2 = tk.Frame(notebook, bg=self.bg_color)
-        notebook.add(tab2, text="Vị Trí Cán Bộ")
-        self.create_vi_tri_can_bo_tab(tab2)
-        
-        # Tab 3: Đảng viên diễn tập
-        tab3 = tk.Frame(notebook, bg=self.bg_color)
-        notebook.add(tab3, text="Đảng Viên Diễn Tập")
-        self.create_dang_vien_dien_tap_tab(tab3)
-        
-        # Tab 4: Tổ 3 người
-        tab4 = tk.Frame(notebook, bg=self.bg_color)
-        notebook.add(tab4, text="Chế độ cũ")
-        self.create_to_3_nguoi_tab(tab4)
-        
-        # Tab 5: Tổ công tác dân vận
-        tab5 = tk.Frame(notebook, bg=self.bg_color)
-        notebook.add(tab5, text="Tổ Công Tác Dân Vận")
-        self.create_to_dan_van_tab(tab5)
-        
-        # Tab 6: Ban chấp hành Chi đoàn
-        tab6 = tk.Frame(notebook, bg=self.bg_color)
-        notebook.add(tab6, text="Ban Chấp Hành Chi Đoàn")
-        self.create_ban_chap_hanh_tab(tab6)
-        
-        # Tab 7: Tổng hợp số liệu
-        tab7 = tk.Frame(notebook, bg=self.bg_color)
-        notebook.add(tab7, text="Tổng Hợp Số Liệu")
-        self.create_tong_hop_tab(tab7)
-        
-        # Tab 8: Quân nhân theo tôn giáo
-        tab8 = tk.Frame(notebook, bg=self.bg_color)
-        notebook.add(tab8, text="Quân Nhân Theo Tôn Giáo")
-        self.create_ton_giao_tab(tab8)
-        
-        # Tab 9: Người thân đảng phái phản động
-        tab9 = tk.Frame(notebook, bg=self.bg_color)
-        notebook.add(tab9, text="Người Thân Đảng Phái Phản Động")
-        self.create_dang_phai_phan_dong_tab(tab9)
-        
-        # Tab 10: Yếu tố nước ngoài
-        tab10 = tk.Frame(notebook, bg=self.bg_color)
-        notebook.add(tab10, text="Yếu Tố Nước Ngoài")
-        self.create_yeu_to_nuoc_ngoai_tab(tab10)
-        
-        # Tab 11: Bảo vệ an ninh
-        tab11 = tk.Frame(notebook, bg=self.bg_color)
-        notebook.add(tab11, text="Bảo Vệ An Ninh")
-        self.create_bao_ve_an_ninh_tab(tab11)
+        # Các tab chỉ được tạo (và nạp dữ liệu) khi được chọn lần đầu
+        self.notebook = notebook
+        self._tabs = []
+        for text, builder in self._tab_builders():
+            frame = tk.Frame(notebook, bg=self.bg_color)
+            notebook.add(frame, text=text)
+            self._tabs.append({'frame': frame, 'build': builder, 'built': False, 'last_viewed': 0.0})
+        self._prewarm_job = None
+        
+        notebook.bind('<<NotebookTabChanged>>', self._on_tab_changed)
+        # Tab đầu tiên tạo sau khi cửa sổ đã hiển thị
+        self.after_idle(self._on_tab_changed)
+        self.after(self.RELEASE_CHECK_MS, self._release_hidden_tabs)
+    
+    # ========== Tạo tab theo yêu cầu ==========
+    
+    def _tab_builders(self):
+        """Danh sách (tên tab, hàm tạo nội dung tab) theo thứ tự hiển thị"""
+        return [
+            ("Trích Ngang Đại Đội", self.create_trich_ngang_tab),
+            ("Vị Trí Cán Bộ", self.create_vi_tri_can_bo_tab),
+            ("Đảng Viên Diễn Tập", self.create_dang_vien_dien_tap_tab),
+            ("Chế độ cũ", self.create_to_3_nguoi_tab),
+            ("Tổ Công Tác Dân Vận", self.create_to_dan_van_tab),
+            ("Ban Chấp Hành Chi Đoàn", self.create_ban_chap_hanh_tab),
+            ("Tổng Hợp Số Liệu", self.create_tong_hop_tab),
+            ("Quân Nhân Theo Tôn Giáo", self.create_ton_giao_tab),
+            ("Người Thân Đảng Phái Phản Động", self.create_dang_phai_phan_dong_tab),
+            ("Yếu Tố Nước Ngoài", self.create_yeu_to_nuoc_ngoai_tab),
+            ("Bảo Vệ An Ninh", self.create_bao_ve_an_ninh_tab),
+        ]
+    
+    def _current_tab_index(self):
+        """Chỉ số tab đang chọn (None nếu chưa có)"""
+        try:
+            return self.notebook.index('current')
+        except tk.TclError:
+            return None
+    
+    def _build_tab(self, index: int):
+        """Tạo nội dung tab (nếu chưa tạo)"""
+        tab = self._tabs[index]
+        if tab['built']:
+            return
+        tab['built'] = True
+        tab['last_viewed'] = time.monotonic()
+        try:
+            tab['build'](tab['frame'])
+        except Exception as e:
+            print(f"Lỗi khi tạo tab {index + 1}: {e}")
+            import traceback
+            traceback.print_exc()
+    
+    def _on_tab_changed(self, event=None):
+        """Chọn tab: tạo tab nếu chưa có, rồi hẹn tạo sẵn tab kế tiếp"""
+        if not self.winfo_exists():
+            return
+        index = self._current_tab_index()
+        if index is None:
+            return
+        self._build_tab(index)
+        self._tabs[index]['last_viewed'] = time.monotonic()
+        
+        if self._prewarm_job is not None:
+            self.after_cancel(self._prewarm_job)
+        self._prewarm_job = self.after(self.PREWARM_DELAY_MS, lambda: self._prewarm_next(index))
+    
+    def _prewarm_next(self, index: int):
+        """Tạo sẵn tab kế tiếp (tab người dùng hay chọn tiếp theo) khi giao diện rảnh"""
+        self._prewarm_job = None
+        if not self.winfo_exists() or index + 1 >= len(self._tabs):
+            return
+        if not self._tabs[index + 1]['built']:
+            self.after_idle(lambda: self.winfo_exists() and self._build_tab(index + 1))
+    
+    def _release_hidden_tabs(self):
+        """Giải phóng widget và dữ liệu của các tab ẩn lâu không xem (định kỳ)"""
+        if not self.winfo_exists():
+            return
+        current = self._current_tab_index()
+        now = time.monotonic()
+        for index, tab in enumerate(self._tabs):
+            if (tab['built'] and index != current
+                    and now - tab['last_viewed'] > self.RELEASE_AFTER_SECONDS):
+                self._release_tab(index)
+        self.after(self.RELEASE_CHECK_MS, self._release_hidden_tabs)
+    
+    def _release_tab(self, index: int):
+        """Hủy nội dung tab (tạo lại khi được chọn)"""
+        tab = self._tabs[index]
+        for child in tab['frame'].winfo_children():
+            child.destroy()
+        tab['built'] = False
+    
+    def reload_tabs(self):
+        """Dữ liệu đã đổi: tạo lại tab đang xem, các tab đã tạo khác sẽ tạo lại khi được chọn"""
+        current = self._current_tab_index()
+        for index, tab in enumerate(self._tabs):
+            if tab['built']:
+                self._release_tab(index)
+        if current is not None:
+            self._build_tab(current)
     
     def create_common_list_view(self, parent, columns, get_data_func, title="", get_id_func=None):
         """
@@ -405,7 +429,7 @@ class ReportsListFrame(tk.Frame):
         tk.Button(
             btn_container,
             text="📥 Xuất Excel",
-            command=lambda: self.export_excel(get_filtered_data, title),
+            command=lambda: self.export_excel(get_filtered_data, title, columns),
             font=('Segoe UI', 10),
             bg='#2196F3',
             fg='white',
@@ -534,7 +558,7 @@ class ReportsListFrame(tk.Frame):
         tk.Button(
             btn_container,
             text="📥 Xuất Excel",
-            command=lambda: self.export_excel(get_data_func, title),
+            command=lambda: self.export_excel(get_data_func, title, columns),
             font=('Segoe UI', 10),
             bg='#2196F3',
             fg='white',
@@ -662,9 +686,10 @@ class ReportsListFrame(tk.Frame):
             return
         
         # Lưu personnel_id vào main window
-        if hasattr(self.master, 'master') and hasattr(self.master.master, 'edit_personnel_id'):
-            self.master.master.edit_personnel_id = personnel_id
-            self.master.master.show_frame('edit')
+        main_window = get_main_window(self)
+        if main_window is not None:
+            main_window.edit_personnel_id = personnel_id
+            main_window.show_frame('edit')
         else:
             # Fallback: mở form trực tiếp
             from gui.personnel_form_frame import PersonnelFormFrame
@@ -685,8 +710,9 @@ class ReportsListFrame(tk.Frame):
     
     def add_new_personnel(self):
         """Thêm quân nhân mới"""
-        if hasattr(self.master, 'master') and hasattr(self.master.master, 'show_frame'):
-            self.master.master.show_frame('add')
+        main_window = get_main_window(self)
+        if main_window is not None:
+            main_window.show_frame('add')
         else:
             from gui.personnel_form_frame import PersonnelFormFrame
             from tkinter import messagebox
@@ -702,29 +728,239 @@ class ReportsListFrame(tk.Frame):
     
     def go_to_personnel_list(self):
         """Quay lại danh sách quân nhân để chỉnh sửa"""
-        if hasattr(self.master, 'master') and hasattr(self.master.master, 'show_frame'):
-            self.master.master.show_frame('list')
+        main_window = get_main_window(self)
+        if main_window is not None:
+            main_window.show_frame('list')
         else:
             messagebox.showinfo(
                 "Thông báo", 
                 "Vui lòng sử dụng menu 'Quản Lý' → 'Danh Sách Quân Nhân' để chỉnh sửa dữ liệu"
             )
     
-    def export_excel(self, get_data_func, title):
-        """Xuất ra Excel"""
+    def _export_word_in_background(self, filename: str, build_document, dialog=None,
+                                   message: str = "Đã xuất file Word:"):
+        """
+        Tạo và ghi file Word trên luồng nền (TaskExecutor), báo kết quả trên luồng giao diện
+        Args:
+            filename: Đường dẫn file cần ghi
+            build_document: Hàm không tham số trả về nội dung file (bytes); mọi giá trị
+                            lấy từ widget phải được đọc trước (ví dụ functools.partial)
+            dialog: Dialog đóng lại khi xuất xong
+            message: Thông báo thành công (kèm đường dẫn file)
+        """
+        def work(task):
+            content = build_document()
+            task.check_cancelled()
+            with open(filename, 'wb') as f:
+                f.write(content)
+            return filename
+        
+        def done(path):
+            messagebox.showinfo("Thành công", f"{message}\n{path}")
+            if dialog is not None and dialog.winfo_exists():
+                dialog.destroy()
+        
+        get_task_executor(self).submit(
+            work,
+            on_done=done,
+            on_error=lambda e: messagebox.showerror("Lỗi", f"Không thể xuất file Word:\n{str(e)}"),
+            key=('export', filename),
+            description=f"Đang xuất {Path(filename).name}...",
+        )
+    
+    def export_excel(self, get_data_func, title, columns=None):
+        """
+        Xuất danh sách đang hiển thị ra Excel (một sheet, ghi trên luồng nền)
+        Args:
+            get_data_func: Hàm trả về dữ liệu của bảng (dict có 'values' hoặc tuple)
+            title: Tiêu đề (tên file và tên sheet)
+            columns: Tiêu đề cột của bảng
+        """
         try:
             filename = filedialog.asksaveasfilename(
                 defaultextension=".xlsx",
                 filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")],
                 initialfile=f"{title}_{datetime.now().strftime('%Y%m%d')}.xlsx"
             )
-            if filename:
-                data = get_data_func()
-                # TODO: Implement Excel export
-                messagebox.showinfo("Thành công", f"Đã xuất file: {filename}")
+            if not filename:
+                return
+            
+            data = get_data_func()
+            rows = [item['values'] if isinstance(item, dict) else item for item in data]
+            headers = list(columns) if columns else [f"Cột {i + 1}" for i in range(len(rows[0]) if rows else 0)]
+            
+            def work(task):
+                ExportService.write_xlsx(filename, [(title, headers, rows)])
+                return filename
+            
+            get_task_executor(self).submit(
+                work,
+                on_done=lambda path: messagebox.showinfo("Thành công", f"Đã xuất file: {path}"),
+                on_error=lambda e: messagebox.showerror("Lỗi", f"Không thể xuất file:\n{str(e)}"),
+                key=('export', filename),
+                description=f"Đang xuất {Path(filename).name}..."
+            )
         except Exception as e:
             messagebox.showerror("Lỗi", f"Không thể xuất file:\n{str(e)}")
     
+    def export_all_excel(self):
+        """Xuất tất cả danh sách báo cáo ra một file Excel, mỗi báo cáo một sheet"""
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".xlsx",
+            filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")],
+            initialfile=f"Bao_cao_dai_doi_{datetime.now().strftime('%Y%m%d')}.xlsx"
+        )
+        if not filename:
+            return
+        
+        def work(task):
+            def progress(sheet_title, count):
+                task.check_cancelled()
+                task.report_progress(None, f"{sheet_title}: đã ghi {count} dòng...")
+            
+            return ExportService.write_report_workbook(self.db, filename, on_progress=progress)
+        
+        def done(counts):
+            summary = "\n".join(f"- {title}: {count}" for title, count in counts.items())
+            messagebox.showinfo("Thành công", f"Đã xuất file: {filename}\n\n{summary}")
+        
+        get_task_executor(self).submit(
+            work,
+            on_done=done,
+            on_error=lambda e: messagebox.showerror("Lỗi", f"Không thể xuất file:\n{str(e)}"),
+            key=('export', filename),
+            description=f"Đang xuất {Path(filename).name}..."
+        )
+    
+    def export_all_word(self):
+        """Xuất nhiều báo cáo Word của một đơn vị vào một file .zip (tạo song song trên nhiều tiến trình)"""
+        from services.batch_export import REPORT_TYPES, export_reports_zip
+        
+        units = self.db.get_all_units()
+        unit_names = ["Tất cả"] + [unit.ten for unit in units]
+        
+        dialog = tk.Toplevel(self)
+        dialog.title("Xuất Word Tất Cả")
+        dialog.geometry("560x640")
+        dialog.transient(self)
+        dialog.grab_set()
+        
+        main_container = tk.Frame(dialog, bg='#FAFAFA')
+        main_container.pack(fill=tk.BOTH, expand=True, padx=20, pady=15)
+        
+        # Đơn vị
+        tk.Label(main_container, text="Đơn vị:", font=('Segoe UI', 10), bg='#FAFAFA').pack(anchor=tk.W, pady=2)
+        unit_var = tk.StringVar(value=unit_names[0])
+        ttk.Combobox(main_container, textvariable=unit_var, values=unit_names, width=38,
+                     state='readonly').pack(anchor=tk.W, pady=2)
+        
+        # Thông tin chung cho các báo cáo
+        fields = [
+            ('tieu_doan', "Tiểu đoàn:", "TIỂU ĐOÀN 38"),
+            ('don_vi', "Đại đội:", "Đại đội 3"),
+            ('dia_diem', "Địa điểm:", "Đắk Lắk"),
+            ('nam', "Năm:", str(datetime.now().year)),
+            ('chinh_tri_vien', "Chính trị viên:", "Đại úy Triệu Văn Dũng"),
+            ('ten_bi_thu', "Bí thư chi đoàn:", ""),
+        ]
+        field_vars = {}
+        for key, label, default in fields:
+            row = tk.Frame(main_container, bg='#FAFAFA')
+            row.pack(fill=tk.X, pady=2)
+            tk.Label(row, text=label, font=('Segoe UI', 10), bg='#FAFAFA', width=15, anchor=tk.W).pack(side=tk.LEFT)
+            field_vars[key] = tk.StringVar(value=default)
+            tk.Entry(row, textvariable=field_vars[key], width=36, font=('Segoe UI', 10)).pack(side=tk.LEFT)
+        
+        # Các báo cáo
+        tk.Label(main_container, text="Báo cáo:", font=('Segoe UI', 10, 'bold'), bg='#FAFAFA').pack(anchor=tk.W, pady=(10, 2))
+        report_vars = {}
+        for report_type, report in REPORT_TYPES.items():
+            report_vars[report_type] = tk.BooleanVar(value=True)
+            tk.Checkbutton(main_container, text=report.title, variable=report_vars[report_type],
+                           font=('Segoe UI', 10), bg='#FAFAFA').pack(anchor=tk.W)
+        
+        def save_and_export():
+            report_types = [report_type for report_type, var in report_vars.items() if var.get()]
+            if not report_types:
+                messagebox.showwarning("Cảnh báo", "Vui lòng chọn ít nhất một báo cáo!", parent=dialog)
+                return
+            
+            filename = filedialog.asksaveasfilename(
+                parent=dialog,
+                defaultextension=".zip",
+                filetypes=[("Zip files", "*.zip"), ("All files", "*.*")],
+                initialfile=f"Bao_cao_Word_{datetime.now().strftime('%Y%m%d')}.zip"
+            )
+            if not filename:
+                return
+            
+            # Tham số đã được đọc từ form ở đây (luồng nền không đọc widget)
+            index = unit_names.index(unit_var.get())
+            unit_id = units[index - 1].id if index > 0 else None
+            params = {key: var.get().strip() for key, var in field_vars.items()}
+            
+            def work(task):
+                return export_reports_zip(
+                    self.db, filename, report_types, unit_id=unit_id, params=params,
+                    on_progress=lambda done, total, message: task.report_progress(
+                        done / total if total else None, message),
+                    check_cancelled=task.check_cancelled,
+                )
+            
+            def done(manifest):
+                lines = []
+                for entry in manifest['reports']:
+                    if entry.get('error'):
+                        lines.append(f"- {entry['title']}: lỗi ({entry['error']})")
+                    elif entry['file'] is None:
+                        lines.append(f"- {entry['title']}: không có dữ liệu")
+                    else:
+                        lines.append(f"- {entry['title']}: {entry['count']}")
+                messagebox.showinfo(
+                    "Thành công",
+                    f"Đã xuất file: {filename}\n({manifest['seconds']:.1f}s, {manifest['workers']} tiến trình)\n\n"
+                    + "\n".join(lines)
+                )
+                if dialog.winfo_exists():
+                    dialog.destroy()
+            
+            get_task_executor(self).submit(
+                work,
+                on_done=done,
+                on_error=lambda e: messagebox.showerror("Lỗi", f"Không thể xuất file:\n{str(e)}"),
+                key=('export', filename),
+                description=f"Đang xuất {Path(filename).name}..."
+            )
+        
+        btn_frame = tk.Frame(main_container, bg='#FAFAFA')
+        btn_frame.pack(fill=tk.X, pady=10, side=tk.BOTTOM)
+        
+        tk.Button(
+            btn_frame,
+            text="📦 Xuất File",
+            command=save_and_export,
+            font=('Segoe UI', 11, 'bold'),
+            bg='#4CAF50',
+            fg='white',
+            relief=tk.FLAT,
+            padx=30,
+            pady=8,
+            cursor='hand2'
+        ).pack(side=tk.RIGHT, padx=10)
+        
+        tk.Button(
+            btn_frame,
+            text="❌ Hủy",
+            command=dialog.destroy,
+            font=('Segoe UI', 11),
+            bg='#757575',
+            fg='white',
+            relief=tk.FLAT,
+            padx=30,
+            pady=8,
+            cursor='hand2'
+        ).pack(side=tk.RIGHT, padx=5)
+    
     def export_vi_tri_can_bo_word(self, get_data_func):
         """Xuất danh sách Vị Trí Cán Bộ ra Word"""
         try:
@@ -777,21 +1013,15 @@ class ReportsListFrame(tk.Frame):
                         initialfile=f"Danh_sach_vi_tri_can_bo_{datetime.now().strftime('%Y%m%d')}.docx"
                     )
                     if filename:
-                        # Xuất Word
-                        word_bytes = to_word_docx_vi_tri_can_bo(
+                        # Tạo file Word trên luồng nền (tham số đã được đọc từ form ở đây)
+                        self._export_word_in_background(filename, partial(
+                            to_word_docx_vi_tri_can_bo,
                             personnel_list=personnel_list,
                             don_vi=dai_doi_var.get(),
                             nam=nam_var.get(),
                             chinh_tri_vien=chinh_tri_vien_var.get(),
                             db_service=self.db
-                        )
-                        
-                        # Lưu file
-                        with open(filename, 'wb') as f:
-                            f.write(word_bytes)
-                        
-                        messagebox.showinfo("Thành công", f"Đã xuất file Word:\n{filename}")
-                        dialog.destroy()
+                        ), dialog)
                 except Exception as e:
                     messagebox.showerror("Lỗi", f"Không thể xuất file Word:\n{str(e)}")
             
@@ -882,8 +1112,7 @@ class ReportsListFrame(tk.Frame):
         def get_data():
             all_personnel = self.db.get_all()
             
-            # Sắp xếp theo cấp bậc (từ cao xuống thấp)
-            all_personnel = self._sort_personnel_by_cap_bac(all_personnel)
+            # Danh sách từ DatabaseService đã sắp theo cấp bậc (từ cao xuống thấp) rồi họ tên
             
             # Cache đơn vị để tránh load nhiều lần
             units_cache = {}
@@ -1029,26 +1258,15 @@ class ReportsListFrame(tk.Frame):
         )
         search_entry.pack(side=tk.LEFT, padx=5)
         
-        # Hàm lọc dữ liệu
-        original_get_data = get_data
-        
-        def get_filtered_data():
-            data = original_get_data()
-            search_text = search_var.get().strip().lower()
-            if not search_text:
-                return data
-            filtered = []
-            for item in data:
-                # Tìm kiếm trong tất cả các cột
-                searchable_text = ' '.join(str(v) for v in item['values']).lower()
-                if search_text in searchable_text:
-                    filtered.append(item)
-            return filtered
-        
-        def on_search_change(*args):
-            self.refresh_list(get_filtered_data, tree, None)
-        
-        search_var.trace('w', on_search_change)
+        # Lọc theo từng phím gõ trên dữ liệu đã tải (get_data chỉ chạy lại khi database thay đổi)
+        search = SearchController(
+            parent, search_var,
+            fetch=get_data,
+            on_result=lambda rows: self.refresh_list(lambda: rows, tree, None),
+            row_text=lambda item: ' '.join(str(v) for v in item['values']),
+            version=self.db.data_version
+        )
+        get_filtered_data = search.results
         
         # Tạo treeview với scrollbar ngang
         tree_frame = tk.Frame(parent, bg=self.bg_color)
@@ -1234,20 +1452,16 @@ class ReportsListFrame(tk.Frame):
                     )
                     
                     if filename:
-                        word_bytes = to_word_docx_trich_ngang(
+                        # Tạo file Word trên luồng nền (tham số đã được đọc từ form ở đây)
+                        self._export_word_in_background(filename, partial(
+                            to_word_docx_trich_ngang,
                             personnel_list=personnel_list,
                             tieu_doan=tieu_doan_var.get(),
                             dai_doi=dai_doi_var.get(),
                             dia_diem=dia_diem_var.get(),
                             nam=nam_var.get(),
                             db_service=self.db
-                        )
-                        
-                        with open(filename, 'wb') as f:
-                            f.write(word_bytes)
-                        
-                        messagebox.showinfo("Thành công", f"Đã xuất file Word:\n{filename}")
-                        dialog.destroy()
+                        ), dialog)
                 except Exception as e:
                     messagebox.showerror("Lỗi", f"Không thể xuất file Word:\n{str(e)}")
             
@@ -1306,8 +1520,9 @@ class ReportsListFrame(tk.Frame):
         
         def get_data():
             all_personnel = self.db.get_all()
-            # Sắp xếp theo cấp bậc (từ cao xuống thấp)
-            all_personnel = self._sort_personnel_by_cap_bac(all_personnel)
+            # Danh sách từ DatabaseService đã sắp theo cấp bậc (từ cao xuống thấp) rồi họ tên
+            # Người thân của tất cả quân nhân (một truy vấn)
+            nguoi_than_map = self.db.get_nguoi_than_for_many()
             result = []
             for idx, p in enumerate(all_personnel, 1):
                 # Tính tuổi
@@ -1509,8 +1724,8 @@ class ReportsListFrame(tk.Frame):
                 gia_dinh_info = []
                 
                 try:
-                    # Lấy danh sách người thân từ database
-                    nguoi_than_list = self.db.get_nguoi_than_by_personnel(p.id)
+                    # Lấy danh sách người thân đã tải sẵn
+                    nguoi_than_list = nguoi_than_map.get(p.id, [])
                     
                     # Nhóm theo mối quan hệ
                     bo_de = []
@@ -1821,7 +2036,7 @@ class ReportsListFrame(tk.Frame):
         tk.Button(
             btn_container,
             text="📊 Xuất Excel",
-            command=lambda: self.export_excel(get_filtered_data, title),
+            command=lambda: self.export_excel(get_filtered_data, title, columns),
             font=('Segoe UI', 10),
             bg='#2196F3',
             fg='white',
@@ -1861,11 +2076,12 @@ class ReportsListFrame(tk.Frame):
         def get_data():
             # Chỉ lấy quân nhân đã được chọn vào danh sách
             selected_ids = set(self.db.get_dang_vien_dien_tap())
-            all_personnel = self.db.get_all()
+            all_personnel = self.db.get_all(columns=['hoTen', 'ngaySinh', 'capBac', 'chucVu', 'donVi',
+                                                     'trinhDoVanHoa', 'danToc', 'tonGiao',
+                                                     'queQuan', 'truQuan', 'thongTinKhac'])
             filtered_personnel = [p for p in all_personnel if p.id in selected_ids]
             
-            # Sắp xếp theo cấp bậc (từ cao xuống thấp)
-            filtered_personnel = self._sort_personnel_by_cap_bac(filtered_personnel)
+            # Danh sách từ DatabaseService đã sắp theo cấp bậc (từ cao xuống thấp) rồi họ tên
             
             result = []
             for idx, p in enumerate(filtered_personnel, 1):
@@ -2046,7 +2262,7 @@ class ReportsListFrame(tk.Frame):
         tk.Button(
             btn_container,
             text="📥 Xuất Excel",
-            command=lambda: self.export_excel(get_filtered_data, "ĐẢNG VIÊN THAM GIA DIỄN TẬP NĂM 2025"),
+            command=lambda: self.export_excel(get_filtered_data, "ĐẢNG VIÊN THAM GIA DIỄN TẬP NĂM 2025", columns),
             font=('Segoe UI', 10),
             bg='#2196F3',
             fg='white',
@@ -2183,13 +2399,11 @@ class ReportsListFrame(tk.Frame):
                   'Quan Hệ', 'Đã Cải Tạo')
         
         def get_data():
-            # Tự động lấy quân nhân có đánh dấu "Có người thân tham gia chế độ cũ"
-            all_personnel = self.db.get_all()
-            # Lọc quân nhân có checkbox cdCu được đánh dấu
-            filtered_personnel = [p for p in all_personnel if p.thongTinKhac.cdCu]
+            # Tự động lấy quân nhân có đánh dấu "Có người thân tham gia chế độ cũ" (cột cdCu có index)
+            filtered_personnel = self.db.filter_personnel('cdCu')
             
-            # Sắp xếp theo cấp bậc (từ cao xuống thấp)
-            filtered_personnel = self._sort_personnel_by_cap_bac(filtered_personnel)
+            # Danh sách từ DatabaseService đã sắp theo cấp bậc (từ cao xuống thấp) rồi họ tên
+            nguoi_than_map = self.db.get_nguoi_than_for_many([p.id for p in filtered_personnel])
             
             result = []
             for idx, p in enumerate(filtered_personnel, 1):
@@ -2197,7 +2411,7 @@ class ReportsListFrame(tk.Frame):
                 nguoi_than_info = ""
                 quan_he = ""
                 try:
-                    nguoi_than_list = self.db.get_nguoi_than_by_personnel(p.id)
+                    nguoi_than_list = nguoi_than_map.get(p.id, [])
                     if nguoi_than_list:
                         # Lấy người thân đầu tiên
                         nt = nguoi_than_list[0]
@@ -2344,7 +2558,7 @@ class ReportsListFrame(tk.Frame):
         tk.Button(
             btn_container,
             text="📥 Xuất Excel",
-            command=lambda: self.export_excel(get_filtered_data, "DANH SÁCH QUÂN NHÂN CÓ NGƯỜI THÂN THAM GIA CHẾ ĐỘ CŨ"),
+            command=lambda: self.export_excel(get_filtered_data, "DANH SÁCH QUÂN NHÂN CÓ NGƯỜI THÂN THAM GIA CHẾ ĐỘ CŨ", columns),
             font=('Segoe UI', 10),
             bg='#2196F3',
             fg='white',
@@ -2421,8 +2635,7 @@ class ReportsListFrame(tk.Frame):
             all_personnel = self.db.get_all()
             filtered_personnel = [p for p in all_personnel if p.id in selected_ids]
             
-            # Sắp xếp theo cấp bậc (từ cao xuống thấp)
-            filtered_personnel = self._sort_personnel_by_cap_bac(filtered_personnel)
+            # Danh sách từ DatabaseService đã sắp theo cấp bậc (từ cao xuống thấp) rồi họ tên
             
             result = []
             for idx, p in enumerate(filtered_personnel, 1):
@@ -2601,7 +2814,7 @@ class ReportsListFrame(tk.Frame):
         tk.Button(
             btn_container,
             text="📥 Xuất Excel",
-            command=lambda: self.export_excel(get_filtered_data, "DANH SÁCH TỔ CÔNG TÁC DÂN VẬN"),
+            command=lambda: self.export_excel(get_filtered_data, "DANH SÁCH TỔ CÔNG TÁC DÂN VẬN", columns),
             font=('Segoe UI', 10),
             bg='#2196F3',
             fg='white',
@@ -2823,8 +3036,7 @@ class ReportsListFrame(tk.Frame):
             # Lọc chỉ những quân nhân trong ban chấp hành
             ban_chap_hanh = [p for p in all_personnel if p.id in ban_chap_hanh_ids]
             
-            # Sắp xếp theo cấp bậc (từ cao xuống thấp)
-            ban_chap_hanh = self._sort_personnel_by_cap_bac(ban_chap_hanh)
+            # Danh sách từ DatabaseService đã sắp theo cấp bậc (từ cao xuống thấp) rồi họ tên
             
             result = []
             for idx, p in enumerate(ban_chap_hanh, 1):
@@ -3120,21 +3332,16 @@ class ReportsListFrame(tk.Frame):
                 # Import và gọi hàm xuất
                 from services.export_ban_chap_hanh_chi_doan import to_word_docx_ban_chap_hanh_chi_doan
                 
-                word_content = to_word_docx_ban_chap_hanh_chi_doan(
+                # Tạo file Word trên luồng nền (tham số đã được đọc từ form ở đây)
+                self._export_word_in_background(filename, partial(
+                    to_word_docx_ban_chap_hanh_chi_doan,
                     personnel_list=personnel_list,
                     don_vi=don_vi,
                     tieu_doan=tieu_doan,
                     dia_diem=dia_diem,
                     ten_bi_thu=ten_bi_thu,
                     db_service=self.db
-                )
-                
-                # Lưu file
-                with open(filename, 'wb') as f:
-                    f.write(word_content)
-                
-                messagebox.showinfo("Thành công", f"Đã xuất file Word thành công!\n{filename}")
-                dialog.destroy()
+                ), dialog, message="Đã xuất file Word thành công!")
                 
             except Exception as e:
                 messagebox.showerror("Lỗi", f"Không thể xuất file Word:\n{str(e)}")
@@ -3222,8 +3429,7 @@ class ReportsListFrame(tk.Frame):
                 tree.column(col, width=120)
         
         # Load data - chỉ hiển thị đoàn viên
-        all_personnel = self.db.get_all()
-        doan_vien = [p for p in all_personnel if p.thongTinKhac.doan.ngayVao]
+        doan_vien = self.db.filter_personnel('doanVien')
         ban_chap_hanh_ids = set(self.db.get_ban_chap_hanh_chi_doan())
         
         selected_ids = set()
@@ -3247,38 +3453,7 @@ class ReportsListFrame(tk.Frame):
                                      search_text in (p.capBac or '').lower() or
                                      search_text in (p.chucVu or '').lower()]
             
-            # Sắp xếp theo cấp bậc
-            def _parse_cap_bac_rank(cap_bac: str) -> int:
-                if not cap_bac:
-                    return 0
-                cap_bac = cap_bac.strip().upper()
-                if 'ĐẠI TÁ' in cap_bac: return 100
-                elif 'TRUNG TÁ' in cap_bac: return 90
-                elif 'THIẾU TÁ' in cap_bac: return 80
-                elif 'ĐẠI ÚY' in cap_bac: return 70
-                elif 'THƯỢNG ÚY' in cap_bac: return 60
-                elif 'TRUNG ÚY' in cap_bac: return 50
-                elif 'THIẾU ÚY' in cap_bac: return 40
-                elif 'THƯỢNG SĨ' in cap_bac: return 30
-                elif 'TRUNG SĨ' in cap_bac: return 20
-                elif 'HẠ SĨ' in cap_bac: return 10
-                elif cap_bac.startswith('H'):
-                    try:
-                        return int(cap_bac[1:])
-                    except:
-                        return 0
-                else:
-                    try:
-                        return int(cap_bac) + 10
-                    except:
-                        return 0
-            
-            def sort_key(p):
-                cap_bac_rank = _parse_cap_bac_rank(p.capBac or '')
-                ho_ten = (p.hoTen or '').lower()
-                return (-cap_bac_rank, ho_ten)
-            
-            display_personnel = sorted(display_personnel, key=sort_key)
+            # Danh sách từ DatabaseService đã sắp theo cấp bậc (từ cao xuống thấp) rồi họ tên
             
             for p in display_personnel:
                 is_selected = p.id in selected_ids
@@ -3372,38 +3547,7 @@ class ReportsListFrame(tk.Frame):
                 if ban_chap_hanh_ids:
                     all_personnel = self.db.get_all()
                     ban_chap_hanh = [p for p in all_personnel if p.id in ban_chap_hanh_ids]
-                    # Sắp xếp theo cấp bậc
-                    def _parse_cap_bac_rank(cap_bac: str) -> int:
-                        if not cap_bac:
-                            return 0
-                        cap_bac = cap_bac.strip().upper()
-                        if 'ĐẠI TÁ' in cap_bac: return 100
-                        elif 'TRUNG TÁ' in cap_bac: return 90
-                        elif 'THIẾU TÁ' in cap_bac: return 80
-                        elif 'ĐẠI ÚY' in cap_bac: return 70
-                        elif 'THƯỢNG ÚY' in cap_bac: return 60
-                        elif 'TRUNG ÚY' in cap_bac: return 50
-                        elif 'THIẾU ÚY' in cap_bac: return 40
-                        elif 'THƯỢNG SĨ' in cap_bac: return 30
-                        elif 'TRUNG SĨ' in cap_bac: return 20
-                        elif 'HẠ SĨ' in cap_bac: return 10
-                        elif cap_bac.startswith('H'):
-                            try:
-                                return int(cap_bac[1:])
-                            except:
-                                return 0
-                        else:
-                            try:
-                                return int(cap_bac) + 10
-                            except:
-                                return 0
-                    
-                    def sort_key(p):
-                        cap_bac_rank = _parse_cap_bac_rank(p.capBac or '')
-                        ho_ten = (p.hoTen or '').lower()
-                        return (-cap_bac_rank, ho_ten)
-                    
-                    ban_chap_hanh = sorted(ban_chap_hanh, key=sort_key)
+                    # Danh sách từ DatabaseService đã sắp theo cấp bậc (từ cao xuống thấp) rồi họ tên
                     
                     for idx, p in enumerate(ban_chap_hanh, 1):
                         chuc_vu_doan = self.db.get_chuc_vu_doan(p.id)
@@ -3492,24 +3636,26 @@ class ReportsListFrame(tk.Frame):
         tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
-        # Load data
-        all_personnel = self.db.get_all()
+        # Load data: đọc từ bảng tổng hợp được cập nhật dần, không quét toàn bộ quân nhân
+        counts = self.db.get_tong_hop_counts()
         
-        # Tính toán số liệu
-        dtts = [p for p in all_personnel if p.danToc and p.danToc.strip()]
-        ton_giao = [p for p in all_personnel if p.tonGiao and p.tonGiao.strip()]
-        cd_cu = [p for p in all_personnel if p.thongTinKhac.cdCu]
-        yeu_to_nn = [p for p in all_personnel if p.thongTinKhac.yeuToNN]
-        
-        data = [
-            (1, 'Quân nhân là người đồng bào DTTS', len(dtts), 0, 0, len(dtts), ''),
-            (2, 'Quân nhân theo tôn giáo', len(ton_giao), 0, 0, len(ton_giao), ''),
-            (3, 'Quân nhân có người thân tham gia chế độ cũ', len(cd_cu), 0, 0, len(cd_cu), ''),
-            (4, 'Quân nhân có yếu tố nước ngoài', len(yeu_to_nn), 0, 0, len(yeu_to_nn), ''),
+        lines = [
+            ('dtts', 'Quân nhân là người đồng bào DTTS'),
+            ('tonGiao', 'Quân nhân theo tôn giáo'),
+            ('cdCu', 'Quân nhân có người thân tham gia chế độ cũ'),
+            ('yeuToNN', 'Quân nhân có yếu tố nước ngoài'),
         ]
         
-        for row in data:
-            tree.insert('', tk.END, values=row)
+        for idx, (line, label) in enumerate(lines, 1):
+            entry = counts[line]
+            # Chi tiết theo đơn vị, đơn vị đông nhất trước
+            chi_tiet = '; '.join(
+                f"{don_vi or 'Chưa rõ'}: {count}"
+                for don_vi, count in sorted(entry['donVi'].items(), key=lambda item: (-item[1], item[0]))
+            )
+            tree.insert('', tk.END, values=(
+                idx, label, entry['total'], entry['SQ'], entry['QNCN'], entry['HSQ_CS'], chi_tiet
+            ))
     
     def create_ton_giao_tab(self, parent):
         """Tab Quân nhân theo tôn giáo"""
@@ -3517,12 +3663,12 @@ class ReportsListFrame(tk.Frame):
                   'Đơn Vị', 'Quê Quán', 'Tôn Giáo')
         
         def get_data():
-            all_personnel = self.db.get_all()
+            all_personnel = self.db.get_all(columns=['hoTen', 'ngaySinh', 'nhapNgu', 'capBac', 'chucVu',
+                                                     'donVi', 'queQuan', 'tonGiao'])
             # Lọc chỉ có tôn giáo
             ton_giao = [p for p in all_personnel if p.tonGiao and p.tonGiao.strip()]
             
-            # Sắp xếp theo cấp bậc (từ cao xuống thấp)
-            ton_giao = self._sort_personnel_by_cap_bac(ton_giao)
+            # Danh sách từ DatabaseService đã sắp theo cấp bậc (từ cao xuống thấp) rồi họ tên
             
             result = []
             for idx, p in enumerate(ton_giao, 1):
@@ -3738,20 +3884,15 @@ class ReportsListFrame(tk.Frame):
                 # Import và gọi hàm xuất
                 from services.export_ton_giao import to_word_docx_ton_giao
                 
-                word_content = to_word_docx_ton_giao(
+                # Tạo file Word trên luồng nền (tham số đã được đọc từ form ở đây)
+                self._export_word_in_background(filename, partial(
+                    to_word_docx_ton_giao,
                     personnel_list=ton_giao_personnel,
                     don_vi=don_vi,
                     tieu_doan=tieu_doan,
                     dia_diem=dia_diem,
                     chinh_tri_vien=chinh_tri_vien
-                )
-                
-                # Lưu file
-                with open(filename, 'wb') as f:
-                    f.write(word_content)
-                
-                messagebox.showinfo("Thành công", f"Đã xuất file Word thành công!\n{filename}")
-                dialog.destroy()
+                ), dialog, message="Đã xuất file Word thành công!")
                 
             except Exception as e:
                 messagebox.showerror("Lỗi", f"Không thể xuất file Word:\n{str(e)}")
@@ -3793,8 +3934,8 @@ class ReportsListFrame(tk.Frame):
             all_personnel = self.db.get_all()
             filtered_personnel = [p for p in all_personnel if p.id in selected_ids]
             
-            # Sắp xếp theo cấp bậc (từ cao xuống thấp)
-            filtered_personnel = self._sort_personnel_by_cap_bac(filtered_personnel)
+            # Danh sách từ DatabaseService đã sắp theo cấp bậc (từ cao xuống thấp) rồi họ tên
+            nguoi_than_map = self.db.get_nguoi_than_for_many([p.id for p in filtered_personnel])
             
             result = []
             stt = 1
@@ -3802,7 +3943,7 @@ class ReportsListFrame(tk.Frame):
             for p in filtered_personnel:
                 # Lấy danh sách người thân từ bảng nguoi_than
                 try:
-                    nguoi_than_list = self.db.get_nguoi_than_by_personnel(p.id)
+                    nguoi_than_list = nguoi_than_map.get(p.id, [])
                     
                     if nguoi_than_list:
                         # Gom tất cả mối quan hệ lại, cách nhau bằng '/'
@@ -3965,7 +4106,7 @@ class ReportsListFrame(tk.Frame):
         tk.Button(
             btn_container,
             text="📥 Xuất Excel",
-            command=lambda: self.export_excel(get_filtered_data, "QUÂN NHÂN CÓ NGƯỜI THÂN THAM GIA ĐẢNG PHÁI PHẢN ĐỘNG"),
+            command=lambda: self.export_excel(get_filtered_data, "QUÂN NHÂN CÓ NGƯỜI THÂN THAM GIA ĐẢNG PHÁI PHẢN ĐỘNG", columns),
             font=('Segoe UI', 10),
             bg='#2196F3',
             fg='white',
@@ -4005,12 +4146,11 @@ class ReportsListFrame(tk.Frame):
                   'Đơn Vị', 'Nội Dung Yếu Tố NN', 'Mối Quan Hệ', 'Tên Nước')
         
         def get_data():
-            all_personnel = self.db.get_all()
-            # Lọc chỉ có yếu tố nước ngoài
-            yeu_to_nn = [p for p in all_personnel if p.thongTinKhac.yeuToNN]
+            # Chỉ quân nhân có yếu tố nước ngoài (cột yeuToNN có index)
+            yeu_to_nn = self.db.filter_personnel('yeuToNN', columns=['hoTen', 'ngaySinh', 'capBac', 'chucVu',
+                                                                     'donVi', 'thongTinKhac'])
             
-            # Sắp xếp theo cấp bậc (từ cao xuống thấp)
-            yeu_to_nn = self._sort_personnel_by_cap_bac(yeu_to_nn)
+            # Danh sách từ DatabaseService đã sắp theo cấp bậc (từ cao xuống thấp) rồi họ tên
             
             result = []
             for idx, p in enumerate(yeu_to_nn, 1):
@@ -4094,20 +4234,21 @@ class ReportsListFrame(tk.Frame):
             # Lọc chỉ những quân nhân trong bảo vệ an ninh
             bao_ve_personnel = [p for p in all_personnel if p.id in bao_ve_ids]
             
-            # Sắp xếp theo cấp bậc (từ cao xuống thấp)
-            bao_ve_personnel = self._sort_personnel_by_cap_bac(bao_ve_personnel)
+            # Danh sách từ DatabaseService đã sắp theo cấp bậc (từ cao xuống thấp) rồi họ tên
+            bao_ve_info_map = self.db.get_bao_ve_an_ninh_info_for_many()
+            nguoi_than_map = self.db.get_nguoi_than_for_many([p.id for p in bao_ve_personnel])
             
             result = []
             for idx, p in enumerate(bao_ve_personnel, 1):
                 # Lấy thông tin thời gian vào/ra
-                bao_ve_info = self.db.get_bao_ve_an_ninh_info(p.id)
+                bao_ve_info = bao_ve_info_map.get(p.id, {})
                 thoi_gian_vao = bao_ve_info.get('thoiGianVao', '') or ''
                 thoi_gian_ra = bao_ve_info.get('thoiGianRa', '') or ''
                 
                 # Lấy thông tin người thân
                 gia_dinh_info = []
                 try:
-                    nguoi_than_list = self.db.get_nguoi_than_by_personnel(p.id)
+                    nguoi_than_list = nguoi_than_map.get(p.id, [])
                     
                     bo_de = []
                     me_de = []
@@ -4540,14 +4681,16 @@ class ReportsListFrame(tk.Frame):
         # Load data - tất cả quân nhân
         all_personnel = self.db.get_all()
         bao_ve_ids = set(self.db.get_bao_ve_an_ninh())
+        # Người thân của tất cả quân nhân, tải một lần cho cả dialog (kể cả khi lọc)
+        nguoi_than_map = self.db.get_nguoi_than_for_many()
         
         selected_ids = set()
         
         def get_gia_dinh_info(p):
-            """Lấy thông tin người thân từ database"""
+            """Lấy thông tin người thân (đã tải sẵn)"""
             gia_dinh_info = []
             try:
-                nguoi_than_list = self.db.get_nguoi_than_by_personnel(p.id)
+                nguoi_than_list = nguoi_than_map.get(p.id, [])
                 
                 bo_de = []
                 me_de = []
@@ -4688,9 +4831,10 @@ class ReportsListFrame(tk.Frame):
         time_data = {}  # {personnel_id: {'vao': '', 'ra': ''}}
         
         # Load thời gian hiện tại cho các quân nhân đã có
+        bao_ve_info_map = self.db.get_bao_ve_an_ninh_info_for_many()
         for p in all_personnel:
             if p.id in bao_ve_ids:
-                bao_ve_info = self.db.get_bao_ve_an_ninh_info(p.id)
+                bao_ve_info = bao_ve_info_map.get(p.id, {})
                 time_data[p.id] = {
                     'vao': bao_ve_info.get('thoiGianVao', '') or '',
                     'ra': bao_ve_info.get('thoiGianRa', '') or ''
@@ -5189,7 +5333,9 @@ class ReportsListFrame(tk.Frame):
                 # Import và gọi hàm xuất
                 from services.export_bao_ve_an_ninh import to_word_docx_bao_ve_an_ninh
                 
-                word_content = to_word_docx_bao_ve_an_ninh(
+                # Tạo file Word trên luồng nền (tham số đã được đọc từ form ở đây)
+                self._export_word_in_background(filename, partial(
+                    to_word_docx_bao_ve_an_ninh,
                     personnel_list=personnel_list,
                     don_vi=don_vi,
                     tieu_doan=tieu_doan,
@@ -5200,14 +5346,7 @@ class ReportsListFrame(tk.Frame):
                     nam_bo_sung=nam_bo_sung,
                     chinh_tri_vien=chinh_tri_vien,
                     db_service=self.db
-                )
-                
-                # Lưu file
-                with open(filename, 'wb') as f:
-                    f.write(word_content)
-                
-                messagebox.showinfo("Thành công", f"Đã xuất file Word thành công!\n{filename}")
-                dialog.destroy()
+                ), dialog, message="Đã xuất file Word thành công!")
                 
             except Exception as e:
                 messagebox.showerror("Lỗi", f"Không thể xuất file Word:\n{str(e)}")
@@ -5328,14 +5467,12 @@ class ReportsListFrame(tk.Frame):
         
         # Load data - chỉ hiển thị quân nhân có người thân
         all_personnel = self.db.get_all()
+        # Số người thân của từng quân nhân (một truy vấn)
+        nguoi_than_counts = self.db.count_nguoi_than_for_many()
         
         def has_nguoi_than(p):
             """Kiểm tra quân nhân có người thân không"""
-            try:
-                nguoi_than_list = self.db.get_nguoi_than_by_personnel(p.id)
-                return len(nguoi_than_list) > 0
-            except:
-                return False
+            return p.id in nguoi_than_counts
         
         # Chỉ hiển thị quân nhân có người thân
         filtered_personnel = [p for p in all_personnel if has_nguoi_than(p)]
@@ -5358,11 +5495,7 @@ class ReportsListFrame(tk.Frame):
                 item_text = '✓' if is_selected else ''
                 
                 # Đếm số người thân
-                try:
-                    nguoi_than_list = self.db.get_nguoi_than_by_personnel(person.id)
-                    nguoi_than_count = len(nguoi_than_list)
-                except:
-                    nguoi_than_count = 0
+                nguoi_than_count = nguoi_than_counts.get(person.id, 0)
                 
                 item = tree.insert('', 'end', 
                                   text=item_text,
@@ -5521,15 +5654,6 @@ class ReportsListFrame(tk.Frame):
             tk.Entry(form_frame, textvariable=chinh_tri_vien_var, width=40, font=('Segoe UI', 10)).pack(anchor=tk.W, pady=2)
             
             def save_and_export():
-                word_bytes = to_word_docx_nguoi_than_che_do_cu(
-                    personnel_list,
-                    tieu_doan=tieu_doan_var.get(),
-                    dai_doi=dai_doi_var.get(),
-                    dia_diem=dia_diem_var.get(),
-                    chinh_tri_vien=chinh_tri_vien_var.get(),
-                    db_service=self.db
-                )
-                
                 filename = filedialog.asksaveasfilename(
                     defaultextension=".docx",
                     filetypes=[("Word documents", "*.docx"), ("All files", "*.*")],
@@ -5537,10 +5661,16 @@ class ReportsListFrame(tk.Frame):
                 )
                 
                 if filename:
-                    with open(filename, 'wb') as f:
-                        f.write(word_bytes)
-                    messagebox.showinfo("Thành công", f"Đã xuất file Word:\n{filename}")
-                    dialog.destroy()
+                    # Tạo file Word trên luồng nền (tham số đã được đọc từ form ở đây)
+                    self._export_word_in_background(filename, partial(
+                        to_word_docx_nguoi_than_che_do_cu,
+                        personnel_list,
+                        tieu_doan=tieu_doan_var.get(),
+                        dai_doi=dai_doi_var.get(),
+                        dia_diem=dia_diem_var.get(),
+                        chinh_tri_vien=chinh_tri_vien_var.get(),
+                        db_service=self.db
+                    ), dialog)
             
             btn_frame = tk.Frame(dialog, bg='#FAFAFA', height=60)
             btn_frame.pack(fill=tk.X, padx=10, pady=10)
@@ -5631,16 +5761,6 @@ class ReportsListFrame(tk.Frame):
             
             def save_and_export():
                 try:
-                    word_bytes = to_word_docx_dang_phai_phan_dong(
-                        personnel_list=personnel_list,
-                        tieu_doan=tieu_doan_var.get(),
-                        dai_doi=dai_doi_var.get(),
-                        dia_diem=dia_diem_var.get(),
-                        nam=nam_var.get(),
-                        chinh_tri_vien=chinh_tri_vien_var.get(),
-                        db_service=self.db
-                    )
-                    
                     filename = filedialog.asksaveasfilename(
                         defaultextension=".docx",
                         filetypes=[("Word documents", "*.docx"), ("All files", "*.*")],
@@ -5648,10 +5768,17 @@ class ReportsListFrame(tk.Frame):
                     )
                     
                     if filename:
-                        with open(filename, 'wb') as f:
-                            f.write(word_bytes)
-                        messagebox.showinfo("Thành công", f"Đã xuất file Word:\n{filename}")
-                        dialog.destroy()
+                        # Tạo file Word trên luồng nền (tham số đã được đọc từ form ở đây)
+                        self._export_word_in_background(filename, partial(
+                            to_word_docx_dang_phai_phan_dong,
+                            personnel_list=personnel_list,
+                            tieu_doan=tieu_doan_var.get(),
+                            dai_doi=dai_doi_var.get(),
+                            dia_diem=dia_diem_var.get(),
+                            nam=nam_var.get(),
+                            chinh_tri_vien=chinh_tri_vien_var.get(),
+                            db_service=self.db
+                        ), dialog)
                 except Exception as e:
                     messagebox.showerror("Lỗi", f"Không thể xuất file Word:\n{str(e)}")
             
@@ -5750,16 +5877,6 @@ class ReportsListFrame(tk.Frame):
             tk.Entry(form_frame, textvariable=chinh_tri_vien_var, width=40, font=('Segoe UI', 10)).pack(anchor=tk.W, pady=2)
             
             def save_and_export():
-                word_bytes = to_word_docx_to_dan_van(
-                    personnel_list,
-                    tieu_doan=tieu_doan_var.get(),
-                    don_vi=dai_doi_var.get(),  # Sửa dai_doi thành don_vi
-                    dia_diem=dia_diem_var.get(),
-                    ngay_thang_nam=ngay_thang_nam_var.get(),
-                    chinh_tri_vien=chinh_tri_vien_var.get(),
-                    db_service=self.db
-                )
-                
                 filename = filedialog.asksaveasfilename(
                     defaultextension=".docx",
                     filetypes=[("Word documents", "*.docx"), ("All files", "*.*")],
@@ -5767,10 +5884,17 @@ class ReportsListFrame(tk.Frame):
                 )
                 
                 if filename:
-                    with open(filename, 'wb') as f:
-                        f.write(word_bytes)
-                    messagebox.showinfo("Thành công", f"Đã xuất file Word:\n{filename}")
-                    dialog.destroy()
+                    # Tạo file Word trên luồng nền (tham số đã được đọc từ form ở đây)
+                    self._export_word_in_background(filename, partial(
+                        to_word_docx_to_dan_van,
+                        personnel_list,
+                        tieu_doan=tieu_doan_var.get(),
+                        don_vi=dai_doi_var.get(),  # Sửa dai_doi thành don_vi
+                        dia_diem=dia_diem_var.get(),
+                        ngay_thang_nam=ngay_thang_nam_var.get(),
+                        chinh_tri_vien=chinh_tri_vien_var.get(),
+                        db_service=self.db
+                    ), dialog)
             
             btn_frame = tk.Frame(main_container, bg='#FAFAFA', height=70)
             btn_frame.pack(fill=tk.X, padx=10, pady=10, side=tk.BOTTOM)
@@ -5861,16 +5985,6 @@ class ReportsListFrame(tk.Frame):
             
             def save_and_export():
                 try:
-                    word_bytes = to_word_docx_dang_phai_phan_dong(
-                        personnel_list=personnel_list,
-                        tieu_doan=tieu_doan_var.get(),
-                        dai_doi=dai_doi_var.get(),
-                        dia_diem=dia_diem_var.get(),
-                        nam=nam_var.get(),
-                        chinh_tri_vien=chinh_tri_vien_var.get(),
-                        db_service=self.db
-                    )
-                    
                     filename = filedialog.asksaveasfilename(
                         defaultextension=".docx",
                         filetypes=[("Word documents", "*.docx"), ("All files", "*.*")],
@@ -5878,10 +5992,17 @@ class ReportsListFrame(tk.Frame):
                     )
                     
                     if filename:
-                        with open(filename, 'wb') as f:
-                            f.write(word_bytes)
-                        messagebox.showinfo("Thành công", f"Đã xuất file Word:\n{filename}")
-                        dialog.destroy()
+                        # Tạo file Word trên luồng nền (tham số đã được đọc từ form ở đây)
+                        self._export_word_in_background(filename, partial(
+                            to_word_docx_dang_phai_phan_dong,
+                            personnel_list=personnel_list,
+                            tieu_doan=tieu_doan_var.get(),
+                            dai_doi=dai_doi_var.get(),
+                            dia_diem=dia_diem_var.get(),
+                            nam=nam_var.get(),
+                            chinh_tri_vien=chinh_tri_vien_var.get(),
+                            db_service=self.db
+                        ), dialog)
                 except Exception as e:
                     messagebox.showerror("Lỗi", f"Không thể xuất file Word:\n{str(e)}")
             
@@ -6220,9 +6341,7 @@ class ReportsListFrame(tk.Frame):
                 tree.column(col, width=120)
         
         # Load data - chỉ lấy đảng viên
-        all_personnel = self.db.get_all()
-        dang_vien = [p for p in all_personnel 
-                     if p.thongTinKhac.dang.ngayVao or p.thongTinKhac.dang.ngayChinhThuc]
+        dang_vien = self.db.filter_personnel('dangVien')
         
         def load_tree_data():
             """Load dữ liệu vào tree"""
@@ -6401,15 +6520,6 @@ class ReportsListFrame(tk.Frame):
             
             def save_and_export():
                 try:
-                    word_bytes = to_word_docx_dang_vien_dien_tap(
-                        personnel_list=personnel_list,
-                        tieu_doan=tieu_doan_var.get(),
-                        dai_doi=dai_doi_var.get(),
-                        dia_diem=dia_diem_var.get(),
-                        nam=nam_var.get(),
-                        db_service=self.db
-                    )
-                    
                     filename = filedialog.asksaveasfilename(
                         defaultextension=".docx",
                         filetypes=[("Word documents", "*.docx"), ("All files", "*.*")],
@@ -6417,10 +6527,16 @@ class ReportsListFrame(tk.Frame):
                     )
                     
                     if filename:
-                        with open(filename, 'wb') as f:
-                            f.write(word_bytes)
-                        messagebox.showinfo("Thành công", f"Đã xuất file Word:\n{filename}")
-                        dialog.destroy()
+                        # Tạo file Word trên luồng nền (tham số đã được đọc từ form ở đây)
+                        self._export_word_in_background(filename, partial(
+                            to_word_docx_dang_vien_dien_tap,
+                            personnel_list=personnel_list,
+                            tieu_doan=tieu_doan_var.get(),
+                            dai_doi=dai_doi_var.get(),
+                            dia_diem=dia_diem_var.get(),
+                            nam=nam_var.get(),
+                            db_service=self.db
+                        ), dialog)
                 except Exception as e:
                     messagebox.showerror("Lỗi", f"Không thể xuất file Word:\n{str(e)}")
             
@@ -6513,16 +6629,6 @@ class ReportsListFrame(tk.Frame):
             
             def save_and_export():
                 try:
-                    word_bytes = to_word_docx_dang_phai_phan_dong(
-                        personnel_list=personnel_list,
-                        tieu_doan=tieu_doan_var.get(),
-                        dai_doi=dai_doi_var.get(),
-                        dia_diem=dia_diem_var.get(),
-                        nam=nam_var.get(),
-                        chinh_tri_vien=chinh_tri_vien_var.get(),
-                        db_service=self.db
-                    )
-                    
                     filename = filedialog.asksaveasfilename(
                         defaultextension=".docx",
                         filetypes=[("Word documents", "*.docx"), ("All files", "*.*")],
@@ -6530,10 +6636,17 @@ class ReportsListFrame(tk.Frame):
                     )
                     
                     if filename:
-                        with open(filename, 'wb') as f:
-                            f.write(word_bytes)
-                        messagebox.showinfo("Thành công", f"Đã xuất file Word:\n{filename}")
-                        dialog.destroy()
+                        # Tạo file Word trên luồng nền (tham số đã được đọc từ form ở đây)
+                        self._export_word_in_background(filename, partial(
+                            to_word_docx_dang_phai_phan_dong,
+                            personnel_list=personnel_list,
+                            tieu_doan=tieu_doan_var.get(),
+                            dai_doi=dai_doi_var.get(),
+                            dia_diem=dia_diem_var.get(),
+                            nam=nam_var.get(),
+                            chinh_tri_vien=chinh_tri_vien_var.get(),
+                            db_service=self.db
+                        ), dialog)
                 except Exception as e:
                     messagebox.showerror("Lỗi", f"Không thể xuất file Word:\n{str(e)}")
             
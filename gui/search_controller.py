@@ -0,0 +1,127 @@
+"""
+Bộ điều khiển ô tìm kiếm: trì hoãn theo lần gõ phím và lọc dần trên kết quả trước
+"""
+
+from typing import Any, Callable, Hashable, Iterable, List, Optional
+
+from utils.text_utils import fold_vietnamese
+
+
+class SearchController:
+    """
+    Lọc một danh sách theo ô tìm kiếm (StringVar) mà không truy vấn lại database mỗi lần gõ phím:
+
+    - Trì hoãn (debounce): chỉ lọc khi người dùng ngừng gõ DELAY_MS mili giây.
+    - Giữ dữ liệu gốc (fetch) trong bộ nhớ; chỉ gọi lại fetch khi version() đổi
+      (ví dụ DatabaseService.data_version) hoặc sau invalidate().
+    - Khi chuỗi tìm kiếm mới nối dài chuỗi trước ("ngu" -> "nguy") thì chỉ lọc trong kết quả trước.
+
+    Một hàng khớp khi chuỗi tìm kiếm (đã bỏ dấu) nằm trong row_text(hàng), hoặc khi row_id(hàng)
+    nằm trong match_ids(chuỗi tìm kiếm), ví dụ DatabaseService.full_text_search_ids
+    (một truy vấn cho mỗi lần lọc, không tải cả chỉ mục full-text).
+    """
+
+    DELAY_MS = 200
+
+    def __init__(self, widget, search_var, fetch: Callable[[], List[Any]],
+                 on_result: Callable[[List[Any]], None],
+                 row_text: Optional[Callable[[Any], str]] = None,
+                 row_id: Optional[Callable[[Any], Optional[Hashable]]] = None,
+                 match_ids: Optional[Callable[[str], Iterable[Hashable]]] = None,
+                 version: Optional[Callable[[], Hashable]] = None,
+                 delay_ms: Optional[int] = None):
+        """
+        Args:
+            widget: Widget dùng after() để trì hoãn
+            search_var: StringVar của ô tìm kiếm (tự gắn trace)
+            fetch: Hàm lấy dữ liệu gốc (chưa lọc)
+            on_result: Nhận danh sách đã lọc sau mỗi lần gõ
+            row_text: Hàm hàng -> chuỗi để tìm chuỗi con (None = không tìm chuỗi con)
+            row_id: Hàm hàng -> ID để so với match_ids
+            match_ids: Hàm chuỗi tìm kiếm -> các ID khớp thêm (None = chỉ tìm chuỗi con)
+            version: Hàm trả về mã phiên bản dữ liệu gốc; đổi thì fetch lại
+            delay_ms: Thời gian trì hoãn (mặc định DELAY_MS)
+        """
+        self.widget = widget
+        self.search_var = search_var
+        self.fetch = fetch
+        self.on_result = on_result
+        self.row_text = row_text
+        self.row_id = row_id
+        self.match_ids = match_ids
+        self.version = version
+        self.delay_ms = self.DELAY_MS if delay_ms is None else delay_ms
+
+        self._base: Optional[List[Any]] = None
+        self._base_version = None
+        self._texts: List[str] = []  # Chuỗi hàng đã bỏ dấu theo chỉ số trong _base
+        self._ids: List[Optional[Hashable]] = []
+        self._last_query: Optional[str] = None
+        self._last_indices: List[int] = []
+        self._pending = None
+
+        search_var.trace('w', lambda *args: self.schedule())
+
+    # ========== API ==========
+
+    def schedule(self):
+        """Lọc lại sau DELAY_MS (gọi lại trong thời gian chờ thì tính lại từ đầu)"""
+        if self._pending is not None:
+            self.widget.after_cancel(self._pending)
+        self._pending = self.widget.after(self.delay_ms, self.apply)
+
+    def apply(self):
+        """Lọc ngay và gửi kết quả cho on_result"""
+        if self._pending is not None:
+            self.widget.after_cancel(self._pending)
+            self._pending = None
+        self.on_result(self.results())
+
+    def results(self) -> List[Any]:
+        """Danh sách đã lọc theo chuỗi tìm kiếm hiện tại"""
+        self._ensure_base()
+        query = self.normalize(self.search_var.get())
+        if not query:
+            self._last_query = None
+            return list(self._base)
+
+        if self._last_query is not None and query.startswith(self._last_query):
+            candidates = self._last_indices
+        else:
+            candidates = range(len(self._base))
+
+        matched = set(self.match_ids(query)) if self.match_ids else set()
+        texts = self._texts
+        ids = self._ids
+        indices = [
+            index for index in candidates
+            if query in texts[index] or (matched and ids[index] in matched)
+        ]
+
+        self._last_query = query
+        self._last_indices = indices
+        return [self._base[index] for index in indices]
+
+    def invalidate(self):
+        """Bỏ dữ liệu gốc đang giữ (lần lọc sau sẽ fetch lại)"""
+        self._base = None
+        self._last_query = None
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Chuỗi tìm kiếm đã bỏ dấu, chữ thường, gộp khoảng trắng"""
+        return ' '.join(fold_vietnamese(query).split())
+
+    # ========== Dữ liệu gốc ==========
+
+    def _ensure_base(self):
+        version = self.version() if self.version else None
+        if self._base is not None and version == self._base_version:
+            return
+
+        rows = self.fetch()
+        self._base = rows
+        self._base_version = version
+        self._texts = [self.normalize(self.row_text(row)) if self.row_text else '' for row in rows]
+        self._ids = [self.row_id(row) if self.row_id else None for row in rows]
+        self._last_query = None
@@ -0,0 +1,237 @@
+"""
+Chạy truy vấn database và xuất file trên luồng nền, trả kết quả về luồng giao diện Tkinter
+"""
+
+import queue
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TaskCancelled(Exception):
+    """Công việc đã bị hủy (ném ra từ Task.check_cancelled)"""
+
+
+class Task:
+    """
+    Một công việc chạy nền. Hàm công việc nhận Task làm tham số đầu tiên để
+    báo tiến độ (report_progress) và kiểm tra hủy (check_cancelled).
+    """
+    
+    def __init__(self, executor: 'TaskExecutor', key: Optional[Hashable], description: str):
+        self.executor = executor
+        self.key = key
+        self.description = description
+        self.future = None
+        self._cancel_event = threading.Event()
+        self._on_done: List[Callable] = []
+        self._on_error: List[Callable] = []
+        self._on_progress: List[Callable] = []
+    
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+    
+    def cancel(self):
+        """Yêu cầu hủy: công việc chưa chạy sẽ bị bỏ, công việc đang chạy dừng ở lần check_cancelled() kế tiếp"""
+        self._cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+        self.executor._post(('cancelled', self, None))
+    
+    def check_cancelled(self):
+        """Gọi định kỳ trong hàm công việc; ném TaskCancelled nếu đã bị hủy"""
+        if self._cancel_event.is_set():
+            raise TaskCancelled()
+    
+    def report_progress(self, value: Optional[float] = None, message: str = ''):
+        """
+        Báo tiến độ từ luồng nền (an toàn với Tkinter: callback chạy trên luồng giao diện)
+        Args:
+            value: Tỷ lệ hoàn thành 0..1 (None = không xác định)
+            message: Mô tả ngắn
+        """
+        self.executor._post(('progress', self, (value, message)))
+
+
+class TaskExecutor:
+    """
+    Thread pool cho các công việc nặng (truy vấn, xuất Word/PDF/CSV) cùng hàng đợi kết quả
+    được luồng giao diện đọc bằng after(). Mọi callback (on_done, on_error, on_progress,
+    on_status) đều chạy trên luồng giao diện.
+    
+    Công việc có cùng key được gộp: gửi lại khi công việc trước chưa xong thì không chạy lần nữa,
+    callback mới được gắn vào công việc đang chạy.
+    """
+    
+    POLL_MS = 50
+    MAX_WORKERS = 2
+    
+    def __init__(self, root, max_workers: Optional[int] = None,
+                 on_status: Optional[Callable[[bool, str, Optional[float]], None]] = None):
+        """
+        Args:
+            root: Cửa sổ Tk (dùng after() để đọc hàng đợi kết quả)
+            max_workers: Số luồng nền
+            on_status: Callback (đang bận, mô tả, tiến độ) để hiển thị chỉ báo bận
+        """
+        self.root = root
+        self.on_status = on_status
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or self.MAX_WORKERS,
+                                        thread_name_prefix='task')
+        self._results: queue.Queue = queue.Queue()
+        self._active: List[Task] = []  # Chỉ truy cập trên luồng giao diện
+        self._by_key: Dict[Hashable, Task] = {}
+        self._polling = False
+        self._closed = False
+    
+    # ========== API ==========
+    
+    def submit(self, func: Callable[..., Any], *args,
+               on_done: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[Exception], None]] = None,
+               on_progress: Optional[Callable[[Optional[float], str], None]] = None,
+               key: Optional[Hashable] = None, description: str = 'Đang xử lý...',
+               **kwargs) -> Task:
+        """
+        Chạy func(task, *args, **kwargs) trên luồng nền. Phải gọi từ luồng giao diện.
+        Args:
+            on_done: Nhận kết quả khi thành công
+            on_error: Nhận exception khi lỗi (mặc định ghi log)
+            on_progress: Nhận (tiến độ, mô tả) mỗi lần task.report_progress()
+            key: Khóa gộp các yêu cầu trùng nhau (None = không gộp)
+            description: Mô tả hiển thị trên chỉ báo bận
+        """
+        existing = self._by_key.get(key) if key is not None else None
+        if existing is not None and not existing.cancelled:
+            task = existing
+        else:
+            task = Task(self, key, description)
+            if key is not None:
+                self._by_key[key] = task
+            self._active.append(task)
+            task.future = self._pool.submit(self._run, task, func, args, kwargs)
+        
+        if on_done:
+            task._on_done.append(on_done)
+        if on_error:
+            task._on_error.append(on_error)
+        if on_progress:
+            task._on_progress.append(on_progress)
+        
+        self._update_status()
+        self._schedule_poll()
+        return task
+    
+    def cancel_all(self):
+        """Hủy mọi công việc đang chờ/đang chạy"""
+        for task in list(self._active):
+            task.cancel()
+    
+    @property
+    def busy(self) -> bool:
+        return bool(self._active)
+    
+    def shutdown(self):
+        """Hủy các công việc và dừng thread pool (gọi khi đóng ứng dụng)"""
+        self._closed = True
+        self.cancel_all()
+        self._pool.shutdown(wait=False)
+    
+    # ========== Luồng nền ==========
+    
+    def _run(self, task: Task, func, args, kwargs):
+        if task.cancelled:
+            return
+        try:
+            result = func(task, *args, **kwargs)
+        except TaskCancelled:
+            return
+        except Exception as e:
+            logger.error(f"Lỗi trong công việc nền '{task.description}': {e}", exc_info=True)
+            self._post(('error', task, e))
+        else:
+            self._post(('done', task, result))
+    
+    def _post(self, message):
+        self._results.put(message)
+    
+    # ========== Luồng giao diện ==========
+    
+    def _schedule_poll(self):
+        if not self._polling and not self._closed:
+            self._polling = True
+            self.root.after(self.POLL_MS, self._poll)
+    
+    def _poll(self):
+        """Xử lý kết quả trong hàng đợi; chỉ tiếp tục poll khi còn công việc"""
+        self._polling = False
+        finished = False
+        while True:
+            try:
+                kind, task, payload = self._results.get_nowait()
+            except queue.Empty:
+                break
+            
+            if kind == 'progress':
+                if task in self._active and not task.cancelled:
+                    for callback in task._on_progress:
+                        self._call(callback, *payload)
+                    self._update_status(*payload)
+                continue
+            
+            if task not in self._active:
+                continue  # Đã kết thúc (ví dụ hủy rồi mới có kết quả)
+            self._finish(task)
+            finished = True
+            if kind == 'done' and not task.cancelled:
+                for callback in task._on_done:
+                    self._call(callback, payload)
+            elif kind == 'error' and not task.cancelled:
+                for callback in task._on_error:
+                    self._call(callback, payload)
+        
+        if finished:
+            self._update_status()
+        if self._active:
+            self._schedule_poll()
+    
+    def _finish(self, task: Task):
+        self._active.remove(task)
+        if task.key is not None and self._by_key.get(task.key) is task:
+            del self._by_key[task.key]
+    
+    @staticmethod
+    def _call(callback, *args):
+        try:
+            callback(*args)
+        except Exception as e:
+            logger.error(f"Lỗi trong callback công việc nền: {e}", exc_info=True)
+    
+    def _update_status(self, progress: Optional[float] = None, message: str = ''):
+        if not self.on_status:
+            return
+        if self._active:
+            task = self._active[0]
+            text = message or task.description
+            if len(self._active) > 1:
+                text += f" (+{len(self._active) - 1})"
+            self._call(self.on_status, True, text, progress)
+        else:
+            self._call(self.on_status, False, '', None)
+
+
+def get_task_executor(widget) -> TaskExecutor:
+    """
+    TaskExecutor dùng chung của cửa sổ chứa widget (MainWindow tạo sẵn kèm chỉ báo bận;
+    frame dùng riêng lẻ thì tạo mới không có chỉ báo)
+    """
+    root = widget.nametowidget('.')
+    executor = getattr(root, 'task_executor', None)
+    if executor is None:
+        executor = TaskExecutor(root)
+        root.task_executor = executor
+    return executor
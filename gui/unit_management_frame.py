@@ -12,6 +12,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from services.database import DatabaseService
 from models.unit import Unit
 from gui.theme import MILITARY_COLORS
+from gui.task_executor import get_task_executor
 
 
 class UnitManagementFrame(tk.Frame):
@@ -332,21 +333,6 @@ class UnitManagementFrame(tk.Frame):
         self.status_label.pack(pady=5, padx=10)
         
     
-    def _count_personnel_recursive(self, unit_id, child_map):
-        """Đếm số quân nhân trong đơn vị và tất cả đơn vị con (đệ quy)"""
-        unit = self.db.get_unit_by_id(unit_id)
-        if not unit:
-            return 0
-        
-        count = len(unit.personnelIds) if unit.personnelIds else 0
-        
-        # Cộng dồn từ các đơn vị con
-        if unit_id in child_map:
-            for child_unit in child_map[unit_id]:
-                count += self._count_personnel_recursive(child_unit.id, child_map)
-        
-        return count
-    
     def load_units(self):
         """Load danh sách đơn vị với cây phân cấp (đại đội/trung đội -> tổ, xe, trung đội...)"""
         # Xóa dữ liệu cũ
@@ -356,6 +342,11 @@ class UnitManagementFrame(tk.Frame):
         # Load từ database
         try:
             all_units = self.db.get_all_units()
+            # Số quân nhân trực tiếp và cộng dồn của mọi đơn vị (một truy vấn)
+            headcounts = self.db.get_unit_headcounts()
+            
+            def direct_count(unit):
+                return headcounts.get(unit.id, {}).get('direct', 0)
             
             # Tách đơn vị cha (đại đội, trung đội) và tất cả đơn vị con (tổ, xe, trung đội...)
             parent_units = [u for u in all_units if u.loai in ['dai_doi', 'trung_doi'] and not u.parentId]
@@ -377,8 +368,8 @@ class UnitManagementFrame(tk.Frame):
             # Load đơn vị cha và tất cả đơn vị con
             stt = 1
             for parent_unit in parent_units:
-                # Tính tổng số quân nhân (bao gồm cả đơn vị con)
-                total_personnel = self._count_personnel_recursive(parent_unit.id, child_map)
+                # Tổng số quân nhân (bao gồm cả đơn vị con)
+                total_personnel = headcounts.get(parent_unit.id, {}).get('total', 0)
                 
                 # Thêm đơn vị cha
                 parent_item = self.tree.insert('', tk.END, iid=parent_unit.id, 
@@ -404,7 +395,7 @@ class UnitManagementFrame(tk.Frame):
                                 '',  # STT để trống cho đơn vị con
                                 child_unit.ten,
                                 self._get_loai_name(child_unit.loai),
-                                len(child_unit.personnelIds),
+                                direct_count(child_unit),
                                 child_unit.ghiChu or ''
                             ))
                     # Tự động mở rộng (expand) đơn vị cha để hiển thị đơn vị con
@@ -420,7 +411,7 @@ class UnitManagementFrame(tk.Frame):
                         stt,
                         unit.ten,
                         self._get_loai_name(unit.loai),
-                        len(unit.personnelIds),
+                        direct_count(unit),
                         unit.ghiChu or ''
                     ))
                 stt += 1
@@ -435,7 +426,7 @@ class UnitManagementFrame(tk.Frame):
                         stt,
                         unit.ten,
                         self._get_loai_name(unit.loai),
-                        len(unit.personnelIds),
+                        direct_count(unit),
                         unit.ghiChu or ''
                     ))
                 stt += 1
@@ -470,39 +461,13 @@ class UnitManagementFrame(tk.Frame):
         
         # Load quân nhân trong đơn vị
         try:
-            personnel_list = []
-            
-            # Nếu là đại đội, lấy quân nhân từ đại đội và tất cả đơn vị con
+            # Nếu là đại đội, lấy quân nhân từ đại đội và tất cả đơn vị con (một truy vấn, không trùng lặp)
             if unit.loai == 'dai_doi':
-                # Lấy quân nhân trực tiếp từ đại đội
-                personnel_list.extend(self.db.get_personnel_by_unit(unit_id))
-                
-                # Lấy tất cả đơn vị con (trung đội, xe, tổ...)
-                child_units = self.db.get_units_by_parent_id(unit_id)
-                for child_unit in child_units:
-                    # Lấy quân nhân từ đơn vị con
-                    child_personnel = self.db.get_personnel_by_unit(child_unit.id)
-                    personnel_list.extend(child_personnel)
-                    
-                    # Nếu đơn vị con có đơn vị con nữa (ví dụ: trung đội có tổ)
-                    if child_unit.loai in ['trung_doi', 'xe']:
-                        grandchild_units = self.db.get_units_by_parent_id(child_unit.id)
-                        for grandchild_unit in grandchild_units:
-                            grandchild_personnel = self.db.get_personnel_by_unit(grandchild_unit.id)
-                            personnel_list.extend(grandchild_personnel)
+                personnel_list = self.db.get_personnel_in_subtree(unit_id)
             else:
                 # Nếu không phải đại đội, chỉ lấy quân nhân trực tiếp
                 personnel_list = self.db.get_personnel_by_unit(unit_id)
             
-            # Loại bỏ trùng lặp (nếu có)
-            seen_ids = set()
-            unique_personnel = []
-            for person in personnel_list:
-                if person.id not in seen_ids:
-                    seen_ids.add(person.id)
-                    unique_personnel.append(person)
-            personnel_list = unique_personnel
-            
             if not personnel_list:
                 self.personnel_info_label.config(
                     text=f"Đơn vị '{unit.ten}' chưa có quân nhân nào"
@@ -578,17 +543,8 @@ class UnitManagementFrame(tk.Frame):
             return
         
         try:
-            # Cập nhật unitId của quân nhân về None
-            for person_id in person_ids:
-                person = self.db.get_by_id(person_id)
-                if person:
-                    person.unitId = None
-                    self.db.update(person)
-            
-            # Cập nhật unit.personnelIds (nếu có)
-            if hasattr(unit, 'personnelIds') and unit.personnelIds:
-                unit.personnelIds = [pid for pid in unit.personnelIds if pid not in person_ids]
-                self.db.update_unit(unit)
+            # Xóa khỏi đơn vị và bỏ unitId của quân nhân
+            self.db.remove_personnel_from_unit(unit_id, person_ids)
             
             self.status_label.config(
                 text=f"✅ Đã xóa {len(person_ids)} quân nhân khỏi đơn vị '{unit.ten}'",
@@ -928,20 +884,11 @@ class UnitManagementFrame(tk.Frame):
                 return
             
             try:
-                # Xóa quân nhân khỏi tổ cũ
-                current_unit.personnelIds = [pid for pid in current_unit.personnelIds if pid not in person_ids]
-                self.db.update_unit(current_unit)
-                
-                # Thêm quân nhân vào tổ mới
-                target_unit.personnelIds = list(set(target_unit.personnelIds + person_ids))
-                self.db.update_unit(target_unit)
-                
-                # Cập nhật unitId cho quân nhân
-                for person_id in person_ids:
-                    person = self.db.get_by_id(person_id)
-                    if person:
-                        person.unitId = target_unit_id
-                        self.db.update(person)
+                # Chuyển quân nhân sang tổ mới và cập nhật unitId
+                with self.db.connection():
+                    self.db.move_personnel_to_unit(current_unit_id, target_unit_id, person_ids)
+                    # Quân nhân chưa thuộc tổ cũ (dữ liệu cũ lệch) vẫn được thêm vào tổ mới
+                    self.db.add_personnel_to_unit(target_unit_id, person_ids)
                 
                 # Reload danh sách
                 self.load_units()
@@ -1513,39 +1460,7 @@ class UnitManagementFrame(tk.Frame):
                                      search_text in (p.capBac or '').lower() or
                                      search_text in (p.chucVu or '').lower()]
             
-            # Sắp xếp theo cấp bậc (từ cao xuống thấp)
-            def _parse_cap_bac_rank(cap_bac: str) -> int:
-                """Parse cấp bậc thành số để so sánh"""
-                if not cap_bac:
-                    return 0
-                cap_bac = cap_bac.strip().upper()
-                if 'ĐẠI TÁ' in cap_bac: return 100
-                elif 'TRUNG TÁ' in cap_bac: return 90
-                elif 'THIẾU TÁ' in cap_bac: return 80
-                elif 'ĐẠI ÚY' in cap_bac: return 70
-                elif 'THƯỢNG ÚY' in cap_bac: return 60
-                elif 'TRUNG ÚY' in cap_bac: return 50
-                elif 'THIẾU ÚY' in cap_bac: return 40
-                elif 'THƯỢNG SĨ' in cap_bac: return 30
-                elif 'TRUNG SĨ' in cap_bac: return 20
-                elif 'HẠ SĨ' in cap_bac: return 10
-                elif cap_bac.startswith('H'):
-                    try:
-                        return int(cap_bac[1:])
-                    except:
-                        return 0
-                else:
-                    try:
-                        return int(cap_bac) + 10
-                    except:
-                        return 0
-            
-            def sort_key(person):
-                cap_bac_rank = _parse_cap_bac_rank(person.capBac or '')
-                ho_ten = (person.hoTen or '').lower()
-                return (-cap_bac_rank, ho_ten)
-            
-            display_personnel = sorted(display_personnel, key=sort_key)
+            # Danh sách từ DatabaseService đã sắp theo cấp bậc (từ cao xuống thấp) rồi họ tên
             
             # Load vào tree
             for person in display_personnel:
@@ -1633,19 +1548,13 @@ class UnitManagementFrame(tk.Frame):
             selected_ids.clear()
             selected_ids.update(current_selected)
             
-            # Cập nhật unit
-            unit.personnelIds = list(selected_ids)
+            # Cập nhật thành viên đơn vị và unitId của quân nhân (một transaction)
             try:
-                self.db.update_unit(unit)
-                
-                # Cập nhật unitId cho quân nhân
-                all_personnel = self.db.get_all()
-                for person in all_personnel:
-                    if person.id in selected_ids:
-                        person.unitId = unit.id
-                    elif person.unitId == unit.id:
-                        person.unitId = None
-                    self.db.update(person)
+                previous_ids = set(self.db.get_unit_personnel_ids(unit.id))
+                with self.db.connection():
+                    self.db.remove_personnel_from_unit(unit.id, list(previous_ids - selected_ids))
+                    self.db.add_personnel_to_unit(unit.id, list(selected_ids))
+                unit.personnelIds = list(selected_ids)
                 
                 self.status_label.config(
                     text=f"✅ Đã cập nhật {len(selected_ids)} quân nhân vào đơn vị '{unit.ten}'",
@@ -1778,46 +1687,10 @@ class UnitManagementFrame(tk.Frame):
             messagebox.showwarning("Cảnh báo", f"Đơn vị '{unit.ten}' chưa có tổ nào")
             return
         
-        # Thu thập tất cả quân nhân từ các tổ và sắp xếp theo cấp bậc
-        def _parse_cap_bac_rank(cap_bac: str) -> int:
-            """Parse cấp bậc thành số để so sánh"""
-            if not cap_bac:
-                return 0
-            cap_bac = cap_bac.strip().upper()
-            if 'ĐẠI TÁ' in cap_bac: return 100
-            elif 'TRUNG TÁ' in cap_bac: return 90
-            elif 'THIẾU TÁ' in cap_bac: return 80
-            elif 'ĐẠI ÚY' in cap_bac: return 70
-            elif 'THƯỢNG ÚY' in cap_bac: return 60
-            elif 'TRUNG ÚY' in cap_bac: return 50
-            elif 'THIẾU ÚY' in cap_bac: return 40
-            elif 'THƯỢNG SĨ' in cap_bac: return 30
-            elif 'TRUNG SĨ' in cap_bac: return 20
-            elif 'HẠ SĨ' in cap_bac: return 10
-            elif cap_bac.startswith('H'):
-                try:
-                    return int(cap_bac[1:])
-                except:
-                    return 0
-            else:
-                try:
-                    return int(cap_bac) + 10
-                except:
-                    return 0
-        
-        def _sort_personnel_by_cap_bac(personnel_list):
-            """Sắp xếp danh sách quân nhân theo cấp bậc (từ cao xuống thấp)"""
-            def sort_key(personnel):
-                cap_bac_rank = _parse_cap_bac_rank(personnel.capBac or '')
-                ho_ten = (personnel.hoTen or '').lower()
-                return (-cap_bac_rank, ho_ten)
-            return sorted(personnel_list, key=sort_key)
-        
+        # Thu thập tất cả quân nhân từ các tổ (get_personnel_by_unit đã sắp theo cấp bậc)
         all_personnel_data = []
         for child_unit in child_units:
             personnel_list = self.db.get_personnel_by_unit(child_unit.id)
-            # Sắp xếp theo cấp bậc (từ cao xuống thấp)
-            personnel_list = _sort_personnel_by_cap_bac(personnel_list)
             all_personnel_data.append({
                 'to': child_unit,
                 'personnel': personnel_list
@@ -1873,7 +1746,8 @@ class UnitManagementFrame(tk.Frame):
                 for unit_group in all_personnel_data:
                     all_personnel.extend(unit_group.get('personnel', []))
                 
-                word_bytes = to_word_docx_trich_ngang(
+                # Đọc tham số từ form trên luồng giao diện, tạo file Word trên luồng nền
+                params = dict(
                     personnel_list=all_personnel,
                     tieu_doan=tieu_doan_var.get(),
                     dai_doi=dai_doi_var.get(),
@@ -1883,11 +1757,25 @@ class UnitManagementFrame(tk.Frame):
                     units_data=all_personnel_data  # Truyền units_data để nhóm theo đơn vị
                 )
                 
-                with open(file_path, 'wb') as f:
-                    f.write(word_bytes)
+                def work(task):
+                    word_bytes = to_word_docx_trich_ngang(**params)
+                    task.check_cancelled()
+                    with open(file_path, 'wb') as f:
+                        f.write(word_bytes)
+                    return file_path
                 
-                messagebox.showinfo("Thành công", f"Đã xuất file Word:\n{file_path}")
-                dialog.destroy()
+                def done(path):
+                    messagebox.showinfo("Thành công", f"Đã xuất file Word:\n{path}")
+                    if dialog.winfo_exists():
+                        dialog.destroy()
+                
+                get_task_executor(self).submit(
+                    work,
+                    on_done=done,
+                    on_error=lambda e: messagebox.showerror("Lỗi", f"Không thể xuất file:\n{str(e)}"),
+                    key=('export', file_path),
+                    description=f"Đang xuất {Path(file_path).name}..."
+                )
             except Exception as e:
                 messagebox.showerror("Lỗi", f"Không thể xuất file:\n{str(e)}")
         
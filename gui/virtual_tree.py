@@ -0,0 +1,189 @@
+"""
+Danh sách ảo cho ttk.Treeview: chỉ tạo item cho các hàng đang nhìn thấy
+"""
+
+from tkinter import ttk
+
+
+class VirtualTreeview:
+    """
+    Hiển thị một mảng kết quả lớn trong ttk.Treeview bằng cách chỉ tạo item cho các hàng
+    nằm trong vùng nhìn thấy (cộng thêm vài hàng đệm). Thanh cuộn dọc được điều khiển theo
+    vị trí trong mảng, nên chi phí refresh/cuộn không phụ thuộc số hàng.
+    
+    Item ID của Treeview là ID của hàng (row_id), nên selection()/identify_row() vẫn trả về ID.
+    """
+    
+    # Số hàng tạo thêm bên dưới vùng nhìn thấy
+    BUFFER_ROWS = 3
+    # Số hàng cuộn mỗi nấc con lăn chuột
+    WHEEL_ROWS = 3
+    
+    def __init__(self, tree: ttk.Treeview, scrollbar: ttk.Scrollbar, row_values,
+                 row_id=lambda row: row.id, row_tags=None):
+        """
+        Args:
+            tree: Treeview hiển thị (không dùng yscrollcommand riêng)
+            scrollbar: Thanh cuộn dọc
+            row_values: Hàm (row, index) -> tuple values của hàng
+            row_id: Hàm row -> ID duy nhất dùng làm item ID
+            row_tags: Hàm (row, index) -> tuple tags (None = không có tag)
+        """
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.row_values = row_values
+        self.row_id = row_id
+        self.row_tags = row_tags
+        
+        self.rows = []
+        self.offset = 0  # Chỉ số hàng đầu tiên đang hiển thị
+        self.selected_id = None
+        self._window_ids = []  # ID các hàng đang có item trong tree
+        self._index = None  # {row_id: chỉ số}, tạo khi cần
+        self._visible_rows = int(tree.cget('height') or 10)
+        
+        tree.configure(yscrollcommand='')
+        scrollbar.configure(command=self._on_scrollbar)
+        
+        tree.bind('<Configure>', self._on_configure, add='+')
+        tree.bind('<<TreeviewSelect>>', self._on_select, add='+')
+        tree.bind('<MouseWheel>', self._on_mousewheel)
+        tree.bind('<Button-4>', lambda e: self.scroll(-self.WHEEL_ROWS))
+        tree.bind('<Button-5>', lambda e: self.scroll(self.WHEEL_ROWS))
+        tree.bind('<Up>', lambda e: self._move_selection(-1))
+        tree.bind('<Down>', lambda e: self._move_selection(1))
+        tree.bind('<Prior>', lambda e: self._move_selection(-self._visible_rows))
+        tree.bind('<Next>', lambda e: self._move_selection(self._visible_rows))
+        tree.bind('<Home>', lambda e: self._move_selection(-len(self.rows)))
+        tree.bind('<End>', lambda e: self._move_selection(len(self.rows)))
+    
+    # ========== Dữ liệu ==========
+    
+    def set_rows(self, rows, keep_position: bool = False):
+        """
+        Thay mảng kết quả (không sao chép) và vẽ lại vùng nhìn thấy
+        Args:
+            keep_position: Giữ vị trí cuộn hiện tại (ví dụ khi sắp xếp lại), mặc định về đầu danh sách
+        """
+        self.rows = rows
+        self._index = None
+        if not keep_position:
+            self.offset = 0
+        self.render()
+    
+    def index_of(self, row_id):
+        """Chỉ số của hàng có ID row_id (None nếu không có)"""
+        if row_id in self._window_ids:
+            return self.offset + self._window_ids.index(row_id)
+        if self._index is None:
+            self._index = {self.row_id(row): i for i, row in enumerate(self.rows)}
+        return self._index.get(row_id)
+    
+    # ========== Hiển thị ==========
+    
+    def _max_offset(self) -> int:
+        return max(0, len(self.rows) - self._visible_rows)
+    
+    def render(self):
+        """Tạo lại item cho các hàng trong vùng nhìn thấy"""
+        self.offset = min(max(0, self.offset), self._max_offset())
+        end = min(len(self.rows), self.offset + self._visible_rows + self.BUFFER_ROWS)
+        
+        tree = self.tree
+        if self._window_ids:
+            tree.delete(*self._window_ids)
+        
+        window_ids = []
+        for index in range(self.offset, end):
+            row = self.rows[index]
+            row_id = self.row_id(row)
+            tags = self.row_tags(row, index) if self.row_tags else ()
+            tree.insert('', 'end', iid=row_id, values=self.row_values(row, index), tags=tags)
+            window_ids.append(row_id)
+        self._window_ids = window_ids
+        tree.yview_moveto(0)
+        
+        if self.selected_id in window_ids:
+            tree.selection_set(self.selected_id)
+            tree.focus(self.selected_id)
+        self._update_scrollbar()
+    
+    def _update_scrollbar(self):
+        total = len(self.rows)
+        if total <= self._visible_rows:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + self._visible_rows) / total)
+    
+    def scroll(self, rows: int):
+        """Cuộn rows hàng (âm = lên trên)"""
+        new_offset = min(max(0, self.offset + rows), self._max_offset())
+        if new_offset != self.offset:
+            self.offset = new_offset
+            self.render()
+        return 'break'
+    
+    def see(self, row_id) -> bool:
+        """Cuộn để hàng row_id nằm trong vùng nhìn thấy; trả về False nếu không có hàng này"""
+        index = self.index_of(row_id)
+        if index is None:
+            return False
+        if index < self.offset:
+            self.scroll(index - self.offset)
+        elif index >= self.offset + self._visible_rows:
+            self.scroll(index - self.offset - self._visible_rows + 1)
+        return True
+    
+    def select(self, row_id) -> bool:
+        """Chọn hàng theo ID (cuộn tới nếu đang ở ngoài vùng nhìn thấy)"""
+        if not self.see(row_id):
+            return False
+        self.selected_id = row_id
+        self.tree.selection_set(row_id)
+        self.tree.focus(row_id)
+        return True
+    
+    # ========== Sự kiện ==========
+    
+    def _on_scrollbar(self, action, value, unit=None):
+        """Lệnh của thanh cuộn: ('moveto', phân số) hoặc ('scroll', n, 'units'/'pages')"""
+        if action == 'moveto':
+            self.offset = int(float(value) * len(self.rows))
+            self.render()
+        elif action == 'scroll':
+            step = self._visible_rows if unit == 'pages' else 1
+            self.scroll(int(value) * step)
+    
+    def _on_mousewheel(self, event):
+        # Windows: delta bội số 120; macOS: delta nhỏ (1, 2, ...)
+        notches = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self.scroll(-notches * self.WHEEL_ROWS)
+    
+    def _on_configure(self, event):
+        """Treeview đổi kích thước -> tính lại số hàng nhìn thấy"""
+        # Style riêng của tree (ví dụ 'Report.Treeview'); lookup tự lấy từ 'Treeview' nếu style không đặt
+        style = self.tree.cget('style') or 'Treeview'
+        row_height = int(ttk.Style().lookup(style, 'rowheight') or 20)
+        header_height = 0
+        if self._window_ids:
+            bbox = self.tree.bbox(self._window_ids[0])
+            if bbox:
+                header_height = bbox[1]
+        visible = max(1, (event.height - header_height) // row_height)
+        if visible != self._visible_rows:
+            self._visible_rows = visible
+            self.render()
+    
+    def _on_select(self, event):
+        selection = self.tree.selection()
+        if selection:
+            self.selected_id = selection[0]
+    
+    def _move_selection(self, step: int):
+        """Phím mũi tên/PageUp/PageDown/Home/End: chọn hàng kế tiếp trên toàn mảng"""
+        if not self.rows:
+            return 'break'
+        current = self.index_of(self.selected_id) if self.selected_id is not None else None
+        index = 0 if current is None else min(max(0, current + step), len(self.rows) - 1)
+        self.select(self.row_id(self.rows[index]))
+        return 'break'
@@ -3,6 +3,7 @@
 Entry point chính
 """
 
+import multiprocessing
 import tkinter as tk
 from tkinter import ttk, messagebox
 import sys
@@ -136,5 +137,7 @@ def main():
 
 
 if __name__ == "__main__":
+    # Cần cho process pool khi chạy bản đóng gói (PyInstaller) trên Windows
+    multiprocessing.freeze_support()
     main()
 
@@ -2,6 +2,7 @@
 Model dữ liệu quân nhân
 """
 
+import json
 from dataclasses import dataclass, field
 from typing import Optional, Dict, Any
 from datetime import datetime
@@ -34,6 +35,27 @@ class ThongTinKhac:
     tenNuoc: str = ""  # Tên nước
     dangPhaiPhanDong: bool = False  # Tham gia đảng phái phản động
 
+    @classmethod
+    def from_dict(cls, tt: Dict[str, Any]) -> 'ThongTinKhac':
+        """Tạo từ dictionary (dữ liệu JSON cột thongTinKhac)"""
+        thong_tin_khac = cls()
+        thong_tin_khac.dang = ThongTinDang(
+            ngayVao=tt.get('dang', {}).get('ngayVao', ''),
+            ngayChinhThuc=tt.get('dang', {}).get('ngayChinhThuc', ''),
+            chucVuDang=tt.get('dang', {}).get('chucVuDang', ''),
+        )
+        thong_tin_khac.doan = ThongTinDoan(
+            ngayVao=tt.get('doan', {}).get('ngayVao', ''),
+            chucVuDoan=tt.get('doan', {}).get('chucVuDoan', ''),
+        )
+        thong_tin_khac.cdCu = tt.get('cdCu', False)
+        thong_tin_khac.yeuToNN = tt.get('yeuToNN', False)
+        thong_tin_khac.noiDungYeuToNN = tt.get('noiDungYeuToNN', '')
+        thong_tin_khac.moiQuanHeYeuToNN = tt.get('moiQuanHeYeuToNN', '')
+        thong_tin_khac.tenNuoc = tt.get('tenNuoc', '')
+        thong_tin_khac.dangPhaiPhanDong = tt.get('dangPhaiPhanDong', False)
+        return thong_tin_khac
+
 
 @dataclass
 class Personnel:
@@ -164,22 +186,7 @@ class Personnel:
         """Tạo từ dictionary"""
         thong_tin_khac = ThongTinKhac()
         if 'thongTinKhac' in data:
-            tt = data['thongTinKhac']
-            thong_tin_khac.dang = ThongTinDang(
-                ngayVao=tt.get('dang', {}).get('ngayVao', ''),
-                ngayChinhThuc=tt.get('dang', {}).get('ngayChinhThuc', ''),
-                chucVuDang=tt.get('dang', {}).get('chucVuDang', ''),
-            )
-            thong_tin_khac.doan = ThongTinDoan(
-                ngayVao=tt.get('doan', {}).get('ngayVao', ''),
-                chucVuDoan=tt.get('doan', {}).get('chucVuDoan', ''),
-            )
-            thong_tin_khac.cdCu = tt.get('cdCu', False)
-            thong_tin_khac.yeuToNN = tt.get('yeuToNN', False)
-            thong_tin_khac.noiDungYeuToNN = tt.get('noiDungYeuToNN', '')
-            thong_tin_khac.moiQuanHeYeuToNN = tt.get('moiQuanHeYeuToNN', '')
-            thong_tin_khac.tenNuoc = tt.get('tenNuoc', '')
-            thong_tin_khac.dangPhaiPhanDong = tt.get('dangPhaiPhanDong', False)
+            thong_tin_khac = ThongTinKhac.from_dict(data['thongTinKhac'])
 
         return cls(
             id=data.get('id'),
@@ -226,4 +233,39 @@ class Personnel:
             ngoaiNgu=data.get('ngoaiNgu', ''),
             tiengDTTS=data.get('tiengDTTS', ''),
             thongTinKhac=thong_tin_khac,
-        )
\ No newline at end of file
+        )
+
+
+class PersonnelRow:
+    """
+    Dòng quân nhân gọn nhẹ cho các view danh sách (kết quả của get_all(columns=[...]))
+    - Chỉ giữ các cột được chọn (dòng sqlite3.Row), đọc như thuộc tính: row.hoTen
+    - thongTinKhac chỉ giải mã JSON khi được truy cập lần đầu
+    - Đọc cột không có trong projection sẽ báo AttributeError
+    """
+    __slots__ = ('_row', '_thong_tin_khac')
+
+    def __init__(self, row):
+        self._row = row
+        self._thong_tin_khac = None
+
+    def __getattr__(self, name: str):
+        try:
+            return self._row[name]
+        except (IndexError, KeyError):
+            raise AttributeError(f"Cột '{name}' không có trong projection") from None
+
+    @property
+    def thongTinKhac(self) -> ThongTinKhac:
+        """Thông tin khác (giải mã lười từ cột JSON)"""
+        if self._thong_tin_khac is None:
+            raw = self.__getattr__('thongTinKhac')
+            self._thong_tin_khac = ThongTinKhac.from_dict(json.loads(raw) if raw else {})
+        return self._thong_tin_khac
+
+    def keys(self):
+        """Danh sách cột có trong dòng"""
+        return self._row.keys()
+
+    def __repr__(self) -> str:
+        return f"PersonnelRow(id={self.id!r}, hoTen={self.hoTen!r})"
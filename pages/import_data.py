@@ -57,20 +57,10 @@ def show():
                     # Nút import
                     if st.button("💾 Import Tất Cả Vào Database", type="primary"):
                         db = DatabaseService()
-                        imported = 0
-                        skipped = 0
+                        # Một transaction cho cả lô; trùng = cùng họ tên (không phân biệt dấu) và ngày sinh
+                        counts = db.bulk_upsert(personnel_list, dedupe_key='hoTen_ngaySinh')
                         
-                        for person in personnel_list:
-                            # Kiểm tra xem đã tồn tại chưa (theo tên)
-                            existing = db.search(person.hoTen)
-                            if existing and any(p.hoTen == person.hoTen for p in existing):
-                                skipped += 1
-                                continue
-                            
-                            db.create(person)
-                            imported += 1
-                        
-                        st.success(f"Đã import {imported} hồ sơ. Bỏ qua {skipped} hồ sơ trùng lặp.")
+                        st.success(f"Đã import {counts['inserted']} hồ sơ. Bỏ qua {counts['skipped']} hồ sơ trùng lặp.")
                         st.rerun()
                 else:
                     st.warning("Không tìm thấy dữ liệu trong các file")
@@ -139,20 +129,10 @@ def show():
                     # Nút import
                     if st.button("💾 Import Tất Cả Vào Database", type="primary"):
                         db = DatabaseService()
-                        imported = 0
-                        skipped = 0
-                        
-                        for person in personnel_list:
-                            # Kiểm tra xem đã tồn tại chưa (theo tên)
-                            existing = db.search(person.hoTen)
-                            if existing and any(p.hoTen == person.hoTen for p in existing):
-                                skipped += 1
-                                continue
-                            
-                            db.create(person)
-                            imported += 1
+                        # Một transaction cho cả lô; trùng = cùng họ tên (không phân biệt dấu) và ngày sinh
+                        counts = db.bulk_upsert(personnel_list, dedupe_key='hoTen_ngaySinh')
                         
-                        st.success(f"Đã import {imported} hồ sơ. Bỏ qua {skipped} hồ sơ trùng lặp.")
+                        st.success(f"Đã import {counts['inserted']} hồ sơ. Bỏ qua {counts['skipped']} hồ sơ trùng lặp.")
                         st.rerun()
                 else:
                     st.warning("Không tìm thấy dữ liệu trong các file")
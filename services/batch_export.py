@@ -0,0 +1,338 @@
+"""
+Xuất nhiều báo cáo Word một lần vào một file .zip (kèm manifest.json)
+
+- Dữ liệu của mọi báo cáo được đọc một lần trong một transaction đọc (ExportSnapshot), nên các
+  văn bản trong gói nhất quán với nhau dù database bị ghi trong lúc xuất.
+- Các văn bản được tạo song song trên một process pool (python-docx chạy thuần Python, luồng
+  không tăng tốc được vì GIL). Snapshot gửi sang mỗi tiến trình một lần qua initializer.
+- Không tạo được tiến trình (môi trường hạn chế) hoặc chỉ dùng 1 worker thì tạo tuần tự.
+"""
+
+import os
+import json
+import time
+import zipfile
+import hashlib
+import inspect
+import logging
+import importlib
+from dataclasses import dataclass, field
+from contextlib import closing
+from datetime import datetime
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BatchReport:
+    """Một loại báo cáo trong gói xuất"""
+    title: str
+    file_name: str
+    exporter: str  # 'module:hàm' trong services/
+    scope: Dict[str, str] = field(default_factory=dict)  # Như REPORT_SHEETS: {}, {'flag': ...}, {'list_table': ...}
+
+
+# Thứ tự như các tab báo cáo
+REPORT_TYPES = {
+    'trich_ngang': BatchReport(
+        'Trích ngang đại đội', 'Trich_ngang_dai_doi',
+        'services.export_trich_ngang:to_word_docx_trich_ngang'),
+    'vi_tri_can_bo': BatchReport(
+        'Vị trí cán bộ', 'Danh_sach_vi_tri_can_bo',
+        'services.export_vi_tri_can_bo:to_word_docx_vi_tri_can_bo'),
+    'dang_vien_dien_tap': BatchReport(
+        'Đảng viên diễn tập', 'Dang_vien_dien_tap',
+        'services.export_dang_vien_dien_tap:to_word_docx_dang_vien_dien_tap',
+        {'list_table': 'dang_vien_dien_tap'}),
+    'nguoi_than_che_do_cu': BatchReport(
+        'Người thân chế độ cũ', 'Nguoi_than_che_do_cu',
+        'services.export_nguoi_than_che_do_cu:to_word_docx_nguoi_than_che_do_cu',
+        {'flag': 'cdCu'}),
+    'to_dan_van': BatchReport(
+        'Tổ công tác dân vận', 'To_dan_van',
+        'services.export_to_dan_van:to_word_docx_to_dan_van',
+        {'list_table': 'to_dan_van'}),
+    'ban_chap_hanh_chi_doan': BatchReport(
+        'Ban chấp hành chi đoàn', 'Ban_Chap_Hanh_Chi_Doan',
+        'services.export_ban_chap_hanh_chi_doan:to_word_docx_ban_chap_hanh_chi_doan',
+        {'list_table': 'ban_chap_hanh_chi_doan'}),
+    'ton_giao': BatchReport(
+        'Quân nhân theo tôn giáo', 'Quan_Nhan_Theo_Ton_Giao',
+        'services.export_ton_giao:to_word_docx_ton_giao',
+        {'flag': 'tonGiao'}),
+    'dang_phai_phan_dong': BatchReport(
+        'Người thân đảng phái phản động', 'Dang_phai_phan_dong',
+        'services.export_dang_phai_phan_dong:to_word_docx_dang_phai_phan_dong',
+        {'list_table': 'nguoi_than_dang_phai_phan_dong'}),
+    'bao_ve_an_ninh': BatchReport(
+        'Bảo vệ an ninh', 'Bao_ve_an_ninh',
+        'services.export_bao_ve_an_ninh:to_word_docx_bao_ve_an_ninh',
+        {'list_table': 'bao_ve_an_ninh'}),
+}
+
+# Gói nhỏ hơn số dòng này thì tạo tuần tự (khởi động tiến trình mất hơn thời gian tạo văn bản)
+PARALLEL_MIN_ROWS = 300
+
+# Bảng danh sách có thông tin riêng mà các hàm xuất đọc qua db_service
+_LIST_INFO_TABLES = ('ban_chap_hanh_chi_doan', 'bao_ve_an_ninh', 'to_dan_van', 'dang_vien_dien_tap')
+
+
+class ExportSnapshot:
+    """
+    Dữ liệu đã đọc cho một gói xuất. Có các hàm đọc mà services/export_* gọi qua db_service
+    (get_nguoi_than_for_many, get_chuc_vu_doan, ...) nên được truyền thẳng làm db_service.
+    Chỉ chứa dataclass và dict, gửi được sang tiến trình khác (pickle).
+    """
+    
+    def __init__(self):
+        self.unit = None
+        self.personnel: Dict[str, Any] = {}      # {id: Personnel}
+        self.reports: Dict[str, List[str]] = {}  # {loại báo cáo: [id theo thứ tự danh sách]}
+        self.nguoi_than: Dict[str, List] = {}
+        self.units: Dict[str, Any] = {}
+        self.list_entries: Dict[str, Dict[str, dict]] = {}
+    
+    @classmethod
+    def read(cls, db, report_types: List[str], unit_id: Optional[str] = None) -> 'ExportSnapshot':
+        """
+        Đọc dữ liệu của các báo cáo trong một transaction đọc
+        Args:
+            db: DatabaseService
+            report_types: Các khoá của REPORT_TYPES
+            unit_id: Chỉ lấy quân nhân thuộc đơn vị này và các đơn vị con cháu (None = tất cả)
+        """
+        snapshot = cls()
+        with db.connection() as conn:
+            # Các hàm đọc của db dùng chung kết nối (và transaction) của luồng này
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            
+            if unit_id is not None:
+                snapshot.unit = db.get_unit_by_id(unit_id)
+                if snapshot.unit is None:
+                    raise ValueError(f"Đơn vị không tồn tại: {unit_id}")
+                members = {p.id for p in db.get_personnel_in_subtree(unit_id)}
+            else:
+                members = None
+            
+            for report_type in report_types:
+                ids = [row[0] for chunk in db.iter_personnel_values(['id'], **REPORT_TYPES[report_type].scope)
+                       for row in chunk]
+                if members is not None:
+                    ids = [pid for pid in ids if pid in members]
+                snapshot.reports[report_type] = ids
+            
+            wanted = list(dict.fromkeys(pid for ids in snapshot.reports.values() for pid in ids))
+            snapshot.personnel = {p.id: p for p in db.get_by_ids(wanted)}
+            snapshot.nguoi_than = db.get_nguoi_than_for_many(wanted)
+            snapshot.units = {unit.id: unit for unit in db.get_all_units()}
+            for list_table in _LIST_INFO_TABLES:
+                snapshot.list_entries[list_table] = db.get_list_entries(list_table)
+        return snapshot
+    
+    def personnel_for(self, report_type: str) -> List:
+        """Personnel của một báo cáo, theo thứ tự danh sách"""
+        return [self.personnel[pid] for pid in self.reports.get(report_type, []) if pid in self.personnel]
+    
+    # ========== Thay cho DatabaseService trong các hàm xuất ==========
+    
+    def get_nguoi_than_for_many(self, personnel_ids: Optional[List[str]] = None) -> Dict[str, List]:
+        if personnel_ids is None:
+            return dict(self.nguoi_than)
+        return {pid: self.nguoi_than[pid] for pid in personnel_ids if pid in self.nguoi_than}
+    
+    def get_unit_by_id(self, unit_id: str):
+        return self.units.get(unit_id)
+    
+    def get_bao_ve_an_ninh_info_for_many(self) -> Dict[str, dict]:
+        return {pid: {'thoiGianVao': entry.get('thoiGianVao', ''), 'thoiGianRa': entry.get('thoiGianRa', '')}
+                for pid, entry in self.list_entries.get('bao_ve_an_ninh', {}).items()}
+    
+    def get_chuc_vu_doan(self, personnel_id: str) -> str:
+        return self._list_value('ban_chap_hanh_chi_doan', personnel_id, 'chucVuDoan')
+    
+    def get_to_dan_van_ghi_chu(self, personnel_id: str) -> str:
+        return self._list_value('to_dan_van', personnel_id, 'ghiChu')
+    
+    def get_dang_vien_dien_tap_ghi_chu(self, personnel_id: str) -> str:
+        return self._list_value('dang_vien_dien_tap', personnel_id, 'ghiChu')
+    
+    def _list_value(self, list_table: str, personnel_id: str, column: str) -> str:
+        return self.list_entries.get(list_table, {}).get(personnel_id, {}).get(column, '') or ''
+
+
+def export_reports_zip(db, file_path: str, report_types: Optional[List[str]] = None,
+                       unit_id: Optional[str] = None, params: Optional[Dict[str, str]] = None,
+                       max_workers: Optional[int] = None,
+                       on_progress: Optional[Callable[[int, int, str], None]] = None,
+                       check_cancelled: Optional[Callable[[], None]] = None) -> dict:
+    """
+    Xuất các báo cáo Word vào một file .zip kèm manifest.json
+    Args:
+        db: DatabaseService
+        file_path: Đường dẫn file .zip
+        report_types: Các khoá của REPORT_TYPES (mặc định tất cả)
+        unit_id: Chỉ xuất quân nhân thuộc đơn vị này và đơn vị con cháu (None = tất cả)
+        params: Thông tin chung cho các báo cáo: tieu_doan, don_vi, dai_doi, dia_diem, nam,
+                chinh_tri_vien, ten_bi_thu, ... (mỗi báo cáo chỉ nhận tham số nó có)
+        max_workers: Số tiến trình (mặc định số nhân CPU, không quá số báo cáo; gói nhỏ thì 1)
+        on_progress: Nhận (số báo cáo đã xong, tổng số, mô tả)
+        check_cancelled: Gọi định kỳ; ném exception (ví dụ TaskCancelled) để hủy
+    Returns:
+        Nội dung manifest (dict)
+    """
+    report_types = list(report_types) if report_types else list(REPORT_TYPES)
+    unknown = [report_type for report_type in report_types if report_type not in REPORT_TYPES]
+    if unknown:
+        raise ValueError(f"Loại báo cáo không hợp lệ: {', '.join(unknown)}")
+    
+    started = time.perf_counter()
+    
+    def progress(done: int, total: int, message: str):
+        if check_cancelled:
+            check_cancelled()
+        if on_progress:
+            on_progress(done, total, message)
+    
+    progress(0, len(report_types), "Đang đọc dữ liệu...")
+    snapshot = ExportSnapshot.read(db, report_types, unit_id)
+    params = _report_params(params, snapshot.unit)
+    
+    # Báo cáo lớn trước để các tiến trình kết thúc gần cùng lúc
+    jobs = sorted((report_type for report_type in report_types if snapshot.reports[report_type]),
+                  key=lambda report_type: -len(snapshot.reports[report_type]))
+    if max_workers is None and sum(len(snapshot.reports[report_type]) for report_type in jobs) < PARALLEL_MIN_ROWS:
+        max_workers = 1
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(jobs) or 1))
+    
+    entries = {report_type: {
+        'type': report_type,
+        'title': REPORT_TYPES[report_type].title,
+        'count': len(snapshot.reports[report_type]),
+        'file': None,
+    } for report_type in report_types}
+    
+    temp_path = f"{file_path}.part"
+    try:
+        results = _render_all(snapshot, jobs, params, workers, check_cancelled)
+        with closing(results), zipfile.ZipFile(temp_path, 'w') as archive:
+            done = len(report_types) - len(jobs)
+            for report_type, data, seconds, error in results:
+                done += 1
+                entry = entries[report_type]
+                entry['seconds'] = round(seconds, 3)
+                if error:
+                    entry['error'] = error
+                    logger.error(f"Lỗi khi xuất báo cáo '{report_type}': {error}")
+                else:
+                    number = report_types.index(report_type) + 1
+                    entry['file'] = f"{number:02d}_{REPORT_TYPES[report_type].file_name}.docx"
+                    entry['size'] = len(data)
+                    entry['sha256'] = hashlib.sha256(data).hexdigest()
+                    # .docx đã nén sẵn: lưu nguyên, không nén lại
+                    archive.writestr(entry['file'], data, compress_type=zipfile.ZIP_STORED)
+                progress(done, len(report_types), f"Đã xuất {entry['title']} ({done}/{len(report_types)})")
+            
+            manifest = {
+                'createdAt': datetime.now().isoformat(timespec='seconds'),
+                'unit': {'id': snapshot.unit.id, 'ten': snapshot.unit.ten} if snapshot.unit else None,
+                'params': params,
+                'workers': workers,
+                'seconds': round(time.perf_counter() - started, 3),
+                'reports': [entries[report_type] for report_type in report_types],
+            }
+            archive.writestr('manifest.json', json.dumps(manifest, ensure_ascii=False, indent=2),
+                             compress_type=zipfile.ZIP_DEFLATED)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return manifest
+
+
+def _report_params(params: Optional[Dict[str, str]], unit) -> Dict[str, str]:
+    """Tham số chung; thiếu thì lấy theo đơn vị được chọn và năm hiện tại"""
+    result = {key: value for key, value in (params or {}).items() if value not in (None, '')}
+    if unit is not None:
+        result.setdefault('don_vi', unit.ten)
+    if 'don_vi' in result:
+        result.setdefault('dai_doi', result['don_vi'].upper())
+    result.setdefault('nam', str(datetime.now().year))
+    return result
+
+
+def _render_all(snapshot: ExportSnapshot, jobs: List[str], params: Dict[str, str], workers: int,
+                check_cancelled: Optional[Callable[[], None]]):
+    """Tạo các văn bản; yield (loại báo cáo, bytes, số giây, lỗi) theo thứ tự xong trước"""
+    if workers > 1:
+        try:
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(snapshot,))
+        except (OSError, NotImplementedError, ImportError) as e:
+            logger.warning(f"Không tạo được process pool, xuất tuần tự: {e}")
+        else:
+            finished = set()
+            try:
+                for result in _render_in_pool(pool, jobs, params, check_cancelled):
+                    finished.add(result[0])
+                    yield result
+                return
+            except BrokenProcessPool as e:
+                logger.warning(f"Process pool bị dừng, xuất tuần tự các báo cáo còn lại: {e}")
+            jobs = [report_type for report_type in jobs if report_type not in finished]
+    
+    for report_type in jobs:
+        if check_cancelled:
+            check_cancelled()
+        yield _render(report_type, params, snapshot)
+
+
+def _render_in_pool(pool: ProcessPoolExecutor, jobs: List[str], params: Dict[str, str],
+                    check_cancelled: Optional[Callable[[], None]]):
+    pending = set()
+    try:
+        pending = {pool.submit(_render, report_type, params) for report_type in jobs}
+        while pending:
+            finished, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in finished:
+                yield future.result()
+            if check_cancelled:
+                check_cancelled()
+    finally:
+        # Hủy hoặc lỗi: bỏ các báo cáo chưa chạy, không chờ báo cáo đang tạo
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=not pending)
+
+
+# ========== Tiến trình con ==========
+
+_worker_snapshot: Optional[ExportSnapshot] = None
+
+
+def _init_worker(snapshot: ExportSnapshot):
+    global _worker_snapshot
+    _worker_snapshot = snapshot
+
+
+def _render(report_type: str, params: Dict[str, str], snapshot: Optional[ExportSnapshot] = None) -> tuple:
+    """Tạo một báo cáo: (loại báo cáo, bytes, số giây, lỗi)"""
+    snapshot = snapshot or _worker_snapshot
+    started = time.perf_counter()
+    try:
+        module_name, function_name = REPORT_TYPES[report_type].exporter.split(':')
+        exporter = getattr(importlib.import_module(module_name), function_name)
+        accepted = inspect.signature(exporter).parameters
+        kwargs = {key: value for key, value in params.items() if key in accepted}
+        if 'db_service' in accepted:
+            kwargs['db_service'] = snapshot
+        data = exporter(snapshot.personnel_for(report_type), **kwargs)
+        return report_type, data, time.perf_counter() - started, None
+    except Exception as e:
+        return report_type, b'', time.perf_counter() - started, str(e)
@@ -5,14 +5,190 @@ Service quản lý database (SQLite hoặc Firebase)
 import sqlite3
 import json
 import sys
-from typing import List, Optional, Dict, Any
+import threading
+import re
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Dict, Any
 from datetime import datetime
 from pathlib import Path
 
 # Thêm thư mục gốc vào path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from models.personnel import Personnel
+from models.personnel import Personnel, PersonnelRow
+from utils.text_utils import fold_vietnamese
+from utils.cap_bac import cap_bac_category, cap_bac_rank, RANK_CATEGORIES
+
+
+# Danh sách cột của bảng personnel (theo thứ tự INSERT)
+PERSONNEL_COLUMNS = [
+    'id', 'hoTen', 'hoTenThuongDung', 'ngaySinh', 'capBac', 'ngayNhanCapBac',
+    'chucVu', 'ngayNhanChucVu', 'donVi', 'unitId', 'nhapNgu', 'xuatNgu',
+    'queQuan', 'truQuan', 'danToc', 'tonGiao', 'trinhDoVanHoa', 'thanhPhanGiaDinh',
+    'quaTruong', 'nganhHoc', 'capHoc', 'thoiGianDaoTao', 'ketQuaDaoTao',
+    'chucVuChienDau', 'thoiGianChucVuChienDau', 'chucVuDaQua', 'thoiGianChucVuDaQua', 'cmQuan',
+    'lienHeKhiCan', 'soDienThoaiLienHe',
+    'hoTenCha', 'hoTenMe', 'hoTenVo',
+    'hoTenNguoiThan', 'moiQuanHe', 'noiDungNguoiThan',
+    'thamGiaNguyQuan', 'thamGiaNguyQuyen', 'thamGiaNoMau', 'daCaiTao',
+    'ghiChu', 'ngoaiNgu', 'tiengDTTS', 'thongTinKhac', 'createdAt', 'updatedAt',
+]
+
+# Phiên bản schema mới nhất (= số migration trong DatabaseService._migrations)
+SCHEMA_VERSION = 8
+
+# Trường trong JSON thongTinKhac chỉ dùng khi xuất file (không có cột sinh tự động)
+EXPORT_JSON_FIELDS = {
+    'dangChucVu': '$.dang.chucVuDang',
+    'doanChucVu': '$.doan.chucVuDoan',
+}
+
+# Các bảng danh sách quân nhân (mỗi quân nhân tối đa một dòng, khoá theo personnelId)
+LIST_TABLES = (
+    'ban_chap_hanh_chi_doan', 'bao_ve_an_ninh', 'nguoi_than_che_do_cu',
+    'to_dan_van', 'dang_vien_dien_tap', 'nguoi_than_dang_phai_phan_dong',
+)
+
+# Trường trong JSON thongTinKhac được đưa ra thành cột sinh tự động (VIRTUAL, có index)
+# để lọc/đếm bằng SQL; SQLite tự tính lại khi thongTinKhac thay đổi
+JSON_COLUMNS = {
+    'dangNgayVao': '$.dang.ngayVao',
+    'dangNgayChinhThuc': '$.dang.ngayChinhThuc',
+    'doanNgayVao': '$.doan.ngayVao',
+    'cdCu': '$.cdCu',
+    'yeuToNN': '$.yeuToNN',
+    'dangPhaiPhanDong': '$.dangPhaiPhanDong',
+}
+
+# Điều kiện SQL của từng diện quản lý (dùng các cột JSON_COLUMNS)
+PERSONNEL_FLAGS = {
+    'dangVien': "(dangNgayVao > '' OR dangNgayChinhThuc > '')",
+    'doanVien': "doanNgayVao > ''",
+    'cdCu': "cdCu = 1",
+    'yeuToNN': "yeuToNN = 1",
+    'dangPhaiPhanDong': "dangPhaiPhanDong = 1",
+}
+
+
+def _personnel_select(alias: str = '') -> str:
+    """
+    Danh sách cột để đọc Personnel. Không dùng SELECT * vì SELECT * tính cả các cột
+    sinh tự động (json_extract mỗi dòng) mà Personnel không cần.
+    """
+    prefix = f"{alias}." if alias else ''
+    return ', '.join(prefix + col for col in PERSONNEL_COLUMNS)
+
+
+# Các dòng nội dung của bảng tổng hợp tong_hop_counts: điều kiện SQL theo dòng quân nhân
+# ({row} là tiền tố của dòng, ví dụ "NEW." trong trigger hoặc "p." khi xây lại)
+TONG_HOP_LINES = {
+    'dtts': "{row}danTocLower != '' AND {row}danTocLower NOT IN ('kinh', 'việt')",
+    'tonGiao': "TRIM({row}tonGiao) != ''",
+    'cdCu': "{row}cdCu = 1",
+    'yeuToNN': "{row}yeuToNN = 1",
+}
+
+
+def _personnel_order(alias: str = '') -> str:
+    """
+    Thứ tự mặc định của danh sách quân nhân: cấp bậc từ cao xuống thấp rồi họ tên
+    (capBacRank được ghi cùng capBac, xem utils.cap_bac)
+    """
+    prefix = f"{alias}." if alias else ''
+    # Họ tên không phân biệt hoa thường (cả chữ có dấu), dùng index idx_personnel_order
+    return f"{prefix}capBacRank DESC, {prefix}hoTenLower"
+
+
+def _personnel_sort_key(personnel) -> tuple:
+    """Khoá sắp xếp trong Python tương ứng với _personnel_order()"""
+    return (-cap_bac_rank(personnel.capBac), (personnel.hoTen or '').lower())
+
+
+def _unicode_lower(value) -> str:
+    """Chữ thường cả chữ có dấu (hàm lower() có sẵn của SQLite chỉ xử lý ký tự ASCII)"""
+    return value.lower() if isinstance(value, str) else ''
+
+
+def _trimmed_lower(value) -> str:
+    """Chữ thường, bỏ khoảng trắng hai đầu (so khớp dân tộc trong TONG_HOP_LINES)"""
+    return value.strip().lower() if isinstance(value, str) else ''
+
+
+def _name_key(value) -> str:
+    """Họ tên chuẩn hoá để phát hiện trùng: bỏ dấu, chữ thường, gộp khoảng trắng"""
+    return ' '.join(fold_vietnamese(value).split())
+
+
+# Cột suy ra từ một cột khác của personnel, tính trong Python và ghi cùng cột nguồn:
+# cột -> (cột nguồn, hàm). Trigger và index chỉ dùng các cột này cùng hàm có sẵn của SQLite,
+# để database vẫn ghi/VACUUM được từ kết nối không đăng ký hàm Python.
+DERIVED_COLUMNS = {
+    'capBacRank': ('capBac', cap_bac_rank),
+    'hoTenLower': ('hoTen', _unicode_lower),
+    'nameKey': ('hoTen', _name_key),
+    'rankCategory': ('capBac', cap_bac_category),
+    'danTocLower': ('danToc', _trimmed_lower),
+}
+
+
+def _derived_values(data: Dict[str, Any]) -> list:
+    """Giá trị của DERIVED_COLUMNS (theo thứ tự) cho một bản ghi (data = Personnel.to_dict())"""
+    return [function(data.get(source) or '') for source, function in DERIVED_COLUMNS.values()]
+
+
+def _personnel_values(data: Dict[str, Any]) -> tuple:
+    """Giá trị INSERT theo thứ tự PERSONNEL_COLUMNS + DERIVED_COLUMNS (data = Personnel.to_dict())"""
+    values = []
+    for column in PERSONNEL_COLUMNS:
+        if column == 'thongTinKhac':
+            values.append(json.dumps(data['thongTinKhac']))
+        elif column == 'unitId':
+            values.append(data.get('unitId'))
+        else:
+            values.append(data.get(column, ''))
+    values.extend(_derived_values(data))
+    return tuple(values)
+
+
+# Khoá phát hiện trùng của bulk_upsert() -> các cột so khớp
+# (họ tên so theo cột nameKey = _name_key(hoTen); có index idx_personnel_name_key)
+DEDUPE_KEYS = {
+    'hoTen_ngaySinh': ('hoTen', 'ngaySinh'),
+    'hoTen': ('hoTen',),
+    'id': ('id',),
+}
+
+# Cột được bulk_upsert() ghi đè khi gặp bản ghi trùng (chỉ khi giá trị mới không rỗng, trừ các cột
+# của khoá trùng); giữ nguyên id, đơn vị đã gán, thông tin khác và ngày tạo
+UPSERT_MERGE_COLUMNS = [
+    column for column in PERSONNEL_COLUMNS
+    if column not in ('id', 'unitId', 'thongTinKhac', 'createdAt', 'updatedAt')
+]
+
+
+# Các trường lọc bằng (=) được hỗ trợ trong search()
+SEARCH_FILTER_FIELDS = ('donVi', 'capBac', 'chucVu', 'danToc', 'tonGiao')
+
+# Các trường thống kê (GROUP BY) được hỗ trợ trong group_counts()/summary()
+GROUP_FIELDS = ('danToc', 'tonGiao', 'capBac', 'chucVu', 'donVi')
+
+
+# Các cột của personnel được đưa vào chỉ mục full-text (đã bỏ dấu)
+FTS_PERSONNEL_COLUMNS = ('hoTen', 'hoTenThuongDung', 'queQuan', 'truQuan', 'donVi')
+
+
+# Xếp hạng bm25: họ tên quan trọng nhất, sau đó tên thường dùng, người thân
+# (trọng số theo thứ tự cột: personnelId, hoTen, hoTenThuongDung, queQuan, truQuan, donVi, nguoiThan)
+FTS_RANK = "bm25(personnel_fts, 0.0, 10.0, 5.0, 1.0, 1.0, 2.0, 3.0)"
+
+
+def _fts_text(expr: str) -> str:
+    """
+    Biểu thức SQL của văn bản ghi vào personnel_fts. Tokenizer unicode61 (remove_diacritics 2)
+    đã bỏ dấu và chữ hoa, riêng đ/Đ không được tách thành d nên đổi bằng replace() có sẵn
+    (trigger lưu trong schema không được gọi hàm đăng ký từ Python)
+    """
+    return f"replace(replace({expr}, 'đ', 'd'), 'Đ', 'D')"
 
 
 class DatabaseService:
@@ -26,16 +202,220 @@ class DatabaseService:
             use_encryption: Có dùng encryption không
         """
         self.db_path = db_path
+        # Pool kết nối: mỗi luồng giữ một kết nối dùng lâu dài
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        # Cache quân nhân dùng chung cho cả tiến trình (xem "Personnel Cache")
+        self._cache_lock = threading.RLock()
+        self._personnel_cache: Dict[str, Personnel] = {}
+        self._personnel_cache_complete = False
+        self._personnel_order: Optional[List[Personnel]] = None
+        self.cache_hits = 0
+        self.cache_misses = 0
         self._init_database()
     
+    # ========== Connection Pool ==========
+    
+    # Cấu hình áp dụng một lần cho mỗi kết nối mới
+    CACHE_SIZE_KB = 20000  # ~20MB page cache
+    MMAP_SIZE = 256 * 1024 * 1024  # 256MB memory-mapped I/O
+    BUSY_TIMEOUT_MS = 5000
+    
+    def _open_connection(self) -> sqlite3.Connection:
+        """Mở và cấu hình một kết nối SQLite mới"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,  # Chỉ để close() từ luồng khác; mỗi luồng vẫn dùng kết nối riêng
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{self.CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size={self.MMAP_SIZE}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute(f"PRAGMA busy_timeout={self.BUSY_TIMEOUT_MS}")
+        return conn
+    
+    def _get_connection(self) -> sqlite3.Connection:
+        """Lấy kết nối của luồng hiện tại (tạo mới nếu chưa có)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._open_connection()
+            self._local.conn = conn
+            self._local.depth = 0
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    @contextmanager
+    def connection(self):
+        """
+        Context manager trả về kết nối dùng chung của luồng hiện tại.
+        Khối lệnh ngoài cùng sẽ commit khi thành công và rollback khi có lỗi;
+        các khối lồng nhau dùng chung transaction của khối ngoài.
+        """
+        conn = self._get_connection()
+        self._local.depth += 1
+        try:
+            yield conn
+            if self._local.depth == 1 and conn.in_transaction:
+                conn.commit()
+        except BaseException:
+            if self._local.depth == 1 and conn.in_transaction:
+                conn.rollback()
+                # Cache có thể đã được cập nhật theo thay đổi vừa bị huỷ
+                self.invalidate_cache()
+            raise
+        finally:
+            self._local.depth -= 1
+    
+    def close(self):
+        """Đóng tất cả kết nối trong pool"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        # Buộc luồng hiện tại mở kết nối mới nếu còn dùng tiếp
+        self._local = threading.local()
+    
+    # ========== Personnel Cache ==========
+    
+    def _cache_is_current(self, conn) -> bool:
+        """
+        Kiểm tra cache còn dùng được không bằng PRAGMA data_version.
+        data_version của một kết nối chỉ đổi khi kết nối khác (tiến trình/luồng khác) ghi vào
+        database, nên thay đổi của chính kết nối này không làm mất cache.
+        """
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if getattr(self._local, 'data_version', None) != version:
+            self._local.data_version = version
+            self.invalidate_cache()
+            return False
+        return True
+    
+    def invalidate_cache(self):
+        """Xoá toàn bộ cache quân nhân (lần đọc sau sẽ tải lại từ database)"""
+        with self._cache_lock:
+            self._personnel_cache = {}
+            self._personnel_cache_complete = False
+            self._personnel_order = None
+    
+    def cache_stats(self) -> Dict[str, int]:
+        """Số lần đọc trúng/trượt cache và số quân nhân đang được cache"""
+        with self._cache_lock:
+            return {
+                'hits': self.cache_hits,
+                'misses': self.cache_misses,
+                'size': len(self._personnel_cache),
+            }
+    
+    def data_version(self) -> tuple:
+        """
+        Mã phiên bản dữ liệu của luồng hiện tại: đổi mỗi khi database được ghi, bởi chính kết nối
+        này (total_changes) hoặc kết nối khác (PRAGMA data_version). Giao diện dùng để biết dữ liệu
+        đã đọc trước đó còn đúng không mà không phải truy vấn lại.
+        """
+        with self.connection() as conn:
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+            return (id(conn), version, conn.total_changes)
+    
+    def _cache_put(self, personnel: Personnel):
+        """Thêm/thay một quân nhân trong cache (bản ghi phải giống hệt dữ liệu trong database)"""
+        with self._cache_lock:
+            self._personnel_cache[personnel.id] = personnel
+            self._personnel_order = None
+    
+    def _cache_remove(self, personnel_id: str):
+        """Bỏ một quân nhân khỏi cache"""
+        with self._cache_lock:
+            if self._personnel_cache.pop(personnel_id, None) is not None:
+                self._personnel_order = None
+    
+    def _cache_set_unit_id(self, personnel_ids: List[str], unit_id: Optional[str],
+                           only_from: Optional[str] = None):
+        """Cập nhật unitId của các quân nhân trong cache (only_from: chỉ khi unitId hiện tại bằng giá trị này)"""
+        with self._cache_lock:
+            for personnel_id in personnel_ids:
+                cached = self._personnel_cache.get(personnel_id)
+                if cached is not None and (only_from is None or cached.unitId == only_from):
+                    cached.unitId = unit_id
+    
+    @staticmethod
+    def _copy_personnel(personnel: Personnel) -> Personnel:
+        """Bản sao để người gọi sửa thoải mái mà không làm hỏng cache"""
+        def shallow(obj):
+            # Nhanh hơn nhiều so với copy.copy (không đi qua __reduce_ex__)
+            clone = object.__new__(type(obj))
+            clone.__dict__.update(obj.__dict__)
+            return clone
+        
+        clone = shallow(personnel)
+        info = clone.thongTinKhac = shallow(personnel.thongTinKhac)
+        info.dang = shallow(info.dang)
+        info.doan = shallow(info.doan)
+        return clone
+    
     def _init_database(self):
-        """Khởi tạo database và tạo bảng nếu chưa có"""
+        """
+        Khởi tạo database: chạy các migration chưa áp dụng theo schema_version.
+        Khi schema đã ở phiên bản mới nhất thì không chạy câu lệnh DDL nào.
+        """
         # Tạo thư mục nếu chưa có
         Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            if self._get_schema_version(cursor) >= SCHEMA_VERSION:
+                return
+            
+            # Khoá ghi để hai tiến trình không cùng chạy migration
+            cursor.execute("BEGIN IMMEDIATE")
+            current = self._get_schema_version(cursor)
+            for version, migrate in enumerate(self._migrations(), 1):
+                if version > current:
+                    migrate(cursor)
+                    self._set_schema_version(cursor, version)
+    
+    # ========== Schema Migrations ==========
+    
+    def _migrations(self) -> list:
+        """
+        Danh sách migration theo thứ tự; migration thứ i nâng schema lên phiên bản i.
+        Chỉ thêm migration mới vào cuối danh sách (và tăng SCHEMA_VERSION), không sửa migration cũ.
+        Các migration phải chạy được trên database tạo trước khi có schema_version.
+        """
+        return [
+            self._migration_base_tables,
+            self._init_unit_members,
+            self._migration_indexes,
+            self._init_full_text_index,
+            self._migration_json_columns,
+            self._init_tong_hop_counts,
+            self._migration_cap_bac_rank,
+            self._migration_name_key_index,
+        ]
+    
+    def _get_schema_version(self, cursor) -> int:
+        """Đọc phiên bản schema hiện tại (0 nếu chưa có bảng schema_version)"""
+        try:
+            row = cursor.execute("SELECT version FROM schema_version").fetchone()
+        except sqlite3.OperationalError:
+            return 0
+        return row[0] if row else 0
+    
+    def _set_schema_version(self, cursor, version: int):
+        """Ghi phiên bản schema sau khi áp dụng một migration"""
+        cursor.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)")
+        cursor.execute("DELETE FROM schema_version")
+        cursor.execute("INSERT INTO schema_version (version) VALUES (?)", (version,))
+    
+    def _migration_base_tables(self, cursor):
+        """Migration 1: các bảng gốc và các cột được bổ sung dần"""
         # Tạo bảng personnel với các cột cơ bản
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS personnel (
@@ -56,11 +436,10 @@ class DatabaseService:
                 updatedAt TEXT
             )
         """)
-        
+    
         # Thêm các cột mới nếu chưa có (migration)
         self._migrate_personnel_table(cursor)
-        conn.commit()  # Commit migration ngay lập tức
-        
+    
         # Tạo bảng units
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS units (
@@ -74,7 +453,7 @@ class DatabaseService:
                 updatedAt TEXT
             )
         """)
-        
+    
         # Tạo bảng nguoi_than
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS nguoi_than (
@@ -91,7 +470,7 @@ class DatabaseService:
                 updatedAt TEXT
             )
         """)
-        
+    
         # Tạo bảng ban_chap_hanh_chi_doan
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS ban_chap_hanh_chi_doan (
@@ -103,7 +482,7 @@ class DatabaseService:
                 UNIQUE(personnelId)
             )
         """)
-        
+    
         # Tạo bảng bao_ve_an_ninh
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS bao_ve_an_ninh (
@@ -116,7 +495,7 @@ class DatabaseService:
                 UNIQUE(personnelId)
             )
         """)
-        
+    
         # Tạo bảng nguoi_than_che_do_cu (quân nhân có người thân tham gia chế độ cũ)
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS nguoi_than_che_do_cu (
@@ -127,7 +506,7 @@ class DatabaseService:
                 UNIQUE(personnelId)
             )
         """)
-        
+    
         # Tạo bảng to_dan_van (quân nhân trong tổ công tác dân vận)
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS to_dan_van (
@@ -138,7 +517,7 @@ class DatabaseService:
                 updatedAt TEXT
             )
         """)
-        
+    
         # Tạo bảng dang_vien_dien_tap (đảng viên tham gia diễn tập)
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS dang_vien_dien_tap (
@@ -149,7 +528,7 @@ class DatabaseService:
                 updatedAt TEXT
             )
         """)
-        
+    
         # Tạo bảng nguoi_than_dang_phai_phan_dong (quân nhân có người thân tham gia đảng phái phản động)
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS nguoi_than_dang_phai_phan_dong (
@@ -159,25 +538,303 @@ class DatabaseService:
                 updatedAt TEXT
             )
         """)
-        
+    
         # Migration: thêm cột ghiChu vào các bảng nếu chưa có
         try:
             cursor.execute("ALTER TABLE to_dan_van ADD COLUMN ghiChu TEXT")
         except sqlite3.OperationalError:
             pass  # Cột đã tồn tại
-        
+    
         try:
             cursor.execute("ALTER TABLE dang_vien_dien_tap ADD COLUMN ghiChu TEXT")
         except sqlite3.OperationalError:
             pass  # Cột đã tồn tại
-        
+    
         try:
             cursor.execute("ALTER TABLE nguoi_than_che_do_cu ADD COLUMN ghiChu TEXT")
         except sqlite3.OperationalError:
             pass  # Cột đã tồn tại
+    
+    def _migration_indexes(self, cursor):
+        """Migration 3: index cho tìm kiếm, lọc và tra cứu theo personnelId"""
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_personnel_hoTen ON personnel(hoTen)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_personnel_unitId ON personnel(unitId)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_personnel_donVi_capBac ON personnel(donVi, capBac)")
+        for field in SEARCH_FILTER_FIELDS:
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_personnel_{field} ON personnel({field}, hoTen)"
+            )
+        
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_nguoi_than_personnelId ON nguoi_than(personnelId)"
+        )
         
-        conn.commit()
-        conn.close()
+        # Các bảng danh sách: UNIQUE(personnelId) đã tạo sẵn index, chỉ thêm khi thiếu
+        for table in LIST_TABLES:
+            if not self._has_index_on(cursor, table, 'personnelId'):
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{table}_personnelId ON {table}(personnelId)"
+                )
+    
+    def _migration_json_columns(self, cursor):
+        """Migration 5: cột sinh tự động (có index) cho các trường đảng/đoàn/cờ trong thongTinKhac"""
+        existing = {row[1] for row in cursor.execute("PRAGMA table_xinfo(personnel)").fetchall()}
+        for column, path in JSON_COLUMNS.items():
+            if column not in existing:
+                cursor.execute(f"""
+                    ALTER TABLE personnel ADD COLUMN {column} GENERATED ALWAYS AS (
+                        CASE WHEN json_valid(thongTinKhac) THEN json_extract(thongTinKhac, '{path}') END
+                    ) VIRTUAL
+                """)
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_personnel_{column} ON personnel({column})")
+    
+    def _init_tong_hop_counts(self, cursor):
+        """
+        Migration 6: bảng tổng hợp tong_hop_counts (dòng nội dung x nhóm cấp bậc x đơn vị)
+        được các trigger trên personnel cập nhật dần, để tab Tổng hợp không phải quét personnel.
+        Nhóm cấp bậc và dân tộc (chữ thường) được lưu sẵn trong rankCategory, danTocLower.
+        """
+        existing = {row[1] for row in cursor.execute("PRAGMA table_info(personnel)").fetchall()}
+        added = [column for column in ('rankCategory', 'danTocLower') if column not in existing]
+        for column in added:
+            cursor.execute(f"ALTER TABLE personnel ADD COLUMN {column} TEXT NOT NULL DEFAULT ''")
+        self._fill_derived_columns(cursor, added)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS tong_hop_counts (
+                line TEXT NOT NULL,
+                rankCategory TEXT NOT NULL,
+                donVi TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (line, rankCategory, donVi)
+            ) WITHOUT ROWID
+        """)
+        
+        def matching_lines(ref):
+            return ' UNION ALL '.join(
+                f"SELECT '{line}' AS line WHERE {condition.format(row=ref + '.')}"
+                for line, condition in TONG_HOP_LINES.items()
+            )
+        
+        add_new = f"""
+            INSERT INTO tong_hop_counts (line, rankCategory, donVi, count)
+            SELECT line, NEW.rankCategory, COALESCE(NEW.donVi, ''), 1
+            FROM ({matching_lines('NEW')}) WHERE 1
+            ON CONFLICT (line, rankCategory, donVi) DO UPDATE SET count = count + 1;
+        """
+        remove_old = f"""
+            UPDATE tong_hop_counts SET count = count - 1
+            WHERE rankCategory = OLD.rankCategory AND donVi = COALESCE(OLD.donVi, '')
+              AND line IN ({matching_lines('OLD')});
+            DELETE FROM tong_hop_counts WHERE count <= 0;
+        """
+        
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS personnel_tong_hop_ai AFTER INSERT ON personnel BEGIN
+                {add_new}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS personnel_tong_hop_ad AFTER DELETE ON personnel BEGIN
+                {remove_old}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS personnel_tong_hop_au
+            AFTER UPDATE OF rankCategory, donVi, danTocLower, tonGiao, thongTinKhac ON personnel BEGIN
+                {remove_old}
+                {add_new}
+            END
+        """)
+        
+        self._rebuild_tong_hop_counts(cursor)
+    
+    def _rebuild_tong_hop_counts(self, cursor):
+        """Tính lại toàn bộ tong_hop_counts từ personnel"""
+        cursor.execute("DELETE FROM tong_hop_counts")
+        for line, condition in TONG_HOP_LINES.items():
+            cursor.execute(f"""
+                INSERT INTO tong_hop_counts (line, rankCategory, donVi, count)
+                SELECT ?, p.rankCategory, COALESCE(p.donVi, ''), COUNT(*)
+                FROM personnel p WHERE {condition.format(row='p.')}
+                GROUP BY 2, 3
+            """, (line,))
+    
+    def rebuild_tong_hop_counts(self):
+        """Tính lại bảng tổng hợp (dùng khi dữ liệu được ghi bởi công cụ không có trigger)"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            self._fill_derived_columns(cursor, list(DERIVED_COLUMNS))
+            self._rebuild_tong_hop_counts(cursor)
+    
+    def _fill_derived_columns(self, cursor, columns: List[str]):
+        """Tính lại các cột trong DERIVED_COLUMNS cho toàn bộ personnel (trong Python, theo rowid)"""
+        if not columns:
+            return
+        sources = [DERIVED_COLUMNS[column][0] for column in columns]
+        functions = [DERIVED_COLUMNS[column][1] for column in columns]
+        rows = cursor.execute(f"SELECT rowid, {', '.join(sources)} FROM personnel").fetchall()
+        assignments = ', '.join(f"{column} = ?" for column in columns)
+        cursor.executemany(
+            f"UPDATE personnel SET {assignments} WHERE rowid = ?",
+            [
+                tuple(function(value or '') for function, value in zip(functions, row[1:])) + (row[0],)
+                for row in rows
+            ],
+        )
+    
+    def _migration_cap_bac_rank(self, cursor):
+        """
+        Migration 7: cột capBacRank (thứ hạng cấp bậc) và hoTenLower (họ tên chữ thường)
+        cùng index cho thứ tự mặc định _personnel_order()
+        """
+        existing = {row[1] for row in cursor.execute("PRAGMA table_info(personnel)").fetchall()}
+        added = []
+        if 'capBacRank' not in existing:
+            cursor.execute("ALTER TABLE personnel ADD COLUMN capBacRank INTEGER NOT NULL DEFAULT 0")
+            added.append('capBacRank')
+        if 'hoTenLower' not in existing:
+            cursor.execute("ALTER TABLE personnel ADD COLUMN hoTenLower TEXT NOT NULL DEFAULT ''")
+            added.append('hoTenLower')
+        self._fill_derived_columns(cursor, added)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_personnel_order ON personnel(capBacRank DESC, hoTenLower)"
+        )
+    
+    def _migration_name_key_index(self, cursor):
+        """Migration 8: cột nameKey (họ tên chuẩn hoá) và index (nameKey, ngaySinh) để phát hiện trùng khi import"""
+        existing = {row[1] for row in cursor.execute("PRAGMA table_info(personnel)").fetchall()}
+        if 'nameKey' not in existing:
+            cursor.execute("ALTER TABLE personnel ADD COLUMN nameKey TEXT NOT NULL DEFAULT ''")
+            self._fill_derived_columns(cursor, ['nameKey'])
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_personnel_name_key ON personnel(nameKey, ngaySinh)"
+        )
+    
+    def _has_index_on(self, cursor, table: str, column: str) -> bool:
+        """Kiểm tra bảng đã có index nào bắt đầu bằng cột `column` chưa"""
+        for index in cursor.execute(f"PRAGMA index_list({table})").fetchall():
+            first = cursor.execute(f"PRAGMA index_info('{index[1]}')").fetchone()
+            if first and first[2] == column:
+                return True
+        return False
+    
+    def _init_unit_members(self, cursor):
+        """Migration 2: tạo bảng unit_members và chuyển dữ liệu một lần từ units.personnelIds"""
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'unit_members'"
+        ).fetchone()
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS unit_members (
+                unitId TEXT NOT NULL,
+                personnelId TEXT NOT NULL,
+                PRIMARY KEY (unitId, personnelId)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_unit_members_personnelId ON unit_members(personnelId)"
+        )
+        
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_units_parentId ON units(parentId)")
+        
+        if not exists:
+            cursor.execute("""
+                INSERT OR IGNORE INTO unit_members (unitId, personnelId)
+                SELECT u.id, j.value FROM units u, json_each(u.personnelIds) j
+                WHERE json_valid(u.personnelIds) AND j.value IS NOT NULL AND j.value != ''
+            """)
+            cursor.execute("UPDATE units SET personnelIds = NULL WHERE personnelIds IS NOT NULL")
+    
+    def _init_full_text_index(self, cursor):
+        """
+        Migration 4: tạo bảng FTS5 personnel_fts (tìm không phân biệt dấu) và các trigger đồng bộ.
+        rowid của personnel_fts trùng rowid của personnel.
+        """
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS personnel_fts USING fts5(
+                personnelId UNINDEXED,
+                {', '.join(FTS_PERSONNEL_COLUMNS)},
+                nguoiThan,
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+        """)
+        
+        fts_columns = ', '.join(FTS_PERSONNEL_COLUMNS)
+        new_values = ', '.join(_fts_text(f"NEW.{col}") for col in FTS_PERSONNEL_COLUMNS)
+        relatives = _fts_text("group_concat(hoTen, ' ')")
+        relatives_of_new = f"(SELECT {relatives} FROM nguoi_than WHERE personnelId = NEW.id)"
+        insert_new = f"""
+            INSERT INTO personnel_fts (rowid, personnelId, {fts_columns}, nguoiThan)
+            VALUES (NEW.rowid, NEW.id, {new_values}, {relatives_of_new});
+        """
+        
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS personnel_fts_ai AFTER INSERT ON personnel BEGIN
+                {insert_new}
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS personnel_fts_ad AFTER DELETE ON personnel BEGIN
+                DELETE FROM personnel_fts WHERE rowid = OLD.rowid;
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS personnel_fts_au
+            AFTER UPDATE OF id, {fts_columns} ON personnel BEGIN
+                DELETE FROM personnel_fts WHERE rowid = OLD.rowid;
+                {insert_new}
+            END
+        """)
+        
+        # Người thân thay đổi -> cập nhật cột nguoiThan của quân nhân tương ứng
+        def refresh_relatives(ref):
+            return f"""
+                UPDATE personnel_fts SET nguoiThan = (
+                    SELECT {_fts_text("group_concat(hoTen, ' ')")} FROM nguoi_than WHERE personnelId = {ref}.personnelId
+                )
+                WHERE rowid = (SELECT rowid FROM personnel WHERE id = {ref}.personnelId);
+            """
+        
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS nguoi_than_fts_ai AFTER INSERT ON nguoi_than BEGIN
+                {refresh_relatives('NEW')}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS nguoi_than_fts_ad AFTER DELETE ON nguoi_than BEGIN
+                {refresh_relatives('OLD')}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS nguoi_than_fts_au AFTER UPDATE ON nguoi_than BEGIN
+                {refresh_relatives('OLD')}
+                {refresh_relatives('NEW')}
+            END
+        """)
+        
+        # Dữ liệu có sẵn từ trước khi có chỉ mục -> xây lại
+        fts_count = cursor.execute("SELECT COUNT(*) FROM personnel_fts").fetchone()[0]
+        personnel_count = cursor.execute("SELECT COUNT(*) FROM personnel").fetchone()[0]
+        if fts_count != personnel_count:
+            self._rebuild_full_text_index(cursor)
+    
+    def _rebuild_full_text_index(self, cursor):
+        """Xây lại toàn bộ personnel_fts từ personnel và nguoi_than"""
+        fts_columns = ', '.join(FTS_PERSONNEL_COLUMNS)
+        values = ', '.join(_fts_text(f"p.{col}") for col in FTS_PERSONNEL_COLUMNS)
+        cursor.execute("DELETE FROM personnel_fts")
+        cursor.execute(f"""
+            INSERT INTO personnel_fts (rowid, personnelId, {fts_columns}, nguoiThan)
+            SELECT p.rowid, p.id, {values},
+                   (SELECT {_fts_text("group_concat(n.hoTen, ' ')")} FROM nguoi_than n WHERE n.personnelId = p.id)
+            FROM personnel p
+        """)
+    
+    def rebuild_full_text_index(self):
+        """Xây lại chỉ mục full-text (dùng khi chỉ mục lệch dữ liệu, ví dụ sau VACUUM)"""
+        with self.connection() as conn:
+            self._rebuild_full_text_index(conn.cursor())
     
     def _migrate_personnel_table(self, cursor):
         """Migration: thêm các cột mới vào bảng personnel"""
@@ -230,43 +887,147 @@ class DatabaseService:
                     print(f"Lỗi khi thêm cột {col_name}: {e}")
                     pass  # Cột đã tồn tại hoặc lỗi khác
     
-    def get_all(self) -> List[Personnel]:
-        """Lấy tất cả quân nhân"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM personnel ORDER BY hoTen")
-        rows = cursor.fetchall()
-        conn.close()
-        
-        result = []
-        for row in rows:
-            data = dict(row)
-            if data.get('thongTinKhac'):
-                data['thongTinKhac'] = json.loads(data['thongTinKhac'])
-            result.append(Personnel.from_dict(data))
-        
-        return result
+    def _load_personnel_cache(self, conn) -> List[Personnel]:
+        """Đảm bảo cache chứa toàn bộ quân nhân; trả về danh sách (trong cache) theo thứ tự mặc định"""
+        with self._cache_lock:
+            if self._cache_is_current(conn) and self._personnel_cache_complete:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+                rows = conn.execute(
+                    f"SELECT {_personnel_select()} FROM personnel ORDER BY {_personnel_order()}"
+                ).fetchall()
+                personnel = [self._row_to_personnel(row) for row in rows]
+                self._personnel_cache = {p.id: p for p in personnel}
+                self._personnel_cache_complete = True
+                self._personnel_order = personnel
+            
+            if self._personnel_order is None:
+                self._personnel_order = sorted(self._personnel_cache.values(),
+                                               key=_personnel_sort_key)
+            return self._personnel_order
+    
+    def get_all(self, columns: Optional[List[str]] = None) -> List[Personnel]:
+        """
+        Lấy tất cả quân nhân (sắp theo cấp bậc từ cao xuống thấp rồi họ tên)
+        Args:
+            columns: None = Personnel đầy đủ (đọc từ cache nếu còn hợp lệ);
+                     danh sách cột = chỉ đọc các cột này, trả về PersonnelRow gọn nhẹ
+                     (luôn kèm cột id) cho các view danh sách
+        """
+        if columns is not None:
+            with self.connection() as conn:
+                rows = conn.execute(
+                    f"SELECT {self._projection(columns)} FROM personnel ORDER BY {_personnel_order()}"
+                ).fetchall()
+            return [PersonnelRow(row) for row in rows]
+        
+        with self.connection() as conn:
+            order = self._load_personnel_cache(conn)
+            return [self._copy_personnel(p) for p in order]
+    
+    def get_by_ids(self, personnel_ids: List[str]) -> List[Personnel]:
+        """Lấy Personnel đầy đủ theo danh sách ID (giữ thứ tự, bỏ qua ID không tồn tại)"""
+        with self.connection() as conn:
+            with self._cache_lock:
+                self._load_personnel_cache(conn)
+                cache = self._personnel_cache
+                return [self._copy_personnel(cache[pid]) for pid in personnel_ids if pid in cache]
+    
+    @staticmethod
+    def _projection(columns: List[str]) -> str:
+        """Danh sách cột cho SELECT (kiểm tra tên cột, luôn có id)"""
+        unknown = [col for col in columns if col not in PERSONNEL_COLUMNS and col not in JSON_COLUMNS]
+        if unknown:
+            raise ValueError(f"Cột không hợp lệ: {', '.join(unknown)}")
+        selected = ['id'] + [col for col in dict.fromkeys(columns) if col != 'id']
+        return ', '.join(selected)
+    
+    def iter_personnel_values(self, fields: List[str], filters: Optional[Dict[str, Any]] = None,
+                              unit_id: Optional[str] = None, personnel_ids: Optional[List[str]] = None,
+                              flag: Optional[str] = None, list_table: Optional[str] = None,
+                              chunk_size: int = 1000) -> Iterator[List[tuple]]:
+        """
+        Đọc giá trị thô của quân nhân theo từng lô từ cursor (không tạo Personnel), để xuất file lớn.
+        Thứ tự như danh sách (cấp bậc rồi họ tên); NULL được trả về dạng "".
+        Phải dùng hết (hoặc đóng) iterator trên cùng luồng đã gọi.
+        Args:
+            fields: Cột của personnel, JSON_COLUMNS hoặc EXPORT_JSON_FIELDS
+            filters: Lọc bằng như search() (donVi, capBac, ...)
+            unit_id: Chỉ lấy quân nhân thuộc đơn vị này (bảng unit_members)
+            personnel_ids: Chỉ lấy các ID này
+            flag: Chỉ lấy một diện: khoá của PERSONNEL_FLAGS hoặc TONG_HOP_LINES ('dtts', 'tonGiao', ...)
+            list_table: Chỉ lấy quân nhân có trong bảng danh sách này (LIST_TABLES)
+            chunk_size: Số dòng mỗi lô
+        """
+        expressions = []
+        for field in fields:
+            if field in EXPORT_JSON_FIELDS:
+                expressions.append(f"json_extract(p.thongTinKhac, '{EXPORT_JSON_FIELDS[field]}')")
+            elif field in PERSONNEL_COLUMNS or field in JSON_COLUMNS:
+                expressions.append(f"p.{field}")
+            else:
+                raise ValueError(f"Cột không hợp lệ: {field}")
+        select = ', '.join(f"COALESCE({expression}, '')" for expression in expressions)
+        
+        conditions = []
+        params: List[Any] = []
+        if filters:
+            for field in SEARCH_FILTER_FIELDS:
+                if filters.get(field):
+                    conditions.append(f"p.{field} = ?")
+                    params.append(filters[field])
+        if unit_id is not None:
+            conditions.append("p.id IN (SELECT personnelId FROM unit_members WHERE unitId = ?)")
+            params.append(unit_id)
+        if personnel_ids is not None:
+            conditions.append("p.id IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(list(personnel_ids)))
+        if flag is not None:
+            if flag in TONG_HOP_LINES:
+                conditions.append(TONG_HOP_LINES[flag].format(row='p.'))
+            else:
+                conditions.append(self._flag_condition(flag))
+        if list_table is not None:
+            if list_table not in LIST_TABLES:
+                raise ValueError(f"Bảng danh sách không hợp lệ: {list_table}")
+            conditions.append(f"p.id IN (SELECT personnelId FROM {list_table})")
+        where_sql = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        with self.connection() as conn:
+            cursor = conn.execute(
+                f"SELECT {select} FROM personnel p{where_sql} ORDER BY {_personnel_order('p')}",
+                params,
+            )
+            try:
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield [tuple(row) for row in rows]
+            finally:
+                cursor.close()
     
     def get_by_id(self, personnel_id: str) -> Optional[Personnel]:
-        """Lấy quân nhân theo ID"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM personnel WHERE id = ?", (personnel_id,))
-        row = cursor.fetchone()
-        conn.close()
-        
-        if not row:
-            return None
-        
-        data = dict(row)
-        if data.get('thongTinKhac'):
-            data['thongTinKhac'] = json.loads(data['thongTinKhac'])
-        
-        return Personnel.from_dict(data)
+        """Lấy quân nhân theo ID (đọc từ cache nếu còn hợp lệ)"""
+        with self.connection() as conn:
+            with self._cache_lock:
+                current = self._cache_is_current(conn)
+                cached = self._personnel_cache.get(personnel_id) if current else None
+                if cached is not None or (current and self._personnel_cache_complete):
+                    self.cache_hits += 1
+                    return self._copy_personnel(cached) if cached is not None else None
+                
+                self.cache_misses += 1
+                row = conn.execute(
+                    f"SELECT {_personnel_select()} FROM personnel WHERE id = ?", (personnel_id,)
+                ).fetchone()
+                if not row:
+                    return None
+                personnel = self._row_to_personnel(row)
+                self._cache_put(personnel)
+        
+        return self._copy_personnel(personnel)
     
     def create(self, personnel: Personnel) -> str:
         """Tạo quân nhân mới"""
@@ -278,83 +1039,23 @@ class DatabaseService:
         personnel.createdAt = datetime.now()
         personnel.updatedAt = datetime.now()
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            cursor = conn.cursor()
         
-        data = personnel.to_dict()
+            data = personnel.to_dict()
 
-        # Danh sách cột và values tương ứng - đảm bảo số lượng cột khớp hoàn toàn với số values
-        columns = [
-            'id', 'hoTen', 'hoTenThuongDung', 'ngaySinh', 'capBac', 'ngayNhanCapBac',
-            'chucVu', 'ngayNhanChucVu', 'donVi', 'unitId', 'nhapNgu', 'xuatNgu',
-            'queQuan', 'truQuan', 'danToc', 'tonGiao', 'trinhDoVanHoa', 'thanhPhanGiaDinh',
-            'quaTruong', 'nganhHoc', 'capHoc', 'thoiGianDaoTao', 'ketQuaDaoTao',
-            'chucVuChienDau', 'thoiGianChucVuChienDau', 'chucVuDaQua', 'thoiGianChucVuDaQua', 'cmQuan',
-            'lienHeKhiCan', 'soDienThoaiLienHe',
-            'hoTenCha', 'hoTenMe', 'hoTenVo',
-            'hoTenNguoiThan', 'moiQuanHe', 'noiDungNguoiThan',
-            'thamGiaNguyQuan', 'thamGiaNguyQuyen', 'thamGiaNoMau', 'daCaiTao',
-            'ghiChu', 'ngoaiNgu', 'tiengDTTS', 'thongTinKhac', 'createdAt', 'updatedAt',
-        ]
+            # Danh sách cột và values tương ứng - đảm bảo số lượng cột khớp hoàn toàn với số values
+            columns = PERSONNEL_COLUMNS + list(DERIVED_COLUMNS)
 
-        placeholders = ", ".join(["?"] * len(columns))
+            placeholders = ", ".join(["?"] * len(columns))
 
-        values = (
-            data['id'],
-            data['hoTen'],
-            data.get('hoTenThuongDung', ''),
-            data['ngaySinh'],
-            data['capBac'],
-            data.get('ngayNhanCapBac', ''),
-            data['chucVu'],
-            data.get('ngayNhanChucVu', ''),
-            data['donVi'],
-            data.get('unitId'),
-            data['nhapNgu'],
-            data.get('xuatNgu', ''),
-            data['queQuan'],
-            data['truQuan'],
-            data['danToc'],
-            data['tonGiao'],
-            data['trinhDoVanHoa'],
-            data.get('thanhPhanGiaDinh', ''),
-            data.get('quaTruong', ''),
-            data.get('nganhHoc', ''),
-            data.get('capHoc', ''),
-            data.get('thoiGianDaoTao', ''),
-            data.get('ketQuaDaoTao', ''),
-            data.get('chucVuChienDau', ''),
-            data.get('thoiGianChucVuChienDau', ''),
-            data.get('chucVuDaQua', ''),
-            data.get('thoiGianChucVuDaQua', ''),
-            data.get('cmQuan', ''),
-            data.get('lienHeKhiCan', ''),
-            data.get('soDienThoaiLienHe', ''),
-            data.get('hoTenCha', ''),
-            data.get('hoTenMe', ''),
-            data.get('hoTenVo', ''),
-            data.get('hoTenNguoiThan', ''),
-            data.get('moiQuanHe', ''),
-            data.get('noiDungNguoiThan', ''),
-            data.get('thamGiaNguyQuan', ''),
-            data.get('thamGiaNguyQuyen', ''),
-            data.get('thamGiaNoMau', ''),
-            data.get('daCaiTao', ''),
-            data.get('ghiChu', ''),
-            data.get('ngoaiNgu', ''),
-            data.get('tiengDTTS', ''),
-            json.dumps(data['thongTinKhac']),
-            data['createdAt'],
-            data['updatedAt'],
-        )
+            values = _personnel_values(data)
 
-        cursor.execute(
-            f"INSERT INTO personnel ({', '.join(columns)}) VALUES ({placeholders})",
-            values,
-        )
-        
-        conn.commit()
-        conn.close()
+            cursor.execute(
+                f"INSERT INTO personnel ({', '.join(columns)}) VALUES ({placeholders})",
+                values,
+            )
+            self._cache_put(Personnel.from_dict(data))
         
         return personnel.id
     
@@ -362,157 +1063,551 @@ class DatabaseService:
         """Cập nhật quân nhân"""
         personnel.updatedAt = datetime.now()
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            cursor = conn.cursor()
         
-        data = personnel.to_dict()
-        cursor.execute("""
-            UPDATE personnel SET
-                hoTen = ?, hoTenThuongDung = ?, ngaySinh = ?, capBac = ?, ngayNhanCapBac = ?,
-                chucVu = ?, ngayNhanChucVu = ?, donVi = ?, unitId = ?,
-                nhapNgu = ?, xuatNgu = ?, queQuan = ?, truQuan = ?,
-                danToc = ?, tonGiao = ?, trinhDoVanHoa = ?, thanhPhanGiaDinh = ?,
-                quaTruong = ?, nganhHoc = ?, capHoc = ?, thoiGianDaoTao = ?, ketQuaDaoTao = ?,
-                chucVuChienDau = ?, thoiGianChucVuChienDau = ?, chucVuDaQua = ?, thoiGianChucVuDaQua = ?, cmQuan = ?,
-                lienHeKhiCan = ?, soDienThoaiLienHe = ?,
-                hoTenCha = ?, hoTenMe = ?, hoTenVo = ?,
-                hoTenNguoiThan = ?, moiQuanHe = ?, noiDungNguoiThan = ?,
-                thamGiaNguyQuan = ?, thamGiaNguyQuyen = ?, thamGiaNoMau = ?, daCaiTao = ?,
-                ghiChu = ?, ngoaiNgu = ?, tiengDTTS = ?, thongTinKhac = ?, updatedAt = ?
-            WHERE id = ?
-        """, (
-            data['hoTen'],
-            data.get('hoTenThuongDung', ''),
-            data['ngaySinh'],
-            data['capBac'],
-            data.get('ngayNhanCapBac', ''),
-            data['chucVu'],
-            data.get('ngayNhanChucVu', ''),
-            data['donVi'],
-            data.get('unitId'),
-            data['nhapNgu'],
-            data.get('xuatNgu', ''),
-            data['queQuan'],
-            data['truQuan'],
-            data['danToc'],
-            data['tonGiao'],
-            data['trinhDoVanHoa'],
-            data.get('thanhPhanGiaDinh', ''),
-            data.get('quaTruong', ''),
-            data.get('nganhHoc', ''),
-            data.get('capHoc', ''),
-            data.get('thoiGianDaoTao', ''),
-            data.get('ketQuaDaoTao', ''),
-            data.get('chucVuChienDau', ''),
-            data.get('thoiGianChucVuChienDau', ''),
-            data.get('chucVuDaQua', ''),
-            data.get('thoiGianChucVuDaQua', ''),
-            data.get('cmQuan', ''),
-            data.get('lienHeKhiCan', ''),
-            data.get('soDienThoaiLienHe', ''),
-            data.get('hoTenCha', ''),
-            data.get('hoTenMe', ''),
-            data.get('hoTenVo', ''),
-            data.get('hoTenNguoiThan', ''),
-            data.get('moiQuanHe', ''),
-            data.get('noiDungNguoiThan', ''),
-            data.get('thamGiaNguyQuan', ''),
-            data.get('thamGiaNguyQuyen', ''),
-            data.get('thamGiaNoMau', ''),
-            data.get('daCaiTao', ''),
-            data.get('ghiChu', ''),
-            data.get('ngoaiNgu', ''),
-            data.get('tiengDTTS', ''),
-            json.dumps(data['thongTinKhac']),
-            data['updatedAt'],
-            data['id'],
-        ))
-        
-        success = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
+            data = personnel.to_dict()
+            derived_sql = ', '.join(f"{column} = ?" for column in DERIVED_COLUMNS)
+            cursor.execute(f"""
+                UPDATE personnel SET
+                    hoTen = ?, hoTenThuongDung = ?, ngaySinh = ?, capBac = ?, ngayNhanCapBac = ?,
+                    chucVu = ?, ngayNhanChucVu = ?, donVi = ?, unitId = ?,
+                    nhapNgu = ?, xuatNgu = ?, queQuan = ?, truQuan = ?,
+                    danToc = ?, tonGiao = ?, trinhDoVanHoa = ?, thanhPhanGiaDinh = ?,
+                    quaTruong = ?, nganhHoc = ?, capHoc = ?, thoiGianDaoTao = ?, ketQuaDaoTao = ?,
+                    chucVuChienDau = ?, thoiGianChucVuChienDau = ?, chucVuDaQua = ?, thoiGianChucVuDaQua = ?, cmQuan = ?,
+                    lienHeKhiCan = ?, soDienThoaiLienHe = ?,
+                    hoTenCha = ?, hoTenMe = ?, hoTenVo = ?,
+                    hoTenNguoiThan = ?, moiQuanHe = ?, noiDungNguoiThan = ?,
+                    thamGiaNguyQuan = ?, thamGiaNguyQuyen = ?, thamGiaNoMau = ?, daCaiTao = ?,
+                    ghiChu = ?, ngoaiNgu = ?, tiengDTTS = ?, thongTinKhac = ?, updatedAt = ?,
+                    {derived_sql}
+                WHERE id = ?
+            """, (
+                data['hoTen'],
+                data.get('hoTenThuongDung', ''),
+                data['ngaySinh'],
+                data['capBac'],
+                data.get('ngayNhanCapBac', ''),
+                data['chucVu'],
+                data.get('ngayNhanChucVu', ''),
+                data['donVi'],
+                data.get('unitId'),
+                data['nhapNgu'],
+                data.get('xuatNgu', ''),
+                data['queQuan'],
+                data['truQuan'],
+                data['danToc'],
+                data['tonGiao'],
+                data['trinhDoVanHoa'],
+                data.get('thanhPhanGiaDinh', ''),
+                data.get('quaTruong', ''),
+                data.get('nganhHoc', ''),
+                data.get('capHoc', ''),
+                data.get('thoiGianDaoTao', ''),
+                data.get('ketQuaDaoTao', ''),
+                data.get('chucVuChienDau', ''),
+                data.get('thoiGianChucVuChienDau', ''),
+                data.get('chucVuDaQua', ''),
+                data.get('thoiGianChucVuDaQua', ''),
+                data.get('cmQuan', ''),
+                data.get('lienHeKhiCan', ''),
+                data.get('soDienThoaiLienHe', ''),
+                data.get('hoTenCha', ''),
+                data.get('hoTenMe', ''),
+                data.get('hoTenVo', ''),
+                data.get('hoTenNguoiThan', ''),
+                data.get('moiQuanHe', ''),
+                data.get('noiDungNguoiThan', ''),
+                data.get('thamGiaNguyQuan', ''),
+                data.get('thamGiaNguyQuyen', ''),
+                data.get('thamGiaNoMau', ''),
+                data.get('daCaiTao', ''),
+                data.get('ghiChu', ''),
+                data.get('ngoaiNgu', ''),
+                data.get('tiengDTTS', ''),
+                json.dumps(data['thongTinKhac']),
+                data['updatedAt'],
+                *_derived_values(data),
+                data['id'],
+            ))
+        
+            success = cursor.rowcount > 0
+            if success:
+                self._cache_put(Personnel.from_dict(data))
         
         return success
     
+    def bulk_upsert(self, personnel_list: List[Personnel], dedupe_key: str = 'hoTen_ngaySinh',
+                    update_existing: bool = False) -> Dict[str, int]:
+        """
+        Ghi nhiều quân nhân trong một transaction (executemany), bỏ qua hoặc cập nhật bản ghi trùng.
+        Bản ghi trùng được tìm qua index idx_personnel_name_key (hoặc khoá chính với dedupe_key='id');
+        các bản ghi trùng nhau ngay trong personnel_list chỉ ghi bản đầu tiên.
+        Args:
+            personnel_list: Danh sách quân nhân (id trống sẽ được sinh mới)
+            dedupe_key: 'hoTen_ngaySinh' (mặc định), 'hoTen' hoặc 'id'
+            update_existing: True = ghi đè các trường có giá trị vào bản ghi đã có
+                (xem UPSERT_MERGE_COLUMNS), False = bỏ qua
+        Returns:
+            {'inserted': số bản ghi thêm mới, 'updated': số bản ghi cập nhật, 'skipped': số bản ghi bỏ qua}
+        """
+        import uuid
+        
+        if dedupe_key not in DEDUPE_KEYS:
+            raise ValueError(f"dedupe_key không hợp lệ: {dedupe_key}")
+        key_columns = DEDUPE_KEYS[dedupe_key]
+        
+        def record_key(data):
+            """Khoá phát hiện trùng (None = không so trùng, ví dụ chưa có họ tên / id)"""
+            key = tuple(
+                _name_key(data.get(column)) if column == 'hoTen' else (data.get(column) or '')
+                for column in key_columns
+            )
+            return key if key[0] else None
+        
+        now = datetime.now()
+        counts = {'inserted': 0, 'updated': 0, 'skipped': 0}
+        
+        with self.connection() as conn:
+            keys = {record_key(p.to_dict()) for p in personnel_list}
+            keys.discard(None)
+            existing = self._find_existing_keys(conn, key_columns, keys)
+            
+            inserts = []
+            updates = []
+            seen = set()
+            for personnel in personnel_list:
+                data = personnel.to_dict()
+                key = record_key(data)
+                if key is not None:
+                    if key in seen:
+                        counts['skipped'] += 1
+                        continue
+                    seen.add(key)
+                
+                existing_id = existing.get(key) if key is not None else None
+                if existing_id is not None:
+                    if not update_existing:
+                        counts['skipped'] += 1
+                        continue
+                    data['id'] = existing_id
+                    data['updatedAt'] = now.isoformat()
+                    updates.append(data)
+                    continue
+                
+                if not personnel.id:
+                    personnel.id = str(uuid.uuid4())
+                personnel.createdAt = now
+                personnel.updatedAt = now
+                inserts.append(personnel.to_dict())
+            
+            columns = PERSONNEL_COLUMNS + list(DERIVED_COLUMNS)
+            conn.executemany(
+                f"INSERT INTO personnel ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})",
+                [_personnel_values(data) for data in inserts],
+            )
+            
+            # Cột dùng làm khoá trùng giữ nguyên cách viết của bản ghi đã có
+            merge_columns = [column for column in UPSERT_MERGE_COLUMNS if column not in key_columns]
+            merge_sql = ', '.join(f"{column} = COALESCE(NULLIF(?, ''), {column})" for column in merge_columns)
+            # Cột suy ra chỉ đổi khi cột nguồn được ghi đè (NULL = giữ nguyên)
+            derived = [
+                (column, source, function) for column, (source, function) in DERIVED_COLUMNS.items()
+                if source in merge_columns
+            ]
+            derived_sql = ''.join(f", {column} = COALESCE(?, {column})" for column, _, _ in derived)
+            conn.executemany(
+                f"UPDATE personnel SET {merge_sql}, updatedAt = ?{derived_sql} WHERE id = ?",
+                [
+                    tuple(data.get(column) or '' for column in merge_columns)
+                    + (data['updatedAt'],)
+                    + tuple(function(data[source]) if data.get(source) else None
+                            for _, source, function in derived)
+                    + (data['id'],)
+                    for data in updates
+                ],
+            )
+            
+            for data in inserts:
+                self._cache_put(Personnel.from_dict(data))
+            # Bản ghi cập nhật được gộp trong SQL: đọc lại để cache giữ đúng dữ liệu (cache vẫn đầy đủ)
+            if updates:
+                rows = conn.execute(
+                    f"SELECT {_personnel_select()} FROM personnel WHERE id IN (SELECT value FROM json_each(?))",
+                    (json.dumps([data['id'] for data in updates]),),
+                ).fetchall()
+                for row in rows:
+                    self._cache_put(self._row_to_personnel(row))
+        
+        counts['inserted'] = len(inserts)
+        counts['updated'] = len(updates)
+        return counts
+    
+    def _find_existing_keys(self, conn, key_columns: tuple, keys: set) -> Dict[tuple, str]:
+        """ID quân nhân đã có theo khoá phát hiện trùng {khoá: id} (tra theo lô, dùng index)"""
+        if not keys:
+            return {}
+        
+        lookup_sql = 'id' if key_columns == ('id',) else 'nameKey'
+        select = ', '.join(
+            'nameKey' if column == 'hoTen' else f"COALESCE({column}, '')" for column in key_columns
+        )
+        
+        lookup_values = sorted({key[0] for key in keys})
+        found = {}
+        # Giới hạn số tham số của SQLite (mặc định 999 ở các bản cũ)
+        for start in range(0, len(lookup_values), 500):
+            chunk = lookup_values[start:start + 500]
+            rows = conn.execute(
+                f"SELECT id, {select} FROM personnel WHERE {lookup_sql} IN ({', '.join(['?'] * len(chunk))})",
+                chunk,
+            )
+            for row in rows:
+                key = tuple(row[1:])
+                if key in keys:
+                    found.setdefault(key, row[0])
+        return found
+    
     def delete(self, personnel_id: str) -> bool:
         """Xóa quân nhân"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("DELETE FROM personnel WHERE id = ?", (personnel_id,))
-        success = cursor.rowcount > 0
+        with self.connection() as conn:
+            cursor = conn.cursor()
         
-        conn.commit()
-        conn.close()
+            cursor.execute("DELETE FROM personnel WHERE id = ?", (personnel_id,))
+            success = cursor.rowcount > 0
+            cursor.execute("DELETE FROM unit_members WHERE personnelId = ?", (personnel_id,))
+            self._cache_remove(personnel_id)
         
         return success
     
-    def search(self, query: str, filters: Optional[Dict[str, Any]] = None) -> List[Personnel]:
-        """Tìm kiếm quân nhân"""
-        all_personnel = self.get_all()
-        results = []
+    def _row_to_personnel(self, row) -> Personnel:
+        """Chuyển một dòng của bảng personnel thành Personnel"""
+        data = dict(row)
+        if data.get('thongTinKhac'):
+            data['thongTinKhac'] = json.loads(data['thongTinKhac'])
+        return Personnel.from_dict(data)
+    
+    def _build_search_where(self, query: str, filters: Optional[Dict[str, Any]] = None):
+        """
+        Tạo mệnh đề WHERE (có tham số) cho tìm kiếm quân nhân
+        Returns:
+            (where_sql, params) - where_sql rỗng nếu không có điều kiện
+        """
+        conditions = []
+        params: List[Any] = []
+        
+        # Tìm theo tên qua chỉ mục full-text (cột hoTen): mỗi từ tìm kiếm là tiền tố của một từ
+        # trong họ tên, không phân biệt dấu và hoa thường ("nguyen v" khớp "Nguyễn Văn An")
+        match = self._build_fts_query(query) if query else ''
+        if match:
+            conditions.append("rowid IN (SELECT rowid FROM personnel_fts WHERE personnel_fts MATCH ?)")
+            params.append(f"hoTen : ({match})")
+        
+        # Lọc bằng theo các tiêu chí
+        if filters:
+            for field in SEARCH_FILTER_FIELDS:
+                if filters.get(field):
+                    conditions.append(f"{field} = ?")
+                    params.append(filters[field])
+        
+        where_sql = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where_sql, params
+    
+    def search(self, query: str, filters: Optional[Dict[str, Any]] = None,
+               limit: Optional[int] = None, offset: int = 0,
+               columns: Optional[List[str]] = None) -> List[Personnel]:
+        """
+        Tìm kiếm quân nhân (lọc trực tiếp trong SQL)
+        Args:
+            query: Các từ (tiền tố) tìm trong họ tên, không phân biệt dấu
+            filters: Lọc theo donVi, capBac, chucVu, danToc, tonGiao
+            limit: Số bản ghi tối đa (None = tất cả)
+            offset: Bỏ qua bao nhiêu bản ghi đầu (phân trang)
+            columns: Chỉ đọc các cột này và trả về PersonnelRow (xem get_all)
+        """
+        where_sql, params = self._build_search_where(query, filters)
+        select = _personnel_select() if columns is None else self._projection(columns)
+        sql = f"SELECT {select} FROM personnel{where_sql} ORDER BY {_personnel_order()}"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        
+        with self.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        
+        if columns is not None:
+            return [PersonnelRow(row) for row in rows]
+        return [self._row_to_personnel(row) for row in rows]
+    
+    def count_search(self, query: str, filters: Optional[Dict[str, Any]] = None) -> int:
+        """Đếm số quân nhân khớp điều kiện tìm kiếm (không tải dữ liệu)"""
+        where_sql, params = self._build_search_where(query, filters)
+        with self.connection() as conn:
+            row = conn.execute(f"SELECT COUNT(*) FROM personnel{where_sql}", params).fetchone()
+        return row[0]
+    
+    # ========== Diện quản lý (cột sinh từ thongTinKhac) ==========
+    
+    @staticmethod
+    def _flag_condition(flag: str) -> str:
+        """Điều kiện SQL của một diện quản lý trong PERSONNEL_FLAGS"""
+        if flag not in PERSONNEL_FLAGS:
+            raise ValueError(f"Diện quản lý không hợp lệ: {flag}")
+        return PERSONNEL_FLAGS[flag]
+    
+    def filter_personnel(self, flag: str, columns: Optional[List[str]] = None) -> List[Personnel]:
+        """
+        Lấy quân nhân thuộc một diện quản lý bằng một truy vấn dùng index (sắp như get_all)
+        Args:
+            flag: 'dangVien', 'doanVien', 'cdCu', 'yeuToNN' hoặc 'dangPhaiPhanDong'
+            columns: Như get_all (None = Personnel đầy đủ, danh sách cột = PersonnelRow)
+        """
+        condition = self._flag_condition(flag)
+        select = _personnel_select() if columns is None else self._projection(columns)
+        with self.connection() as conn:
+            rows = conn.execute(
+                f"SELECT {select} FROM personnel WHERE {condition} ORDER BY {_personnel_order()}"
+            ).fetchall()
+        
+        if columns is not None:
+            return [PersonnelRow(row) for row in rows]
+        return [self._row_to_personnel(row) for row in rows]
+    
+    def count_personnel(self, flag: str) -> int:
+        """Đếm quân nhân thuộc một diện quản lý (chỉ đọc index)"""
+        condition = self._flag_condition(flag)
+        with self.connection() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM personnel WHERE {condition}").fetchone()[0]
+    
+    def count_flags(self, filters: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+        """
+        Đếm tất cả diện quản lý trong PERSONNEL_FLAGS bằng một câu lệnh: {flag: số quân nhân}
+        Args:
+            filters: Lọc như search() (donVi, capBac, ...)
+        """
+        where_sql, where_params = self._build_search_where('', filters)
+        extra = where_sql.replace(' WHERE ', ' AND ', 1)
+        counts = ', '.join(
+            f"(SELECT COUNT(*) FROM personnel WHERE {condition}{extra})"
+            for condition in PERSONNEL_FLAGS.values()
+        )
+        with self.connection() as conn:
+            row = conn.execute(f"SELECT {counts}", where_params * len(PERSONNEL_FLAGS)).fetchone()
+        return dict(zip(PERSONNEL_FLAGS, row))
+    
+    # ========== Thống kê ==========
+    
+    def group_counts(self, field: str, filters: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+        """
+        Đếm quân nhân theo giá trị của một trường (GROUP BY)
+        Args:
+            field: Một trong GROUP_FIELDS
+            filters: Lọc như search()
+        Returns:
+            {giá trị: số quân nhân} - giá trị rỗng/NULL gộp vào khoá ''
+        """
+        return self.summary([field], filters)['groups'][field]
+    
+    def summary(self, fields: Optional[List[str]] = None,
+                filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Thống kê nhiều tiêu chí trong một lần gọi: tổng số, đếm theo từng trường (GROUP BY,
+        gộp thành một câu lệnh UNION ALL) và các diện quản lý (count_flags)
+        Args:
+            fields: Các trường cần thống kê (mặc định tất cả GROUP_FIELDS)
+            filters: Lọc như search()
+        Returns:
+            {'total': int, 'groups': {field: {giá trị: số}}, 'flags': {flag: số}}
+        """
+        fields = list(GROUP_FIELDS if fields is None else fields)
+        unknown = [field for field in fields if field not in GROUP_FIELDS]
+        if unknown:
+            raise ValueError(f"Trường thống kê không hợp lệ: {', '.join(unknown)}")
+        
+        where_sql, where_params = self._build_search_where('', filters)
+        parts = [f"SELECT NULL, NULL, COUNT(*) FROM personnel{where_sql}"]
+        params = list(where_params)
+        for field in fields:
+            parts.append(
+                f"SELECT '{field}', COALESCE({field}, ''), COUNT(*) FROM personnel{where_sql} "
+                f"GROUP BY COALESCE({field}, '')"
+            )
+            params += where_params
         
-        query_lower = query.lower() if query else ""
+        with self.connection() as conn:
+            rows = conn.execute(' UNION ALL '.join(parts), params).fetchall()
+            flags = self.count_flags(filters)
         
-        for person in all_personnel:
-            # Tìm kiếm theo tên
-            if query_lower and query_lower not in (person.hoTen or "").lower():
+        groups: Dict[str, Dict[str, int]] = {field: {} for field in fields}
+        total = 0
+        for field, value, count in rows:
+            if field is None:
+                total = count
+            else:
+                groups[field][value] = count
+        return {'total': total, 'groups': groups, 'flags': flags}
+    
+    def get_tong_hop_counts(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Số liệu tab Tổng hợp, đọc từ bảng tổng hợp tong_hop_counts (không quét personnel)
+        Returns:
+            {dòng trong TONG_HOP_LINES: {'total': int, 'SQ': int, 'QNCN': int, 'HSQ_CS': int,
+                                        'donVi': {đơn vị: số}}}
+        """
+        result = {
+            line: {'total': 0, **{category: 0 for category in RANK_CATEGORIES}, 'donVi': {}}
+            for line in TONG_HOP_LINES
+        }
+        with self.connection() as conn:
+            rows = conn.execute(
+                "SELECT line, rankCategory, donVi, count FROM tong_hop_counts WHERE count > 0"
+            ).fetchall()
+        
+        for line, category, don_vi, count in rows:
+            entry = result.get(line)
+            if entry is None:
                 continue
-            
-            # Lọc theo các tiêu chí
-            if filters:
-                if filters.get('donVi') and person.donVi != filters['donVi']:
-                    continue
-                if filters.get('capBac') and person.capBac != filters['capBac']:
-                    continue
-                if filters.get('chucVu') and person.chucVu != filters['chucVu']:
-                    continue
-                if filters.get('danToc') and person.danToc != filters['danToc']:
-                    continue
-                if filters.get('tonGiao') and person.tonGiao != filters['tonGiao']:
-                    continue
-            
-            results.append(person)
-        
-        return results
+            entry['total'] += count
+            entry[category] = entry.get(category, 0) + count
+            entry['donVi'][don_vi] = entry['donVi'].get(don_vi, 0) + count
+        return result
     
     def get_unique_values(self, field: str) -> List[str]:
         """Lấy danh sách giá trị unique của một trường"""
-        all_personnel = self.get_all()
-        values = set()
+        if field not in PERSONNEL_COLUMNS:
+            return []
+        
+        with self.connection() as conn:
+            rows = conn.execute(
+                f"SELECT DISTINCT {field} FROM personnel WHERE {field} IS NOT NULL AND {field} != ''"
+            ).fetchall()
+        
+        return sorted(row[0] for row in rows)
+    
+    @staticmethod
+    def _build_fts_query(query: str) -> str:
+        """
+        Chuyển chuỗi người dùng nhập thành biểu thức MATCH của FTS5:
+        bỏ dấu, tách từ, mỗi từ là một tiền tố ("nguyen van" -> "nguyen"* "van"*)
+        """
+        tokens = re.findall(r'\w+', fold_vietnamese(query))
+        return ' '.join(f'"{token}"*' for token in tokens)
+    
+    def full_text_search_ids(self, query: str, limit: Optional[int] = None) -> List[str]:
+        """Tìm ID quân nhân theo chỉ mục full-text, xếp theo độ liên quan (bm25)"""
+        match = self._build_fts_query(query)
+        if not match:
+            return []
         
-        for person in all_personnel:
-            value = getattr(person, field, None)
-            if value:
-                values.add(value)
+        sql = f"SELECT personnelId FROM personnel_fts WHERE personnel_fts MATCH ? ORDER BY {FTS_RANK}"
+        params: List[Any] = [match]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        
+        with self.connection() as conn:
+            return [row[0] for row in conn.execute(sql, params)]
+    
+    def full_text_search(self, query: str, limit: Optional[int] = 50,
+                         filters: Optional[Dict[str, Any]] = None) -> List[Personnel]:
+        """
+        Tìm kiếm không phân biệt dấu trên họ tên, tên thường dùng, quê quán, trú quán,
+        đơn vị và họ tên người thân; kết quả xếp theo bm25
+        Args:
+            query: Chuỗi tìm kiếm ("Nguyen" khớp "Nguyễn")
+            limit: Số kết quả tối đa (None = tất cả)
+            filters: Lọc bằng như search() (donVi, capBac, ...)
+        """
+        match = self._build_fts_query(query)
+        if not match:
+            return []
         
-        return sorted(list(values))
+        conditions = ["personnel_fts MATCH ?"]
+        params: List[Any] = [match]
+        if filters:
+            for field in SEARCH_FILTER_FIELDS:
+                if filters.get(field):
+                    conditions.append(f"p.{field} = ?")
+                    params.append(filters[field])
+        
+        limit_sql = ""
+        if limit is not None:
+            limit_sql = " LIMIT ?"
+            params.append(limit)
+        
+        if len(conditions) == 1:
+            # Không có bộ lọc: lấy top-N trong FTS trước rồi mới join sang personnel
+            sql = f"""
+                SELECT {_personnel_select('p')} FROM (
+                    SELECT personnelId, {FTS_RANK} AS score FROM personnel_fts
+                    WHERE personnel_fts MATCH ? ORDER BY score{limit_sql}
+                ) f
+                JOIN personnel p ON p.id = f.personnelId
+                ORDER BY f.score
+            """
+        else:
+            sql = f"""
+                SELECT {_personnel_select('p')} FROM personnel_fts
+                JOIN personnel p ON p.id = personnel_fts.personnelId
+                WHERE {' AND '.join(conditions)}
+                ORDER BY {FTS_RANK}{limit_sql}
+            """
+        
+        with self.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        
+        return [self._row_to_personnel(row) for row in rows]
     
     # ========== Unit Management ==========
     
+    def _load_unit_members(self, conn, unit_ids: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """Lấy danh sách ID quân nhân của các đơn vị từ bảng unit_members"""
+        if unit_ids is None:
+            rows = conn.execute("SELECT unitId, personnelId FROM unit_members")
+        else:
+            rows = conn.execute(
+                "SELECT unitId, personnelId FROM unit_members "
+                "WHERE unitId IN (SELECT value FROM json_each(?))",
+                (json.dumps(unit_ids),),
+            )
+        members: Dict[str, List[str]] = {}
+        for row in rows:
+            members.setdefault(row[0], []).append(row[1])
+        return members
+    
+    def _rows_to_units(self, conn, rows) -> List:
+        """Chuyển các dòng của bảng units thành Unit (kèm personnelIds từ unit_members)"""
+        from models.unit import Unit
+        
+        members = self._load_unit_members(conn, [row['id'] for row in rows])
+        result = []
+        for row in rows:
+            data = dict(row)
+            data['personnelIds'] = members.get(data['id'], [])
+            result.append(Unit.from_dict(data))
+        return result
+    
+    def _replace_unit_members(self, conn, unit_id: str, personnel_ids: List[str]):
+        """Thay toàn bộ thành viên của đơn vị bằng danh sách mới"""
+        ids_json = json.dumps(list(personnel_ids or []))
+        conn.execute(
+            "DELETE FROM unit_members WHERE unitId = ? "
+            "AND personnelId NOT IN (SELECT value FROM json_each(?))",
+            (unit_id, ids_json),
+        )
+        conn.execute(
+            "INSERT OR IGNORE INTO unit_members (unitId, personnelId) "
+            "SELECT ?, value FROM json_each(?)",
+            (unit_id, ids_json),
+        )
+    
     def get_all_units(self):
         """Lấy tất cả đơn vị"""
         try:
-            from models.unit import Unit
-            
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT * FROM units ORDER BY loai, ten")
-            rows = cursor.fetchall()
-            conn.close()
-            
-            result = []
-            for row in rows:
-                data = dict(row)
-                if data.get('personnelIds'):
-                    data['personnelIds'] = json.loads(data['personnelIds'])
-                else:
-                    data['personnelIds'] = []
-                result.append(Unit.from_dict(data))
-            
-            return result
+            with self.connection() as conn:
+                rows = conn.execute("SELECT * FROM units ORDER BY loai, ten").fetchall()
+                return self._rows_to_units(conn, rows)
         except sqlite3.OperationalError:
             # Bảng chưa tồn tại
             return []
@@ -520,52 +1615,22 @@ class DatabaseService:
     def get_unit_by_id(self, unit_id: str):
         """Lấy đơn vị theo ID"""
         try:
-            from models.unit import Unit
-            
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT * FROM units WHERE id = ?", (unit_id,))
-            row = cursor.fetchone()
-            conn.close()
-            
-            if not row:
-                return None
-            
-            data = dict(row)
-            if data.get('personnelIds'):
-                data['personnelIds'] = json.loads(data['personnelIds'])
-            else:
-                data['personnelIds'] = []
-            
-            return Unit.from_dict(data)
+            with self.connection() as conn:
+                row = conn.execute("SELECT * FROM units WHERE id = ?", (unit_id,)).fetchone()
+                if not row:
+                    return None
+                return self._rows_to_units(conn, [row])[0]
         except sqlite3.OperationalError:
             return None
     
     def get_units_by_parent_id(self, parent_id: str):
         """Lấy danh sách đơn vị con theo parent ID"""
         try:
-            from models.unit import Unit
-            
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT * FROM units WHERE parentId = ? ORDER BY ten", (parent_id,))
-            rows = cursor.fetchall()
-            conn.close()
-            
-            result = []
-            for row in rows:
-                data = dict(row)
-                if data.get('personnelIds'):
-                    data['personnelIds'] = json.loads(data['personnelIds'])
-                else:
-                    data['personnelIds'] = []
-                result.append(Unit.from_dict(data))
-            
-            return result
+            with self.connection() as conn:
+                rows = conn.execute(
+                    "SELECT * FROM units WHERE parentId = ? ORDER BY ten", (parent_id,)
+                ).fetchall()
+                return self._rows_to_units(conn, rows)
         except sqlite3.OperationalError:
             return []
     
@@ -579,85 +1644,229 @@ class DatabaseService:
         unit.createdAt = datetime.now()
         unit.updatedAt = datetime.now()
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        data = unit.to_dict()
-        cursor.execute("""
-            INSERT INTO units (
-                id, ten, loai, parentId, personnelIds, ghiChu, createdAt, updatedAt
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            data['id'],
-            data['ten'],
-            data['loai'],
-            data['parentId'],
-            json.dumps(data['personnelIds']),
-            data['ghiChu'],
-            data['createdAt'],
-            data['updatedAt'],
-        ))
-        
-        conn.commit()
-        conn.close()
+        with self.connection() as conn:
+            data = unit.to_dict()
+            # personnelIds không còn lưu dạng JSON trong units, mà trong unit_members
+            conn.execute("""
+                INSERT INTO units (
+                    id, ten, loai, parentId, ghiChu, createdAt, updatedAt
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (
+                data['id'],
+                data['ten'],
+                data['loai'],
+                data['parentId'],
+                data['ghiChu'],
+                data['createdAt'],
+                data['updatedAt'],
+            ))
+            self._replace_unit_members(conn, unit.id, data['personnelIds'])
         
         return unit.id
     
     def update_unit(self, unit) -> bool:
-        """Cập nhật đơn vị"""
+        """Cập nhật đơn vị (bao gồm danh sách unit.personnelIds)"""
         unit.updatedAt = datetime.now()
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        data = unit.to_dict()
-        cursor.execute("""
-            UPDATE units SET
-                ten = ?, loai = ?, parentId = ?, personnelIds = ?,
-                ghiChu = ?, updatedAt = ?
-            WHERE id = ?
-        """, (
-            data['ten'],
-            data['loai'],
-            data['parentId'],
-            json.dumps(data['personnelIds']),
-            data['ghiChu'],
-            data['updatedAt'],
-            data['id'],
-        ))
-        
-        success = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
+        with self.connection() as conn:
+            data = unit.to_dict()
+            cursor = conn.execute("""
+                UPDATE units SET
+                    ten = ?, loai = ?, parentId = ?, ghiChu = ?, updatedAt = ?
+                WHERE id = ?
+            """, (
+                data['ten'],
+                data['loai'],
+                data['parentId'],
+                data['ghiChu'],
+                data['updatedAt'],
+                data['id'],
+            ))
+            success = cursor.rowcount > 0
+            if success:
+                self._replace_unit_members(conn, unit.id, data['personnelIds'])
         
         return success
     
     def delete_unit(self, unit_id: str) -> bool:
         """Xóa đơn vị"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("DELETE FROM units WHERE id = ?", (unit_id,))
-        success = cursor.rowcount > 0
-        
-        conn.commit()
-        conn.close()
+        with self.connection() as conn:
+            cursor = conn.execute("DELETE FROM units WHERE id = ?", (unit_id,))
+            success = cursor.rowcount > 0
+            conn.execute("DELETE FROM unit_members WHERE unitId = ?", (unit_id,))
         
         return success
     
+    def get_unit_personnel_ids(self, unit_id: str) -> List[str]:
+        """Lấy danh sách ID quân nhân trực tiếp thuộc đơn vị"""
+        with self.connection() as conn:
+            rows = conn.execute(
+                "SELECT personnelId FROM unit_members WHERE unitId = ?", (unit_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+    
     def get_personnel_by_unit(self, unit_id: str) -> List[Personnel]:
         """Lấy danh sách quân nhân trong đơn vị"""
-        unit = self.get_unit_by_id(unit_id)
-        if not unit:
+        with self.connection() as conn:
+            rows = conn.execute(f"""
+                SELECT {_personnel_select('p')} FROM unit_members m
+                JOIN personnel p ON p.id = m.personnelId
+                WHERE m.unitId = ?
+                ORDER BY {_personnel_order('p')}
+            """, (unit_id,)).fetchall()
+        
+        return [self._row_to_personnel(row) for row in rows]
+    
+    # Giới hạn độ sâu khi duyệt cây đơn vị (phòng dữ liệu parentId bị vòng lặp)
+    MAX_UNIT_DEPTH = 32
+    
+    def get_unit_subtree(self, unit_id: str) -> List:
+        """
+        Lấy đơn vị và toàn bộ đơn vị con cháu (WITH RECURSIVE), theo thứ tự duyệt cây
+        (mỗi đơn vị con đứng ngay sau đơn vị cha, anh em sắp theo tên)
+        """
+        try:
+            with self.connection() as conn:
+                rows = conn.execute("""
+                    WITH RECURSIVE tree(id, depth, path) AS (
+                        SELECT id, 0, '' FROM units WHERE id = ?
+                        UNION ALL
+                        SELECT u.id, t.depth + 1, t.path || char(1) || u.ten
+                        FROM units u JOIN tree t ON u.parentId = t.id
+                        WHERE t.depth < ?
+                    )
+                    SELECT u.* FROM tree t JOIN units u ON u.id = t.id
+                    ORDER BY t.path
+                """, (unit_id, self.MAX_UNIT_DEPTH)).fetchall()
+                return self._rows_to_units(conn, rows)
+        except sqlite3.OperationalError:
             return []
+    
+    def get_unit_headcounts(self) -> Dict[str, Dict[str, int]]:
+        """
+        Đếm quân nhân của mọi đơn vị trong một truy vấn
+        Returns:
+            {unit_id: {'direct': số quân nhân trực tiếp,
+                       'total': tổng quân nhân của đơn vị và các đơn vị con cháu}}
+        """
+        try:
+            with self.connection() as conn:
+                rows = conn.execute("""
+                    WITH RECURSIVE tree(ancestorId, unitId, depth) AS (
+                        SELECT id, id, 0 FROM units
+                        UNION
+                        SELECT t.ancestorId, u.id, t.depth + 1
+                        FROM units u JOIN tree t ON u.parentId = t.unitId
+                        WHERE t.depth < ?
+                    ),
+                    direct AS (
+                        SELECT unitId AS id, COUNT(*) AS n FROM unit_members GROUP BY unitId
+                    ),
+                    totals AS (
+                        SELECT t.ancestorId AS id, SUM(d.n) AS n
+                        FROM tree t JOIN direct d ON d.id = t.unitId
+                        GROUP BY t.ancestorId
+                    )
+                    SELECT u.id, COALESCE(d.n, 0), COALESCE(x.n, 0)
+                    FROM units u
+                    LEFT JOIN direct d ON d.id = u.id
+                    LEFT JOIN totals x ON x.id = u.id
+                """, (self.MAX_UNIT_DEPTH,)).fetchall()
+        except sqlite3.OperationalError:
+            return {}
         
-        all_personnel = self.get_all()
-        result = []
-        for person in all_personnel:
-            if person.id in unit.personnelIds:
-                result.append(person)
-        
-        return result
+        return {row[0]: {'direct': row[1], 'total': row[2]} for row in rows}
+    
+    def get_personnel_in_subtree(self, unit_id: str) -> List[Personnel]:
+        """
+        Lấy tất cả quân nhân thuộc đơn vị và các đơn vị con cháu (không trùng lặp),
+        nhóm theo thứ tự duyệt cây đơn vị rồi theo cấp bậc và họ tên
+        """
+        with self.connection() as conn:
+            rows = conn.execute(f"""
+                WITH RECURSIVE tree(id, depth, path) AS (
+                    SELECT id, 0, '' FROM units WHERE id = ?
+                    UNION ALL
+                    SELECT u.id, t.depth + 1, t.path || char(1) || u.ten
+                    FROM units u JOIN tree t ON u.parentId = t.id
+                    WHERE t.depth < ?
+                ),
+                members AS (
+                    SELECT m.personnelId, MIN(t.path) AS path
+                    FROM tree t JOIN unit_members m ON m.unitId = t.id
+                    GROUP BY m.personnelId
+                )
+                SELECT {_personnel_select('p')} FROM members s JOIN personnel p ON p.id = s.personnelId
+                ORDER BY s.path, {_personnel_order('p')}
+            """, (unit_id, self.MAX_UNIT_DEPTH)).fetchall()
+        
+        return [self._row_to_personnel(row) for row in rows]
+    
+    def add_personnel_to_unit(self, unit_id: str, personnel_ids: List[str]) -> int:
+        """
+        Thêm quân nhân vào đơn vị và đặt personnel.unitId
+        Returns:
+            Số quân nhân được thêm mới
+        """
+        ids_json = json.dumps(list(personnel_ids))
+        with self.connection() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO unit_members (unitId, personnelId) "
+                "SELECT ?, value FROM json_each(?)",
+                (unit_id, ids_json),
+            )
+            added = cursor.rowcount
+            conn.execute(
+                "UPDATE personnel SET unitId = ?, updatedAt = ? "
+                "WHERE id IN (SELECT value FROM json_each(?))",
+                (unit_id, datetime.now().isoformat(), ids_json),
+            )
+            self._cache_set_unit_id(personnel_ids, unit_id)
+        return added
+    
+    def remove_personnel_from_unit(self, unit_id: str, personnel_ids: List[str]) -> int:
+        """
+        Xóa quân nhân khỏi đơn vị (bỏ personnel.unitId nếu đang trỏ tới đơn vị này)
+        Returns:
+            Số quân nhân đã xóa khỏi đơn vị
+        """
+        ids_json = json.dumps(list(personnel_ids))
+        with self.connection() as conn:
+            cursor = conn.execute(
+                "DELETE FROM unit_members WHERE unitId = ? "
+                "AND personnelId IN (SELECT value FROM json_each(?))",
+                (unit_id, ids_json),
+            )
+            removed = cursor.rowcount
+            conn.execute(
+                "UPDATE personnel SET unitId = NULL, updatedAt = ? "
+                "WHERE unitId = ? AND id IN (SELECT value FROM json_each(?))",
+                (datetime.now().isoformat(), unit_id, ids_json),
+            )
+            self._cache_set_unit_id(personnel_ids, None, only_from=unit_id)
+        return removed
+    
+    def move_personnel_to_unit(self, from_unit_id: str, to_unit_id: str, personnel_ids: List[str]) -> int:
+        """
+        Chuyển quân nhân từ đơn vị này sang đơn vị khác
+        Returns:
+            Số quân nhân đã chuyển
+        """
+        ids_json = json.dumps(list(personnel_ids))
+        with self.connection() as conn:
+            cursor = conn.execute(
+                "UPDATE OR REPLACE unit_members SET unitId = ? "
+                "WHERE unitId = ? AND personnelId IN (SELECT value FROM json_each(?))",
+                (to_unit_id, from_unit_id, ids_json),
+            )
+            moved = cursor.rowcount
+            conn.execute(
+                "UPDATE personnel SET unitId = ?, updatedAt = ? "
+                "WHERE id IN (SELECT value FROM json_each(?))",
+                (to_unit_id, datetime.now().isoformat(), ids_json),
+            )
+            self._cache_set_unit_id(personnel_ids, to_unit_id)
+        return moved
     
     # ========== NguoiThan Management ==========
     
@@ -666,13 +1875,11 @@ class DatabaseService:
         try:
             from models.nguoi_than import NguoiThan
             
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
+            with self.connection() as conn:
+                cursor = conn.cursor()
             
-            cursor.execute("SELECT * FROM nguoi_than WHERE personnelId = ? ORDER BY hoTen", (personnel_id,))
-            rows = cursor.fetchall()
-            conn.close()
+                cursor.execute("SELECT * FROM nguoi_than WHERE personnelId = ? ORDER BY hoTen", (personnel_id,))
+                rows = cursor.fetchall()
             
             result = []
             for row in rows:
@@ -685,18 +1892,69 @@ class DatabaseService:
         except Exception:
             return []
     
+    def get_nguoi_than_for_many(self, personnel_ids: Optional[List[str]] = None) -> Dict[str, List]:
+        """
+        Lấy người thân của nhiều quân nhân trong một truy vấn
+        Args:
+            personnel_ids: Danh sách ID quân nhân (None = tất cả)
+        Returns:
+            {personnel_id: [NguoiThan, ...]} - quân nhân không có người thân sẽ không có key
+        """
+        try:
+            from models.nguoi_than import NguoiThan
+            
+            with self.connection() as conn:
+                if personnel_ids is None:
+                    rows = conn.execute(
+                        "SELECT * FROM nguoi_than ORDER BY personnelId, hoTen"
+                    ).fetchall()
+                else:
+                    rows = conn.execute(
+                        "SELECT * FROM nguoi_than WHERE personnelId IN (SELECT value FROM json_each(?)) "
+                        "ORDER BY personnelId, hoTen",
+                        (json.dumps(list(personnel_ids)),),
+                    ).fetchall()
+            
+            result: Dict[str, List] = {}
+            for row in rows:
+                result.setdefault(row['personnelId'], []).append(NguoiThan.from_dict(dict(row)))
+            return result
+        except Exception:
+            return {}
+    
+    def count_nguoi_than_for_many(self, personnel_ids: Optional[List[str]] = None) -> Dict[str, int]:
+        """
+        Đếm số người thân của nhiều quân nhân (không tải chi tiết người thân).
+        Dùng để kiểm tra quân nhân có người thân hay không: `personnel_id in result`
+        Returns:
+            {personnel_id: số người thân} - chỉ gồm quân nhân có ít nhất một người thân
+        """
+        try:
+            with self.connection() as conn:
+                if personnel_ids is None:
+                    rows = conn.execute(
+                        "SELECT personnelId, COUNT(*) FROM nguoi_than GROUP BY personnelId"
+                    ).fetchall()
+                else:
+                    rows = conn.execute(
+                        "SELECT personnelId, COUNT(*) FROM nguoi_than "
+                        "WHERE personnelId IN (SELECT value FROM json_each(?)) GROUP BY personnelId",
+                        (json.dumps(list(personnel_ids)),),
+                    ).fetchall()
+            return {row[0]: row[1] for row in rows}
+        except Exception:
+            return {}
+    
     def get_nguoi_than_by_id(self, nguoi_than_id: str):
         """Lấy người thân theo ID"""
         try:
             from models.nguoi_than import NguoiThan
             
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
+            with self.connection() as conn:
+                cursor = conn.cursor()
             
-            cursor.execute("SELECT * FROM nguoi_than WHERE id = ?", (nguoi_than_id,))
-            row = cursor.fetchone()
-            conn.close()
+                cursor.execute("SELECT * FROM nguoi_than WHERE id = ?", (nguoi_than_id,))
+                row = cursor.fetchone()
             
             if not row:
                 return None
@@ -716,31 +1974,29 @@ class DatabaseService:
         nguoi_than.createdAt = datetime.now()
         nguoi_than.updatedAt = datetime.now()
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+        
+            data = nguoi_than.to_dict()
+            cursor.execute("""
+                INSERT INTO nguoi_than (
+                    id, personnelId, hoTen, ngaySinh, diaChi, soDienThoai,
+                    moiQuanHe, noiDung, ghiChu, createdAt, updatedAt
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                data['id'],
+                data['personnelId'],
+                data['hoTen'],
+                data['ngaySinh'],
+                data['diaChi'],
+                data['soDienThoai'],
+                data['moiQuanHe'],
+                data['noiDung'],
+                data['ghiChu'],
+                data['createdAt'],
+                data['updatedAt'],
+            ))
         
-        data = nguoi_than.to_dict()
-        cursor.execute("""
-            INSERT INTO nguoi_than (
-                id, personnelId, hoTen, ngaySinh, diaChi, soDienThoai,
-                moiQuanHe, noiDung, ghiChu, createdAt, updatedAt
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            data['id'],
-            data['personnelId'],
-            data['hoTen'],
-            data['ngaySinh'],
-            data['diaChi'],
-            data['soDienThoai'],
-            data['moiQuanHe'],
-            data['noiDung'],
-            data['ghiChu'],
-            data['createdAt'],
-            data['updatedAt'],
-        ))
-        
-        conn.commit()
-        conn.close()
         
         return nguoi_than.id
     
@@ -750,54 +2006,49 @@ class DatabaseService:
         
         nguoi_than.updatedAt = datetime.now()
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            cursor = conn.cursor()
         
-        data = nguoi_than.to_dict()
-        cursor.execute("""
-            UPDATE nguoi_than SET
-                hoTen = ?, ngaySinh = ?, diaChi = ?, soDienThoai = ?,
-                moiQuanHe = ?, noiDung = ?, ghiChu = ?, updatedAt = ?
-            WHERE id = ?
-        """, (
-            data['hoTen'],
-            data['ngaySinh'],
-            data['diaChi'],
-            data['soDienThoai'],
-            data['moiQuanHe'],
-            data['noiDung'],
-            data['ghiChu'],
-            data['updatedAt'],
-            data['id'],
-        ))
-        
-        success = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
+            data = nguoi_than.to_dict()
+            cursor.execute("""
+                UPDATE nguoi_than SET
+                    hoTen = ?, ngaySinh = ?, diaChi = ?, soDienThoai = ?,
+                    moiQuanHe = ?, noiDung = ?, ghiChu = ?, updatedAt = ?
+                WHERE id = ?
+            """, (
+                data['hoTen'],
+                data['ngaySinh'],
+                data['diaChi'],
+                data['soDienThoai'],
+                data['moiQuanHe'],
+                data['noiDung'],
+                data['ghiChu'],
+                data['updatedAt'],
+                data['id'],
+            ))
+        
+            success = cursor.rowcount > 0
         
         return success
     
     def delete_nguoi_than(self, nguoi_than_id: str) -> bool:
         """Xóa người thân"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute("DELETE FROM nguoi_than WHERE id = ?", (nguoi_than_id,))
-        success = cursor.rowcount > 0
+            cursor.execute("DELETE FROM nguoi_than WHERE id = ?", (nguoi_than_id,))
+            success = cursor.rowcount > 0
         
-        conn.commit()
-        conn.close()
         
         return success
     
     def get_ban_chap_hanh_chi_doan(self) -> List[str]:
         """Lấy danh sách ID quân nhân trong ban chấp hành chi đoàn"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT personnelId FROM ban_chap_hanh_chi_doan")
-            rows = cursor.fetchall()
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT personnelId FROM ban_chap_hanh_chi_doan")
+                rows = cursor.fetchall()
             return [row[0] for row in rows]
         except Exception:
             return []
@@ -808,31 +2059,29 @@ class DatabaseService:
             import uuid
             from datetime import datetime
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            with self.connection() as conn:
+                cursor = conn.cursor()
             
-            # Kiểm tra xem đã có chưa
-            cursor.execute("SELECT id FROM ban_chap_hanh_chi_doan WHERE personnelId = ?", (personnel_id,))
-            existing = cursor.fetchone()
+                # Kiểm tra xem đã có chưa
+                cursor.execute("SELECT id FROM ban_chap_hanh_chi_doan WHERE personnelId = ?", (personnel_id,))
+                existing = cursor.fetchone()
             
-            if existing:
-                # Cập nhật
-                cursor.execute("""
-                    UPDATE ban_chap_hanh_chi_doan 
-                    SET chucVuDoan = ?, updatedAt = ?
-                    WHERE personnelId = ?
-                """, (chuc_vu_doan, datetime.now().isoformat(), personnel_id))
-            else:
-                # Thêm mới
-                ban_chap_hanh_id = str(uuid.uuid4())
-                cursor.execute("""
-                    INSERT INTO ban_chap_hanh_chi_doan (id, personnelId, chucVuDoan, createdAt, updatedAt)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (ban_chap_hanh_id, personnel_id, chuc_vu_doan, 
-                      datetime.now().isoformat(), datetime.now().isoformat()))
+                if existing:
+                    # Cập nhật
+                    cursor.execute("""
+                        UPDATE ban_chap_hanh_chi_doan 
+                        SET chucVuDoan = ?, updatedAt = ?
+                        WHERE personnelId = ?
+                    """, (chuc_vu_doan, datetime.now().isoformat(), personnel_id))
+                else:
+                    # Thêm mới
+                    ban_chap_hanh_id = str(uuid.uuid4())
+                    cursor.execute("""
+                        INSERT INTO ban_chap_hanh_chi_doan (id, personnelId, chucVuDoan, createdAt, updatedAt)
+                        VALUES (?, ?, ?, ?, ?)
+                    """, (ban_chap_hanh_id, personnel_id, chuc_vu_doan, 
+                          datetime.now().isoformat(), datetime.now().isoformat()))
             
-            conn.commit()
-            conn.close()
             return True
         except Exception as e:
             print(f"Error adding ban chap hanh: {e}")
@@ -841,11 +2090,9 @@ class DatabaseService:
     def remove_ban_chap_hanh_chi_doan(self, personnel_id: str) -> bool:
         """Xóa quân nhân khỏi ban chấp hành chi đoàn"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM ban_chap_hanh_chi_doan WHERE personnelId = ?", (personnel_id,))
-            conn.commit()
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM ban_chap_hanh_chi_doan WHERE personnelId = ?", (personnel_id,))
             return True
         except Exception:
             return False
@@ -853,11 +2100,10 @@ class DatabaseService:
     def get_chuc_vu_doan(self, personnel_id: str) -> str:
         """Lấy chức vụ đoàn của quân nhân trong ban chấp hành"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT chucVuDoan FROM ban_chap_hanh_chi_doan WHERE personnelId = ?", (personnel_id,))
-            row = cursor.fetchone()
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT chucVuDoan FROM ban_chap_hanh_chi_doan WHERE personnelId = ?", (personnel_id,))
+                row = cursor.fetchone()
             return row[0] if row and row[0] else ""
         except Exception:
             return ""
@@ -865,11 +2111,10 @@ class DatabaseService:
     def get_bao_ve_an_ninh(self) -> List[str]:
         """Lấy danh sách ID quân nhân trong bảo vệ an ninh"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT personnelId FROM bao_ve_an_ninh")
-            rows = cursor.fetchall()
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT personnelId FROM bao_ve_an_ninh")
+                rows = cursor.fetchall()
             return [row[0] for row in rows]
         except Exception:
             return []
@@ -880,31 +2125,29 @@ class DatabaseService:
             import uuid
             from datetime import datetime
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            with self.connection() as conn:
+                cursor = conn.cursor()
             
-            # Kiểm tra xem đã có chưa
-            cursor.execute("SELECT id FROM bao_ve_an_ninh WHERE personnelId = ?", (personnel_id,))
-            existing = cursor.fetchone()
+                # Kiểm tra xem đã có chưa
+                cursor.execute("SELECT id FROM bao_ve_an_ninh WHERE personnelId = ?", (personnel_id,))
+                existing = cursor.fetchone()
             
-            if existing:
-                # Cập nhật
-                cursor.execute("""
-                    UPDATE bao_ve_an_ninh 
-                    SET thoiGianVao = ?, thoiGianRa = ?, updatedAt = ?
-                    WHERE personnelId = ?
-                """, (thoi_gian_vao, thoi_gian_ra, datetime.now().isoformat(), personnel_id))
-            else:
-                # Thêm mới
-                bao_ve_id = str(uuid.uuid4())
-                cursor.execute("""
-                    INSERT INTO bao_ve_an_ninh (id, personnelId, thoiGianVao, thoiGianRa, createdAt, updatedAt)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (bao_ve_id, personnel_id, thoi_gian_vao, thoi_gian_ra, 
-                      datetime.now().isoformat(), datetime.now().isoformat()))
+                if existing:
+                    # Cập nhật
+                    cursor.execute("""
+                        UPDATE bao_ve_an_ninh 
+                        SET thoiGianVao = ?, thoiGianRa = ?, updatedAt = ?
+                        WHERE personnelId = ?
+                    """, (thoi_gian_vao, thoi_gian_ra, datetime.now().isoformat(), personnel_id))
+                else:
+                    # Thêm mới
+                    bao_ve_id = str(uuid.uuid4())
+                    cursor.execute("""
+                        INSERT INTO bao_ve_an_ninh (id, personnelId, thoiGianVao, thoiGianRa, createdAt, updatedAt)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """, (bao_ve_id, personnel_id, thoi_gian_vao, thoi_gian_ra, 
+                          datetime.now().isoformat(), datetime.now().isoformat()))
             
-            conn.commit()
-            conn.close()
             return True
         except Exception as e:
             print(f"Error adding bao ve an ninh: {e}")
@@ -913,11 +2156,9 @@ class DatabaseService:
     def remove_bao_ve_an_ninh(self, personnel_id: str) -> bool:
         """Xóa quân nhân khỏi bảo vệ an ninh"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM bao_ve_an_ninh WHERE personnelId = ?", (personnel_id,))
-            conn.commit()
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM bao_ve_an_ninh WHERE personnelId = ?", (personnel_id,))
             return True
         except Exception:
             return False
@@ -927,11 +2168,10 @@ class DatabaseService:
     def get_nguoi_than_che_do_cu(self) -> List[str]:
         """Lấy danh sách ID quân nhân có người thân tham gia chế độ cũ"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT personnelId FROM nguoi_than_che_do_cu")
-            result = [row[0] for row in cursor.fetchall()]
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT personnelId FROM nguoi_than_che_do_cu")
+                result = [row[0] for row in cursor.fetchall()]
             return result
         except Exception:
             return []
@@ -942,31 +2182,29 @@ class DatabaseService:
             import uuid
             from datetime import datetime
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            with self.connection() as conn:
+                cursor = conn.cursor()
             
-            # Kiểm tra xem đã có chưa
-            cursor.execute("SELECT id FROM nguoi_than_che_do_cu WHERE personnelId = ?", (personnel_id,))
-            existing = cursor.fetchone()
+                # Kiểm tra xem đã có chưa
+                cursor.execute("SELECT id FROM nguoi_than_che_do_cu WHERE personnelId = ?", (personnel_id,))
+                existing = cursor.fetchone()
             
-            if existing:
-                # Cập nhật
-                cursor.execute("""
-                    UPDATE nguoi_than_che_do_cu 
-                    SET updatedAt = ?
-                    WHERE personnelId = ?
-                """, (datetime.now().isoformat(), personnel_id))
-            else:
-                # Thêm mới
-                record_id = str(uuid.uuid4())
-                cursor.execute("""
-                    INSERT INTO nguoi_than_che_do_cu (id, personnelId, createdAt, updatedAt)
-                    VALUES (?, ?, ?, ?)
-                """, (record_id, personnel_id, 
-                      datetime.now().isoformat(), datetime.now().isoformat()))
+                if existing:
+                    # Cập nhật
+                    cursor.execute("""
+                        UPDATE nguoi_than_che_do_cu 
+                        SET updatedAt = ?
+                        WHERE personnelId = ?
+                    """, (datetime.now().isoformat(), personnel_id))
+                else:
+                    # Thêm mới
+                    record_id = str(uuid.uuid4())
+                    cursor.execute("""
+                        INSERT INTO nguoi_than_che_do_cu (id, personnelId, createdAt, updatedAt)
+                        VALUES (?, ?, ?, ?)
+                    """, (record_id, personnel_id, 
+                          datetime.now().isoformat(), datetime.now().isoformat()))
             
-            conn.commit()
-            conn.close()
             return True
         except Exception as e:
             print(f"Error adding nguoi than che do cu: {e}")
@@ -975,11 +2213,9 @@ class DatabaseService:
     def remove_nguoi_than_che_do_cu(self, personnel_id: str) -> bool:
         """Xóa quân nhân khỏi danh sách có người thân tham gia chế độ cũ"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM nguoi_than_che_do_cu WHERE personnelId = ?", (personnel_id,))
-            conn.commit()
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM nguoi_than_che_do_cu WHERE personnelId = ?", (personnel_id,))
             return True
         except Exception:
             return False
@@ -987,11 +2223,10 @@ class DatabaseService:
     def get_nguoi_than_che_do_cu_ghi_chu(self, personnel_id: str) -> str:
         """Lấy ghi chú riêng của quân nhân trong người thân chế độ cũ"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT ghiChu FROM nguoi_than_che_do_cu WHERE personnelId = ?", (personnel_id,))
-            row = cursor.fetchone()
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT ghiChu FROM nguoi_than_che_do_cu WHERE personnelId = ?", (personnel_id,))
+                row = cursor.fetchone()
             return row[0] if row and row[0] else ''
         except Exception:
             return ''
@@ -999,15 +2234,13 @@ class DatabaseService:
     def update_nguoi_than_che_do_cu_ghi_chu(self, personnel_id: str, ghi_chu: str) -> bool:
         """Cập nhật ghi chú riêng của quân nhân trong người thân chế độ cũ"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE nguoi_than_che_do_cu 
-                SET ghiChu = ?, updatedAt = ?
-                WHERE personnelId = ?
-            """, (ghi_chu, datetime.now().isoformat(), personnel_id))
-            conn.commit()
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    UPDATE nguoi_than_che_do_cu 
+                    SET ghiChu = ?, updatedAt = ?
+                    WHERE personnelId = ?
+                """, (ghi_chu, datetime.now().isoformat(), personnel_id))
             return True
         except Exception:
             return False
@@ -1017,11 +2250,10 @@ class DatabaseService:
     def get_to_dan_van(self) -> List[str]:
         """Lấy danh sách ID quân nhân trong tổ công tác dân vận"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT personnelId FROM to_dan_van")
-            result = [row[0] for row in cursor.fetchall()]
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT personnelId FROM to_dan_van")
+                result = [row[0] for row in cursor.fetchall()]
             return result
         except Exception:
             return []
@@ -1029,11 +2261,10 @@ class DatabaseService:
     def get_to_dan_van_ghi_chu(self, personnel_id: str) -> str:
         """Lấy ghi chú riêng của quân nhân trong tổ công tác dân vận"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT ghiChu FROM to_dan_van WHERE personnelId = ?", (personnel_id,))
-            row = cursor.fetchone()
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT ghiChu FROM to_dan_van WHERE personnelId = ?", (personnel_id,))
+                row = cursor.fetchone()
             return row[0] if row and row[0] else ''
         except Exception:
             return ''
@@ -1041,15 +2272,13 @@ class DatabaseService:
     def update_to_dan_van_ghi_chu(self, personnel_id: str, ghi_chu: str) -> bool:
         """Cập nhật ghi chú riêng của quân nhân trong tổ công tác dân vận"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE to_dan_van 
-                SET ghiChu = ?, updatedAt = ?
-                WHERE personnelId = ?
-            """, (ghi_chu, datetime.now().isoformat(), personnel_id))
-            conn.commit()
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    UPDATE to_dan_van 
+                    SET ghiChu = ?, updatedAt = ?
+                    WHERE personnelId = ?
+                """, (ghi_chu, datetime.now().isoformat(), personnel_id))
             return True
         except Exception:
             return False
@@ -1060,31 +2289,29 @@ class DatabaseService:
             import uuid
             from datetime import datetime
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            with self.connection() as conn:
+                cursor = conn.cursor()
             
-            # Kiểm tra xem đã có chưa
-            cursor.execute("SELECT id FROM to_dan_van WHERE personnelId = ?", (personnel_id,))
-            existing = cursor.fetchone()
+                # Kiểm tra xem đã có chưa
+                cursor.execute("SELECT id FROM to_dan_van WHERE personnelId = ?", (personnel_id,))
+                existing = cursor.fetchone()
             
-            if existing:
-                # Cập nhật
-                cursor.execute("""
-                    UPDATE to_dan_van 
-                    SET updatedAt = ?
-                    WHERE personnelId = ?
-                """, (datetime.now().isoformat(), personnel_id))
-            else:
-                # Thêm mới
-                record_id = str(uuid.uuid4())
-                cursor.execute("""
-                    INSERT INTO to_dan_van (id, personnelId, createdAt, updatedAt)
-                    VALUES (?, ?, ?, ?)
-                """, (record_id, personnel_id, 
-                      datetime.now().isoformat(), datetime.now().isoformat()))
+                if existing:
+                    # Cập nhật
+                    cursor.execute("""
+                        UPDATE to_dan_van 
+                        SET updatedAt = ?
+                        WHERE personnelId = ?
+                    """, (datetime.now().isoformat(), personnel_id))
+                else:
+                    # Thêm mới
+                    record_id = str(uuid.uuid4())
+                    cursor.execute("""
+                        INSERT INTO to_dan_van (id, personnelId, createdAt, updatedAt)
+                        VALUES (?, ?, ?, ?)
+                    """, (record_id, personnel_id, 
+                          datetime.now().isoformat(), datetime.now().isoformat()))
             
-            conn.commit()
-            conn.close()
             return True
         except Exception as e:
             print(f"Error adding to dan van: {e}")
@@ -1093,11 +2320,9 @@ class DatabaseService:
     def remove_to_dan_van(self, personnel_id: str) -> bool:
         """Xóa quân nhân khỏi tổ công tác dân vận"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM to_dan_van WHERE personnelId = ?", (personnel_id,))
-            conn.commit()
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM to_dan_van WHERE personnelId = ?", (personnel_id,))
             return True
         except Exception:
             return False
@@ -1107,11 +2332,10 @@ class DatabaseService:
     def get_dang_vien_dien_tap(self) -> List[str]:
         """Lấy danh sách ID quân nhân đảng viên tham gia diễn tập"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT personnelId FROM dang_vien_dien_tap")
-            result = [row[0] for row in cursor.fetchall()]
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT personnelId FROM dang_vien_dien_tap")
+                result = [row[0] for row in cursor.fetchall()]
             return result
         except Exception:
             return []
@@ -1119,11 +2343,10 @@ class DatabaseService:
     def get_dang_vien_dien_tap_ghi_chu(self, personnel_id: str) -> str:
         """Lấy ghi chú riêng của quân nhân trong đảng viên diễn tập"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT ghiChu FROM dang_vien_dien_tap WHERE personnelId = ?", (personnel_id,))
-            row = cursor.fetchone()
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT ghiChu FROM dang_vien_dien_tap WHERE personnelId = ?", (personnel_id,))
+                row = cursor.fetchone()
             return row[0] if row and row[0] else ''
         except Exception:
             return ''
@@ -1131,15 +2354,13 @@ class DatabaseService:
     def update_dang_vien_dien_tap_ghi_chu(self, personnel_id: str, ghi_chu: str) -> bool:
         """Cập nhật ghi chú riêng của quân nhân trong đảng viên diễn tập"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE dang_vien_dien_tap 
-                SET ghiChu = ?, updatedAt = ?
-                WHERE personnelId = ?
-            """, (ghi_chu, datetime.now().isoformat(), personnel_id))
-            conn.commit()
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    UPDATE dang_vien_dien_tap 
+                    SET ghiChu = ?, updatedAt = ?
+                    WHERE personnelId = ?
+                """, (ghi_chu, datetime.now().isoformat(), personnel_id))
             return True
         except Exception:
             return False
@@ -1150,31 +2371,29 @@ class DatabaseService:
             import uuid
             from datetime import datetime
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            with self.connection() as conn:
+                cursor = conn.cursor()
             
-            # Kiểm tra xem đã có chưa
-            cursor.execute("SELECT id FROM dang_vien_dien_tap WHERE personnelId = ?", (personnel_id,))
-            existing = cursor.fetchone()
+                # Kiểm tra xem đã có chưa
+                cursor.execute("SELECT id FROM dang_vien_dien_tap WHERE personnelId = ?", (personnel_id,))
+                existing = cursor.fetchone()
             
-            if existing:
-                # Cập nhật
-                cursor.execute("""
-                    UPDATE dang_vien_dien_tap 
-                    SET updatedAt = ?
-                    WHERE personnelId = ?
-                """, (datetime.now().isoformat(), personnel_id))
-            else:
-                # Thêm mới
-                record_id = str(uuid.uuid4())
-                cursor.execute("""
-                    INSERT INTO dang_vien_dien_tap (id, personnelId, createdAt, updatedAt)
-                    VALUES (?, ?, ?, ?)
-                """, (record_id, personnel_id, 
-                      datetime.now().isoformat(), datetime.now().isoformat()))
+                if existing:
+                    # Cập nhật
+                    cursor.execute("""
+                        UPDATE dang_vien_dien_tap 
+                        SET updatedAt = ?
+                        WHERE personnelId = ?
+                    """, (datetime.now().isoformat(), personnel_id))
+                else:
+                    # Thêm mới
+                    record_id = str(uuid.uuid4())
+                    cursor.execute("""
+                        INSERT INTO dang_vien_dien_tap (id, personnelId, createdAt, updatedAt)
+                        VALUES (?, ?, ?, ?)
+                    """, (record_id, personnel_id, 
+                          datetime.now().isoformat(), datetime.now().isoformat()))
             
-            conn.commit()
-            conn.close()
             return True
         except Exception as e:
             print(f"Error adding dang vien dien tap: {e}")
@@ -1183,11 +2402,9 @@ class DatabaseService:
     def remove_dang_vien_dien_tap(self, personnel_id: str) -> bool:
         """Xóa quân nhân khỏi danh sách đảng viên tham gia diễn tập"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM dang_vien_dien_tap WHERE personnelId = ?", (personnel_id,))
-            conn.commit()
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM dang_vien_dien_tap WHERE personnelId = ?", (personnel_id,))
             return True
         except Exception:
             return False
@@ -1197,11 +2414,10 @@ class DatabaseService:
     def get_nguoi_than_dang_phai_phan_dong(self) -> List[str]:
         """Lấy danh sách ID quân nhân có người thân tham gia đảng phái phản động"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT personnelId FROM nguoi_than_dang_phai_phan_dong")
-            result = [row[0] for row in cursor.fetchall()]
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT personnelId FROM nguoi_than_dang_phai_phan_dong")
+                result = [row[0] for row in cursor.fetchall()]
             return result
         except Exception:
             return []
@@ -1212,31 +2428,29 @@ class DatabaseService:
             import uuid
             from datetime import datetime
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            with self.connection() as conn:
+                cursor = conn.cursor()
             
-            # Kiểm tra xem đã có chưa
-            cursor.execute("SELECT id FROM nguoi_than_dang_phai_phan_dong WHERE personnelId = ?", (personnel_id,))
-            existing = cursor.fetchone()
+                # Kiểm tra xem đã có chưa
+                cursor.execute("SELECT id FROM nguoi_than_dang_phai_phan_dong WHERE personnelId = ?", (personnel_id,))
+                existing = cursor.fetchone()
             
-            if existing:
-                # Cập nhật
-                cursor.execute("""
-                    UPDATE nguoi_than_dang_phai_phan_dong 
-                    SET updatedAt = ?
-                    WHERE personnelId = ?
-                """, (datetime.now().isoformat(), personnel_id))
-            else:
-                # Thêm mới
-                record_id = str(uuid.uuid4())
-                cursor.execute("""
-                    INSERT INTO nguoi_than_dang_phai_phan_dong (id, personnelId, createdAt, updatedAt)
-                    VALUES (?, ?, ?, ?)
-                """, (record_id, personnel_id, 
-                      datetime.now().isoformat(), datetime.now().isoformat()))
+                if existing:
+                    # Cập nhật
+                    cursor.execute("""
+                        UPDATE nguoi_than_dang_phai_phan_dong 
+                        SET updatedAt = ?
+                        WHERE personnelId = ?
+                    """, (datetime.now().isoformat(), personnel_id))
+                else:
+                    # Thêm mới
+                    record_id = str(uuid.uuid4())
+                    cursor.execute("""
+                        INSERT INTO nguoi_than_dang_phai_phan_dong (id, personnelId, createdAt, updatedAt)
+                        VALUES (?, ?, ?, ?)
+                    """, (record_id, personnel_id, 
+                          datetime.now().isoformat(), datetime.now().isoformat()))
             
-            conn.commit()
-            conn.close()
             return True
         except Exception as e:
             print(f"Error adding nguoi than dang phai phan dong: {e}")
@@ -1245,11 +2459,9 @@ class DatabaseService:
     def remove_nguoi_than_dang_phai_phan_dong(self, personnel_id: str) -> bool:
         """Xóa quân nhân khỏi danh sách có người thân tham gia đảng phái phản động"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM nguoi_than_dang_phai_phan_dong WHERE personnelId = ?", (personnel_id,))
-            conn.commit()
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM nguoi_than_dang_phai_phan_dong WHERE personnelId = ?", (personnel_id,))
             return True
         except Exception:
             return False
@@ -1257,13 +2469,39 @@ class DatabaseService:
     def get_bao_ve_an_ninh_info(self, personnel_id: str) -> dict:
         """Lấy thông tin bảo vệ an ninh của quân nhân"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT thoiGianVao, thoiGianRa FROM bao_ve_an_ninh WHERE personnelId = ?", (personnel_id,))
-            row = cursor.fetchone()
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT thoiGianVao, thoiGianRa FROM bao_ve_an_ninh WHERE personnelId = ?", (personnel_id,))
+                row = cursor.fetchone()
             if row:
                 return {'thoiGianVao': row[0] or '', 'thoiGianRa': row[1] or ''}
             return {'thoiGianVao': '', 'thoiGianRa': ''}
         except Exception:
             return {'thoiGianVao': '', 'thoiGianRa': ''}
+    
+    def get_bao_ve_an_ninh_info_for_many(self) -> Dict[str, dict]:
+        """Lấy thông tin bảo vệ an ninh của tất cả quân nhân trong danh sách (một truy vấn)"""
+        try:
+            with self.connection() as conn:
+                rows = conn.execute(
+                    "SELECT personnelId, thoiGianVao, thoiGianRa FROM bao_ve_an_ninh"
+                ).fetchall()
+            return {row[0]: {'thoiGianVao': row[1] or '', 'thoiGianRa': row[2] or ''} for row in rows}
+        except Exception:
+            return {}
+    
+    def get_list_entries(self, list_table: str) -> Dict[str, dict]:
+        """
+        Đọc cả một bảng danh sách (LIST_TABLES) trong một truy vấn
+        Returns:
+            {personnel_id: {cột: giá trị}} - NULL được trả về dạng ""
+        """
+        if list_table not in LIST_TABLES:
+            raise ValueError(f"Bảng danh sách không hợp lệ: {list_table}")
+        try:
+            with self.connection() as conn:
+                rows = conn.execute(f"SELECT * FROM {list_table}").fetchall()
+            return {row['personnelId']: {key: row[key] if row[key] is not None else '' for key in row.keys()}
+                    for row in rows}
+        except sqlite3.OperationalError:
+            return {}
@@ -3,9 +3,11 @@ Service xuất dữ liệu ra CSV và PDF
 """
 
 import csv
+import gzip
 import io
+import re
 import sys
-from typing import List
+from typing import Callable, List, Dict, Optional
 from datetime import datetime
 from pathlib import Path
 
@@ -13,6 +15,90 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from models.personnel import Personnel
+from services.word_template import get_template
+
+
+# Cột của file CSV: (tiêu đề, trường đọc bằng DatabaseService.iter_personnel_values)
+CSV_COLUMNS = [
+    ('Họ và Tên', 'hoTen'), ('Họ Tên Thường Dùng', 'hoTenThuongDung'), ('Ngày Sinh', 'ngaySinh'),
+    ('Cấp Bậc', 'capBac'), ('Ngày Nhận Cấp Bậc', 'ngayNhanCapBac'), ('Chức Vụ', 'chucVu'),
+    ('Ngày Nhận Chức Vụ', 'ngayNhanChucVu'), ('Đơn Vị', 'donVi'),
+    ('Nhập Ngũ', 'nhapNgu'), ('Xuất Ngũ', 'xuatNgu'), ('Quê Quán', 'queQuan'), ('Nơi Cư Trú', 'truQuan'),
+    ('Dân Tộc', 'danToc'), ('Tôn Giáo', 'tonGiao'),
+    ('Trình Độ Văn Hóa', 'trinhDoVanHoa'), ('Thành Phần Gia Đình', 'thanhPhanGiaDinh'),
+    ('Qua Trường', 'quaTruong'), ('Ngành Học', 'nganhHoc'),
+    ('Cấp Học', 'capHoc'), ('Thời Gian Đào Tạo', 'thoiGianDaoTao'),
+    ('Liên Hệ Khi Cần', 'lienHeKhiCan'), ('Số Điện Thoại Liên Hệ', 'soDienThoaiLienHe'),
+    ('Họ Tên Cha', 'hoTenCha'), ('Họ Tên Mẹ', 'hoTenMe'), ('Họ Tên Vợ', 'hoTenVo'), ('Ghi Chú', 'ghiChu'),
+    ('Ngày Vào Đảng', 'dangNgayVao'), ('Ngày Chính Thức Đảng', 'dangNgayChinhThuc'), ('Chức Vụ Đảng', 'dangChucVu'),
+    ('Ngày Vào Đoàn', 'doanNgayVao'), ('Chức Vụ Đoàn', 'doanChucVu'),
+    ('Chế Độ Cũ', 'cdCu'), ('Yếu Tố Nước Ngoài', 'yeuToNN'),
+]
+
+# Trường đúng/sai, ghi ra CSV là "Có"/"Không"
+CSV_BOOLEAN_FIELDS = ('cdCu', 'yeuToNN')
+
+# Cột chung của các sheet báo cáo Excel (sau cột STT)
+_REPORT_BASE_COLUMNS = [
+    ('Họ và Tên', 'hoTen'), ('Ngày Sinh', 'ngaySinh'), ('Cấp Bậc', 'capBac'),
+    ('Chức Vụ', 'chucVu'), ('Đơn Vị', 'donVi'),
+]
+
+# Sheet của file Excel tổng hợp báo cáo (một sheet cho mỗi tab báo cáo):
+# (tên sheet, phạm vi cho DatabaseService.iter_personnel_values, cột)
+REPORT_SHEETS = [
+    ('Trích ngang', {}, _REPORT_BASE_COLUMNS + [
+        ('Nhập Ngũ', 'nhapNgu'), ('Dân Tộc', 'danToc'), ('Tôn Giáo', 'tonGiao'),
+        ('Văn Hóa', 'trinhDoVanHoa'), ('Thành Phần Gia Đình', 'thanhPhanGiaDinh'),
+        ('Vào Đảng', 'dangNgayVao'), ('Chính Thức', 'dangNgayChinhThuc'), ('Vào Đoàn', 'doanNgayVao'),
+        ('Quê Quán', 'queQuan'), ('Trú Quán', 'truQuan'), ('Liên Hệ', 'lienHeKhiCan'),
+        ('Số Điện Thoại', 'soDienThoaiLienHe'), ('Họ Tên Cha', 'hoTenCha'), ('Họ Tên Mẹ', 'hoTenMe'),
+        ('Họ Tên Vợ', 'hoTenVo'), ('Ghi Chú', 'ghiChu'),
+    ]),
+    ('Đảng viên', {'flag': 'dangVien'}, _REPORT_BASE_COLUMNS + [
+        ('Vào Đảng', 'dangNgayVao'), ('Chính Thức', 'dangNgayChinhThuc'), ('Chức Vụ Đảng', 'dangChucVu'),
+    ]),
+    ('Đảng viên diễn tập', {'list_table': 'dang_vien_dien_tap'}, _REPORT_BASE_COLUMNS + [
+        ('Vào Đảng', 'dangNgayVao'), ('Chính Thức', 'dangNgayChinhThuc'),
+    ]),
+    ('Tôn giáo', {'flag': 'tonGiao'}, _REPORT_BASE_COLUMNS + [
+        ('Tôn Giáo', 'tonGiao'), ('Quê Quán', 'queQuan'),
+    ]),
+    ('DTTS', {'flag': 'dtts'}, _REPORT_BASE_COLUMNS + [
+        ('Dân Tộc', 'danToc'), ('Tiếng DTTS', 'tiengDTTS'), ('Quê Quán', 'queQuan'),
+    ]),
+    ('Yếu tố nước ngoài', {'flag': 'yeuToNN'}, _REPORT_BASE_COLUMNS + [
+        ('Quê Quán', 'queQuan'), ('Ghi Chú', 'ghiChu'),
+    ]),
+    ('Chế độ cũ', {'flag': 'cdCu'}, _REPORT_BASE_COLUMNS + [
+        ('Ngụy Quân', 'thamGiaNguyQuan'), ('Ngụy Quyền', 'thamGiaNguyQuyen'),
+        ('Nợ Máu', 'thamGiaNoMau'), ('Đã Cải Tạo', 'daCaiTao'),
+    ]),
+    ('Đảng phái phản động', {'list_table': 'nguoi_than_dang_phai_phan_dong'}, _REPORT_BASE_COLUMNS + [
+        ('Họ Tên Người Thân', 'hoTenNguoiThan'), ('Quan Hệ', 'moiQuanHe'), ('Nội Dung', 'noiDungNguoiThan'),
+    ]),
+    ('Bảo vệ an ninh', {'list_table': 'bao_ve_an_ninh'}, _REPORT_BASE_COLUMNS + [
+        ('Quê Quán', 'queQuan'), ('Trú Quán', 'truQuan'),
+    ]),
+    ('Tổ dân vận', {'list_table': 'to_dan_van'}, _REPORT_BASE_COLUMNS + [
+        ('Dân Tộc', 'danToc'), ('Tiếng DTTS', 'tiengDTTS'),
+    ]),
+    ('Ban chấp hành chi đoàn', {'list_table': 'ban_chap_hanh_chi_doan'}, _REPORT_BASE_COLUMNS + [
+        ('Vào Đoàn', 'doanNgayVao'), ('Chức Vụ Đoàn', 'doanChucVu'),
+    ]),
+]
+
+
+def _sheet_title(title: str, used: set) -> str:
+    """Tên sheet hợp lệ cho Excel: bỏ ký tự cấm, tối đa 31 ký tự, không trùng"""
+    base = re.sub(r'[\\/*?:\[\]]', ' ', str(title)).strip()[:31] or 'Sheet'
+    name, index = base, 2
+    while name.lower() in used:
+        suffix = f" ({index})"
+        name = base[:31 - len(suffix)] + suffix
+        index += 1
+    used.add(name.lower())
+    return name
 
 
 class ExportService:
@@ -32,17 +118,7 @@ class ExportService:
         writer = csv.writer(output)
         
         # Header - Đầy đủ các trường với chính tả đúng
-        headers = [
-            'Họ và Tên', 'Họ Tên Thường Dùng', 'Ngày Sinh', 'Cấp Bậc', 
-            'Ngày Nhận Cấp Bậc', 'Chức Vụ', 'Ngày Nhận Chức Vụ', 'Đơn Vị',
-            'Nhập Ngũ', 'Xuất Ngũ', 'Quê Quán', 'Nơi Cư Trú', 'Dân Tộc', 'Tôn Giáo',
-            'Trình Độ Văn Hóa', 'Thành Phần Gia Đình', 'Qua Trường', 'Ngành Học',
-            'Cấp Học', 'Thời Gian Đào Tạo', 'Liên Hệ Khi Cần', 'Số Điện Thoại Liên Hệ',
-            'Họ Tên Cha', 'Họ Tên Mẹ', 'Họ Tên Vợ', 'Ghi Chú',
-            'Ngày Vào Đảng', 'Ngày Chính Thức Đảng', 'Chức Vụ Đảng',
-            'Ngày Vào Đoàn', 'Chức Vụ Đoàn',
-            'Chế Độ Cũ', 'Yếu Tố Nước Ngoài'
-        ]
+        headers = [header for header, _ in CSV_COLUMNS]
         writer.writerow(headers)
         
         # Dữ liệu - Đầy đủ các trường
@@ -86,6 +162,130 @@ class ExportService:
         
         return output.getvalue()
     
+    @staticmethod
+    def write_csv(db, file_path, filters: Optional[Dict] = None, unit_id: Optional[str] = None,
+                  personnel_ids: Optional[List[str]] = None, compress: Optional[bool] = None,
+                  on_progress: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Xuất CSV thẳng ra file theo từng lô đọc từ database (không tạo Personnel, không giữ cả file
+        trong bộ nhớ); cùng cột và định dạng với to_csv()
+        Args:
+            db: DatabaseService
+            file_path: File đích
+            filters: Lọc bằng như DatabaseService.search() (donVi, capBac, ...)
+            unit_id: Chỉ xuất quân nhân thuộc đơn vị này
+            personnel_ids: Chỉ xuất các ID này
+            compress: Nén gzip (mặc định: khi tên file kết thúc bằng .gz)
+            on_progress: Nhận số dòng đã ghi sau mỗi lô (có thể ném exception để dừng)
+        Returns:
+            Số dòng dữ liệu đã ghi
+        """
+        if compress is None:
+            compress = str(file_path).lower().endswith('.gz')
+        
+        fields = [field for _, field in CSV_COLUMNS]
+        boolean_indexes = [index for index, field in enumerate(fields) if field in CSV_BOOLEAN_FIELDS]
+        
+        opener = gzip.open if compress else open
+        count = 0
+        with opener(file_path, 'wt', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow([header for header, _ in CSV_COLUMNS])
+            
+            for rows in db.iter_personnel_values(fields, filters=filters, unit_id=unit_id,
+                                                 personnel_ids=personnel_ids):
+                for row in rows:
+                    if boolean_indexes:
+                        row = list(row)
+                        for index in boolean_indexes:
+                            row[index] = 'Có' if row[index] else 'Không'
+                    writer.writerow(row)
+                count += len(rows)
+                if on_progress:
+                    on_progress(count)
+        
+        return count
+    
+    @staticmethod
+    def write_xlsx(file_path, sheets) -> Dict[str, int]:
+        """
+        Ghi file Excel bằng openpyxl chế độ write-only: các hàng được ghi thẳng ra file
+        theo thứ tự, nên bộ nhớ không tăng theo số hàng (chỉ cần rows là iterator)
+        Args:
+            file_path: File .xlsx đích
+            sheets: Iterable (tên sheet, tiêu đề cột, các hàng)
+        Returns:
+            {tên sheet: số hàng dữ liệu}
+        """
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, PatternFill
+        from openpyxl.utils import get_column_letter
+        
+        workbook = Workbook(write_only=True)
+        header_font = Font(bold=True)
+        header_fill = PatternFill('solid', fgColor='C8E6C9')
+        used_titles = set()
+        counts = {}
+        
+        for title, headers, rows in sheets:
+            sheet = workbook.create_sheet(title=_sheet_title(title, used_titles))
+            # Độ rộng cột phải đặt trước khi ghi hàng (ước lượng theo tiêu đề)
+            for index, header in enumerate(headers, 1):
+                sheet.column_dimensions[get_column_letter(index)].width = max(8, min(40, len(header) + 6))
+            sheet.freeze_panes = 'A2'
+            
+            header_cells = []
+            for header in headers:
+                cell = WriteOnlyCell(sheet, value=header)
+                cell.font = header_font
+                cell.fill = header_fill
+                header_cells.append(cell)
+            sheet.append(header_cells)
+            
+            count = 0
+            for row in rows:
+                sheet.append(row)
+                count += 1
+            counts[sheet.title] = count
+        
+        workbook.save(file_path)
+        return counts
+    
+    @staticmethod
+    def write_report_workbook(db, file_path, sheets: Optional[List] = None,
+                              on_progress: Optional[Callable[[str, int], None]] = None) -> Dict[str, int]:
+        """
+        Xuất các danh sách báo cáo ra một file Excel, mỗi báo cáo một sheet, đọc từng báo cáo
+        bằng một truy vấn duy nhất (DatabaseService.iter_personnel_values) và ghi theo lô
+        Args:
+            db: DatabaseService
+            file_path: File .xlsx đích
+            sheets: Danh sách sheet dạng REPORT_SHEETS (mặc định tất cả)
+            on_progress: Nhận (tên sheet, số hàng đã ghi) sau mỗi lô (có thể ném exception để dừng)
+        Returns:
+            {tên sheet: số hàng dữ liệu}
+        """
+        def sheet_rows(title, scope, columns):
+            fields = [field for _, field in columns]
+            boolean_indexes = [index for index, field in enumerate(fields) if field in CSV_BOOLEAN_FIELDS]
+            count = 0
+            for chunk in db.iter_personnel_values(fields, **scope):
+                for row in chunk:
+                    count += 1
+                    if boolean_indexes:
+                        row = list(row)
+                        for index in boolean_indexes:
+                            row[index] = 'Có' if row[index] else 'Không'
+                    yield (count,) + tuple(row)
+                if on_progress:
+                    on_progress(title, count)
+        
+        return ExportService.write_xlsx(file_path, (
+            (title, ['STT'] + [header for header, _ in columns], sheet_rows(title, scope, columns))
+            for title, scope, columns in (sheets or REPORT_SHEETS)
+        ))
+    
     @staticmethod
     def to_pdf(personnel_list: List[Personnel], title: str = "Danh Sách Quân Nhân") -> bytes:
         """
@@ -157,11 +357,11 @@ class ExportService:
             doc.build(story)
             buffer.seek(0)
             return buffer.getvalue()
-            
+        
         except ImportError:
             # Fallback nếu không có reportlab
             raise ImportError("Cần cài đặt reportlab: pip install reportlab")
-
+    
     @staticmethod
     def filter_ethnic_minority(personnel_list: List[Personnel]) -> List[Personnel]:
         """
@@ -194,6 +394,104 @@ class ExportService:
         
         return filtered
     
+    @staticmethod
+    def _danh_sach_template(tieu_de: str, phu_de: str = ''):
+        """
+        Mẫu chung cho danh sách khổ A4 ngang: khối tiêu đề TIỂU ĐOÀN / CỘNG HOÀ, tiêu đề,
+        ngày tháng, chỗ đặt bảng {{>bang}} và chữ ký chính trị viên
+        """
+        from docx import Document
+        from docx.shared import Pt, Inches
+        from docx.enum.text import WD_ALIGN_PARAGRAPH
+        from docx.oxml.ns import qn
+        
+        doc = Document()
+        
+        # Thiết lập độ rộng trang và margins theo cấu hình Page Setup từ ảnh
+        # Paper: Width 29.7 cm (11.69 inches), Height 21 cm (8.27 inches) - A4 Landscape
+        # Margins: Top 1.1 cm, Bottom 1.75 cm, Left 2.3 cm, Right 2 cm
+        # Header/Footer: 1.27 cm (0.5 inches) from edge
+        section = doc.sections[0]
+        section.page_width = Inches(11.69)  # 29.7 cm = 11.69 inches (ngang)
+        section.page_height = Inches(8.27)  # 21 cm = 8.27 inches (dọc)
+        section.left_margin = Inches(0.906)  # 2.3 cm = 0.906 inches
+        section.right_margin = Inches(0.787)  # 2 cm = 0.787 inches
+        section.top_margin = Inches(0.433)  # 1.1 cm = 0.433 inches
+        section.bottom_margin = Inches(0.689)  # 1.75 cm = 0.689 inches
+        section.header_distance = Inches(0.5)  # 1.27 cm = 0.5 inches
+        section.footer_distance = Inches(0.5)  # 1.27 cm = 0.5 inches
+        
+        # Thiết lập font mặc định
+        doc.styles['Normal'].font.name = 'Times New Roman'
+        doc.styles['Normal']._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+        
+        # Header với 2 cột (trái và phải)
+        header_table = doc.add_table(rows=2, cols=2)
+        header_table.autofit = False
+        
+        # Cột trái: Tiểu đoàn và Đại đội
+        left_cell = header_table.rows[0].cells[0]
+        left_para = left_cell.paragraphs[0]
+        left_para.add_run("{{tieu_doan}}").font.size = Pt(12)
+        left_para = left_cell.add_paragraph()
+        dai_doi_run = left_para.add_run("{{dai_doi}}")
+        dai_doi_run.font.size = Pt(12)
+        dai_doi_run.underline = True
+        
+        # Cột phải: Cộng hòa XHCN Việt Nam
+        right_cell = header_table.rows[0].cells[1]
+        right_para = right_cell.paragraphs[0]
+        right_para.alignment = WD_ALIGN_PARAGRAPH.RIGHT
+        right_para.add_run("CỘNG HOÀ XÃ HỘI CHỦ NGHĨA VIỆT NAM").font.size = Pt(12)
+        right_para = right_cell.add_paragraph()
+        right_para.alignment = WD_ALIGN_PARAGRAPH.RIGHT
+        doc_lap_run = right_para.add_run("Độc lập - Tự do – Hạnh phúc")
+        doc_lap_run.font.size = Pt(12)
+        doc_lap_run.underline = True
+        
+        # Merge hàng header
+        header_table.rows[1].cells[0].merge(header_table.rows[1].cells[1])
+        
+        # Tiêu đề chính (giữa)
+        title_para = doc.add_paragraph()
+        title_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        title_run = title_para.add_run(tieu_de)
+        title_run.bold = True
+        title_run.font.size = Pt(16)
+        
+        # Phụ đề (giữa, gạch chân)
+        if phu_de:
+            subtitle_para = doc.add_paragraph()
+            subtitle_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            subtitle_run = subtitle_para.add_run(phu_de)
+            subtitle_run.bold = True
+            subtitle_run.font.size = Pt(12)
+            subtitle_run.underline = True
+        
+        # Ngày tháng (căn phải)
+        date_para = doc.add_paragraph()
+        date_para.alignment = WD_ALIGN_PARAGRAPH.RIGHT
+        date_run = date_para.add_run("{{dia_diem}}, ngày {{ngay}} tháng {{thang}} năm {{nam}}")
+        date_run.font.size = Pt(12)
+        
+        doc.add_paragraph()  # Khoảng trống
+        
+        doc.add_paragraph("{{>bang}}")
+        
+        doc.add_paragraph()  # Khoảng trống
+        
+        # Chữ ký (căn phải như ảnh)
+        signature = doc.add_paragraph()
+        signature.alignment = WD_ALIGN_PARAGRAPH.RIGHT
+        signature_run = signature.add_run("{{?chinh_tri_vien}}CHÍNH TRỊ VIÊN\n")
+        signature_run.bold = True
+        signature_run.font.size = Pt(12)
+        name_run = signature.add_run("{{chinh_tri_vien}}")
+        name_run.bold = True
+        name_run.font.size = Pt(12)
+        
+        return doc
+    
     @staticmethod
     def to_word_docx(personnel_list: List[Personnel], 
                      tieu_doan: str = "TIỂU ĐOÀN 38",
@@ -205,382 +503,316 @@ class ExportService:
         Tự động lấy danh sách dân tộc từ database
         """
         try:
-            from docx import Document
             from docx.shared import Pt, Inches, RGBColor
             from docx.enum.text import WD_ALIGN_PARAGRAPH
             from docx.oxml.ns import qn
             from docx.oxml import OxmlElement
             
-            doc = Document()
-            
-            # Thiết lập độ rộng trang và margins theo cấu hình Page Setup từ ảnh
-            # Paper: Width 29.7 cm (11.69 inches), Height 21 cm (8.27 inches) - A4 Landscape
-            # Margins: Top 1.1 cm, Bottom 1.75 cm, Left 2.3 cm, Right 2 cm
-            # Header/Footer: 1.27 cm (0.5 inches) from edge
-            section = doc.sections[0]
-            section.page_width = Inches(11.69)  # 29.7 cm = 11.69 inches (ngang)
-            section.page_height = Inches(8.27)  # 21 cm = 8.27 inches (dọc)
-            section.left_margin = Inches(0.906)  # 2.3 cm = 0.906 inches
-            section.right_margin = Inches(0.787)  # 2 cm = 0.787 inches
-            section.top_margin = Inches(0.433)  # 1.1 cm = 0.433 inches
-            section.bottom_margin = Inches(0.689)  # 1.75 cm = 0.689 inches
-            section.header_distance = Inches(0.5)  # 1.27 cm = 0.5 inches
-            section.footer_distance = Inches(0.5)  # 1.27 cm = 0.5 inches
-            
-            # Thiết lập font mặc định
-            doc.styles['Normal'].font.name = 'Times New Roman'
-            doc.styles['Normal']._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
-            
-            # Header với 2 cột (trái và phải)
-            header_table = doc.add_table(rows=2, cols=2)
-            header_table.autofit = False
-            
-            # Cột trái: Tiểu đoàn và Đại đội
-            left_cell = header_table.rows[0].cells[0]
-            left_para = left_cell.paragraphs[0]
-            left_para.add_run(tieu_doan).font.size = Pt(12)
-            left_para = left_cell.add_paragraph()
-            dai_doi_run = left_para.add_run(dai_doi)
-            dai_doi_run.font.size = Pt(12)
-            dai_doi_run.underline = True
-            
-            # Cột phải: Cộng hòa XHCN Việt Nam
-            right_cell = header_table.rows[0].cells[1]
-            right_para = right_cell.paragraphs[0]
-            right_para.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-            right_para.add_run("CỘNG HOÀ XÃ HỘI CHỦ NGHĨA VIỆT NAM").font.size = Pt(12)
-            right_para = right_cell.add_paragraph()
-            right_para.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-            doc_lap_run = right_para.add_run("Độc lập - Tự do – Hạnh phúc")
-            doc_lap_run.font.size = Pt(12)
-            doc_lap_run.underline = True
-            
-            # Merge hàng header
-            header_table.rows[1].cells[0].merge(header_table.rows[1].cells[1])
-            
-            # Tiêu đề chính "DANH SÁCH" (giữa)
-            title_para = doc.add_paragraph()
-            title_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            title_run = title_para.add_run("DANH SÁCH")
-            title_run.bold = True
-            title_run.font.size = Pt(16)
-            
-            # Phụ đề "Quân nhân là người đồng bào dân tộc thiểu số" (giữa, gạch chân)
-            subtitle_para = doc.add_paragraph()
-            subtitle_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            subtitle_run = subtitle_para.add_run("Quân nhân là người đồng bào dân tộc thiểu số")
-            subtitle_run.bold = True
-            subtitle_run.font.size = Pt(12)
-            subtitle_run.underline = True
-            
-            # Ngày tháng (căn phải)
-            date_para = doc.add_paragraph()
-            date_para.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-            date_run = date_para.add_run(f"{dia_diem}, ngày {datetime.now().strftime('%d')} tháng {datetime.now().strftime('%m')} năm {datetime.now().strftime('%Y')}")
-            date_run.font.size = Pt(12)
-            
-            doc.add_paragraph()  # Khoảng trống
-            
-            # Lấy danh sách dân tộc từ dữ liệu thực tế (loại trừ Kinh)
-            ethnic_set = set()
-            for person in personnel_list:
-                dan_toc = (person.danToc or '').strip()
-                if dan_toc and dan_toc.lower() not in ['kinh', 'việt', 'việt nam']:
-                    ethnic_set.add(dan_toc)
-            
-            # Sắp xếp danh sách dân tộc
-            ethnic_groups = sorted(list(ethnic_set))
-            
-            # Đếm số lượng theo từng dân tộc
-            ethnic_counts = {group: 0 for group in ethnic_groups}
-            
-            # Tính số cột: TT(1) + HỌ TÊN(1) + CB/CV(1) + ĐƠN VỊ(1) + Dân tộc(n) + Quê quán/Trú quán(1) + GHI CHÚ(1)
-            num_cols = 4 + len(ethnic_groups) + 2  # 4 cột cố định + số dân tộc + 2 cột cuối
-            
-            # Tạo bảng (không dùng style có màu, sẽ format thủ công)
-            table = doc.add_table(rows=1, cols=num_cols)
-            # Tắt autofit để kiểm soát độ rộng chính xác
-            table.autofit = False
-            
-            # Thêm border đen cho toàn bộ bảng và thiết lập độ rộng bảng
-            tbl = table._element
-            tblPr = tbl.tblPr
-            if tblPr is None:
-                tblPr = OxmlElement('w:tblPr')
-                tbl.insert(0, tblPr)
-            
-            # Thêm borders
-            tblBorders = OxmlElement('w:tblBorders')
-            for border_name in ['top', 'left', 'bottom', 'right', 'insideH', 'insideV']:
-                border = OxmlElement(f'w:{border_name}')
-                border.set(qn('w:val'), 'single')
-                border.set(qn('w:sz'), '4')
-                border.set(qn('w:space'), '0')
-                border.set(qn('w:color'), '000000')  # Màu đen
-                tblBorders.append(border)
-            tblPr.append(tblBorders)
-            
-            # Tính table width = page width - left margin - right margin
-            # 11.69 - 0.906 - 0.787 = 9.997 inches ≈ 10 inches
-            table_width_inches = 11.69 - 0.906 - 0.787
-            
-            # Set table width - thêm vào tblPr đã có
-            tblW = OxmlElement('w:tblW')
-            tblW.set(qn('w:w'), str(int(table_width_inches * 1440)))  # Convert to twips
-            tblW.set(qn('w:type'), 'dxa')  # dxa = twentieths of a point
-            tblPr.append(tblW)
-            
-            # Thiết lập độ rộng cột - Tổng độ rộng = table_width_inches
-            # Điều chỉnh tỷ lệ để phù hợp với page width mới (11.69 inches thay vì 24 inches)
-            col_widths = [
-                Inches(0.4),   # TT
-                Inches(1.5),   # HỌ TÊN
-                Inches(0.6),   # CB, CV
-                Inches(0.6),   # ĐƠN VỊ
-            ]
-            # Thêm width cho các cột dân tộc (mỗi cột nhỏ)
-            for _ in ethnic_groups:
-                col_widths.append(Inches(0.4))  # Mỗi cột dân tộc
-            # Quê quán / Trú quán - tính toán để tổng = table_width_inches
-            # Tính tổng các cột đã có
-            total_so_far = 0.4 + 1.5 + 0.6 + 0.6 + (0.4 * len(ethnic_groups)) + 0.8
-            que_quan_width = table_width_inches - total_so_far
-            if que_quan_width < 1.0:  # Đảm bảo tối thiểu 1 inch
-                que_quan_width = 1.0
-            col_widths.append(Inches(que_quan_width))  # Quê quán / Trú quán (tự động tính)
-            col_widths.append(Inches(0.8))  # GHI CHÚ
-            
-            # Set width cho các cột - đảm bảo tổng = 24 inches
-            for idx, width in enumerate(col_widths):
-                if idx < len(table.columns):
-                    table.columns[idx].width = width
-            
-            # Đảm bảo bảng không tự động mở rộng - kiểm tra lại table width
-            # tblPr và tblW đã được set ở trên, nhưng cần đảm bảo không bị ghi đè
-            tbl = table._element
-            existing_tblPr = tbl.tblPr
-            if existing_tblPr is not None:
-                # Kiểm tra xem tblW đã có chưa
-                existing_tblW = existing_tblPr.find(qn('w:tblW'))
-                if existing_tblW is None:
-                    # Nếu chưa có, thêm vào
-                    tblW = OxmlElement('w:tblW')
-                    tblW.set(qn('w:w'), str(int(table_width_inches * 1440)))
-                    tblW.set(qn('w:type'), 'dxa')
-                    existing_tblPr.append(tblW)
-                else:
-                    # Nếu đã có, cập nhật lại
-                    existing_tblW.set(qn('w:w'), str(int(table_width_inches * 1440)))
-                    existing_tblW.set(qn('w:type'), 'dxa')
-            
-            # Header row
-            header_cells = table.rows[0].cells
-            headers = ['TT', 'HỌ TÊN (Ngày, tháng, năm sinh)', 'CB, CV', 'ĐƠN VỊ'] + ethnic_groups + ['Quê quán / Trú quán', 'GHI CHÚ']
-            
-            # Đảm bảo số cột header khớp với số cột bảng
-            if len(headers) != num_cols:
-                # Nếu thiếu, thêm cột trống
-                while len(headers) < num_cols:
-                    headers.append('')
-                # Nếu thừa, cắt bớt
-                headers = headers[:num_cols]
-            
-            for i, header_text in enumerate(headers):
-                if i < len(header_cells):
-                    cell = header_cells[i]
-                    
-                    # Format header - nền trắng, chữ đen
-                    shading_elm = OxmlElement('w:shd')
-                    shading_elm.set(qn('w:fill'), 'FFFFFF')  # Trắng
-                    shading_elm.set(qn('w:val'), 'clear')
-                    cell._element.get_or_add_tcPr().append(shading_elm)
+            now = datetime.now()
+            values = {
+                'tieu_doan': tieu_doan,
+                'dai_doi': dai_doi,
+                'dia_diem': dia_diem,
+                'ngay': now.strftime('%d'),
+                'thang': now.strftime('%m'),
+                'nam': now.strftime('%Y'),
+                'chinh_tri_vien': chinh_tri_vien,
+            }
+            
+            def build_table(doc):
+                # Lấy danh sách dân tộc từ dữ liệu thực tế (loại trừ Kinh)
+                ethnic_set = set()
+                for person in personnel_list:
+                    dan_toc = (person.danToc or '').strip()
+                    if dan_toc and dan_toc.lower() not in ['kinh', 'việt', 'việt nam']:
+                        ethnic_set.add(dan_toc)
+                
+                # Sắp xếp danh sách dân tộc
+                ethnic_groups = sorted(list(ethnic_set))
+                
+                # Đếm số lượng theo từng dân tộc
+                ethnic_counts = {group: 0 for group in ethnic_groups}
+                
+                # Tính số cột: TT(1) + HỌ TÊN(1) + CB/CV(1) + ĐƠN VỊ(1) + Dân tộc(n) + Quê quán/Trú quán(1) + GHI CHÚ(1)
+                num_cols = 4 + len(ethnic_groups) + 2  # 4 cột cố định + số dân tộc + 2 cột cuối
+                
+                # Tạo bảng (không dùng style có màu, sẽ format thủ công)
+                table = doc.add_table(rows=1, cols=num_cols)
+                # Tắt autofit để kiểm soát độ rộng chính xác
+                table.autofit = False
+                
+                # Thêm border đen cho toàn bộ bảng và thiết lập độ rộng bảng
+                tbl = table._element
+                tblPr = tbl.tblPr
+                if tblPr is None:
+                    tblPr = OxmlElement('w:tblPr')
+                    tbl.insert(0, tblPr)
+                
+                # Thêm borders
+                tblBorders = OxmlElement('w:tblBorders')
+                for border_name in ['top', 'left', 'bottom', 'right', 'insideH', 'insideV']:
+                    border = OxmlElement(f'w:{border_name}')
+                    border.set(qn('w:val'), 'single')
+                    border.set(qn('w:sz'), '4')
+                    border.set(qn('w:space'), '0')
+                    border.set(qn('w:color'), '000000')  # Màu đen
+                    tblBorders.append(border)
+                tblPr.append(tblBorders)
+                
+                # Tính table width = page width - left margin - right margin
+                # 11.69 - 0.906 - 0.787 = 9.997 inches ≈ 10 inches
+                table_width_inches = 11.69 - 0.906 - 0.787
+                
+                # Set table width - thêm vào tblPr đã có
+                tblW = OxmlElement('w:tblW')
+                tblW.set(qn('w:w'), str(int(table_width_inches * 1440)))  # Convert to twips
+                tblW.set(qn('w:type'), 'dxa')  # dxa = twentieths of a point
+                tblPr.append(tblW)
+                
+                # Thiết lập độ rộng cột - Tổng độ rộng = table_width_inches
+                # Điều chỉnh tỷ lệ để phù hợp với page width mới (11.69 inches thay vì 24 inches)
+                col_widths = [
+                    Inches(0.4),   # TT
+                    Inches(1.5),   # HỌ TÊN
+                    Inches(0.6),   # CB, CV
+                    Inches(0.6),   # ĐƠN VỊ
+                ]
+                # Thêm width cho các cột dân tộc (mỗi cột nhỏ)
+                for _ in ethnic_groups:
+                    col_widths.append(Inches(0.4))  # Mỗi cột dân tộc
+                # Quê quán / Trú quán - tính toán để tổng = table_width_inches
+                # Tính tổng các cột đã có
+                total_so_far = 0.4 + 1.5 + 0.6 + 0.6 + (0.4 * len(ethnic_groups)) + 0.8
+                que_quan_width = table_width_inches - total_so_far
+                if que_quan_width < 1.0:  # Đảm bảo tối thiểu 1 inch
+                    que_quan_width = 1.0
+                col_widths.append(Inches(que_quan_width))  # Quê quán / Trú quán (tự động tính)
+                col_widths.append(Inches(0.8))  # GHI CHÚ
+                
+                # Set width cho các cột - đảm bảo tổng = 24 inches
+                for idx, width in enumerate(col_widths):
+                    if idx < len(table.columns):
+                        table.columns[idx].width = width
+                
+                # Đảm bảo bảng không tự động mở rộng - kiểm tra lại table width
+                # tblPr và tblW đã được set ở trên, nhưng cần đảm bảo không bị ghi đè
+                tbl = table._element
+                existing_tblPr = tbl.tblPr
+                if existing_tblPr is not None:
+                    # Kiểm tra xem tblW đã có chưa
+                    existing_tblW = existing_tblPr.find(qn('w:tblW'))
+                    if existing_tblW is None:
+                        # Nếu chưa có, thêm vào
+                        tblW = OxmlElement('w:tblW')
+                        tblW.set(qn('w:w'), str(int(table_width_inches * 1440)))
+                        tblW.set(qn('w:type'), 'dxa')
+                        existing_tblPr.append(tblW)
+                    else:
+                        # Nếu đã có, cập nhật lại
+                        existing_tblW.set(qn('w:w'), str(int(table_width_inches * 1440)))
+                        existing_tblW.set(qn('w:type'), 'dxa')
+                
+                # Header row
+                header_cells = table.rows[0].cells
+                headers = ['TT', 'HỌ TÊN (Ngày, tháng, năm sinh)', 'CB, CV', 'ĐƠN VỊ'] + ethnic_groups + ['Quê quán / Trú quán', 'GHI CHÚ']
+                
+                # Đảm bảo số cột header khớp với số cột bảng
+                if len(headers) != num_cols:
+                    # Nếu thiếu, thêm cột trống
+                    while len(headers) < num_cols:
+                        headers.append('')
+                    # Nếu thừa, cắt bớt
+                    headers = headers[:num_cols]
+                
+                for i, header_text in enumerate(headers):
+                    if i < len(header_cells):
+                        cell = header_cells[i]
+                        
+                        # Format header - nền trắng, chữ đen
+                        shading_elm = OxmlElement('w:shd')
+                        shading_elm.set(qn('w:fill'), 'FFFFFF')  # Trắng
+                        shading_elm.set(qn('w:val'), 'clear')
+                        cell._element.get_or_add_tcPr().append(shading_elm)
+                        
+                        # Xác định loại header để format phù hợp
+                        is_ethnic_col = i >= 4 and i < 4 + len(ethnic_groups)
+                        is_que_quan_col = i == 4 + len(ethnic_groups)
+                        is_ghi_chu_col = i == 4 + len(ethnic_groups) + 1
+                        
+                        # Xử lý text header - chia thành nhiều dòng nếu cần
+                        if 'HỌ TÊN' in header_text:
+                            # Header có thêm (Ngày, tháng, năm sinh)
+                            cell.text = 'HỌ TÊN\n(Ngày, tháng, năm sinh)'
+                        elif header_text == 'CB, CV':
+                            cell.text = 'CB,\nCV'
+                        elif header_text == 'ĐƠN VỊ':
+                            cell.text = 'ĐƠN VỊ'  # Giữ nguyên, không chia dòng
+                        elif header_text == 'Quê quán / Trú quán':
+                            cell.text = 'Quê quán\nTrú quán'  # 2 dòng, không có dấu /
+                        elif header_text == 'GHI CHÚ':
+                            cell.text = 'GHI CHÚ'  # Giữ nguyên, không chia dòng
+                        elif is_ethnic_col:
+                            # Các cột dân tộc - giữ nguyên tên đầy đủ, sẽ xoay dọc
+                            cell.text = header_text
+                        else:
+                            cell.text = header_text
+                        
+                        # Format header text
+                        tcPr = cell._element.tcPr
+                        
+                        # Vertical alignment center cho tất cả header
+                        vAlign = OxmlElement('w:vAlign')
+                        vAlign.set(qn('w:val'), 'center')
+                        tcPr.append(vAlign)
+                        
+                        # Xoay text dọc CHỈ cho các cột dân tộc
+                        if is_ethnic_col:
+                            # Thêm text direction (vertical) - xoay 90 độ
+                            textDirection = OxmlElement('w:textDirection')
+                            textDirection.set(qn('w:val'), 'tbRl')  # Top to bottom, right to left (vertical)
+                            tcPr.append(textDirection)
+                        # Các cột khác không có textDirection = giữ nguyên ngang
+                        
+                        for paragraph in cell.paragraphs:
+                            paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                            for run in paragraph.runs:
+                                run.bold = True
+                                run.font.size = Pt(9)
+                                run.font.color.rgb = RGBColor(0, 0, 0)  # Màu đen
+                                run.font.name = 'Times New Roman'
+                                run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+                
+                # Thêm dữ liệu
+                for idx, person in enumerate(personnel_list, 1):
+                    row = table.add_row()
+                    cells = row.cells
                     
-                    # Xác định loại header để format phù hợp
-                    is_ethnic_col = i >= 4 and i < 4 + len(ethnic_groups)
-                    is_que_quan_col = i == 4 + len(ethnic_groups)
-                    is_ghi_chu_col = i == 4 + len(ethnic_groups) + 1
+                    # TT
+                    cells[0].text = str(idx)
+                    cells[0].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
                     
-                    # Xử lý text header - chia thành nhiều dòng nếu cần
-                    if 'HỌ TÊN' in header_text:
-                        # Header có thêm (Ngày, tháng, năm sinh)
-                        cell.text = 'HỌ TÊN\n(Ngày, tháng, năm sinh)'
-                    elif header_text == 'CB, CV':
-                        cell.text = 'CB,\nCV'
-                    elif header_text == 'ĐƠN VỊ':
-                        cell.text = 'ĐƠN VỊ'  # Giữ nguyên, không chia dòng
-                    elif header_text == 'Quê quán / Trú quán':
-                        cell.text = 'Quê quán\nTrú quán'  # 2 dòng, không có dấu /
-                    elif header_text == 'GHI CHÚ':
-                        cell.text = 'GHI CHÚ'  # Giữ nguyên, không chia dòng
-                    elif is_ethnic_col:
-                        # Các cột dân tộc - giữ nguyên tên đầy đủ, sẽ xoay dọc
-                        cell.text = header_text
+                    # HỌ TÊN (ngày sinh ở dòng dưới)
+                    ho_ten = person.hoTen or ''
+                    if person.ngaySinh:
+                        cells[1].text = f"{ho_ten}\n{person.ngaySinh}"
                     else:
-                        cell.text = header_text
+                        cells[1].text = ho_ten
+                    cells[1].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
                     
-                    # Format header text
-                    tcPr = cell._element.tcPr
+                    # CB, CV
+                    cb_cv = f"{person.capBac or ''}/{person.chucVu or ''}".strip('/')
+                    cells[2].text = cb_cv
+                    cells[2].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
                     
-                    # Vertical alignment center cho tất cả header
-                    vAlign = OxmlElement('w:vAlign')
-                    vAlign.set(qn('w:val'), 'center')
-                    tcPr.append(vAlign)
+                    # ĐƠN VỊ
+                    cells[3].text = person.donVi or ''
+                    cells[3].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
                     
-                    # Xoay text dọc CHỈ cho các cột dân tộc
-                    if is_ethnic_col:
-                        # Thêm text direction (vertical) - xoay 90 độ
-                        textDirection = OxmlElement('w:textDirection')
-                        textDirection.set(qn('w:val'), 'tbRl')  # Top to bottom, right to left (vertical)
-                        tcPr.append(textDirection)
-                    # Các cột khác không có textDirection = giữ nguyên ngang
+                    # Dân tộc - đánh dấu X vào cột tương ứng
+                    dan_toc = (person.danToc or '').strip()
+                    for i, ethnic in enumerate(ethnic_groups):
+                        # So sánh chính xác hoặc chứa
+                        if dan_toc == ethnic or dan_toc.lower() == ethnic.lower():
+                            cells[4 + i].text = 'X'
+                            cells[4 + i].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+                            ethnic_counts[ethnic] += 1
                     
-                    for paragraph in cell.paragraphs:
-                        paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                        for run in paragraph.runs:
-                            run.bold = True
-                            run.font.size = Pt(9)
-                            run.font.color.rgb = RGBColor(0, 0, 0)  # Màu đen
-                            run.font.name = 'Times New Roman'
-                            run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
-            
-            # Thêm dữ liệu
-            for idx, person in enumerate(personnel_list, 1):
-                row = table.add_row()
-                cells = row.cells
-                
-                # TT
-                cells[0].text = str(idx)
-                cells[0].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-                
-                # HỌ TÊN (ngày sinh ở dòng dưới)
-                ho_ten = person.hoTen or ''
-                if person.ngaySinh:
-                    cells[1].text = f"{ho_ten}\n{person.ngaySinh}"
-                else:
-                    cells[1].text = ho_ten
-                cells[1].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
-                
-                # CB, CV
-                cb_cv = f"{person.capBac or ''}/{person.chucVu or ''}".strip('/')
-                cells[2].text = cb_cv
-                cells[2].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-                
-                # ĐƠN VỊ
-                cells[3].text = person.donVi or ''
-                cells[3].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-                
-                # Dân tộc - đánh dấu X vào cột tương ứng
-                dan_toc = (person.danToc or '').strip()
-                for i, ethnic in enumerate(ethnic_groups):
-                    # So sánh chính xác hoặc chứa
-                    if dan_toc == ethnic or dan_toc.lower() == ethnic.lower():
-                        cells[4 + i].text = 'X'
-                        cells[4 + i].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-                        ethnic_counts[ethnic] += 1
-                
-                # Quê quán / Trú quán (cột sau các cột dân tộc) - format với dấu ; như mẫu
-                que_quan = person.queQuan or ''
-                tru_quan = person.truQuan or ''
-                if que_quan and tru_quan:
-                    dia_chi = f"{que_quan}; {tru_quan}"
-                elif que_quan:
-                    dia_chi = que_quan
-                elif tru_quan:
-                    dia_chi = tru_quan
-                else:
-                    dia_chi = ''
-                que_quan_col = 4 + len(ethnic_groups)
-                cells[que_quan_col].text = dia_chi
-                cells[que_quan_col].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
-                
-                # GHI CHÚ (cột cuối)
-                ghi_chu_col = 4 + len(ethnic_groups) + 1
-                cells[ghi_chu_col].text = person.ghiChu or ''
-                cells[ghi_chu_col].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
-                
-                # Format font size và màu cho các cell (nền trắng, chữ đen)
-                for cell in cells:
-                    # Set background white
+                    # Quê quán / Trú quán (cột sau các cột dân tộc) - format với dấu ; như mẫu
+                    que_quan = person.queQuan or ''
+                    tru_quan = person.truQuan or ''
+                    if que_quan and tru_quan:
+                        dia_chi = f"{que_quan}; {tru_quan}"
+                    elif que_quan:
+                        dia_chi = que_quan
+                    elif tru_quan:
+                        dia_chi = tru_quan
+                    else:
+                        dia_chi = ''
+                    que_quan_col = 4 + len(ethnic_groups)
+                    cells[que_quan_col].text = dia_chi
+                    cells[que_quan_col].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
+                    
+                    # GHI CHÚ (cột cuối)
+                    ghi_chu_col = 4 + len(ethnic_groups) + 1
+                    cells[ghi_chu_col].text = person.ghiChu or ''
+                    cells[ghi_chu_col].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
+                    
+                    # Format font size và màu cho các cell (nền trắng, chữ đen)
+                    for cell in cells:
+                        # Set background white
+                        shading_elm = OxmlElement('w:shd')
+                        shading_elm.set(qn('w:fill'), 'FFFFFF')  # Trắng
+                        shading_elm.set(qn('w:val'), 'clear')
+                        cell._element.get_or_add_tcPr().append(shading_elm)
+                        
+                        for paragraph in cell.paragraphs:
+                            for run in paragraph.runs:
+                                run.font.size = Pt(10)
+                                run.font.color.rgb = RGBColor(0, 0, 0)  # Màu đen
+                                run.font.name = 'Times New Roman'
+                                run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+                
+                # Thêm dòng tổng kết
+                total_row = table.add_row()
+                total_cells = total_row.cells
+                
+                # Format nền trắng cho tất cả cell tổng kết
+                for cell in total_cells:
                     shading_elm = OxmlElement('w:shd')
                     shading_elm.set(qn('w:fill'), 'FFFFFF')  # Trắng
                     shading_elm.set(qn('w:val'), 'clear')
                     cell._element.get_or_add_tcPr().append(shading_elm)
-                    
-                    for paragraph in cell.paragraphs:
-                        for run in paragraph.runs:
-                            run.font.size = Pt(10)
-                            run.font.color.rgb = RGBColor(0, 0, 0)  # Màu đen
-                            run.font.name = 'Times New Roman'
-                            run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
-            
-            # Thêm dòng tổng kết
-            total_row = table.add_row()
-            total_cells = total_row.cells
-            
-            # Format nền trắng cho tất cả cell tổng kết
-            for cell in total_cells:
-                shading_elm = OxmlElement('w:shd')
-                shading_elm.set(qn('w:fill'), 'FFFFFF')  # Trắng
-                shading_elm.set(qn('w:val'), 'clear')
-                cell._element.get_or_add_tcPr().append(shading_elm)
-            
-            # Cột "Tổng"
-            if len(total_cells) > 0:
-                total_cells[0].text = "Tổng"
-                total_cells[0].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-                if total_cells[0].paragraphs[0].runs:
-                    total_cells[0].paragraphs[0].runs[0].bold = True
-                    total_cells[0].paragraphs[0].runs[0].font.color.rgb = RGBColor(0, 0, 0)
-                else:
-                    run = total_cells[0].paragraphs[0].add_run("Tổng")
-                    run.bold = True
-                    run.font.color.rgb = RGBColor(0, 0, 0)
-            
-            # Tổng số quân nhân (cột HỌ TÊN)
-            if len(total_cells) > 1:
-                total_cells[1].text = str(len(personnel_list))
-                total_cells[1].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-                if total_cells[1].paragraphs[0].runs:
-                    total_cells[1].paragraphs[0].runs[0].bold = True
-                    total_cells[1].paragraphs[0].runs[0].font.color.rgb = RGBColor(0, 0, 0)
-                else:
-                    run = total_cells[1].paragraphs[0].add_run(str(len(personnel_list)))
-                    run.bold = True
-                    run.font.color.rgb = RGBColor(0, 0, 0)
-            
-            # Tổng theo từng dân tộc
-            for i, ethnic in enumerate(ethnic_groups):
-                col_idx = 4 + i
-                if col_idx < len(total_cells):
-                    total_cells[col_idx].text = str(ethnic_counts[ethnic])
-                    total_cells[col_idx].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-                    if total_cells[col_idx].paragraphs[0].runs:
-                        total_cells[col_idx].paragraphs[0].runs[0].bold = True
-                        total_cells[col_idx].paragraphs[0].runs[0].font.color.rgb = RGBColor(0, 0, 0)
+                
+                # Cột "Tổng"
+                if len(total_cells) > 0:
+                    total_cells[0].text = "Tổng"
+                    total_cells[0].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+                    if total_cells[0].paragraphs[0].runs:
+                        total_cells[0].paragraphs[0].runs[0].bold = True
+                        total_cells[0].paragraphs[0].runs[0].font.color.rgb = RGBColor(0, 0, 0)
                     else:
-                        run = total_cells[col_idx].paragraphs[0].add_run(str(ethnic_counts[ethnic]))
+                        run = total_cells[0].paragraphs[0].add_run("Tổng")
                         run.bold = True
                         run.font.color.rgb = RGBColor(0, 0, 0)
+                
+                # Tổng số quân nhân (cột HỌ TÊN)
+                if len(total_cells) > 1:
+                    total_cells[1].text = str(len(personnel_list))
+                    total_cells[1].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+                    if total_cells[1].paragraphs[0].runs:
+                        total_cells[1].paragraphs[0].runs[0].bold = True
+                        total_cells[1].paragraphs[0].runs[0].font.color.rgb = RGBColor(0, 0, 0)
+                    else:
+                        run = total_cells[1].paragraphs[0].add_run(str(len(personnel_list)))
+                        run.bold = True
+                        run.font.color.rgb = RGBColor(0, 0, 0)
+                
+                # Tổng theo từng dân tộc
+                for i, ethnic in enumerate(ethnic_groups):
+                    col_idx = 4 + i
+                    if col_idx < len(total_cells):
+                        total_cells[col_idx].text = str(ethnic_counts[ethnic])
+                        total_cells[col_idx].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+                        if total_cells[col_idx].paragraphs[0].runs:
+                            total_cells[col_idx].paragraphs[0].runs[0].bold = True
+                            total_cells[col_idx].paragraphs[0].runs[0].font.color.rgb = RGBColor(0, 0, 0)
+                        else:
+                            run = total_cells[col_idx].paragraphs[0].add_run(str(ethnic_counts[ethnic]))
+                            run.bold = True
+                            run.font.color.rgb = RGBColor(0, 0, 0)
+                
+                return table
             
-            doc.add_paragraph()  # Khoảng trống
-            
-            # Chữ ký (căn phải như ảnh)
-            if chinh_tri_vien:
-                signature = doc.add_paragraph()
-                signature.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-                signature_run = signature.add_run("CHÍNH TRỊ VIÊN\n")
-                signature_run.bold = True
-                signature_run.font.size = Pt(12)
-                name_run = signature.add_run(chinh_tri_vien)
-                name_run.bold = True
-                name_run.font.size = Pt(12)
+            template = get_template('dan_toc_thieu_so', lambda: ExportService._danh_sach_template(
+                "DANH SÁCH", "Quân nhân là người đồng bào dân tộc thiểu số"))
+            doc = template.render(values, tables={'bang': build_table})
             
             # Lưu vào buffer
             buffer = io.BytesIO()
             doc.save(buffer)
             buffer.seek(0)
             return buffer.getvalue()
-            
+        
         except ImportError:
             raise ImportError("Cần cài đặt python-docx: pip install python-docx")
         except Exception as e:
@@ -598,259 +830,202 @@ class ExportService:
         Có nhóm đại đội/trung đội, có tổ, mỗi tổ 3 người
         """
         try:
-            from docx import Document
             from docx.shared import Pt, Inches, RGBColor
             from docx.enum.text import WD_ALIGN_PARAGRAPH
             from docx.oxml.ns import qn
             from docx.oxml import OxmlElement
-            from models.unit import Unit
-            
-            doc = Document()
-            
-            # Thiết lập độ rộng trang và margins theo cấu hình Page Setup
-            section = doc.sections[0]
-            section.page_width = Inches(11.69)  # 29.7 cm = 11.69 inches (ngang)
-            section.page_height = Inches(8.27)  # 21 cm = 8.27 inches (dọc)
-            section.left_margin = Inches(0.906)  # 2.3 cm
-            section.right_margin = Inches(0.787)  # 2 cm
-            section.top_margin = Inches(0.433)  # 1.1 cm
-            section.bottom_margin = Inches(0.689)  # 1.75 cm
-            section.header_distance = Inches(0.5)
-            section.footer_distance = Inches(0.5)
-            
-            # Thiết lập font mặc định
-            doc.styles['Normal'].font.name = 'Times New Roman'
-            doc.styles['Normal']._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
-            
-            # Header với 2 cột (trái và phải)
-            header_table = doc.add_table(rows=2, cols=2)
-            header_table.autofit = False
-            
-            # Cột trái: Tiểu đoàn và Đại đội
-            left_cell = header_table.rows[0].cells[0]
-            left_para = left_cell.paragraphs[0]
-            left_para.add_run(tieu_doan).font.size = Pt(12)
-            left_para = left_cell.add_paragraph()
-            dai_doi_text = dai_doi if dai_doi else unit.ten
-            dai_doi_run = left_para.add_run(dai_doi_text)
-            dai_doi_run.font.size = Pt(12)
-            dai_doi_run.underline = True
-            
-            # Cột phải: Cộng hòa XHCN Việt Nam
-            right_cell = header_table.rows[0].cells[1]
-            right_para = right_cell.paragraphs[0]
-            right_para.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-            right_para.add_run("CỘNG HOÀ XÃ HỘI CHỦ NGHĨA VIỆT NAM").font.size = Pt(12)
-            right_para = right_cell.add_paragraph()
-            right_para.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-            doc_lap_run = right_para.add_run("Độc lập - Tự do – Hạnh phúc")
-            doc_lap_run.font.size = Pt(12)
-            doc_lap_run.underline = True
-            
-            # Merge hàng header
-            header_table.rows[1].cells[0].merge(header_table.rows[1].cells[1])
-            
-            # Tiêu đề chính "DANH SÁCH TỔ 3 NGƯỜI" (giữa)
-            title_para = doc.add_paragraph()
-            title_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            title_run = title_para.add_run("DANH SÁCH TỔ 3 NGƯỜI")
-            title_run.bold = True
-            title_run.font.size = Pt(16)
             
-            # Ngày tháng (căn phải)
-            date_para = doc.add_paragraph()
-            date_para.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-            date_run = date_para.add_run(f"{dia_diem}, ngày {datetime.now().strftime('%d')} tháng {datetime.now().strftime('%m')} năm {datetime.now().strftime('%Y')}")
-            date_run.font.size = Pt(12)
-            
-            doc.add_paragraph()  # Khoảng trống
-            
-            # Tạo bảng với 5 cột: TT, Họ và tên, Cấp bậc, Chức vụ, Ghi chú
-            table = doc.add_table(rows=1, cols=5)
-            table.autofit = False
-            
-            # Thiết lập độ rộng bảng
-            tbl = table._element
-            tblPr = tbl.tblPr
-            if tblPr is None:
-                tblPr = OxmlElement('w:tblPr')
-                tbl.insert(0, tblPr)
-            
-            # Thêm borders
-            tblBorders = OxmlElement('w:tblBorders')
-            for border_name in ['top', 'left', 'bottom', 'right', 'insideH', 'insideV']:
-                border = OxmlElement(f'w:{border_name}')
-                border.set(qn('w:val'), 'single')
-                border.set(qn('w:sz'), '4')
-                border.set(qn('w:space'), '0')
-                border.set(qn('w:color'), '000000')
-                tblBorders.append(border)
-            tblPr.append(tblBorders)
-            
-            # Set table width
-            table_width_inches = 11.69 - 0.906 - 0.787
-            tblW = OxmlElement('w:tblW')
-            tblW.set(qn('w:w'), str(int(table_width_inches * 1440)))
-            tblW.set(qn('w:type'), 'dxa')
-            tblPr.append(tblW)
-            
-            # Thiết lập độ rộng cột
-            col_widths = [
-                Inches(0.5),   # TT
-                Inches(3.0),   # Họ và tên
-                Inches(1.0),   # Cấp bậc
-                Inches(1.5),   # Chức vụ
-                Inches(2.0),   # Ghi chú
-            ]
-            for idx, width in enumerate(col_widths):
-                if idx < len(table.columns):
-                    table.columns[idx].width = width
-            
-            # Header row
-            header_cells = table.rows[0].cells
-            headers = ['TT', 'Họ và tên', 'Cấp bậc', 'Chức vụ', 'Ghi chú']
-            
-            for i, header_text in enumerate(headers):
-                if i < len(header_cells):
-                    cell = header_cells[i]
-                    cell.text = header_text
-                    
-                    # Format header - nền trắng, chữ đen
-                    shading_elm = OxmlElement('w:shd')
-                    shading_elm.set(qn('w:fill'), 'FFFFFF')
-                    shading_elm.set(qn('w:val'), 'clear')
-                    cell._element.get_or_add_tcPr().append(shading_elm)
-                    
-                    # Vertical alignment center
-                    tcPr = cell._element.tcPr
-                    vAlign = OxmlElement('w:vAlign')
-                    vAlign.set(qn('w:val'), 'center')
-                    tcPr.append(vAlign)
-                    
-                    for paragraph in cell.paragraphs:
-                        paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                        for run in paragraph.runs:
-                            run.bold = True
-                            run.font.size = Pt(9)
-                            run.font.color.rgb = RGBColor(0, 0, 0)
-                            run.font.name = 'Times New Roman'
-                            run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
-            
-            # Thêm hàng nhóm (đại đội/trung đội) - chỉ một lần
-            group_name = unit.ten.upper()
-            
-            # Hàng nhóm (merge tất cả cột)
-            group_row = table.add_row()
-            group_cell = group_row.cells[0]
-            # Merge tất cả cột
-            for i in range(1, 5):
-                group_cell.merge(group_row.cells[i])
-            
-            group_cell.text = group_name
-            group_cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-            
-            # Format nhóm
-            shading_elm = OxmlElement('w:shd')
-            shading_elm.set(qn('w:fill'), 'FFFFFF')
-            shading_elm.set(qn('w:val'), 'clear')
-            group_cell._element.get_or_add_tcPr().append(shading_elm)
-            
-            for run in group_cell.paragraphs[0].runs:
-                run.bold = True
-                run.font.size = Pt(10)
-                run.font.color.rgb = RGBColor(0, 0, 0)
-                run.font.name = 'Times New Roman'
-                run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
-            
-            # Thêm dữ liệu theo tổ
-            stt = 1
-            
-            for child_data in child_units_data:
-                child_unit = child_data['to']
-                personnel_list = child_data['personnel']
+            now = datetime.now()
+            values = {
+                'tieu_doan': tieu_doan,
+                'dai_doi': dai_doi or unit.ten,
+                'dia_diem': dia_diem,
+                'ngay': now.strftime('%d'),
+                'thang': now.strftime('%m'),
+                'nam': now.strftime('%Y'),
+                'chinh_tri_vien': chinh_tri_vien,
+            }
+            
+            def build_table(doc):
+                # Tạo bảng với 5 cột: TT, Họ và tên, Cấp bậc, Chức vụ, Ghi chú
+                table = doc.add_table(rows=1, cols=5)
+                table.autofit = False
                 
-                # Hàng tổ (merge tất cả cột)
-                to_row = table.add_row()
-                to_cell = to_row.cells[0]
+                # Thiết lập độ rộng bảng
+                tbl = table._element
+                tblPr = tbl.tblPr
+                if tblPr is None:
+                    tblPr = OxmlElement('w:tblPr')
+                    tbl.insert(0, tblPr)
+                
+                # Thêm borders
+                tblBorders = OxmlElement('w:tblBorders')
+                for border_name in ['top', 'left', 'bottom', 'right', 'insideH', 'insideV']:
+                    border = OxmlElement(f'w:{border_name}')
+                    border.set(qn('w:val'), 'single')
+                    border.set(qn('w:sz'), '4')
+                    border.set(qn('w:space'), '0')
+                    border.set(qn('w:color'), '000000')
+                    tblBorders.append(border)
+                tblPr.append(tblBorders)
+                
+                # Set table width
+                table_width_inches = 11.69 - 0.906 - 0.787
+                tblW = OxmlElement('w:tblW')
+                tblW.set(qn('w:w'), str(int(table_width_inches * 1440)))
+                tblW.set(qn('w:type'), 'dxa')
+                tblPr.append(tblW)
+                
+                # Thiết lập độ rộng cột
+                col_widths = [
+                    Inches(0.5),   # TT
+                    Inches(3.0),   # Họ và tên
+                    Inches(1.0),   # Cấp bậc
+                    Inches(1.5),   # Chức vụ
+                    Inches(2.0),   # Ghi chú
+                ]
+                for idx, width in enumerate(col_widths):
+                    if idx < len(table.columns):
+                        table.columns[idx].width = width
+                
+                # Header row
+                header_cells = table.rows[0].cells
+                headers = ['TT', 'Họ và tên', 'Cấp bậc', 'Chức vụ', 'Ghi chú']
+                
+                for i, header_text in enumerate(headers):
+                    if i < len(header_cells):
+                        cell = header_cells[i]
+                        cell.text = header_text
+                        
+                        # Format header - nền trắng, chữ đen
+                        shading_elm = OxmlElement('w:shd')
+                        shading_elm.set(qn('w:fill'), 'FFFFFF')
+                        shading_elm.set(qn('w:val'), 'clear')
+                        cell._element.get_or_add_tcPr().append(shading_elm)
+                        
+                        # Vertical alignment center
+                        tcPr = cell._element.tcPr
+                        vAlign = OxmlElement('w:vAlign')
+                        vAlign.set(qn('w:val'), 'center')
+                        tcPr.append(vAlign)
+                        
+                        for paragraph in cell.paragraphs:
+                            paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                            for run in paragraph.runs:
+                                run.bold = True
+                                run.font.size = Pt(9)
+                                run.font.color.rgb = RGBColor(0, 0, 0)
+                                run.font.name = 'Times New Roman'
+                                run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+                
+                # Thêm hàng nhóm (đại đội/trung đội) - chỉ một lần
+                group_name = unit.ten.upper()
+                
+                # Hàng nhóm (merge tất cả cột)
+                group_row = table.add_row()
+                group_cell = group_row.cells[0]
+                # Merge tất cả cột
                 for i in range(1, 5):
-                    to_cell.merge(to_row.cells[i])
+                    group_cell.merge(group_row.cells[i])
                 
-                to_cell.text = child_unit.ten
-                to_cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+                group_cell.text = group_name
+                group_cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
                 
-                # Format tổ
+                # Format nhóm
                 shading_elm = OxmlElement('w:shd')
                 shading_elm.set(qn('w:fill'), 'FFFFFF')
                 shading_elm.set(qn('w:val'), 'clear')
-                to_cell._element.get_or_add_tcPr().append(shading_elm)
+                group_cell._element.get_or_add_tcPr().append(shading_elm)
                 
-                for run in to_cell.paragraphs[0].runs:
+                for run in group_cell.paragraphs[0].runs:
                     run.bold = True
-                    run.font.size = Pt(9)
+                    run.font.size = Pt(10)
                     run.font.color.rgb = RGBColor(0, 0, 0)
                     run.font.name = 'Times New Roman'
                     run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
                 
-                # Thêm quân nhân trong tổ (tối đa 3 người)
-                for person in personnel_list[:3]:  # Chỉ lấy 3 người đầu
-                    row = table.add_row()
-                    cells = row.cells
-                    
-                    # TT
-                    cells[0].text = str(stt)
-                    cells[0].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+                # Thêm dữ liệu theo tổ
+                stt = 1
+                
+                for child_data in child_units_data:
+                    child_unit = child_data['to']
+                    personnel_list = child_data['personnel']
                     
-                    # Họ và tên
-                    cells[1].text = person.hoTen or ''
-                    cells[1].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
+                    # Hàng tổ (merge tất cả cột)
+                    to_row = table.add_row()
+                    to_cell = to_row.cells[0]
+                    for i in range(1, 5):
+                        to_cell.merge(to_row.cells[i])
                     
-                    # Cấp bậc
-                    cells[2].text = person.capBac or ''
-                    cells[2].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+                    to_cell.text = child_unit.ten
+                    to_cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
                     
-                    # Chức vụ
-                    cells[3].text = person.chucVu or ''
-                    cells[3].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+                    # Format tổ
+                    shading_elm = OxmlElement('w:shd')
+                    shading_elm.set(qn('w:fill'), 'FFFFFF')
+                    shading_elm.set(qn('w:val'), 'clear')
+                    to_cell._element.get_or_add_tcPr().append(shading_elm)
                     
-                    # Ghi chú (lấy từ ghiChu hoặc để trống)
-                    cells[4].text = person.ghiChu or ''
-                    cells[4].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
+                    for run in to_cell.paragraphs[0].runs:
+                        run.bold = True
+                        run.font.size = Pt(9)
+                        run.font.color.rgb = RGBColor(0, 0, 0)
+                        run.font.name = 'Times New Roman'
+                        run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
                     
-                    # Format font
-                    for cell in cells:
-                        shading_elm = OxmlElement('w:shd')
-                        shading_elm.set(qn('w:fill'), 'FFFFFF')
-                        shading_elm.set(qn('w:val'), 'clear')
-                        cell._element.get_or_add_tcPr().append(shading_elm)
+                    # Thêm quân nhân trong tổ (tối đa 3 người)
+                    for person in personnel_list[:3]:  # Chỉ lấy 3 người đầu
+                        row = table.add_row()
+                        cells = row.cells
                         
-                        for paragraph in cell.paragraphs:
-                            for run in paragraph.runs:
-                                run.font.size = Pt(9)
-                                run.font.color.rgb = RGBColor(0, 0, 0)
-                                run.font.name = 'Times New Roman'
-                                run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
-                    
-                    stt += 1
-            
-            doc.add_paragraph()  # Khoảng trống
+                        # TT
+                        cells[0].text = str(stt)
+                        cells[0].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+                        
+                        # Họ và tên
+                        cells[1].text = person.hoTen or ''
+                        cells[1].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
+                        
+                        # Cấp bậc
+                        cells[2].text = person.capBac or ''
+                        cells[2].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+                        
+                        # Chức vụ
+                        cells[3].text = person.chucVu or ''
+                        cells[3].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+                        
+                        # Ghi chú (lấy từ ghiChu hoặc để trống)
+                        cells[4].text = person.ghiChu or ''
+                        cells[4].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
+                        
+                        # Format font
+                        for cell in cells:
+                            shading_elm = OxmlElement('w:shd')
+                            shading_elm.set(qn('w:fill'), 'FFFFFF')
+                            shading_elm.set(qn('w:val'), 'clear')
+                            cell._element.get_or_add_tcPr().append(shading_elm)
+                            
+                            for paragraph in cell.paragraphs:
+                                for run in paragraph.runs:
+                                    run.font.size = Pt(9)
+                                    run.font.color.rgb = RGBColor(0, 0, 0)
+                                    run.font.name = 'Times New Roman'
+                                    run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+                        
+                        stt += 1
+                
+                return table
             
-            # Chữ ký (căn phải)
-            if chinh_tri_vien:
-                signature = doc.add_paragraph()
-                signature.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-                signature_run = signature.add_run("CHÍNH TRỊ VIÊN\n")
-                signature_run.bold = True
-                signature_run.font.size = Pt(12)
-                name_run = signature.add_run(chinh_tri_vien)
-                name_run.bold = True
-                name_run.font.size = Pt(12)
+            template = get_template('to_3_nguoi', lambda: ExportService._danh_sach_template(
+                "DANH SÁCH TỔ 3 NGƯỜI"))
+            doc = template.render(values, tables={'bang': build_table})
             
             # Lưu vào buffer
             buffer = io.BytesIO()
             doc.save(buffer)
             buffer.seek(0)
             return buffer.getvalue()
-            
+        
         except ImportError:
             raise ImportError("Cần cài đặt python-docx: pip install python-docx")
         except Exception as e:
@@ -10,6 +10,153 @@ from datetime import datetime
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from models.personnel import Personnel
+from services.word_table import add_table, Column, CENTER
+from services.word_template import get_template
+
+
+def _template():
+    """Mẫu Bảo vệ an ninh: trang, khối tiêu đề, chỗ đặt bảng {{>bang}} và chữ ký"""
+    from docx import Document
+    from docx.shared import Pt, Inches
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.oxml.ns import qn
+    
+    doc = Document()
+    
+    # Thiết lập trang Letter (27.94 cm x 21.59 cm)
+    section = doc.sections[0]
+    section.page_width = Inches(11.0)  # 27.94 cm = 11 inches
+    section.page_height = Inches(8.5)  # 21.59 cm = 8.5 inches
+    section.left_margin = Inches(0.79)  # 2 cm
+    section.right_margin = Inches(0.79)  # 2 cm
+    section.top_margin = Inches(0.79)  # 2 cm
+    section.bottom_margin = Inches(0.79)  # 2 cm
+    
+    # Font mặc định
+    doc.styles['Normal'].font.name = 'Times New Roman'
+    doc.styles['Normal']._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+    
+    # Header với 2 cột (trái và phải)
+    header_table = doc.add_table(rows=2, cols=2)
+    header_table.autofit = False
+    
+    # Cột trái: TIỂU ĐOÀN 38, ĐẠI ĐỘI 3
+    left_cell = header_table.rows[0].cells[0]
+    left_cell.paragraphs[0].clear()
+    left_run1 = left_cell.paragraphs[0].add_run("{{tieu_doan}}")
+    left_run1.font.size = Pt(11)
+    left_run1.font.name = 'Times New Roman'
+    left_run1._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+    
+    left_cell.paragraphs[0].add_run("\n")
+    left_run2 = left_cell.paragraphs[0].add_run("{{don_vi_in_hoa}}")
+    left_run2.font.size = Pt(11)
+    left_run2.font.name = 'Times New Roman'
+    left_run2._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+    
+    # Cột phải: CỘNG HÒA XÃ HỘI CHỦ NGHĨA VIỆT NAM, Độc lập - Tự do - Hạnh phúc
+    right_cell = header_table.rows[0].cells[1]
+    right_cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
+    right_cell.paragraphs[0].clear()
+    right_run1 = right_cell.paragraphs[0].add_run("CỘNG HÒA XÃ HỘI CHỦ NGHĨA VIỆT NAM")
+    right_run1.font.size = Pt(11)
+    right_run1.font.name = 'Times New Roman'
+    right_run1._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+    right_run1.bold = True
+    
+    right_cell.paragraphs[0].add_run("\n")
+    right_run2 = right_cell.paragraphs[0].add_run("Độc lập - Tự do - Hạnh phúc")
+    right_run2.font.size = Pt(11)
+    right_run2.font.name = 'Times New Roman'
+    right_run2._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+    right_run2.italic = True
+    right_run2.underline = True
+    
+    # Merge cells cho dòng 2 (date line)
+    header_table.rows[1].cells[0].merge(header_table.rows[1].cells[1])
+    date_cell = header_table.rows[1].cells[0]
+    date_cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+    date_cell.paragraphs[0].clear()
+    
+    date_text = "{{dia_diem}}, ngày tháng năm {{nam}}"
+    date_run = date_cell.paragraphs[0].add_run(date_text)
+    date_run.font.size = Pt(11)
+    date_run.font.name = 'Times New Roman'
+    date_run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+    
+    # Bỏ borders cho header table
+    for row in header_table.rows:
+        for cell in row.cells:
+            tcPr = cell._element.tcPr
+            if tcPr is not None:
+                tcBorders = tcPr.find(qn('w:tcBorders'))
+                if tcBorders is not None:
+                    tcPr.remove(tcBorders)
+    
+    doc.add_paragraph()  # Khoảng trống
+    
+    # Tiêu đề: DANH SÁCH
+    title = doc.add_paragraph()
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    title_run = title.add_run("DANH SÁCH")
+    title_run.bold = True
+    title_run.font.size = Pt(14)
+    title_run.font.name = 'Times New Roman'
+    title_run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+    
+    # Subtitle: Bí thư cấp uỷ, chi bộ phụ trách công tác bảo vệ an ninh và chiến sỹ bảo vệ năm 2025
+    subtitle = doc.add_paragraph()
+    subtitle.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    subtitle_run = subtitle.add_run("Bí thư cấp uỷ, chi bộ phụ trách công tác bảo vệ an ninh và chiến sỹ bảo vệ năm {{nam}}")
+    subtitle_run.font.size = Pt(11)
+    subtitle_run.font.name = 'Times New Roman'
+    subtitle_run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+    
+    # Subtitle 2: (kiện toàn, bổ sung ngày 01 tháng 7 năm 2025)
+    subtitle2 = doc.add_paragraph()
+    subtitle2.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    subtitle2_run = subtitle2.add_run("(kiện toàn, bổ sung ngày {{ngay_bo_sung}} tháng {{thang_bo_sung}} năm {{nam_bo_sung}})")
+    subtitle2_run.font.size = Pt(10)
+    subtitle2_run.font.name = 'Times New Roman'
+    subtitle2_run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+    
+    doc.add_paragraph()  # Khoảng trống
+    
+    doc.add_paragraph("{{>bang}}")
+    
+    # Footer: CHÍNH TRỊ VIÊN, tên
+    doc.add_paragraph()  # Khoảng trống
+    
+    footer_table = doc.add_table(rows=2, cols=1)
+    footer_table.autofit = False
+    footer_cell = footer_table.rows[0].cells[0]
+    footer_cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+    footer_cell.paragraphs[0].clear()
+    footer_run1 = footer_cell.paragraphs[0].add_run("CHÍNH TRỊ VIÊN")
+    footer_run1.font.size = Pt(11)
+    footer_run1.font.name = 'Times New Roman'
+    footer_run1._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+    footer_run1.bold = True
+    
+    footer_cell = footer_table.rows[1].cells[0]
+    footer_cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+    footer_cell.paragraphs[0].clear()
+    footer_run2 = footer_cell.paragraphs[0].add_run("{{chinh_tri_vien}}")
+    footer_run2.font.size = Pt(11)
+    footer_run2.font.name = 'Times New Roman'
+    footer_run2._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+    footer_run2.bold = True
+    
+    # Bỏ borders cho footer table
+    for row in footer_table.rows:
+        for cell in row.cells:
+            tcPr = cell._element.tcPr
+            if tcPr is not None:
+                tcBorders = tcPr.find(qn('w:tcBorders'))
+                if tcBorders is not None:
+                    tcPr.remove(tcBorders)
+    
+    return doc
 
 
 def to_word_docx_bao_ve_an_ninh(personnel_list: List[Personnel],
@@ -26,257 +173,55 @@ def to_word_docx_bao_ve_an_ninh(personnel_list: List[Personnel],
     Xuất danh sách Bảo Vệ An Ninh ra file Word với format giống mẫu
     """
     try:
-        from docx import Document
-        from docx.shared import Pt, Inches, RGBColor
-        from docx.enum.text import WD_ALIGN_PARAGRAPH
-        from docx.oxml.ns import qn
-        from docx.oxml import OxmlElement
-        
-        doc = Document()
-        
-        # Thiết lập trang Letter (27.94 cm x 21.59 cm)
-        section = doc.sections[0]
-        section.page_width = Inches(11.0)  # 27.94 cm = 11 inches
-        section.page_height = Inches(8.5)  # 21.59 cm = 8.5 inches
-        section.left_margin = Inches(0.79)  # 2 cm
-        section.right_margin = Inches(0.79)  # 2 cm
-        section.top_margin = Inches(0.79)  # 2 cm
-        section.bottom_margin = Inches(0.79)  # 2 cm
-        
-        # Font mặc định
-        doc.styles['Normal'].font.name = 'Times New Roman'
-        doc.styles['Normal']._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
-        
-        # Header với 2 cột (trái và phải)
-        header_table = doc.add_table(rows=2, cols=2)
-        header_table.autofit = False
-        
-        # Cột trái: TIỂU ĐOÀN 38, ĐẠI ĐỘI 3
-        left_cell = header_table.rows[0].cells[0]
-        left_cell.paragraphs[0].clear()
-        left_run1 = left_cell.paragraphs[0].add_run(tieu_doan)
-        left_run1.font.size = Pt(11)
-        left_run1.font.name = 'Times New Roman'
-        left_run1._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
-        
-        left_cell.paragraphs[0].add_run("\n")
-        left_run2 = left_cell.paragraphs[0].add_run(don_vi.upper())
-        left_run2.font.size = Pt(11)
-        left_run2.font.name = 'Times New Roman'
-        left_run2._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
-        
-        # Cột phải: CỘNG HÒA XÃ HỘI CHỦ NGHĨA VIỆT NAM, Độc lập - Tự do - Hạnh phúc
-        right_cell = header_table.rows[0].cells[1]
-        right_cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
-        right_cell.paragraphs[0].clear()
-        right_run1 = right_cell.paragraphs[0].add_run("CỘNG HÒA XÃ HỘI CHỦ NGHĨA VIỆT NAM")
-        right_run1.font.size = Pt(11)
-        right_run1.font.name = 'Times New Roman'
-        right_run1._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
-        right_run1.bold = True
-        
-        right_cell.paragraphs[0].add_run("\n")
-        right_run2 = right_cell.paragraphs[0].add_run("Độc lập - Tự do - Hạnh phúc")
-        right_run2.font.size = Pt(11)
-        right_run2.font.name = 'Times New Roman'
-        right_run2._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
-        right_run2.italic = True
-        right_run2.underline = True
-        
-        # Merge cells cho dòng 2 (date line)
-        header_table.rows[1].cells[0].merge(header_table.rows[1].cells[1])
-        date_cell = header_table.rows[1].cells[0]
-        date_cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-        date_cell.paragraphs[0].clear()
-        
-        date_text = f"{dia_diem}, ngày tháng năm {nam}"
-        date_run = date_cell.paragraphs[0].add_run(date_text)
-        date_run.font.size = Pt(11)
-        date_run.font.name = 'Times New Roman'
-        date_run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
-        
-        # Bỏ borders cho header table
-        for row in header_table.rows:
-            for cell in row.cells:
-                tcPr = cell._element.tcPr
-                if tcPr is not None:
-                    tcBorders = tcPr.find(qn('w:tcBorders'))
-                    if tcBorders is not None:
-                        tcPr.remove(tcBorders)
-        
-        doc.add_paragraph()  # Khoảng trống
-        
-        # Tiêu đề: DANH SÁCH
-        title = doc.add_paragraph()
-        title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        title_run = title.add_run("DANH SÁCH")
-        title_run.bold = True
-        title_run.font.size = Pt(14)
-        title_run.font.name = 'Times New Roman'
-        title_run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
-        
-        # Subtitle: Bí thư cấp uỷ, chi bộ phụ trách công tác bảo vệ an ninh và chiến sỹ bảo vệ năm 2025
-        subtitle = doc.add_paragraph()
-        subtitle.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        subtitle_run = subtitle.add_run(f"Bí thư cấp uỷ, chi bộ phụ trách công tác bảo vệ an ninh và chiến sỹ bảo vệ năm {nam}")
-        subtitle_run.font.size = Pt(11)
-        subtitle_run.font.name = 'Times New Roman'
-        subtitle_run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
-        
-        # Subtitle 2: (kiện toàn, bổ sung ngày 01 tháng 7 năm 2025)
-        subtitle2 = doc.add_paragraph()
-        subtitle2.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        subtitle2_run = subtitle2.add_run(f"(kiện toàn, bổ sung ngày {ngay_bo_sung} tháng {thang_bo_sung} năm {nam_bo_sung})")
-        subtitle2_run.font.size = Pt(10)
-        subtitle2_run.font.name = 'Times New Roman'
-        subtitle2_run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
-        
-        doc.add_paragraph()  # Khoảng trống
-        
-        # Tạo bảng với 11 cột
-        table = doc.add_table(rows=1, cols=11)
-        table.style = None  # Bỏ style mặc định
-        
-        # Thiết lập borders cho toàn bộ table
-        tbl = table._element
-        tblPr = tbl.tblPr
-        if tblPr is None:
-            tblPr = OxmlElement('w:tblPr')
-            tbl.insert(0, tblPr)
+        from docx.shared import Inches
         
-        # Thêm borders cho toàn bộ table
-        tblBorders = OxmlElement('w:tblBorders')
-        for border_name in ['top', 'left', 'bottom', 'right', 'insideH', 'insideV']:
-            border = OxmlElement(f'w:{border_name}')
-            border.set(qn('w:val'), 'single')
-            border.set(qn('w:sz'), '4')
-            border.set(qn('w:space'), '0')
-            border.set(qn('w:color'), '000000')
-            tblBorders.append(border)
-        tblPr.append(tblBorders)
+        values = {
+            'tieu_doan': tieu_doan,
+            'don_vi': don_vi,
+            'don_vi_in_hoa': don_vi.upper(),
+            'dia_diem': dia_diem,
+            'nam': nam,
+            'ngay_bo_sung': ngay_bo_sung,
+            'thang_bo_sung': thang_bo_sung,
+            'nam_bo_sung': nam_bo_sung,
+            'chinh_tri_vien': chinh_tri_vien,
+        }
         
-        # Độ rộng cột
-        col_widths = [
-            Inches(0.4),   # TT
-            Inches(1.5),   # Họ và tên (Ngày, tháng, năm sinh)
-            Inches(1.2),   # NN CB-CV Đ.VI
-            Inches(1.0),   # Đăng đoàn
-            Inches(0.8),   # DT TG
-            Inches(0.5),   # VH
-            Inches(2.5),   # Họ tên cha/mẹ/vợ
-            Inches(2.0),   # Nguyên quán Trú quán
-            Inches(0.8),   # Thời gian vào
-            Inches(0.8),   # Thời gian ra
-            Inches(0.8),   # Ghi chú
+        # Bảng 11 cột
+        columns = [
+            Column('TT', Inches(0.4), CENTER),
+            Column('Họ và tên\n(Ngày, tháng,\nnăm sinh)', Inches(1.5)),
+            Column('NN\nCB-CV\nĐ.VI', Inches(1.2)),
+            Column('Đăng\ndoàn', Inches(1.0)),
+            Column('DT\nTG', Inches(0.8)),
+            Column('VH', Inches(0.5)),
+            Column('Họ tên cha\n(Năm sinh-nghề nghiệp) /\nHọ tên mẹ\n(Năm sinh-nghề nghiệp) /\nHọ tên vợ\n(Năm sinh-nghề nghiệp)', Inches(2.5)),
+            Column('Nguyên quán\nTrú quán', Inches(2.0)),
+            Column('Thời gian\nvào', Inches(0.8)),
+            Column('Thời gian\nra', Inches(0.8)),
+            Column('Ghi chú', Inches(0.8)),
         ]
         
-        for idx, width in enumerate(col_widths):
-            if idx < len(table.columns):
-                table.columns[idx].width = width
+        # Tải người thân của tất cả quân nhân trong một truy vấn
+        nguoi_than_map = db_service.get_nguoi_than_for_many([p.id for p in personnel_list]) if db_service else {}
+        bao_ve_info_map = db_service.get_bao_ve_an_ninh_info_for_many() if db_service else {}
         
-        # Header row
-        header_cells = table.rows[0].cells
-        headers = [
-            'TT',
-            'Họ và tên\n(Ngày, tháng,\nnăm sinh)',
-            'NN\nCB-CV\nĐ.VI',
-            'Đăng\ndoàn',
-            'DT\nTG',
-            'VH',
-            'Họ tên cha\n(Năm sinh-nghề nghiệp) /\nHọ tên mẹ\n(Năm sinh-nghề nghiệp) /\nHọ tên vợ\n(Năm sinh-nghề nghiệp)',
-            'Nguyên quán\nTrú quán',
-            'Thời gian\nvào',
-            'Thời gian\nra',
-            'Ghi chú'
-        ]
-        
-        for i, header_text in enumerate(headers):
-            if i < len(header_cells):
-                cell = header_cells[i]
-                cell.text = header_text
-                
-                # Format header
-                tcPr = cell._element.get_or_add_tcPr()
-                
-                # Shading - nền trắng
-                shading_elm = OxmlElement('w:shd')
-                shading_elm.set(qn('w:fill'), 'FFFFFF')
-                shading_elm.set(qn('w:val'), 'clear')
-                tcPr.append(shading_elm)
-                
-                # Borders cho header
-                for border_name in ['top', 'left', 'bottom', 'right']:
-                    border = OxmlElement(f'w:{border_name}')
-                    border.set(qn('w:val'), 'single')
-                    border.set(qn('w:sz'), '4')
-                    border.set(qn('w:space'), '0')
-                    border.set(qn('w:color'), '000000')
-                    tcPr.append(border)
-                
-                # Vertical alignment center
-                vAlign = OxmlElement('w:vAlign')
-                vAlign.set(qn('w:val'), 'center')
-                tcPr.append(vAlign)
-                
-                for paragraph in cell.paragraphs:
-                    paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                    for run in paragraph.runs:
-                        run.bold = True
-                        run.font.size = Pt(8)
-                        run.font.color.rgb = RGBColor(0, 0, 0)
-                        run.font.name = 'Times New Roman'
-                        run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
-        
-        # Thêm dữ liệu
+        rows = []
         for idx, p in enumerate(personnel_list, 1):
-            row = table.add_row()
-            cells = row.cells
-            
-            # Format tất cả cells
-            for cell in cells:
-                tcPr = cell._element.get_or_add_tcPr()
-                
-                # Shading - nền trắng
-                shading_elm = OxmlElement('w:shd')
-                shading_elm.set(qn('w:fill'), 'FFFFFF')
-                shading_elm.set(qn('w:val'), 'clear')
-                tcPr.append(shading_elm)
-                
-                # Borders cho từng cell
-                for border_name in ['top', 'left', 'bottom', 'right']:
-                    border = OxmlElement(f'w:{border_name}')
-                    border.set(qn('w:val'), 'single')
-                    border.set(qn('w:sz'), '4')
-                    border.set(qn('w:space'), '0')
-                    border.set(qn('w:color'), '000000')
-                    tcPr.append(border)
-                
-                # Vertical alignment center
-                vAlign = OxmlElement('w:vAlign')
-                vAlign.set(qn('w:val'), 'center')
-                tcPr.append(vAlign)
-                
-                for paragraph in cell.paragraphs:
-                    paragraph.alignment = WD_ALIGN_PARAGRAPH.LEFT
-                    for run in paragraph.runs:
-                        run.font.size = Pt(8)
-                        run.font.color.rgb = RGBColor(0, 0, 0)
-                        run.font.name = 'Times New Roman'
-                        run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+            cells = [''] * 11
             
             # Cột 1: TT
-            cells[0].text = str(idx)
-            cells[0].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+            cells[0] = str(idx)
             
             # Cột 2: Họ và tên (Ngày, tháng, năm sinh)
             ho_ten = p.hoTen or ''
             ngay_sinh = p.ngaySinh or ''
             if ho_ten and ngay_sinh:
-                cells[1].text = f"{ho_ten}\n({ngay_sinh})"
+                cells[1] = f"{ho_ten}\n({ngay_sinh})"
             elif ho_ten:
-                cells[1].text = ho_ten
+                cells[1] = ho_ten
             else:
-                cells[1].text = ''
+                cells[1] = ''
             
             # Cột 3: NN CB-CV Đ.VI
             nhap_ngu = p.nhapNgu or ''
@@ -301,7 +246,7 @@ def to_word_docx_bao_ve_an_ninh(personnel_list: List[Personnel],
             if don_vi:
                 nn_cb_cv.append(don_vi)
             
-            cells[2].text = "\n".join(nn_cb_cv) if nn_cb_cv else ''
+            cells[2] = "\n".join(nn_cb_cv) if nn_cb_cv else ''
             
             # Cột 4: Đăng đoàn
             dang_doan_parts = []
@@ -324,15 +269,15 @@ def to_word_docx_bao_ve_an_ninh(personnel_list: List[Personnel],
                             ngay_vao_doan = f"{parts[0]}/{parts[1]}/{parts[2]}"
                     dang_doan_parts.append(f"Đoàn {ngay_vao_doan}")
             
-            cells[3].text = "\n".join(dang_doan_parts) if dang_doan_parts else ''
+            cells[3] = "\n".join(dang_doan_parts) if dang_doan_parts else ''
             
             # Cột 5: DT TG
             dan_toc = p.danToc or ''
             ton_giao = p.tonGiao or 'Không'
-            cells[4].text = f"{dan_toc}\n{ton_giao}"
+            cells[4] = f"{dan_toc}\n{ton_giao}"
             
             # Cột 6: VH
-            cells[5].text = p.trinhDoVanHoa or ''
+            cells[5] = p.trinhDoVanHoa or ''
             
             # Cột 7: Họ tên cha/mẹ/vợ
             gia_dinh_info = []
@@ -343,7 +288,7 @@ def to_word_docx_bao_ve_an_ninh(personnel_list: List[Personnel],
             # Ưu tiên lấy từ bảng nguoi_than
             if db_service and p.id:
                 try:
-                    nguoi_than_list = db_service.get_nguoi_than_by_personnel(p.id)
+                    nguoi_than_list = nguoi_than_map.get(p.id, [])
                     
                     for nguoi_than in nguoi_than_list:
                         moi_quan_he = (nguoi_than.moiQuanHe or '').lower().strip()
@@ -407,7 +352,7 @@ def to_word_docx_bao_ve_an_ninh(personnel_list: List[Personnel],
                         elif 'mẹ' in moi_quan_he or 'me' in moi_quan_he:
                             if 'vợ' not in moi_quan_he and 'vo' not in moi_quan_he:
                                 me_de.append(info_str)
-                    
+                
                 except Exception as e:
                     # Log lỗi nhưng vẫn tiếp tục với fallback
                     pass
@@ -457,76 +402,48 @@ def to_word_docx_bao_ve_an_ninh(personnel_list: List[Personnel],
             gia_dinh_info.extend(me_de)
             gia_dinh_info.extend(vo)
             
-            cells[6].text = " / ".join(gia_dinh_info) if gia_dinh_info else ''
+            cells[6] = " / ".join(gia_dinh_info) if gia_dinh_info else ''
             
             # Cột 8: Nguyên quán Trú quán
             que_quan = p.queQuan or ''
             tru_quan = p.truQuan or ''
             if que_quan and tru_quan:
-                cells[7].text = f"{que_quan} / {tru_quan}"
+                cells[7] = f"{que_quan} / {tru_quan}"
             elif que_quan:
-                cells[7].text = que_quan
+                cells[7] = que_quan
             elif tru_quan:
-                cells[7].text = tru_quan
+                cells[7] = tru_quan
             else:
-                cells[7].text = ''
+                cells[7] = ''
             
             # Cột 9: Thời gian vào
             if db_service:
-                bao_ve_info = db_service.get_bao_ve_an_ninh_info(p.id)
-                cells[8].text = bao_ve_info.get('thoiGianVao', '') or ''
+                bao_ve_info = bao_ve_info_map.get(p.id, {})
+                cells[8] = bao_ve_info.get('thoiGianVao', '') or ''
             else:
-                cells[8].text = ''
+                cells[8] = ''
             
             # Cột 10: Thời gian ra
             if db_service:
-                bao_ve_info = db_service.get_bao_ve_an_ninh_info(p.id)
-                cells[9].text = bao_ve_info.get('thoiGianRa', '') or ''
+                bao_ve_info = bao_ve_info_map.get(p.id, {})
+                cells[9] = bao_ve_info.get('thoiGianRa', '') or ''
             else:
-                cells[9].text = ''
+                cells[9] = ''
             
             # Cột 11: Ghi chú
-            cells[10].text = p.ghiChu or ''
-        
-        # Footer: CHÍNH TRỊ VIÊN, tên
-        doc.add_paragraph()  # Khoảng trống
-        
-        footer_table = doc.add_table(rows=2, cols=1)
-        footer_table.autofit = False
-        footer_cell = footer_table.rows[0].cells[0]
-        footer_cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-        footer_cell.paragraphs[0].clear()
-        footer_run1 = footer_cell.paragraphs[0].add_run("CHÍNH TRỊ VIÊN")
-        footer_run1.font.size = Pt(11)
-        footer_run1.font.name = 'Times New Roman'
-        footer_run1._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
-        footer_run1.bold = True
-        
-        footer_cell = footer_table.rows[1].cells[0]
-        footer_cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-        footer_cell.paragraphs[0].clear()
-        if chinh_tri_vien:
-            footer_run2 = footer_cell.paragraphs[0].add_run(chinh_tri_vien)
-            footer_run2.font.size = Pt(11)
-            footer_run2.font.name = 'Times New Roman'
-            footer_run2._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
-            footer_run2.bold = True
+            cells[10] = p.ghiChu or ''
+            
+            rows.append(cells)
         
-        # Bỏ borders cho footer table
-        for row in footer_table.rows:
-            for cell in row.cells:
-                tcPr = cell._element.tcPr
-                if tcPr is not None:
-                    tcBorders = tcPr.find(qn('w:tcBorders'))
-                    if tcBorders is not None:
-                        tcPr.remove(tcBorders)
+        doc = get_template('bao_ve_an_ninh', _template).render(
+            values, tables={'bang': lambda doc: add_table(doc, columns, rows, font_size=8)})
         
         # Lưu vào buffer
         buffer = io.BytesIO()
         doc.save(buffer)
         buffer.seek(0)
         return buffer.getvalue()
-        
+    
     except ImportError:
         raise ImportError("Cần cài đặt python-docx: pip install python-docx")
     except Exception as e:
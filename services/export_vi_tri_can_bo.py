@@ -9,6 +9,79 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from models.personnel import Personnel
+from services.word_table import add_table, Column, CENTER
+from services.word_template import get_template
+
+
+def _template():
+    """Mẫu Vị trí cán bộ: trang, tiêu đề, chỗ đặt bảng {{>bang}} và chữ ký"""
+    from docx import Document
+    from docx.shared import Pt, Inches
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.oxml.ns import qn
+    
+    doc = Document()
+    
+    # Thiết lập trang: A4 Landscape theo thông số ảnh
+    # A4: 29.7 cm x 21 cm (Landscape)
+    # Margins: Top 2 cm, Bottom 2 cm, Left 2.54 cm, Right 2.54 cm
+    # Header/Footer distance: 1.25 cm
+    section = doc.sections[0]
+    section.page_width = Inches(11.69)  # 29.7 cm = 11.69 inches
+    section.page_height = Inches(8.27)   # 21 cm = 8.27 inches
+    section.left_margin = Inches(1.0)    # 2.54 cm = 1.0 inch
+    section.right_margin = Inches(1.0)   # 2.54 cm = 1.0 inch
+    section.top_margin = Inches(0.79)    # 2 cm = 0.79 inches
+    section.bottom_margin = Inches(0.79) # 2 cm = 0.79 inches
+    section.header_distance = Inches(0.49)  # 1.25 cm = 0.49 inches
+    section.footer_distance = Inches(0.49)  # 1.25 cm = 0.49 inches
+    
+    # Font mặc định
+    doc.styles['Normal'].font.name = 'Times New Roman'
+    doc.styles['Normal']._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+    
+    # Tiêu đề
+    title = doc.add_paragraph()
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    title_run = title.add_run("DANH SÁCH VỊ TRÍ CÁN BỘ NĂM {{nam}}")
+    title_run.bold = True
+    title_run.font.size = Pt(14)
+    
+    # Đơn vị
+    unit_para = doc.add_paragraph()
+    unit_run = unit_para.add_run("Đơn vị: {{don_vi}}")
+    unit_run.font.size = Pt(11)
+    
+    doc.add_paragraph()  # Khoảng trống
+    
+    doc.add_paragraph("{{>bang}}")
+    
+    # Thêm phần chữ ký ở cuối
+    doc.add_paragraph()  # Khoảng trống
+    doc.add_paragraph()  # Khoảng trống
+    
+    # Phần chữ ký
+    signature_para = doc.add_paragraph()
+    signature_para.alignment = WD_ALIGN_PARAGRAPH.RIGHT
+    
+    # "CHÍNH TRỊ VIÊN"
+    chinh_tri_vien_label = signature_para.add_run("CHÍNH TRỊ VIÊN")
+    chinh_tri_vien_label.bold = True
+    chinh_tri_vien_label.font.size = Pt(11)
+    chinh_tri_vien_label.font.name = 'Times New Roman'
+    chinh_tri_vien_label._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+    
+    # Xuống dòng
+    signature_para.add_run("\n")
+    
+    # Tên chính trị viên
+    chinh_tri_vien_name = signature_para.add_run("{{chinh_tri_vien}}")
+    chinh_tri_vien_name.bold = True
+    chinh_tri_vien_name.font.size = Pt(11)
+    chinh_tri_vien_name.font.name = 'Times New Roman'
+    chinh_tri_vien_name._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+    
+    return doc
 
 
 def to_word_docx_vi_tri_can_bo(personnel_list: List[Personnel],
@@ -20,151 +93,35 @@ def to_word_docx_vi_tri_can_bo(personnel_list: List[Personnel],
     Xuất danh sách Vị Trí Cán Bộ ra file Word với 11 cột giống mẫu
     """
     try:
-        from docx import Document
-        from docx.shared import Pt, Inches, RGBColor
-        from docx.enum.text import WD_ALIGN_PARAGRAPH
-        from docx.oxml.ns import qn
-        from docx.oxml import OxmlElement
-        
-        doc = Document()
-        
-        # Thiết lập trang: A4 Landscape theo thông số ảnh
-        # A4: 29.7 cm x 21 cm (Landscape)
-        # Margins: Top 2 cm, Bottom 2 cm, Left 2.54 cm, Right 2.54 cm
-        # Header/Footer distance: 1.25 cm
-        section = doc.sections[0]
-        section.page_width = Inches(11.69)  # 29.7 cm = 11.69 inches
-        section.page_height = Inches(8.27)   # 21 cm = 8.27 inches
-        section.left_margin = Inches(1.0)    # 2.54 cm = 1.0 inch
-        section.right_margin = Inches(1.0)   # 2.54 cm = 1.0 inch
-        section.top_margin = Inches(0.79)    # 2 cm = 0.79 inches
-        section.bottom_margin = Inches(0.79) # 2 cm = 0.79 inches
-        section.header_distance = Inches(0.49)  # 1.25 cm = 0.49 inches
-        section.footer_distance = Inches(0.49)  # 1.25 cm = 0.49 inches
-        
-        # Font mặc định
-        doc.styles['Normal'].font.name = 'Times New Roman'
-        doc.styles['Normal']._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
-        
-        # Tiêu đề
-        title = doc.add_paragraph()
-        title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        title_run = title.add_run(f"DANH SÁCH VỊ TRÍ CÁN BỘ NĂM {nam}")
-        title_run.bold = True
-        title_run.font.size = Pt(14)
-        
-        # Đơn vị
-        unit_para = doc.add_paragraph()
-        unit_run = unit_para.add_run(f"Đơn vị: {don_vi}")
-        unit_run.font.size = Pt(11)
-        
-        doc.add_paragraph()  # Khoảng trống
-        
-        # Tạo bảng với 11 cột
-        table = doc.add_table(rows=1, cols=11)
-        table.style = None  # Bỏ style mặc định
-        
-        # Thiết lập borders cho toàn bộ table
-        tbl = table._element
-        tblPr = tbl.tblPr
-        if tblPr is None:
-            tblPr = OxmlElement('w:tblPr')
-            tbl.insert(0, tblPr)
+        from docx.shared import Inches
         
-        # Thêm borders cho toàn bộ table
-        tblBorders = OxmlElement('w:tblBorders')
-        for border_name in ['top', 'left', 'bottom', 'right', 'insideH', 'insideV']:
-            border = OxmlElement(f'w:{border_name}')
-            border.set(qn('w:val'), 'single')
-            border.set(qn('w:sz'), '4')
-            border.set(qn('w:space'), '0')
-            border.set(qn('w:color'), '000000')
-            tblBorders.append(border)
-        tblPr.append(tblBorders)
+        values = {
+            'don_vi': don_vi,
+            'nam': nam,
+            'chinh_tri_vien': chinh_tri_vien,
+        }
         
-        # Thiết lập độ rộng bảng
-        table_width_inches = 24.0 - 0.4  # 24 inches - margins
-        tblW = OxmlElement('w:tblW')
-        tblW.set(qn('w:w'), str(int(table_width_inches * 1440)))  # 1440 twips per inch
-        tblW.set(qn('w:type'), 'dxa')
-        tblPr.append(tblW)
-        
-        # Độ rộng cột
-        col_widths = [
-            Inches(0.5),   # TT
-            Inches(4.0),   # Họ và tên...
-            Inches(1.2),   # Cấp Bậc
-            Inches(1.8),   # Chức, đơn vị
-            Inches(1.0),   # CM Quân
-            Inches(1.2),   # Vào Đảng
-            Inches(2.5),   # Chức vụ chiến đấu
-            Inches(2.0),   # Qua trường
-            Inches(0.8),   # VH SK
-            Inches(1.0),   # DT TG
-            Inches(7.0),   # Thông tin gia đình
+        # Bảng 11 cột (tổng độ rộng vượt khổ trang sẽ được thu nhỏ theo tỷ lệ)
+        columns = [
+            Column('TT', Inches(0.5), CENTER),
+            Column('Họ và tên\nSinh (tuổi)\nQuê quán - trú quán\nSHSQ', Inches(4.0)),
+            Column('Cấp Bậc\n(Tháng\nnăm\nnhận)', Inches(1.2)),
+            Column('Chức,\nđơn vị\n(Tháng\nnăm\nnhận)', Inches(1.8)),
+            Column('CM\nQuân\n(Tháng\nnăm)', Inches(1.0)),
+            Column('Vào Đảng:\nChính thức', Inches(1.2)),
+            Column('Chức vụ chiến\nđấu (Thời gian)\nChức vụ đã qua\n(Thời gian)', Inches(2.5)),
+            Column('Qua trường\n(Ngành, thời\ngian, kết quả)', Inches(2.0)),
+            Column('VH\nSK', Inches(0.8)),
+            Column('DT\nTG', Inches(1.0)),
+            Column('Thông tin gia đình:\nBố đẻ: sinh, nghề\nMẹ đẻ: sinh, nghề\nNơi ở hiện nay\nBố vợ: sinh, nghề\nMẹ vợ: sinh, nghề\nNơi ở hiện nay\nVợ: sinh, nghề\nCon: sinh, nghề\nNơi ở hiện nay\nSĐT gia đình', Inches(7.0)),
         ]
         
-        for idx, width in enumerate(col_widths):
-            if idx < len(table.columns):
-                table.columns[idx].width = width
-        
-        # Header row
-        header_cells = table.rows[0].cells
-        headers = [
-            'TT',
-            'Họ và tên\nSinh (tuổi)\nQuê quán - trú quán\nSHSQ',
-            'Cấp Bậc\n(Tháng\nnăm\nnhận)',
-            'Chức,\nđơn vị\n(Tháng\nnăm\nnhận)',
-            'CM\nQuân\n(Tháng\nnăm)',
-            'Vào Đảng:\nChính thức',
-            'Chức vụ chiến\nđấu (Thời gian)\nChức vụ đã qua\n(Thời gian)',
-            'Qua trường\n(Ngành, thời\ngian, kết quả)',
-            'VH\nSK',
-            'DT\nTG',
-            'Thông tin gia đình:\nBố đẻ: sinh, nghề\nMẹ đẻ: sinh, nghề\nNơi ở hiện nay\nBố vợ: sinh, nghề\nMẹ vợ: sinh, nghề\nNơi ở hiện nay\nVợ: sinh, nghề\nCon: sinh, nghề\nNơi ở hiện nay\nSĐT gia đình'
-        ]
+        # Tải người thân của tất cả quân nhân trong một truy vấn
+        nguoi_than_map = db_service.get_nguoi_than_for_many([p.id for p in personnel_list]) if db_service else {}
         
-        for i, header_text in enumerate(headers):
-            if i < len(header_cells):
-                cell = header_cells[i]
-                cell.text = header_text
-                
-                # Format header
-                tcPr = cell._element.get_or_add_tcPr()
-                
-                # Shading - nền trắng
-                shading_elm = OxmlElement('w:shd')
-                shading_elm.set(qn('w:fill'), 'FFFFFF')
-                shading_elm.set(qn('w:val'), 'clear')
-                tcPr.append(shading_elm)
-                
-                # Borders cho header
-                for border_name in ['top', 'left', 'bottom', 'right']:
-                    border = OxmlElement(f'w:{border_name}')
-                    border.set(qn('w:val'), 'single')
-                    border.set(qn('w:sz'), '4')
-                    border.set(qn('w:space'), '0')
-                    border.set(qn('w:color'), '000000')
-                    tcPr.append(border)
-                
-                # Vertical alignment center
-                vAlign = OxmlElement('w:vAlign')
-                vAlign.set(qn('w:val'), 'center')
-                tcPr.append(vAlign)
-                
-                for paragraph in cell.paragraphs:
-                    paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                    for run in paragraph.runs:
-                        run.bold = True
-                        run.font.size = Pt(8)
-                        run.font.color.rgb = RGBColor(0, 0, 0)
-                        run.font.name = 'Times New Roman'
-                        run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
-        
-        # Thêm dữ liệu
+        rows = []
         for idx, p in enumerate(personnel_list, 1):
-            row = table.add_row()
-            cells = row.cells
+            cells = [''] * 11
             
             # Tính tuổi
             try:
@@ -177,8 +134,7 @@ def to_word_docx_vi_tri_can_bo(personnel_list: List[Personnel],
                 age = ''
             
             # Cột 1: TT
-            cells[0].text = f"{idx:02d}"
-            cells[0].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+            cells[0] = f"{idx:02d}"
             
             # Cột 2: Họ và tên, Sinh (tuổi), Quê quán - trú quán, SHSQ
             # Format: "Triệu Văn Dũng\n19/11/1991 (34)\nThôn Tát Dài, xã Chợ Rã, tỉnh Thái Nguyên\nThôn Tam Trung, xã Tam Giang, tỉnh Đắk Lắk\n17022..."
@@ -197,8 +153,7 @@ def to_word_docx_vi_tri_can_bo(personnel_list: List[Personnel],
             if p.ghiChu:
                 col2_parts.append(p.ghiChu)
             col2_text = "\n".join(col2_parts)
-            cells[1].text = col2_text
-            cells[1].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
+            cells[1] = col2_text
             
             # Cột 3: Cấp Bậc (Tháng năm nhận) - Format: "4/5/2024" hoặc "H2/ 06/12/2024"
             col3_text = ""
@@ -217,8 +172,7 @@ def to_word_docx_vi_tri_can_bo(personnel_list: List[Personnel],
                     col3_text = f"{p.capBac}/{ngay_nhan}"
             elif p.capBac:
                 col3_text = p.capBac
-            cells[2].text = col3_text
-            cells[2].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
+            cells[2] = col3_text
             
             # Cột 4: Chức, đơn vị (Tháng năm nhận) - Format: "CTV C3.d15, 5/2019"
             col4_text = ""
@@ -247,8 +201,7 @@ def to_word_docx_vi_tri_can_bo(personnel_list: List[Personnel],
                 col4_text = p.chucVu
             elif p.donVi:
                 col4_text = p.donVi
-            cells[3].text = col4_text
-            cells[3].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
+            cells[3] = col4_text
             
             # Cột 5: CM Quân (Tháng năm) - Format: "9/2012"
             cm_quan = p.cmQuan or p.nhapNgu or ''
@@ -261,8 +214,7 @@ def to_word_docx_vi_tri_can_bo(personnel_list: List[Personnel],
                 elif len(parts) >= 2:
                     # MM/YYYY hoặc YYYY
                     cm_quan = f"{parts[-2]}/{parts[-1]}"
-            cells[4].text = cm_quan
-            cells[4].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
+            cells[4] = cm_quan
             
             # Cột 6: Vào Đảng: Chính thức - Format: "5/2015\n5/2016"
             col6_parts = []
@@ -288,8 +240,7 @@ def to_word_docx_vi_tri_can_bo(personnel_list: List[Personnel],
                         ngay_chinh_thuc = f"{parts[-2]}/{parts[-1]}"
                 col6_parts.append(ngay_chinh_thuc)
             col6_text = "\n".join(col6_parts)
-            cells[5].text = col6_text
-            cells[5].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
+            cells[5] = col6_text
             
             # Cột 7: Chức vụ chiến đấu (Thời gian) Chức vụ đã qua (Thời gian)
             # Format: "CTVP/c10.d9.e66.fl0 (8/2017-5/2019), - CTV/c3.d15.f10 (5/2019-)"
@@ -310,8 +261,7 @@ def to_word_docx_vi_tri_can_bo(personnel_list: List[Personnel],
                 col7_parts.append(da_qua_text)
             
             col7_text = ", ".join(col7_parts) if col7_parts else ''
-            cells[6].text = col7_text
-            cells[6].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
+            cells[6] = col7_text
             
             # Cột 8: Qua trường (Ngành, thời gian, kết quả)
             # Format: "SQCT (Chính trị BCHT, 9/2012-7/2017-khá)"
@@ -332,23 +282,20 @@ def to_word_docx_vi_tri_can_bo(personnel_list: List[Personnel],
                         parts.append(f"-{p.ketQuaDaoTao}")
                 col8_text += ", ".join(parts)
                 col8_text += ")"
-            cells[7].text = col8_text
-            cells[7].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
+            cells[7] = col8_text
             
             # Cột 9: VH SK
-            cells[8].text = p.trinhDoVanHoa or ''
-            cells[8].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
+            cells[8] = p.trinhDoVanHoa or ''
             
             # Cột 10: DT TG
             col10_text = f"{p.danToc or ''}\n{p.tonGiao or 'Không'}"
-            cells[9].text = col10_text
-            cells[9].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
+            cells[9] = col10_text
             
             # Cột 11: Thông tin gia đình
             gia_dinh_info = []
             if db_service:
                 try:
-                    nguoi_than_list = db_service.get_nguoi_than_by_personnel(p.id)
+                    nguoi_than_list = nguoi_than_map.get(p.id, [])
                     
                     bo_de = []
                     me_de = []
@@ -438,66 +385,19 @@ def to_word_docx_vi_tri_can_bo(personnel_list: List[Personnel],
                 except:
                     pass
             
-            cells[10].text = "\n".join(gia_dinh_info) if gia_dinh_info else ''
-            cells[10].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
+            cells[10] = "\n".join(gia_dinh_info) if gia_dinh_info else ''
             
-            # Format tất cả cells
-            for cell in cells:
-                tcPr = cell._element.get_or_add_tcPr()
-                
-                # Shading - nền trắng
-                shading_elm = OxmlElement('w:shd')
-                shading_elm.set(qn('w:fill'), 'FFFFFF')
-                shading_elm.set(qn('w:val'), 'clear')
-                tcPr.append(shading_elm)
-                
-                # Borders cho từng cell (đảm bảo có borders)
-                for border_name in ['top', 'left', 'bottom', 'right']:
-                    border = OxmlElement(f'w:{border_name}')
-                    border.set(qn('w:val'), 'single')
-                    border.set(qn('w:sz'), '4')
-                    border.set(qn('w:space'), '0')
-                    border.set(qn('w:color'), '000000')
-                    tcPr.append(border)
-                
-                for paragraph in cell.paragraphs:
-                    for run in paragraph.runs:
-                        run.font.size = Pt(8)
-                        run.font.color.rgb = RGBColor(0, 0, 0)
-                        run.font.name = 'Times New Roman'
-                        run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
-        
-        # Thêm phần chữ ký ở cuối
-        doc.add_paragraph()  # Khoảng trống
-        doc.add_paragraph()  # Khoảng trống
+            rows.append(cells)
         
-        # Phần chữ ký
-        signature_para = doc.add_paragraph()
-        signature_para.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-        
-        # "CHÍNH TRỊ VIÊN"
-        chinh_tri_vien_label = signature_para.add_run("CHÍNH TRỊ VIÊN")
-        chinh_tri_vien_label.bold = True
-        chinh_tri_vien_label.font.size = Pt(11)
-        chinh_tri_vien_label.font.name = 'Times New Roman'
-        chinh_tri_vien_label._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
-        
-        # Xuống dòng
-        signature_para.add_run("\n")
-        
-        # Tên chính trị viên
-        chinh_tri_vien_name = signature_para.add_run(chinh_tri_vien)
-        chinh_tri_vien_name.bold = True
-        chinh_tri_vien_name.font.size = Pt(11)
-        chinh_tri_vien_name.font.name = 'Times New Roman'
-        chinh_tri_vien_name._element.rPr.rFonts.set(qn('w:eastAsia'), 'Times New Roman')
+        doc = get_template('vi_tri_can_bo', _template).render(
+            values, tables={'bang': lambda doc: add_table(doc, columns, rows, font_size=8)})
         
         # Lưu vào buffer
         buffer = io.BytesIO()
         doc.save(buffer)
         buffer.seek(0)
         return buffer.getvalue()
-        
+    
     except ImportError:
         raise ImportError("Cần cài đặt python-docx: pip install python-docx")
     except Exception as e:
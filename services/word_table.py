@@ -0,0 +1,255 @@
+"""
+Ghi bảng Word nhanh cho các hàm xuất services/export_*
+
+Thay vì tạo bảng bằng python-docx từng ô (mỗi ô vài OxmlElement viền/nền và một vòng lặp
+paragraphs/runs để đặt font), bảng được dựng thành một chuỗi XML rồi parse một lần:
+- Viền bảng nằm trong một table style dùng chung (TABLE_STYLE).
+- Font, cỡ chữ, in đậm nằm trong paragraph style theo cỡ chữ; ô chỉ tham chiếu style.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+from xml.sax.saxutils import escape
+
+FONT_NAME = 'Times New Roman'
+TABLE_STYLE = 'Bảng Danh Sách'
+
+LEFT = 'left'
+CENTER = 'center'
+RIGHT = 'right'
+
+_TWIPS_PER_EMU = 1 / 635  # 1 twip = 635 EMU
+_INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+@dataclass
+class Column:
+    """Một cột của bảng"""
+    header: str
+    width: int  # docx.shared.Length (Inches/Cm/...)
+    align: str = LEFT
+
+
+@dataclass
+class Cell:
+    """Ô đặc biệt: gộp ngang (span), gộp dọc (rowspan) hoặc căn lề riêng"""
+    text: str = ''
+    span: int = 1
+    rowspan: int = 1
+    align: Optional[str] = None
+
+
+@dataclass
+class Row:
+    """Hàng đặc biệt (hàng tổng, tiêu đề nhóm...). Hàng thường chỉ cần là list/tuple chuỗi."""
+    cells: Sequence[Union[str, Cell]]
+    bold: bool = False
+    shading: Optional[str] = None  # Màu nền hex, ví dụ 'E0E0E0'
+    align: Optional[str] = None
+
+
+def add_table(doc, columns: Sequence[Column], rows: Iterable[Union[Sequence[str], Row]],
+              font_size: float = 9, header_font_size: Optional[float] = None,
+              header_rows: Optional[Sequence[Row]] = None):
+    """
+    Thêm bảng có viền vào cuối văn bản
+    Args:
+        doc: docx.Document
+        columns: Các cột (tiêu đề, độ rộng, căn lề mặc định)
+        rows: Các hàng dữ liệu: list/tuple chuỗi (mỗi chuỗi một ô, '\\n' = xuống dòng) hoặc Row
+        font_size: Cỡ chữ dữ liệu (pt)
+        header_font_size: Cỡ chữ tiêu đề (mặc định bằng font_size)
+        header_rows: Các hàng tiêu đề tùy chỉnh (mặc định một hàng từ Column.header)
+    Returns:
+        docx.table.Table
+    """
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls
+    from docx.table import Table
+    
+    if not columns:
+        raise ValueError("Bảng phải có ít nhất một cột")
+    
+    widths = _fit_widths(doc, [column.width for column in columns])
+    header_font_size = header_font_size or font_size
+    body_style = _paragraph_style(doc, font_size, bold=False)
+    bold_style = _paragraph_style(doc, font_size, bold=True)
+    header_style = _paragraph_style(doc, header_font_size, bold=True)
+    
+    if header_rows is None:
+        header_rows = [Row([column.header for column in columns], align=CENTER)]
+    
+    writer = _TableXml(columns, widths)
+    parts = [
+        f'<w:tbl {nsdecls("w")}><w:tblPr>'
+        f'<w:tblStyle w:val="{_table_style(doc)}"/>'
+        f'<w:tblW w:w="{sum(widths)}" w:type="dxa"/>'
+        '<w:tblLayout w:type="fixed"/>'
+        '<w:tblLook w:val="0000" w:firstRow="0" w:lastRow="0" w:firstColumn="0" '
+        'w:lastColumn="0" w:noHBand="1" w:noVBand="1"/>'
+        '</w:tblPr><w:tblGrid>',
+        ''.join(f'<w:gridCol w:w="{width}"/>' for width in widths),
+        '</w:tblGrid>',
+    ]
+    for row in header_rows:
+        parts.append(writer.row(row, header_style, header_style, header=True))
+    
+    # Hàng thường: ghép sẵn phần mở đầu ô theo cột, mỗi ô chỉ còn nối văn bản
+    cell_open = [writer.cell_open(index, 1, body_style, column.align)
+                 for index, column in enumerate(columns)]
+    ncols = len(columns)
+    for row in rows:
+        if isinstance(row, Row):
+            parts.append(writer.row(row, body_style, bold_style))
+            continue
+        if len(row) > ncols:
+            raise ValueError(f"Hàng có {len(row)} ô nhưng bảng chỉ có {ncols} cột")
+        parts.append('<w:tr>')
+        for index in range(ncols):
+            parts.append(cell_open[index])
+            if index < len(row):
+                parts.append(_runs(row[index]))
+            parts.append('</w:p></w:tc>')
+        parts.append('</w:tr>')
+    parts.append('</w:tbl>')
+    
+    tbl = parse_xml(''.join(parts))
+    doc.element.body._insert_tbl(tbl)
+    return Table(tbl, doc._body)
+
+
+class _TableXml:
+    """Dựng XML cho các hàng có ô gộp (theo dõi các ô đang gộp dọc)"""
+    
+    def __init__(self, columns: Sequence[Column], widths: List[int]):
+        self.columns = columns
+        self.widths = widths
+        self._merging: Dict[int, List[int]] = {}  # {cột: [số hàng còn gộp, số cột gộp]}
+    
+    def cell_open(self, index: int, span: int, style_id: str, align: str,
+                  vmerge: str = '', shading: Optional[str] = None) -> str:
+        """Phần mở đầu một ô tới trước các run (kết thúc bằng '</w:p></w:tc>')"""
+        width = sum(self.widths[index:index + span])
+        return (
+            f'<w:tc><w:tcPr><w:tcW w:w="{width}" w:type="dxa"/>'
+            + (f'<w:gridSpan w:val="{span}"/>' if span > 1 else '')
+            + vmerge
+            + (f'<w:shd w:val="clear" w:color="auto" w:fill="{shading}"/>' if shading else '')
+            + '<w:vAlign w:val="center"/></w:tcPr>'
+            f'<w:p><w:pPr><w:pStyle w:val="{style_id}"/><w:jc w:val="{align}"/></w:pPr>'
+        )
+    
+    def row(self, row: Row, style_id: str, bold_style_id: str, header: bool = False) -> str:
+        style_id = bold_style_id if row.bold else style_id
+        parts = ['<w:tr><w:trPr><w:tblHeader/></w:trPr>' if header else '<w:tr>']
+        cells = [cell if isinstance(cell, Cell) else Cell(cell) for cell in row.cells]
+        ncols = len(self.columns)
+        index = 0
+        while index < ncols:
+            merging = self._merging.get(index)
+            if merging:
+                # Ô tiếp nối của một ô gộp dọc ở hàng trên
+                rows_left, span = merging
+                parts.append(self.cell_open(index, span, style_id, CENTER, '<w:vMerge/>', row.shading))
+                parts.append('</w:p></w:tc>')
+                if rows_left > 1:
+                    merging[0] = rows_left - 1
+                else:
+                    del self._merging[index]
+                index += span
+                continue
+            
+            cell = cells.pop(0) if cells else Cell()
+            span = max(1, min(cell.span, ncols - index))
+            vmerge = ''
+            if cell.rowspan > 1:
+                vmerge = '<w:vMerge w:val="restart"/>'
+                self._merging[index] = [cell.rowspan - 1, span]
+            align = cell.align or row.align or self.columns[index].align
+            parts.append(self.cell_open(index, span, style_id, align, vmerge, row.shading))
+            parts.append(_runs(cell.text))
+            parts.append('</w:p></w:tc>')
+            index += span
+        
+        if cells:
+            raise ValueError(f"Hàng có nhiều ô hơn số cột của bảng ({ncols})")
+        parts.append('</w:tr>')
+        return ''.join(parts)
+
+
+def _runs(text) -> str:
+    """Một run chứa text ('\\n' -> ngắt dòng, '\\t' -> tab), rỗng nếu không có chữ"""
+    if not text:
+        return ''
+    text = _INVALID_XML_CHARS.sub('', str(text).replace('\r\n', '\n').replace('\r', '\n'))
+    body = escape(text)
+    if '\n' in body:
+        body = '</w:t><w:br/><w:t xml:space="preserve">'.join(body.split('\n'))
+    if '\t' in body:
+        body = '</w:t><w:tab/><w:t xml:space="preserve">'.join(body.split('\t'))
+    return f'<w:r><w:t xml:space="preserve">{body}</w:t></w:r>'
+
+
+def _fit_widths(doc, widths: Sequence[int]) -> List[int]:
+    """Độ rộng cột (twip); thu nhỏ theo tỷ lệ nếu tổng vượt bề rộng trang trừ lề"""
+    twips = [int(width * _TWIPS_PER_EMU) for width in widths]
+    section = doc.sections[-1]
+    try:
+        available = int((section.page_width - section.left_margin - section.right_margin) * _TWIPS_PER_EMU)
+    except TypeError:
+        return twips
+    total = sum(twips)
+    if available > 0 and total > available:
+        twips = [int(width * available / total) for width in twips]
+    return twips
+
+
+def _table_style(doc) -> str:
+    """Table style dùng chung: viền đơn màu đen cho mọi ô. Trả về style_id."""
+    from docx.enum.style import WD_STYLE_TYPE
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls
+    from docx.styles.style import StyleFactory
+    
+    styles = doc.styles
+    existing = styles.element.get_by_name(TABLE_STYLE)
+    if existing is not None:
+        return existing.styleId
+    
+    # Tạo thẳng phần tử style (styles.add_style kiểm tra trùng tên bằng cách duyệt mọi style)
+    style = StyleFactory(styles.element.add_style_of_type(TABLE_STYLE, WD_STYLE_TYPE.TABLE, False))
+    borders = ''.join(
+        f'<w:{name} w:val="single" w:sz="4" w:space="0" w:color="000000"/>'
+        for name in ('top', 'left', 'bottom', 'right', 'insideH', 'insideV')
+    )
+    style.element.append(parse_xml(
+        f'<w:tblPr {nsdecls("w")}><w:tblBorders>{borders}</w:tblBorders></w:tblPr>'
+    ))
+    return style.style_id
+
+
+def _paragraph_style(doc, size: float, bold: bool) -> str:
+    """Paragraph style cho chữ trong bảng theo cỡ chữ (tạo khi cần). Trả về style_id."""
+    from docx.enum.style import WD_STYLE_TYPE
+    from docx.oxml.ns import qn
+    from docx.shared import Pt, RGBColor
+    from docx.styles.style import StyleFactory
+    
+    name = f"Bảng {'Đậm ' if bold else ''}{size:g}pt"
+    styles = doc.styles
+    existing = styles.element.get_by_name(name)
+    if existing is not None:
+        return existing.styleId
+    
+    style = StyleFactory(styles.element.add_style_of_type(name, WD_STYLE_TYPE.PARAGRAPH, False))
+    style.base_style = styles['Normal']
+    style.hidden = False
+    style.quick_style = False
+    font = style.font
+    font.name = FONT_NAME
+    font.size = Pt(size)
+    font.bold = bold
+    font.color.rgb = RGBColor(0, 0, 0)
+    style.element.rPr.rFonts.set(qn('w:eastAsia'), FONT_NAME)
+    return style.style_id
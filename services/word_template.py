@@ -0,0 +1,291 @@
+"""
+Mẫu văn bản Word cho các hàm xuất: dựng/nạp một lần, giữ package đã parse trong bộ nhớ
+
+Phần cố định của một báo cáo (thiết lập trang, khối "TIỂU ĐOÀN / CỘNG HOÀ XÃ HỘI CHỦ NGHĨA
+VIỆT NAM", tiêu đề, chữ ký) nằm trong một mẫu .docx có chỗ điền:
+- {{ten}}: thay bằng values['ten'] (giữ định dạng của run; '\\n' thành ngắt dòng).
+- {{?ten}}: đặt trong đoạn văn; bỏ cả đoạn nếu values['ten'] rỗng.
+- {{#ten}}: đặt trong một hàng bảng; hàng được nhân bản cho mỗi phần tử của rows['ten']
+  (dict), các chỗ điền trong hàng lấy giá trị từ phần tử trước rồi mới tới values.
+- {{>ten}}: đoạn văn riêng; thay bằng bảng do tables['ten'](doc) tạo (ví dụ word_table.add_table).
+
+Mẫu lấy từ file templates/<tên>.docx nếu có (đổi bố cục không cần sửa code), nếu không
+thì dựng bằng hàm builder của module xuất. Mỗi lần xuất chỉ sao chép package trong bộ nhớ.
+"""
+
+import io
+import re
+import copy
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Hashable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = Path(__file__).parent.parent / 'templates'
+
+PLACEHOLDER = re.compile(r'\{\{\s*([?#>]?)\s*([\w.]+)\s*\}\}')
+
+_cache: Dict[Hashable, 'WordTemplate'] = {}
+_cache_lock = threading.Lock()
+
+_XML_SPACE = '{http://www.w3.org/XML/1998/namespace}space'
+
+
+class WordTemplate:
+    """Một mẫu .docx đã parse; render() trả về văn bản mới đã điền"""
+    
+    def __init__(self, data: bytes, name: str = ''):
+        """
+        Args:
+            data: Nội dung file .docx
+            name: Tên mẫu (để ghi log)
+        """
+        from docx import Document
+        
+        self.name = name
+        self._data = data
+        self._package = Document(io.BytesIO(data)).part.package
+    
+    @classmethod
+    def from_document(cls, doc, name: str = '') -> 'WordTemplate':
+        """Tạo mẫu từ một docx.Document đã dựng"""
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        return cls(buffer.getvalue(), name)
+    
+    @classmethod
+    def from_file(cls, path) -> 'WordTemplate':
+        """Nạp mẫu từ file .docx"""
+        path = Path(path)
+        return cls(path.read_bytes(), path.stem)
+    
+    def new_document(self):
+        """Văn bản mới là bản sao của mẫu (chưa điền)"""
+        try:
+            return _clone_package(self._package).main_document_part.document
+        except Exception as e:
+            # Phòng khi cấu trúc nội bộ python-docx khác phiên bản: mở lại từ bytes
+            logger.warning(f"Không sao chép được mẫu '{self.name}' trong bộ nhớ, mở lại từ file: {e}")
+            from docx import Document
+            return Document(io.BytesIO(self._data))
+    
+    def render(self, values: Optional[Dict[str, object]] = None,
+               rows: Optional[Dict[str, Iterable[Dict[str, object]]]] = None,
+               tables: Optional[Dict[str, Callable]] = None):
+        """
+        Văn bản mới từ mẫu với các chỗ điền đã thay
+        Args:
+            values: Giá trị cho {{ten}} và {{?ten}}
+            rows: Danh sách dict cho các hàng lặp {{#ten}}
+            tables: Hàm (doc) -> docx.table.Table cho các chỗ đặt bảng {{>ten}}
+        Returns:
+            docx.Document
+        """
+        doc = self.new_document()
+        values = values or {}
+        rows = rows or {}
+        tables = tables or {}
+        
+        roots = [doc.element.body] + _header_footer_elements(doc)
+        for root in roots:
+            _fill_tables(doc, root, tables)
+            _fill_rows(root, rows, values)
+            _fill_paragraphs(root, values)
+        return doc
+    
+    def render_bytes(self, values: Optional[Dict[str, object]] = None,
+                     rows: Optional[Dict[str, Iterable[Dict[str, object]]]] = None,
+                     tables: Optional[Dict[str, Callable]] = None) -> bytes:
+        """Như render() nhưng trả về nội dung file .docx"""
+        buffer = io.BytesIO()
+        self.render(values, rows, tables).save(buffer)
+        return buffer.getvalue()
+    
+    def placeholders(self) -> List[str]:
+        """Các chỗ điền trong mẫu (kèm tiền tố ?, #, >)"""
+        doc = self.new_document()
+        found = []
+        for root in [doc.element.body] + _header_footer_elements(doc):
+            for p in root.iter(_qn('w:p')):
+                for match in PLACEHOLDER.finditer(_paragraph_text(p)):
+                    key = match.group(1) + match.group(2)
+                    if key not in found:
+                        found.append(key)
+        return found
+
+
+def get_template(name: str, builder: Callable[[], object]) -> WordTemplate:
+    """
+    Mẫu dùng chung theo tên (tạo một lần cho cả ứng dụng, an toàn với nhiều luồng)
+    Args:
+        name: Tên mẫu; nếu có file templates/<name>.docx thì dùng file đó
+        builder: Hàm () -> docx.Document dựng mẫu mặc định
+    """
+    path = TEMPLATE_DIR / f"{name}.docx"
+    try:
+        key = (name, path.stat().st_mtime)
+    except OSError:
+        path = None
+        key = (name, None)
+    
+    template = _cache.get(key)
+    if template is not None:
+        return template
+    
+    with _cache_lock:
+        template = _cache.get(key)
+        if template is None:
+            if path is not None:
+                template = WordTemplate.from_file(path)
+            else:
+                template = WordTemplate.from_document(builder(), name)
+            # Bỏ bản cũ của cùng mẫu (file mẫu vừa được sửa)
+            for old_key in [k for k in _cache if k[0] == name]:
+                del _cache[old_key]
+            _cache[key] = template
+    return template
+
+
+def clear_template_cache():
+    """Bỏ mọi mẫu đã nạp (lần xuất sau dựng/nạp lại)"""
+    with _cache_lock:
+        _cache.clear()
+
+
+# ========== Nội bộ ==========
+
+def _qn(tag: str) -> str:
+    from docx.oxml.ns import qn
+    return qn(tag)
+
+
+def _clone_package(source):
+    """Sao chép package: XML được deepcopy (nhanh hơn parse lại), phần nhị phân dùng chung blob"""
+    from docx.package import Package
+    from docx.opc.part import XmlPart
+    
+    package = Package()
+    parts = {}
+    for part in source.iter_parts():
+        if isinstance(part, XmlPart):
+            parts[part] = type(part)(part.partname, part.content_type,
+                                     copy.deepcopy(part._element), package)
+        else:
+            # Phần nhị phân (ảnh, ...) tạo qua load() như khi mở file: hàm khởi tạo của
+            # ImagePart không nhận package
+            parts[part] = type(part).load(partname=part.partname, content_type=part.content_type,
+                                          blob=part.blob, package=package)
+    for part, new_part in parts.items():
+        for rel in part.rels.values():
+            target = rel.target_ref if rel.is_external else parts[rel.target_part]
+            new_part.rels.add_relationship(rel.reltype, target, rel.rId, rel.is_external)
+    for rel in source.rels.values():
+        package.rels.add_relationship(rel.reltype, parts[rel.target_part], rel.rId, rel.is_external)
+    # Như khi mở file: ghi nhận các ảnh có sẵn để ảnh thêm sau dùng lại phần trùng và không trùng tên
+    package.after_unmarshal()
+    return package
+
+
+def _header_footer_elements(doc) -> list:
+    """Phần tử gốc của các header/footer có trong văn bản"""
+    from docx.opc.constants import RELATIONSHIP_TYPE as RT
+    
+    return [rel.target_part.element for rel in doc.part.rels.values()
+            if rel.reltype in (RT.HEADER, RT.FOOTER)]
+
+
+def _paragraph_text(p) -> str:
+    return ''.join(t.text or '' for t in p.iter(_qn('w:t')))
+
+
+def _fill_tables(doc, root, tables: Dict[str, Callable]):
+    """Thay các đoạn {{>ten}} bằng bảng (đoạn không có bảng tương ứng thì bỏ)"""
+    for p in list(root.iter(_qn('w:p'))):
+        match = PLACEHOLDER.fullmatch(_paragraph_text(p).strip())
+        if not match or match.group(1) != '>':
+            continue
+        build = tables.get(match.group(2))
+        if build is not None:
+            table = build(doc)
+            p.addprevious(table._tbl)
+        p.getparent().remove(p)
+
+
+def _fill_rows(root, rows: Dict[str, Iterable[Dict[str, object]]], values: Dict[str, object]):
+    """Nhân bản các hàng bảng có {{#ten}} cho mỗi phần tử của rows['ten']"""
+    for tr in list(root.iter(_qn('w:tr'))):
+        match = next((m for m in PLACEHOLDER.finditer(_paragraph_text(tr)) if m.group(1) == '#'), None)
+        if match is None:
+            continue
+        for item in rows.get(match.group(2), []):
+            clone = copy.deepcopy(tr)
+            merged = dict(values)
+            merged.update(item)
+            _fill_paragraphs(clone, merged)
+            tr.addprevious(clone)
+        tr.getparent().remove(tr)
+
+
+def _fill_paragraphs(root, values: Dict[str, object]):
+    """Thay {{ten}} trong mọi đoạn văn; bỏ đoạn có {{?ten}} khi giá trị rỗng"""
+    for p in list(root.iter(_qn('w:p'))):
+        texts = list(p.iter(_qn('w:t')))
+        full = ''.join(t.text or '' for t in texts)
+        if '{{' not in full:
+            continue
+        matches = list(PLACEHOLDER.finditer(full))
+        if any(m.group(1) == '?' and not values.get(m.group(2)) for m in matches):
+            p.getparent().remove(p)
+            continue
+        # Thay từ cuối lên để vị trí các chỗ điền phía trước không đổi
+        for match in reversed(matches):
+            if match.group(1) in ('?', '#'):
+                value = ''
+            else:
+                value = values.get(match.group(2))
+                value = '' if value is None else str(value)
+            _splice(texts, match.start(), match.end(), value)
+        for t in texts:
+            if t.text and '\n' in t.text:
+                _expand_breaks(t)
+
+
+def _splice(texts: list, start: int, end: int, value: str):
+    """Thay đoạn [start, end) của chuỗi ghép từ các w:t; giá trị đặt vào w:t chứa start"""
+    offset = 0
+    first = True
+    for t in texts:
+        text = t.text or ''
+        node_start, node_end = offset, offset + len(text)
+        offset = node_end
+        if node_end <= start:
+            continue
+        if first:
+            # w:t chứa phần đầu chỗ điền: giữ phần trước, chèn giá trị
+            t.text = text[:start - node_start] + value + text[max(0, end - node_start):]
+            first = False
+        else:
+            # Chỗ điền bị Word tách qua nhiều run: bỏ phần còn lại ở các w:t sau
+            t.text = text[end - node_start:] if end < node_end else ''
+        t.set(_XML_SPACE, 'preserve')
+        if node_end >= end:
+            break
+
+
+def _expand_breaks(t):
+    """Tách w:t có '\\n' thành các w:t xen kẽ w:br trong cùng run"""
+    from docx.oxml import OxmlElement
+    
+    parts = t.text.split('\n')
+    t.text = parts[0]
+    anchor = t
+    for part in parts[1:]:
+        br = OxmlElement('w:br')
+        anchor.addnext(br)
+        new_t = OxmlElement('w:t')
+        new_t.text = part
+        new_t.set(_XML_SPACE, 'preserve')
+        br.addnext(new_t)
+        anchor = new_t
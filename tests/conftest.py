@@ -0,0 +1,20 @@
+"""
+Fixture dùng chung cho các test
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.database import DatabaseService
+
+
+@pytest.fixture
+def db(tmp_path):
+    """DatabaseService trên file database tạm (đóng kết nối khi xong)"""
+    service = DatabaseService(str(tmp_path / "test.db"))
+    yield service
+    service.close()
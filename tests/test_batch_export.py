@@ -0,0 +1,97 @@
+"""
+Test xuất gói báo cáo Word (services/batch_export)
+"""
+
+import hashlib
+import io
+import json
+import os
+import zipfile
+
+import docx
+import pytest
+
+from models.personnel import Personnel
+from services.batch_export import REPORT_TYPES, export_reports_zip
+
+
+class Cancelled(Exception):
+    pass
+
+
+@pytest.fixture
+def filled_db(db):
+    """Vài quân nhân có cờ và nằm trong một số bảng danh sách; hai bảng danh sách để trống"""
+    ids = []
+    for i in range(6):
+        p = Personnel(hoTen=f"Quân nhân {i}", ngaySinh="01/01/2000", capBac="B2", donVi="c3",
+                      tonGiao="Phật giáo" if i % 3 == 0 else "")
+        p.thongTinKhac.cdCu = i % 2 == 0
+        ids.append(db.create(p))
+    db.add_dang_vien_dien_tap(ids[0])
+    db.add_to_dan_van(ids[1])
+    db.add_to_dan_van(ids[2])
+    db.add_ban_chap_hanh_chi_doan(ids[3], "Bí thư")
+    return db
+
+
+def _scope_count(db, report_type):
+    return sum(len(chunk) for chunk in db.iter_personnel_values(['id'], **REPORT_TYPES[report_type].scope))
+
+
+def test_export_reports_zip_serial(filled_db, tmp_path):
+    """max_workers=1: mỗi báo cáo có dữ liệu là một .docx trong zip, số dòng theo phạm vi của báo cáo"""
+    file_path = str(tmp_path / "bao_cao.zip")
+    progress = []
+    manifest = export_reports_zip(filled_db, file_path, max_workers=1,
+                                  on_progress=lambda done, total, message: progress.append((done, total)))
+    
+    assert manifest['workers'] == 1
+    assert [entry['type'] for entry in manifest['reports']] == list(REPORT_TYPES)
+    assert progress[-1] == (len(REPORT_TYPES), len(REPORT_TYPES))
+    assert not os.path.exists(file_path + ".part")
+    
+    with zipfile.ZipFile(file_path) as archive:
+        assert json.loads(archive.read('manifest.json')) == manifest
+        files = []
+        for number, entry in enumerate(manifest['reports'], 1):
+            count = _scope_count(filled_db, entry['type'])
+            assert entry['count'] == count, entry['type']
+            assert 'error' not in entry
+            if not count:
+                assert entry['file'] is None
+                continue
+            assert entry['file'] == f"{number:02d}_{REPORT_TYPES[entry['type']].file_name}.docx"
+            data = archive.read(entry['file'])
+            assert entry['size'] == len(data)
+            assert entry['sha256'] == hashlib.sha256(data).hexdigest()
+            docx.Document(io.BytesIO(data))  # Mở được bằng python-docx
+            files.append(entry['file'])
+        assert sorted(archive.namelist()) == sorted(files + ['manifest.json'])
+    
+    # Phạm vi thật sự khác nhau giữa các báo cáo, có cả báo cáo rỗng
+    counts = {entry['type']: entry['count'] for entry in manifest['reports']}
+    assert counts['trich_ngang'] == 6
+    assert counts['nguoi_than_che_do_cu'] == 3
+    assert counts['ton_giao'] == 2
+    assert counts['to_dan_van'] == 2
+    assert counts['bao_ve_an_ninh'] == 0
+
+
+def test_export_reports_zip_cancel_removes_part_file(filled_db, tmp_path):
+    """Hủy giữa chừng: exception được ném lại, không còn file .part và không tạo file .zip"""
+    file_path = str(tmp_path / "bao_cao.zip")
+    part_path = file_path + ".part"
+    calls = []
+    
+    def check_cancelled():
+        calls.append(os.path.exists(part_path))
+        if len(calls) == 3:  # Sau khi đã ghi báo cáo đầu tiên vào file tạm
+            raise Cancelled()
+    
+    with pytest.raises(Cancelled):
+        export_reports_zip(filled_db, file_path, max_workers=1, check_cancelled=check_cancelled)
+    
+    assert calls[-1] is True
+    assert not os.path.exists(part_path)
+    assert not os.path.exists(file_path)
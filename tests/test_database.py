@@ -0,0 +1,257 @@
+"""
+Test DatabaseService
+"""
+
+import sqlite3
+import threading
+
+from models.personnel import Personnel
+
+
+def test_bulk_upsert_update_keeps_cache(db):
+    """Cập nhật bản ghi đã có qua bulk_upsert: get_all()/get_by_id() vẫn thấy bản ghi đã cập nhật"""
+    db.bulk_upsert([
+        Personnel(hoTen="Nguyễn Văn An", ngaySinh="01/01/2000", capBac="B2"),
+        Personnel(hoTen="Trần Văn Bình", ngaySinh="02/02/2001", capBac="B1"),
+    ])
+    existing = {p.hoTen: p.id for p in db.get_all()}  # Nạp đủ cache
+    
+    counts = db.bulk_upsert(
+        [Personnel(hoTen="Nguyễn Văn An", ngaySinh="01/01/2000", chucVu="A trưởng")],
+        update_existing=True,
+    )
+    
+    assert counts == {'inserted': 0, 'updated': 1, 'skipped': 0}
+    everyone = db.get_all()
+    assert len(everyone) == 2
+    updated = db.get_by_id(existing["Nguyễn Văn An"])
+    assert updated is not None
+    assert updated.chucVu == "A trưởng"
+    assert updated.capBac == "B2"
+
+
+def test_default_order_ignores_case(db):
+    """Cùng cấp bậc: họ tên sắp không phân biệt hoa thường, SQL và cache cho cùng thứ tự"""
+    for ho_ten in ("bình", "An", "Đức", "an Bảo", "đào"):
+        db.create(Personnel(hoTen=ho_ten, ngaySinh="01/01/2000", capBac="B2"))
+    expected = ["An", "an Bảo", "bình", "Đức", "đào"]
+    expected.sort(key=str.lower)
+    
+    assert [p.hoTen for p in db.get_all(columns=['hoTen'])] == expected
+    assert [p.hoTen for p in db.get_all()] == expected
+    # Thứ tự tính lại trong Python sau khi cache thay đổi
+    db.create(Personnel(hoTen="Bảo", ngaySinh="01/01/2000", capBac="B2"))
+    assert [p.hoTen for p in db.get_all()] == sorted(expected + ["Bảo"], key=str.lower)
+
+
+def test_full_text_triggers_without_app_functions(db):
+    """Trigger của personnel_fts chạy được trên kết nối sqlite3 thường (không có hàm đăng ký từ Python)"""
+    person = Personnel(hoTen="Đỗ Văn Đức", ngaySinh="01/01/2000", capBac="B2")
+    db.create(person)
+    
+    conn = sqlite3.connect(db.db_path)
+    conn.execute(
+        "INSERT INTO nguoi_than (id, personnelId, hoTen) VALUES ('nt1', ?, 'Lê Thị Đào')", (person.id,)
+    )
+    conn.commit()
+    conn.close()
+    
+    assert [p.id for p in db.full_text_search("duc")] == [person.id]
+    assert [p.id for p in db.full_text_search("Đức")] == [person.id]
+    assert [p.id for p in db.full_text_search("dao")] == [person.id]
+
+
+def test_tong_hop_counts_follow_writes(db):
+    """tong_hop_counts theo kịp create/update/bulk_upsert và khớp với khi tính lại từ đầu"""
+    person = Personnel(hoTen="Lò Văn Sự", ngaySinh="01/01/2000", capBac="Thượng úy", donVi="c1", danToc="Thái")
+    db.create(person)
+    db.create(Personnel(hoTen="Lê Văn Việt", ngaySinh="01/01/2000", capBac="B2", donVi="c1", danToc=" VIỆT "))
+    counts = db.get_tong_hop_counts()['dtts']
+    assert (counts['total'], counts['SQ'], counts['HSQ_CS']) == (1, 1, 0)
+    
+    person.capBac = "Trung sĩ"
+    db.update(person)
+    counts = db.get_tong_hop_counts()['dtts']
+    assert (counts['total'], counts['SQ'], counts['HSQ_CS']) == (1, 0, 1)
+    
+    db.bulk_upsert(
+        [Personnel(hoTen="Lò Văn Sự", ngaySinh="01/01/2000", capBac="Thiếu tá CN", danToc="KINH")],
+        update_existing=True,
+    )
+    assert db.get_tong_hop_counts()['dtts']['total'] == 0
+    
+    before = db.get_tong_hop_counts()
+    db.rebuild_tong_hop_counts()
+    assert db.get_tong_hop_counts() == before
+
+
+def test_rename_updates_default_order(db):
+    """Đổi họ tên qua update()/bulk_upsert() thì thứ tự trong SQL đổi theo (hoTenLower ghi cùng hoTen)"""
+    first = Personnel(hoTen="An", ngaySinh="01/01/2000", capBac="B2")
+    db.create(first)
+    db.create(Personnel(hoTen="Bình", ngaySinh="01/01/2000", capBac="B2"))
+    
+    first.hoTen = "Cúc"
+    db.update(first)
+    assert [p.hoTen for p in db.get_all(columns=['hoTen'])] == ["Bình", "Cúc"]
+    
+    db.bulk_upsert([Personnel(id=first.id, hoTen="an Bảo")], dedupe_key='id', update_existing=True)
+    assert [p.hoTen for p in db.get_all(columns=['hoTen'])] == ["an Bảo", "Bình"]
+
+
+def test_schema_usable_without_app_functions(db):
+    """Ghi, VACUUM và integrity_check từ kết nối sqlite3 thường (trigger/index không dùng hàm Python)"""
+    person = Personnel(hoTen="Nguyễn Văn An", ngaySinh="01/01/2000", capBac="B2", danToc="Tày")
+    db.create(person)
+    db.create(Personnel(hoTen="Trần Văn Bình", ngaySinh="02/02/2001", capBac="B1"))
+    db.close()
+    
+    conn = sqlite3.connect(db.db_path)
+    conn.execute("UPDATE personnel SET hoTen = 'Nguyễn Văn Ân', capBac = 'B1' WHERE id = ?", (person.id,))
+    conn.execute("INSERT INTO nguoi_than (id, personnelId, hoTen) VALUES ('nt1', ?, 'Lê Thị Hoa')", (person.id,))
+    conn.execute("DELETE FROM nguoi_than")
+    conn.execute("DELETE FROM personnel WHERE id = ?", (person.id,))
+    conn.commit()
+    conn.execute("VACUUM")
+    assert conn.execute("PRAGMA integrity_check").fetchone()[0] == 'ok'
+    assert conn.execute("SELECT COUNT(*) FROM personnel_fts").fetchone()[0] == 1
+    conn.close()
+
+
+def test_search_matches_name_words_only(db):
+    """search(): từ tìm kiếm là tiền tố của từ trong họ tên, không dấu; không khớp quê quán"""
+    an = Personnel(hoTen="Nguyễn Văn An", capBac="B2", donVi="c1", queQuan="Nam Định")
+    dung = Personnel(hoTen="Đặng Quốc Dũng", capBac="B2", donVi="c2")
+    for person in (an, dung):
+        db.create(person)
+    
+    assert [p.id for p in db.search("nguyen v")] == [an.id]
+    assert [p.id for p in db.search("ĐẶNG dung")] == [dung.id]
+    assert db.search("nam") == []
+    assert db.search("dung", {'donVi': 'c1'}) == []
+    assert db.count_search("an") == 1
+    assert db.count_search("") == 2
+
+
+def _count(db, sql):
+    with db.connection() as conn:
+        return conn.execute(sql).fetchone()[0]
+
+
+def test_bulk_upsert_dedupe_keys(db):
+    """Mỗi dedupe_key: bản ghi trùng (cả trùng trong cùng lô) bị bỏ qua khi update_existing=False"""
+    first = Personnel(hoTen="Nguyễn Văn An", ngaySinh="01/01/2000", capBac="B2")
+    db.bulk_upsert([first, Personnel(hoTen="Trần Văn Bình", ngaySinh="02/02/2001", capBac="B1")])
+    
+    # Họ tên so không dấu, không phân biệt hoa thường và khoảng trắng thừa
+    counts = db.bulk_upsert([
+        Personnel(hoTen="nguyen  van AN", ngaySinh="01/01/2000"),
+        Personnel(hoTen="Nguyễn Văn An", ngaySinh="03/03/2003"),
+        Personnel(hoTen="Nguyễn Văn An", ngaySinh="03/03/2003"),
+    ])
+    assert counts == {'inserted': 1, 'updated': 0, 'skipped': 2}
+    
+    counts = db.bulk_upsert([Personnel(hoTen="TRẦN VĂN BÌNH", ngaySinh="09/09/1999")], dedupe_key='hoTen')
+    assert counts == {'inserted': 0, 'updated': 0, 'skipped': 1}
+    
+    counts = db.bulk_upsert(
+        [Personnel(id=first.id, hoTen="Tên khác"), Personnel(id="moi", hoTen="Lê Văn Cường")],
+        dedupe_key='id',
+    )
+    assert counts == {'inserted': 1, 'updated': 0, 'skipped': 1}
+    assert db.get_by_id(first.id).hoTen == "Nguyễn Văn An"
+    assert db.count_search('') == 4
+
+
+def test_bulk_upsert_update_existing_merges_non_empty(db):
+    """update_existing=True: chỉ ghi đè trường có giá trị, giữ id và cách viết của cột khoá trùng"""
+    person = Personnel(hoTen="Nguyễn Văn An", ngaySinh="01/01/2000", capBac="B2", chucVu="CS", donVi="c1")
+    db.create(person)
+    
+    counts = db.bulk_upsert(
+        [Personnel(hoTen="NGUYEN VAN AN", ngaySinh="01/01/2000", capBac="Trung úy", donVi="")],
+        update_existing=True,
+    )
+    assert counts == {'inserted': 0, 'updated': 1, 'skipped': 0}
+    
+    updated = db.get_by_id(person.id)
+    assert (updated.hoTen, updated.capBac, updated.chucVu, updated.donVi) == ("Nguyễn Văn An", "Trung úy", "CS", "c1")
+    
+    counts = db.bulk_upsert([Personnel(hoTen="Nguyễn Văn An", capBac="B1")], dedupe_key='hoTen')
+    assert counts == {'inserted': 0, 'updated': 0, 'skipped': 1}
+    assert db.get_by_id(person.id).capBac == "Trung úy"
+
+
+def test_bulk_upsert_keeps_fts_and_tong_hop_in_sync(db):
+    """Sau một lô thêm + cập nhật: personnel_fts và tong_hop_counts khớp với dữ liệu"""
+    batch = [
+        Personnel(hoTen=f"Hoàng Văn {i}", ngaySinh="01/01/2000", capBac="B2" if i % 3 else "Thiếu úy",
+                  donVi=f"c{i % 2}", danToc="Tày" if i % 4 == 0 else "Kinh")
+        for i in range(20)
+    ]
+    assert db.bulk_upsert(batch)['inserted'] == 20
+    db.bulk_upsert(
+        [Personnel(hoTen="Hoàng Văn 1", ngaySinh="01/01/2000", hoTenThuongDung="Sơn", danToc="Mường")],
+        update_existing=True,
+    )
+    
+    assert _count(db, "SELECT COUNT(*) FROM personnel_fts") == 20
+    assert [p.hoTen for p in db.full_text_search("son")] == ["Hoàng Văn 1"]
+    
+    everyone = db.get_all()
+    expected = sum(1 for p in everyone if p.danToc.strip().lower() not in ('', 'kinh', 'việt'))
+    counts = db.get_tong_hop_counts()
+    assert counts['dtts']['total'] == expected == 6
+    db.rebuild_tong_hop_counts()
+    assert db.get_tong_hop_counts() == counts
+
+
+def test_cache_sees_writes_from_other_connections(db):
+    """Ghi từ kết nối khác (sqlite3 thường hoặc luồng khác) làm mất hiệu lực cache"""
+    person = Personnel(hoTen="Nguyễn Văn An", ngaySinh="01/01/2000", capBac="B2", chucVu="CS")
+    db.create(person)
+    assert db.get_by_id(person.id).chucVu == "CS"
+    assert len(db.get_all()) == 1
+    
+    conn = sqlite3.connect(db.db_path)
+    conn.execute("UPDATE personnel SET chucVu = 'A trưởng' WHERE id = ?", (person.id,))
+    conn.commit()
+    conn.close()
+    assert db.get_by_id(person.id).chucVu == "A trưởng"
+    
+    def write_on_other_thread():
+        with db.connection() as other:
+            other.execute("UPDATE personnel SET chucVu = 'B trưởng' WHERE id = ?", (person.id,))
+            other.execute(
+                "INSERT INTO personnel (id, hoTen, capBac, thongTinKhac) "
+                "VALUES ('moi', 'Trần Văn Bình', 'B1', '{}')"
+            )
+    
+    thread = threading.Thread(target=write_on_other_thread)
+    thread.start()
+    thread.join()
+    assert db.get_by_id(person.id).chucVu == "B trưởng"
+    assert sorted(p.id for p in db.get_all()) == sorted([person.id, 'moi'])
+
+
+def test_cached_personnel_are_copies(db):
+    """Sửa đối tượng trả về (kể cả thongTinKhac lồng nhau) không làm hỏng cache"""
+    person = Personnel(hoTen="Nguyễn Văn An", ngaySinh="01/01/2000", capBac="B2")
+    person.thongTinKhac.dang.ngayVao = "01/01/2020"
+    db.create(person)
+    
+    got = db.get_by_id(person.id)
+    got.hoTen = "Đã sửa"
+    got.thongTinKhac.dang.ngayVao = ""
+    got.thongTinKhac.cdCu = True
+    listed = db.get_all()[0]
+    listed.capBac = "Đại tá"
+    listed.thongTinKhac.doan.ngayVao = "02/02/2018"
+    db.get_by_ids([person.id])[0].thongTinKhac.yeuToNN = True
+    
+    again = db.get_by_id(person.id)
+    assert (again.hoTen, again.capBac) == ("Nguyễn Văn An", "B2")
+    assert again.thongTinKhac.dang.ngayVao == "01/01/2020"
+    assert again.thongTinKhac.doan.ngayVao == ""
+    assert not again.thongTinKhac.cdCu and not again.thongTinKhac.yeuToNN
+    assert db.get_all()[0].capBac == "B2"
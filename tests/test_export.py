@@ -0,0 +1,22 @@
+"""
+Test ExportService
+"""
+
+from models.personnel import Personnel
+from services.export import ExportService, REPORT_SHEETS
+
+
+def test_report_workbook_che_do_cu_matches_tab(db, tmp_path):
+    """Sheet 'Chế độ cũ' có cùng số hàng với tab Chế độ cũ (filter_personnel('cdCu'))"""
+    ids = []
+    for i in range(6):
+        p = Personnel(hoTen=f"Quân nhân {i}", ngaySinh="01/01/2000", capBac="B2")
+        p.thongTinKhac.cdCu = i % 2 == 0
+        ids.append(db.create(p))
+    # Bảng danh sách chế độ cũ khác với cờ cdCu: sheet phải theo cờ như tab
+    db.add_nguoi_than_che_do_cu(ids[1])
+    
+    sheets = [sheet for sheet in REPORT_SHEETS if sheet[0] == 'Chế độ cũ']
+    counts = ExportService.write_report_workbook(db, str(tmp_path / "bao_cao.xlsx"), sheets=sheets)
+    
+    assert counts['Chế độ cũ'] == len(db.filter_personnel('cdCu')) == 3
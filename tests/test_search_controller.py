@@ -0,0 +1,42 @@
+"""
+Test SearchController (không cần Tk: widget và StringVar giả)
+"""
+
+from gui.search_controller import SearchController
+
+
+class FakeVar:
+    def __init__(self):
+        self.value = ''
+    
+    def get(self):
+        return self.value
+    
+    def trace(self, mode, callback):
+        pass
+
+
+def test_row_text_and_match_ids():
+    """Chuỗi con của row_text (không dấu) hoặc ID nằm trong match_ids(chuỗi tìm kiếm)"""
+    rows = [('1', 'Nguyễn Văn An'), ('2', 'Trần Văn Bình'), ('3', 'Lê Thị Hoa')]
+    queries = []
+    
+    def match_ids(query):
+        queries.append(query)
+        return ['3'] if query.startswith('nam') else []
+    
+    var = FakeVar()
+    search = SearchController(
+        None, var, fetch=lambda: rows, on_result=lambda result: None,
+        row_text=lambda row: row[1], row_id=lambda row: row[0], match_ids=match_ids,
+    )
+    
+    var.value = 'van'
+    assert search.results() == rows[:2]
+    var.value = 'Văn B'
+    assert search.results() == [rows[1]]
+    var.value = 'nam'
+    assert search.results() == [rows[2]]
+    var.value = ''
+    assert search.results() == rows
+    assert queries == ['van', 'van b', 'nam']
@@ -0,0 +1,36 @@
+"""
+Test TaskExecutor (root giả: chỉ cần after())
+"""
+
+import threading
+
+from gui.task_executor import TaskExecutor
+
+
+class FakeRoot:
+    def after(self, delay, callback):
+        return None
+
+
+def test_shutdown_stops_running_tasks():
+    """shutdown(): công việc đang chạy dừng ở check_cancelled(), luồng nền kết thúc"""
+    started = threading.Event()
+    stopped = threading.Event()
+    
+    def work(task):
+        started.set()
+        try:
+            while True:
+                task.check_cancelled()
+                task.report_progress()
+        finally:
+            stopped.set()
+    
+    executor = TaskExecutor(FakeRoot())
+    task = executor.submit(work)
+    assert started.wait(5)
+    
+    executor.shutdown()
+    assert task.cancelled
+    assert stopped.wait(5)
+    executor._pool.shutdown(wait=True)
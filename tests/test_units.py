@@ -0,0 +1,140 @@
+"""
+Test đơn vị: bảng unit_members và truy vấn cây đơn vị
+"""
+
+import json
+import sqlite3
+
+from models.personnel import Personnel
+from models.unit import Unit
+from services.database import DatabaseService, SCHEMA_VERSION
+
+
+def test_migrate_legacy_unit_personnel_ids(tmp_path):
+    """Database cũ (units.personnelIds dạng JSON, chưa có schema_version) chuyển sang unit_members"""
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE personnel (
+            id TEXT PRIMARY KEY, hoTen TEXT NOT NULL, ngaySinh TEXT, capBac TEXT, chucVu TEXT,
+            donVi TEXT, nhapNgu TEXT, queQuan TEXT, truQuan TEXT, danToc TEXT, tonGiao TEXT,
+            trinhDoVanHoa TEXT, thongTinKhac TEXT, createdAt TEXT, updatedAt TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE units (
+            id TEXT PRIMARY KEY, ten TEXT NOT NULL, loai TEXT, parentId TEXT, personnelIds TEXT,
+            ghiChu TEXT, createdAt TEXT, updatedAt TEXT
+        )
+    """)
+    for pid, ho_ten, dan_toc in (("p1", "Nguyễn Văn An", "Kinh"), ("p2", "Lò Văn Sự", "Thái"),
+                                 ("p3", "Trần Văn Bình", "Kinh")):
+        conn.execute(
+            "INSERT INTO personnel (id, hoTen, capBac, danToc, thongTinKhac) VALUES (?, ?, 'B2', ?, '{}')",
+            (pid, ho_ten, dan_toc),
+        )
+    units = [
+        ("c1", None, json.dumps(["p1", "p2", "p2", ""])),
+        ("b1", "c1", json.dumps(["p3"])),
+        ("b2", "c1", "không phải JSON"),
+        ("b3", "c1", None),
+    ]
+    for unit_id, parent_id, personnel_ids in units:
+        conn.execute(
+            "INSERT INTO units (id, ten, parentId, personnelIds) VALUES (?, ?, ?, ?)",
+            (unit_id, unit_id.upper(), parent_id, personnel_ids),
+        )
+    conn.commit()
+    conn.close()
+    
+    db = DatabaseService(path)
+    try:
+        assert sorted(db.get_unit_personnel_ids("c1")) == ["p1", "p2"]
+        assert db.get_unit_personnel_ids("b1") == ["p3"]
+        assert db.get_unit_personnel_ids("b2") == []
+        assert sorted(db.get_unit_by_id("c1").personnelIds) == ["p1", "p2"]
+        assert db.get_unit_headcounts()["c1"] == {'direct': 2, 'total': 3}
+        
+        with db.connection() as conn:
+            assert conn.execute("SELECT version FROM schema_version").fetchone()[0] == SCHEMA_VERSION
+            assert conn.execute("SELECT COUNT(*) FROM units WHERE personnelIds IS NOT NULL").fetchone()[0] == 0
+        # Các migration sau cũng áp dụng cho dữ liệu cũ
+        assert [p.id for p in db.full_text_search("su")] == ["p2"]
+        assert db.get_tong_hop_counts()['dtts']['total'] == 1
+    finally:
+        db.close()
+    
+    # Mở lại: không chuyển dữ liệu lần nữa
+    db = DatabaseService(path)
+    try:
+        assert sorted(db.get_unit_personnel_ids("c1")) == ["p1", "p2"]
+    finally:
+        db.close()
+
+
+def _build_tree(db):
+    """
+    Cây 3 cấp: 2 đại đội x 2 trung đội x 2 tổ, quân nhân ở mọi cấp (14 người mỗi đại đội);
+    một người của tổ đầu tiên đồng thời thuộc đại đội C1
+    """
+    counter = iter(range(1000))
+    
+    def add_people(unit_id, count):
+        ids = [db.create(Personnel(hoTen=f"Quân nhân {next(counter)}", capBac="B2")) for _ in range(count)]
+        db.add_personnel_to_unit(unit_id, ids)
+        return ids
+    
+    units = []
+    squad_people = []
+    for c in range(2):
+        company = Unit(ten=f"C{c + 1}", loai='dai_doi')
+        db.create_unit(company)
+        units.append(company)
+        add_people(company.id, 1)
+        for b in range(2):
+            platoon = Unit(ten=f"B{b + 1}", loai='trung_doi', parentId=company.id)
+            db.create_unit(platoon)
+            units.append(platoon)
+            add_people(platoon.id, b + 1)
+            for t in range(2):
+                squad = Unit(ten=f"T{t + 1}", loai='to', parentId=platoon.id)
+                db.create_unit(squad)
+                units.append(squad)
+                squad_people.append(add_people(squad.id, t + 2))
+    db.add_personnel_to_unit(units[0].id, squad_people[0][:1])
+    return units
+
+
+def _recursive_ids(db, unit_id):
+    """Cách cũ: duyệt đệ quy từng đơn vị con, mỗi đơn vị một truy vấn"""
+    ids = list(db.get_unit_personnel_ids(unit_id))
+    for child in db.get_units_by_parent_id(unit_id):
+        ids += _recursive_ids(db, child.id)
+    return ids
+
+
+def test_unit_headcounts_match_recursive_count(db):
+    """get_unit_headcounts() khớp với cách đếm đệ quy cũ trên cây 3 cấp"""
+    units = _build_tree(db)
+    headcounts = db.get_unit_headcounts()
+    
+    assert set(headcounts) == {unit.id for unit in units}
+    for unit in units:
+        assert headcounts[unit.id]['direct'] == len(db.get_unit_personnel_ids(unit.id))
+        assert headcounts[unit.id]['total'] == len(_recursive_ids(db, unit.id))
+    # Cách đếm cũ cộng dồn số quân nhân trực tiếp: người thuộc hai đơn vị được đếm hai lần
+    assert headcounts[units[0].id] == {'direct': 2, 'total': 15}
+
+
+def test_personnel_in_subtree_matches_recursive_walk(db):
+    """get_personnel_in_subtree(): cùng tập quân nhân với cách duyệt đệ quy cũ, không trùng lặp"""
+    units = _build_tree(db)
+    
+    for unit in units:
+        ids = [p.id for p in db.get_personnel_in_subtree(unit.id)]
+        assert len(ids) == len(set(ids))
+        assert set(ids) == set(_recursive_ids(db, unit.id))
+    assert len(db.get_personnel_in_subtree(units[0].id)) == 14
+    # Nhóm theo thứ tự duyệt cây: quân nhân trực tiếp của đại đội đứng đầu
+    first = db.get_personnel_in_subtree(units[0].id)[:2]
+    assert {p.id for p in first} == set(db.get_unit_personnel_ids(units[0].id))
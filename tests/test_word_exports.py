@@ -0,0 +1,212 @@
+"""
+Test các hàm xuất Word services/export_* và bảng services/word_table
+"""
+
+import io
+
+import docx
+import pytest
+from docx.oxml.ns import qn
+from docx.shared import Inches
+
+from models.nguoi_than import NguoiThan
+from models.personnel import Personnel
+from models.unit import Unit
+from services.export_ban_chap_hanh_chi_doan import to_word_docx_ban_chap_hanh_chi_doan
+from services.export_bao_ve_an_ninh import to_word_docx_bao_ve_an_ninh
+from services.export_dang_phai_phan_dong import to_word_docx_dang_phai_phan_dong
+from services.export_dang_vien_dien_tap import to_word_docx_dang_vien_dien_tap
+from services.export_nguoi_than_che_do_cu import to_word_docx_nguoi_than_che_do_cu
+from services.export_to_dan_van import to_word_docx_to_dan_van
+from services.export_ton_giao import to_word_docx_ton_giao
+from services.export_trich_ngang import to_word_docx_trich_ngang
+from services.export_vi_tri_can_bo import to_word_docx_vi_tri_can_bo
+from services.word_table import CENTER, Cell, Column, Row, add_table
+
+
+@pytest.fixture
+def people(db):
+    """Hai quân nhân (khác tôn giáo), người đầu có bố trong bảng nguoi_than"""
+    ids = [
+        db.create(Personnel(hoTen="Nguyễn Văn An", ngaySinh="01/02/2000", capBac="B2",
+                            chucVu="Chiến sĩ", donVi="c3", tonGiao="Phật giáo", queQuan="Hà Nội")),
+        db.create(Personnel(hoTen="Trần Văn Bình", ngaySinh="03/04/2001", capBac="B1",
+                            chucVu="Chiến sĩ", donVi="c3", tonGiao="Công giáo", queQuan="Nam Định")),
+    ]
+    db.create_nguoi_than(NguoiThan(personnelId=ids[0], hoTen="Nguyễn Văn Cha",
+                                   ngaySinh="1970", moiQuanHe="Bố"))
+    return [db.get_by_id(personnel_id) for personnel_id in ids]
+
+
+def _data_table(data: bytes):
+    """Bảng danh sách của văn bản (bảng có ô đầu là cột thứ tự)"""
+    doc = docx.Document(io.BytesIO(data))
+    tables = [table for table in doc.tables if table.cell(0, 0).text in ('TT', 'STT', 'SỐ TT')]
+    assert len(tables) == 1
+    return tables[0]
+
+
+def _rows(table):
+    """Chữ của từng ô theo hàng (ô gộp lặp lại ở mọi vị trí nó phủ)"""
+    return [[cell.text for cell in row.cells] for row in table.rows]
+
+
+def test_trich_ngang(db, people):
+    """Trích ngang: 13 cột, một hàng mỗi quân nhân, người thân lấy từ nguoi_than"""
+    rows = _rows(_data_table(to_word_docx_trich_ngang(people, db_service=db)))
+    
+    assert len(rows) == 3 and len(rows[0]) == 13
+    assert rows[1][:4] == ['1', 'Nguyễn Văn An', '01/02/2000\nB2', 'Chiến sĩ']
+    assert rows[1][10] == 'Nguyễn Văn Cha'
+    assert rows[2][:2] == ['2', 'Trần Văn Bình']
+
+
+def test_trich_ngang_units_data(db, people):
+    """Trích ngang theo đơn vị: hàng tên đơn vị gộp cả 13 cột, đơn vị rỗng bị bỏ"""
+    units_data = [
+        {'to': Unit(ten="Tiểu đội 1"), 'personnel': people[:1]},
+        {'to': Unit(ten="Tiểu đội 2"), 'personnel': []},
+        {'to': Unit(ten="Tiểu đội 3"), 'personnel': people[1:]},
+    ]
+    rows = _rows(_data_table(to_word_docx_trich_ngang([], db_service=db, units_data=units_data)))
+    
+    assert len(rows) == 5
+    assert rows[1] == ["Tiểu đội 1"] * 13
+    assert rows[2][:2] == ['1', 'Nguyễn Văn An']
+    assert rows[3] == ["Tiểu đội 3"] * 13
+    assert rows[4][:2] == ['2', 'Trần Văn Bình']
+
+
+def test_vi_tri_can_bo(db, people):
+    """Vị trí cán bộ: 11 cột, thứ tự 2 chữ số, thông tin gia đình từ nguoi_than"""
+    rows = _rows(_data_table(to_word_docx_vi_tri_can_bo(people, db_service=db)))
+    
+    assert len(rows) == 3 and len(rows[0]) == 11
+    assert [row[0] for row in rows[1:]] == ['01', '02']
+    assert rows[1][1].startswith('Nguyễn Văn An\n01/02/2000')
+    assert rows[1][2] == 'B2'
+    assert 'Nguyễn Văn Cha' in rows[1][10]
+
+
+def test_ton_giao(people):
+    """Tôn giáo: đánh dấu X đúng cột và hàng tổng đếm theo từng tôn giáo"""
+    rows = _rows(_data_table(to_word_docx_ton_giao(people)))
+    
+    assert len(rows) == 4 and len(rows[0]) == 10
+    assert rows[1][:2] == ['1', 'Nguyễn Văn An\n(01/02/2000)']
+    assert rows[1][5:9] == ['', 'X', '', '']
+    assert rows[2][5:9] == ['', '', '', 'X']
+    assert rows[3] == ['Tổng', '2', '', '', '', '0', '1', '0', '1', '']
+
+
+def test_ban_chap_hanh_chi_doan(db, people):
+    """BCH chi đoàn: 12 cột, ghi chú là chức vụ đoàn trong bảng danh sách"""
+    db.add_ban_chap_hanh_chi_doan(people[0].id, "Bí thư")
+    rows = _rows(_data_table(to_word_docx_ban_chap_hanh_chi_doan(people, db_service=db)))
+    
+    assert len(rows) == 3 and len(rows[0]) == 12
+    assert rows[1][:4] == ['1', 'Nguyễn Văn An', '01/02/2000', 'B2']
+    assert rows[1][11] == 'Bí thư'
+    assert rows[2][1] == 'Trần Văn Bình'
+
+
+def test_bao_ve_an_ninh(db, people):
+    """Bảo vệ an ninh: 11 cột, thời gian vào/ra lấy từ bảng bao_ve_an_ninh"""
+    db.add_bao_ve_an_ninh(people[1].id, "01/2024", "06/2024")
+    rows = _rows(_data_table(to_word_docx_bao_ve_an_ninh(people, db_service=db)))
+    
+    assert len(rows) == 3 and len(rows[0]) == 11
+    assert rows[1][:2] == ['1', 'Nguyễn Văn An\n(01/02/2000)']
+    assert rows[1][6].startswith('Nguyễn Văn Cha (1970')
+    assert rows[2][8:10] == ['01/2024', '06/2024']
+
+
+def test_dang_phai_phan_dong(db, people):
+    """Đảng phái phản động: 7 cột, cột người thân gồm tên, năm sinh, quan hệ"""
+    rows = _rows(_data_table(to_word_docx_dang_phai_phan_dong(people, db_service=db)))
+    
+    assert len(rows) == 3 and len(rows[0]) == 7
+    assert rows[1][0] == '1' and rows[1][1].startswith('Nguyễn Văn An\n(01/02/2000)')
+    assert rows[1][2:5] == ['c3', 'Hà Nội', 'Nguyễn Văn Cha\n(1970)\nBố']
+    assert rows[2][4] == ''
+
+
+def test_dang_vien_dien_tap(db, people):
+    """Đảng viên diễn tập: 10 cột, ghi chú lấy từ bảng danh sách"""
+    db.add_dang_vien_dien_tap(people[0].id)
+    db.update_dang_vien_dien_tap_ghi_chu(people[0].id, "Tổ trưởng")
+    rows = _rows(_data_table(to_word_docx_dang_vien_dien_tap(people, db_service=db)))
+    
+    assert len(rows) == 3 and len(rows[0]) == 10
+    assert rows[1][:4] == ['1', 'Nguyễn Văn An\n01/02/2000', 'B2/Chiến sĩ', 'c3']
+    assert rows[1][6] == 'Phật giáo'
+    assert rows[1][9] == 'Tổ trưởng'
+    assert rows[2][9] == ''
+
+
+def test_nguoi_than_che_do_cu(db, people):
+    """Người thân chế độ cũ: tiêu đề 2 hàng (THAM GIA gộp 5 cột) và hàng tổng"""
+    table = _data_table(to_word_docx_nguoi_than_che_do_cu(people, db_service=db))
+    rows = _rows(table)
+    
+    assert len(rows) == 5 and len(rows[0]) == 11
+    assert rows[0][3:8] == ['THAM GIA'] * 5
+    assert rows[1][:4] == ['STT', rows[0][1], rows[0][2], 'Ngụy quân']
+    assert rows[2][:3] == ['1', 'Nguyễn Văn An\n(01/02/2000)\nB2-Chiến sĩ', 'c3']
+    assert rows[2][8:10] == ['Nguyễn Văn Cha (1970, )', 'Bố']
+    assert rows[4][:2] == ['Tổng', '2']
+
+
+def test_to_dan_van(db, people):
+    """Tổ dân vận: 9 cột, ghi chú lấy từ bảng danh sách"""
+    db.add_to_dan_van(people[1].id)
+    db.update_to_dan_van_ghi_chu(people[1].id, "Tiếng Ê Đê")
+    rows = _rows(_data_table(to_word_docx_to_dan_van(people, db_service=db)))
+    
+    assert len(rows) == 3 and len(rows[0]) == 9
+    assert rows[1][:5] == ['1', 'Nguyễn Văn An', 'B2/Chiến sĩ', 'c3', ' / Phật giáo']
+    assert rows[2][1] == 'Trần Văn Bình'
+    assert rows[2][8] == 'Tiếng Ê Đê'
+
+
+def test_add_table_spans():
+    """add_table: gộp ngang ghi gridSpan, gộp dọc ghi vMerge restart rồi các ô tiếp nối"""
+    doc = docx.Document()
+    columns = [Column('A', Inches(1)), Column('B', Inches(1)), Column('C', Inches(1))]
+    header_rows = [
+        Row([Cell('Nhóm', rowspan=2), Cell('BC', span=2)], align=CENTER),
+        Row(['B', 'C']),
+    ]
+    rows = [
+        Row([Cell('Gộp', span=3)], bold=True, shading='E0E0E0'),
+        Row([Cell('Dọc', rowspan=3), 'x', 'y']),
+        Row(['z', 'w']),  # Cột đầu đang gộp dọc: các ô điền từ cột thứ hai
+        Row(['u', 'v']),
+    ]
+    table = add_table(doc, columns, rows, header_rows=header_rows)
+    
+    assert _rows(table) == [
+        ['Nhóm', 'BC', 'BC'],
+        ['Nhóm', 'B', 'C'],
+        ['Gộp', 'Gộp', 'Gộp'],
+        ['Dọc', 'x', 'y'],
+        ['Dọc', 'z', 'w'],
+        ['Dọc', 'u', 'v'],
+    ]
+    
+    tcs = [tr.findall(qn('w:tc')) for tr in table._tbl.findall(qn('w:tr'))]
+    assert [len(row) for row in tcs] == [2, 3, 1, 3, 3, 3]
+    
+    def grid_span(tc):
+        span = tc.tcPr.find(qn('w:gridSpan'))
+        return int(span.get(qn('w:val'))) if span is not None else 1
+    
+    def v_merge(tc):
+        merge = tc.tcPr.find(qn('w:vMerge'))
+        return None if merge is None else merge.get(qn('w:val'), 'continue')
+    
+    assert [grid_span(tc) for tc in tcs[0]] == [1, 2]
+    assert grid_span(tcs[2][0]) == 3
+    assert [v_merge(row[0]) for row in tcs] == ['restart', 'continue', None,
+                                                'restart', 'continue', 'continue']
+    assert tcs[2][0].tcPr.find(qn('w:shd')).get(qn('w:fill')) == 'E0E0E0'
@@ -0,0 +1,35 @@
+"""
+Test WordTemplate
+"""
+
+import io
+import zipfile
+from pathlib import Path
+
+from docx import Document
+
+from services.word_template import WordTemplate
+
+LOGO = Path(__file__).parent.parent / 'logo.jpg'
+
+
+def test_template_with_images_keeps_parts_unique():
+    """Mẫu có ảnh: văn bản đã điền (kể cả khi thêm lại cùng ảnh) không có phần trùng tên trong file"""
+    doc = Document()
+    doc.add_paragraph('{{ten}}')
+    doc.add_picture(str(LOGO))
+    doc.sections[0].header.paragraphs[0].add_run().add_picture(str(LOGO))
+    template = WordTemplate.from_document(doc, 'logo')
+    
+    for name in ('An', 'Bình'):
+        rendered = template.render({'ten': name})
+        rendered.add_picture(str(LOGO))
+        buffer = io.BytesIO()
+        rendered.save(buffer)
+        
+        names = zipfile.ZipFile(buffer).namelist()
+        assert len(names) == len(set(names))
+        assert [n for n in names if n.startswith('word/media/')] == ['word/media/image1.jpg']
+        reopened = Document(io.BytesIO(buffer.getvalue()))
+        assert reopened.paragraphs[0].text == name
+        assert len(reopened.inline_shapes) == 2
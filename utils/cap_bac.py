@@ -0,0 +1,90 @@
+"""
+Utility phân loại và xếp hạng cấp bậc quân nhân
+"""
+
+import re
+from functools import lru_cache
+
+from utils.text_utils import fold_vietnamese
+
+
+# Nhóm cấp bậc dùng trong các bảng tổng hợp (theo thứ tự hiển thị)
+RANK_CATEGORIES = ('SQ', 'QNCN', 'HSQ_CS')
+
+# Bảng cấp bậc chuẩn, từ cao xuống thấp: (tên, thứ hạng, nhóm, các cách viết tắt)
+# Thứ hạng chỉ dùng để sắp xếp (cao hơn = cấp bậc cao hơn); 0 = không nhận dạng được
+CAP_BAC_TABLE = (
+    ('Đại tướng', 1400, 'SQ', ()),
+    ('Thượng tướng', 1300, 'SQ', ()),
+    ('Trung tướng', 1200, 'SQ', ()),
+    ('Thiếu tướng', 1100, 'SQ', ()),
+    ('Đại tá', 1000, 'SQ', ('4//',)),
+    ('Thượng tá', 950, 'SQ', ('3//',)),
+    ('Trung tá', 900, 'SQ', ('2//',)),
+    ('Thiếu tá', 800, 'SQ', ('1//',)),
+    ('Đại úy', 700, 'SQ', ('4/',)),
+    ('Thượng úy', 600, 'SQ', ('3/',)),
+    ('Trung úy', 500, 'SQ', ('2/',)),
+    ('Thiếu úy', 400, 'SQ', ('1/',)),
+    ('Thượng sĩ', 300, 'HSQ_CS', ('H3',)),
+    ('Trung sĩ', 200, 'HSQ_CS', ('H2',)),
+    # Cấp bậc ghi bằng số thuần: xếp giữa Trung sĩ và Hạ sĩ (như cách sắp xếp trước đây)
+    ('4', 140, 'HSQ_CS', ()),
+    ('3', 130, 'HSQ_CS', ()),
+    ('2', 120, 'HSQ_CS', ()),
+    ('1', 110, 'HSQ_CS', ()),
+    ('Hạ sĩ', 100, 'HSQ_CS', ('H1',)),
+    ('Binh nhất', 50, 'HSQ_CS', ('B1',)),
+    ('Binh nhì', 40, 'HSQ_CS', ('B2',)),
+)
+
+# Quân nhân chuyên nghiệp: "QNCN", "Thiếu tá CN", "... chuyên nghiệp"
+_QNCN_PATTERN = re.compile(r'qncn|chuyen nghiep|\bcn\b')
+
+# Tên đầy đủ (đã bỏ dấu) -> (thứ hạng, nhóm); tìm theo cụm từ trong chuỗi cấp bậc
+_RANK_NAMES = [
+    (re.compile(r'(?<!\w)' + re.escape(fold_vietnamese(name)) + r'(?!\w)'), rank, category)
+    for name, rank, category, _ in CAP_BAC_TABLE
+    if not name.isdigit()
+]
+
+# Cách viết tắt và cấp bậc số thuần -> (thứ hạng, nhóm); phải khớp toàn bộ chuỗi
+_RANK_ALIASES = {
+    fold_vietnamese(alias): (rank, category)
+    for name, rank, category, aliases in CAP_BAC_TABLE
+    for alias in aliases + ((name,) if name.isdigit() else ())
+}
+
+
+@lru_cache(maxsize=1024)
+def parse_cap_bac(cap_bac) -> tuple:
+    """
+    Tra bảng cấp bậc chuẩn: trả về (thứ hạng, nhóm 'SQ' / 'QNCN' / 'HSQ_CS').
+    Cấp bậc trống hoặc không nhận dạng được: (0, 'HSQ_CS'); có "CN"/"QNCN" thì nhóm là 'QNCN'.
+    """
+    text = fold_vietnamese(cap_bac).strip()
+    text = re.sub(r'\s+', ' ', text)
+
+    rank, category = _RANK_ALIASES.get(text.replace(' ', ''), (0, 'HSQ_CS'))
+    if not rank:
+        for pattern, name_rank, name_category in _RANK_NAMES:
+            if pattern.search(text):
+                rank, category = name_rank, name_category
+                break
+
+    if _QNCN_PATTERN.search(text):
+        category = 'QNCN'
+    return rank, category
+
+
+def cap_bac_rank(cap_bac) -> int:
+    """Thứ hạng cấp bậc để sắp xếp (cao hơn = cấp bậc cao hơn, 0 = không nhận dạng được)"""
+    return parse_cap_bac(cap_bac)[0]
+
+
+def cap_bac_category(cap_bac) -> str:
+    """
+    Phân nhóm cấp bậc: 'SQ' (sĩ quan), 'QNCN' (quân nhân chuyên nghiệp)
+    hoặc 'HSQ_CS' (hạ sĩ quan - chiến sĩ, gồm cả cấp bậc trống/không nhận dạng được)
+    """
+    return parse_cap_bac(cap_bac)[1]
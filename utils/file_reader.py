@@ -2,8 +2,12 @@
 Utility đọc file Word và Excel
 """
 
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List
+from typing import Iterator, List, Optional
 import re
 
 import sys
@@ -15,35 +19,39 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from models.personnel import Personnel, ThongTinDang, ThongTinDoan, ThongTinKhac
 
 
+def _parse_docx(file_path: Path) -> List[Personnel]:
+    """Đọc quân nhân từ các bảng trong file .docx (ném exception khi lỗi)"""
+    from docx import Document
+    
+    doc = Document(file_path)
+    personnel_list = []
+    
+    # Đọc từ bảng trong document
+    for table in doc.tables:
+        # Giả sử hàng đầu là header
+        headers = [cell.text.strip() for cell in table.rows[0].cells]
+        
+        # Đọc các hàng dữ liệu
+        for row in table.rows[1:]:
+            cells = [cell.text.strip() for cell in row.cells]
+            if len(cells) < 2:  # Bỏ qua hàng rỗng
+                continue
+            
+            # Map dữ liệu (cần điều chỉnh theo cấu trúc file thực tế)
+            person = Personnel()
+            person.hoTen = cells[0] if len(cells) > 0 else ""
+            # Thêm mapping các trường khác tùy theo cấu trúc file
+            
+            if person.hoTen:
+                personnel_list.append(person)
+    
+    return personnel_list
+
+
 def read_docx(file_path: Path) -> List[Personnel]:
     """Đọc file .docx"""
     try:
-        from docx import Document
-        
-        doc = Document(file_path)
-        personnel_list = []
-        
-        # Đọc từ bảng trong document
-        for table in doc.tables:
-            # Giả sử hàng đầu là header
-            headers = [cell.text.strip() for cell in table.rows[0].cells]
-            
-            # Đọc các hàng dữ liệu
-            for row in table.rows[1:]:
-                cells = [cell.text.strip() for cell in row.cells]
-                if len(cells) < 2:  # Bỏ qua hàng rỗng
-                    continue
-                
-                # Map dữ liệu (cần điều chỉnh theo cấu trúc file thực tế)
-                person = Personnel()
-                person.hoTen = cells[0] if len(cells) > 0 else ""
-                # Thêm mapping các trường khác tùy theo cấu trúc file
-                
-                if person.hoTen:
-                    personnel_list.append(person)
-        
-        return personnel_list
-        
+        return _parse_docx(file_path)
     except ImportError:
         raise ImportError("Cần cài đặt python-docx: pip install python-docx")
     except Exception as e:
@@ -51,83 +59,216 @@ def read_docx(file_path: Path) -> List[Personnel]:
         return []
 
 
+# Tên cột trong file Excel -> thuộc tính Personnel (cần điều chỉnh theo tên cột thực tế)
+EXCEL_COLUMN_MAPPING = {
+    'Họ và Tên': 'hoTen',
+    'Ngày Sinh': 'ngaySinh',
+    'Cấp Bậc': 'capBac',
+    'Chức Vụ': 'chucVu',
+    'Đơn Vị': 'donVi',
+    'Nhập Ngũ': 'nhapNgu',
+    'Quê Quán': 'queQuan',
+    'Trú Quán': 'truQuan',
+    'Dân Tộc': 'danToc',
+    'Tôn Giáo': 'tonGiao',
+    'Trình Độ Văn Hóa': 'trinhDoVanHoa',
+}
+
+
+def _cell_text(value) -> str:
+    """Giá trị ô Excel -> chuỗi (ô trống -> "", số nguyên dạng float bỏ ".0")"""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        if value != value:  # NaN
+            return ""
+        if value.is_integer():
+            return str(int(value))
+    return str(value)
+
+
+def _rows_to_personnel(header, rows) -> List[Personnel]:
+    """
+    Chuyển các hàng Excel (tuple giá trị) thành Personnel theo EXCEL_COLUMN_MAPPING
+    Args:
+        header: Hàng tiêu đề
+        rows: Các hàng dữ liệu
+    """
+    # Vị trí cột cần đọc, tính một lần cho cả sheet
+    columns = [
+        (index, EXCEL_COLUMN_MAPPING[str(name).strip()])
+        for index, name in enumerate(header)
+        if name is not None and str(name).strip() in EXCEL_COLUMN_MAPPING
+    ]
+    
+    personnel_list = []
+    for row in rows:
+        values = {
+            attr_name: _cell_text(row[index]) if index < len(row) else ""
+            for index, attr_name in columns
+        }
+        if values.get('hoTen', '').strip():
+            personnel_list.append(Personnel(**values))
+    return personnel_list
+
+
+def _parse_xlsx(file_path: Path) -> List[Personnel]:
+    """Đọc .xlsx bằng openpyxl chế độ read_only (duyệt giá trị, không tạo đối tượng ô)"""
+    from openpyxl import load_workbook
+    
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if not header:
+            return []
+        return _rows_to_personnel(header, rows)
+    finally:
+        workbook.close()
+
+
+def _parse_xls(file_path: Path) -> List[Personnel]:
+    """Đọc .xls (định dạng cũ) bằng pandas/xlrd, chỉ lấy các cột cần dùng"""
+    import pandas as pd
+    
+    df = pd.read_excel(file_path, engine='xlrd', dtype=object)
+    columns = [name for name in df.columns if str(name).strip() in EXCEL_COLUMN_MAPPING]
+    if not columns:
+        return []
+    values = df[columns].astype(object).where(df[columns].notna(), None)
+    return _rows_to_personnel(columns, values.itertuples(index=False, name=None))
+
+
+def _parse_excel(file_path: Path) -> List[Personnel]:
+    """Đọc Excel theo phần mở rộng; file .xls đặt tên sai đuôi thì thử lại bằng openpyxl"""
+    if file_path.suffix.lower() == '.xls':
+        try:
+            return _parse_xls(file_path)
+        except ImportError:
+            raise
+        except Exception:
+            return _parse_xlsx(file_path)
+    return _parse_xlsx(file_path)
+
+
 def read_xls(file_path: Path) -> List[Personnel]:
     """Đọc file .xls hoặc .xlsx"""
     try:
-        import pandas as pd
-        
-        # Thử đọc với openpyxl trước (cho .xlsx)
-        try:
-            df = pd.read_excel(file_path, engine='openpyxl')
-        except:
-            # Fallback về xlrd cho .xls
-            df = pd.read_excel(file_path, engine='xlrd')
-        
-        personnel_list = []
-        
-        for _, row in df.iterrows():
-            person = Personnel()
-            
-            # Map các cột (cần điều chỉnh theo tên cột thực tế)
-            # Giả sử các cột có tên tiếng Việt
-            column_mapping = {
-                'Họ và Tên': 'hoTen',
-                'Ngày Sinh': 'ngaySinh',
-                'Cấp Bậc': 'capBac',
-                'Chức Vụ': 'chucVu',
-                'Đơn Vị': 'donVi',
-                'Nhập Ngũ': 'nhapNgu',
-                'Quê Quán': 'queQuan',
-                'Trú Quán': 'truQuan',
-                'Dân Tộc': 'danToc',
-                'Tôn Giáo': 'tonGiao',
-                'Trình Độ Văn Hóa': 'trinhDoVanHoa',
-            }
-            
-            for col_name, attr_name in column_mapping.items():
-                if col_name in df.columns:
-                    value = str(row[col_name]) if pd.notna(row[col_name]) else ""
-                    setattr(person, attr_name, value)
-            
-            if person.hoTen and person.hoTen.strip():
-                personnel_list.append(person)
-        
-        return personnel_list
-        
+        return _parse_excel(Path(file_path))
     except ImportError:
-        raise ImportError("Cần cài đặt pandas và openpyxl: pip install pandas openpyxl")
+        raise ImportError("Cần cài đặt openpyxl (và pandas, xlrd cho .xls): pip install openpyxl pandas xlrd")
     except Exception as e:
         print(f"Lỗi đọc file {file_path}: {e}")
         return []
 
 
-def read_office_files(folder_path: str) -> List[Personnel]:
+# ========== Đọc cả thư mục ==========
+
+@dataclass
+class FileReadResult:
+    """Kết quả đọc một file: danh sách quân nhân, thời gian đọc và lỗi (nếu có)"""
+    path: Path
+    personnel: List[Personnel] = field(default_factory=list)
+    seconds: float = 0.0
+    error: str = ""
+
+
+def list_office_files(folder_path: str) -> List[Path]:
     """
-    Đọc tất cả file Word và Excel trong thư mục
+    Các file Word (.docx) rồi Excel (.xls, .xlsx) trong thư mục, theo tên
     Args:
         folder_path: Đường dẫn thư mục
-    Returns:
-        Danh sách quân nhân
     """
     folder = Path(folder_path)
     if not folder.exists():
         raise FileNotFoundError(f"Thư mục không tồn tại: {folder_path}")
     
-    all_personnel = []
+    # File .doc cần convert hoặc dùng thư viện khác nên tạm thời bỏ qua
+    # Bỏ qua file khoá tạm của Office ("~$...")
+    docx_files = sorted(f for f in folder.glob("*.docx") if not f.name.startswith('~$'))
+    xls_files = sorted(f for f in folder.glob("*.xls*") if not f.name.startswith('~$'))
+    return docx_files + xls_files
+
+
+def read_office_file(file_path: Path) -> FileReadResult:
+    """Đọc một file Word/Excel, ghi lại thời gian và lỗi thay vì ném exception"""
+    file_path = Path(file_path)
+    started = time.perf_counter()
+    result = FileReadResult(path=file_path)
+    try:
+        if file_path.suffix.lower() == '.docx':
+            result.personnel = _parse_docx(file_path)
+        else:
+            result.personnel = _parse_excel(file_path)
+    except ImportError as e:
+        result.error = f"Thiếu thư viện: {e}"
+    except Exception as e:
+        result.error = str(e) or type(e).__name__
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def iter_office_files(folder_path: str, max_workers: Optional[int] = None) -> Iterator[FileReadResult]:
+    """
+    Đọc song song các file trong thư mục bằng process pool, trả về từng FileReadResult
+    ngay khi file đó đọc xong (thứ tự hoàn thành, không theo tên file)
+    Args:
+        folder_path: Đường dẫn thư mục
+        max_workers: Số tiến trình (mặc định theo số CPU, tối đa bằng số file)
+    """
+    files = list_office_files(folder_path)
+    if not files:
+        return
     
-    # Đọc file .docx
-    for docx_file in folder.glob("*.docx"):
-        print(f"Đang đọc: {docx_file.name}")
-        personnel_list = read_docx(docx_file)
-        all_personnel.extend(personnel_list)
+    workers = min(len(files), max_workers or os.cpu_count() or 1)
+    if workers <= 1:
+        for file_path in files:
+            yield read_office_file(file_path)
+        return
     
-    # Đọc file .doc (cần convert hoặc dùng thư viện khác)
-    # Tạm thời bỏ qua .doc vì phức tạp hơn
+    try:
+        pool = ProcessPoolExecutor(max_workers=workers)
+    except (OSError, NotImplementedError) as e:
+        # Môi trường không hỗ trợ multiprocessing -> đọc tuần tự
+        print(f"Không tạo được process pool ({e}), đọc tuần tự")
+        for file_path in files:
+            yield read_office_file(file_path)
+        return
     
-    # Đọc file .xls và .xlsx
-    for xls_file in folder.glob("*.xls*"):
-        print(f"Đang đọc: {xls_file.name}")
-        personnel_list = read_xls(xls_file)
-        all_personnel.extend(personnel_list)
+    futures = {}
+    try:
+        for file_path in files:
+            futures[pool.submit(read_office_file, file_path)] = file_path
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                # Tiến trình con chết (BrokenProcessPool, ...) -> ghi nhận lỗi cho file này
+                yield FileReadResult(path=futures[future], error=str(e) or type(e).__name__)
+    finally:
+        # Người dùng dừng giữa chừng -> bỏ các file chưa đọc
+        for future in futures:
+            future.cancel()
+        pool.shutdown(wait=False)
+
+
+def read_office_files(folder_path: str) -> List[Personnel]:
+    """
+    Đọc tất cả file Word và Excel trong thư mục
+    Args:
+        folder_path: Đường dẫn thư mục
+    Returns:
+        Danh sách quân nhân (theo thứ tự file như list_office_files)
+    """
+    results = {}
+    for result in iter_office_files(folder_path):
+        if result.error:
+            print(f"Lỗi đọc file {result.path}: {result.error}")
+        else:
+            print(f"Đã đọc: {result.path.name} ({len(result.personnel)} hồ sơ, {result.seconds:.2f}s)")
+        results[result.path] = result.personnel
     
+    all_personnel = []
+    for file_path in list_office_files(folder_path):
+        all_personnel.extend(results.get(file_path, []))
     return all_personnel
@@ -0,0 +1,19 @@
+"""
+Utility xử lý chuỗi tiếng Việt
+"""
+
+import unicodedata
+
+
+def fold_vietnamese(text) -> str:
+    """
+    Bỏ dấu và chuyển chữ thường để so khớp không phân biệt dấu
+    Ví dụ: "Nguyễn Đức" -> "nguyen duc"
+    """
+    if not text:
+        return ""
+
+    # "đ/Đ" không phải dấu kết hợp nên NFD không tách được
+    text = str(text).replace('đ', 'd').replace('Đ', 'D')
+    decomposed = unicodedata.normalize('NFD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()